@@ -0,0 +1,167 @@
+# app/api/activity/buckets.py
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from ...core.background import register_periodic_task
+from ...core.config import settings
+from ...core.counters import increment_counter
+from ...core.database import SessionLocal
+from .models import ActivityBucket
+
+PROJECT = "project"
+USER = "user"
+DAY = "day"
+WEEK = "week"
+COUNTERS = ("messages", "troubles", "favorites")
+
+
+def week_start(day: date) -> date:
+    """日付が属する週の開始日（月曜日）"""
+    return day - timedelta(days=day.weekday())
+
+
+def record(db: Session, subject_type: str, subject_id: int, counter: str, on: Optional[date] = None, amount: int = 1) -> None:
+    """当日の集計バケットを加算する（呼び出し元のトランザクションに含める）"""
+    increment_counter(
+        db,
+        ActivityBucket.__table__,
+        {
+            "subject_type": subject_type,
+            "subject_id": subject_id,
+            "granularity": DAY,
+            "bucket_start": on or date.today(),
+        },
+        {counter: amount}
+    )
+
+
+def record_message(db: Session, project_id: int, user_id: int) -> None:
+    record(db, PROJECT, project_id, "messages")
+    record(db, USER, user_id, "messages")
+
+
+def record_trouble(db: Session, project_id: int, user_id: int) -> None:
+    record(db, PROJECT, project_id, "troubles")
+    record(db, USER, user_id, "troubles")
+
+
+def record_favorite(db: Session, project_id: int, user_id: int) -> None:
+    record(db, PROJECT, project_id, "favorites")
+    record(db, USER, user_id, "favorites")
+
+
+def max_day_periods() -> int:
+    """日別で取得できる日数（今日を含む。これより前の日次バケットは週次に畳み込まれている可能性がある）"""
+    return settings.ACTIVITY_DAILY_RETENTION_DAYS + 1
+
+
+def check_periods(granularity: str, periods: int) -> None:
+    """日別の期間が日次バケットの保持期間を超える場合は 400 エラー"""
+    if granularity == DAY and periods > max_day_periods():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"日別は直近{max_day_periods()}日まで指定できます（それより前は granularity=week を指定してください）"
+        )
+
+
+def get_histogram(db: Session, subject_type: str, subject_id: int, granularity: str, periods: int) -> List[Dict]:
+    """
+    直近 periods 日（週）分の件数を古い順に取得する（件数0の期間も含む）
+
+    週単位は週次バケットと、まだ圧縮されていない日次バケットを合算する
+    """
+    today = date.today()
+    if granularity == DAY:
+        start = today - timedelta(days=periods - 1)
+        keys = [start + timedelta(days=offset) for offset in range(periods)]
+    else:
+        start = week_start(today) - timedelta(weeks=periods - 1)
+        keys = [start + timedelta(weeks=offset) for offset in range(periods)]
+
+    query = db.query(ActivityBucket).filter(
+        ActivityBucket.subject_type == subject_type,
+        ActivityBucket.subject_id == subject_id,
+        ActivityBucket.bucket_start >= start
+    )
+    if granularity == DAY:
+        query = query.filter(ActivityBucket.granularity == DAY)
+
+    totals = {key: dict.fromkeys(COUNTERS, 0) for key in keys}
+    for bucket in query.all():
+        key = bucket.bucket_start if granularity == DAY else week_start(bucket.bucket_start)
+        if key not in totals:
+            continue
+        for counter in COUNTERS:
+            totals[key][counter] += getattr(bucket, counter) or 0
+
+    return [{"bucket_start": key, **totals[key]} for key in keys]
+
+
+def compact(db: Session, retention_days: int, batch_size: int = 500) -> int:
+    """
+    保持期間を過ぎた日次バケットを週次バケットに畳み込む
+
+    :return: 畳み込んだ日次バケットの行数
+    """
+    # 週の途中で分割されないよう、週の開始日で区切る
+    cutoff = week_start(date.today() - timedelta(days=retention_days))
+    compacted = 0
+    for subject_type in (PROJECT, USER):
+        while True:
+            subject_ids = [
+                row[0] for row in db.query(ActivityBucket.subject_id).filter(
+                    ActivityBucket.subject_type == subject_type,
+                    ActivityBucket.granularity == DAY,
+                    ActivityBucket.bucket_start < cutoff
+                ).distinct().limit(batch_size).all()
+            ]
+            if not subject_ids:
+                break
+
+            day_filter = (
+                ActivityBucket.subject_type == subject_type,
+                ActivityBucket.subject_id.in_(subject_ids),
+                ActivityBucket.granularity == DAY,
+                ActivityBucket.bucket_start < cutoff
+            )
+            weekly: Dict[tuple, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+            rows = db.query(ActivityBucket).filter(*day_filter).all()
+            for bucket in rows:
+                totals = weekly[(bucket.subject_id, week_start(bucket.bucket_start))]
+                for counter in COUNTERS:
+                    totals[counter] += getattr(bucket, counter) or 0
+
+            for (subject_id, start), totals in weekly.items():
+                increment_counter(
+                    db,
+                    ActivityBucket.__table__,
+                    {"subject_type": subject_type, "subject_id": subject_id, "granularity": WEEK, "bucket_start": start},
+                    totals
+                )
+            db.query(ActivityBucket).filter(*day_filter).delete(synchronize_session=False)
+            db.commit()
+            compacted += len(rows)
+    return compacted
+
+
+def compact_activity() -> None:
+    """日次バケットの圧縮（定期実行）"""
+    db = SessionLocal()
+    try:
+        compact(db, settings.ACTIVITY_DAILY_RETENTION_DAYS)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+register_periodic_task(
+    "activity-compaction",
+    settings.ACTIVITY_COMPACTION_INTERVAL_SECONDS,
+    compact_activity,
+)
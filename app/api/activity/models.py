@@ -0,0 +1,16 @@
+# app/api/activity/models.py
+from sqlalchemy import Column, Integer, String, Date
+
+# 相対インポートに変更
+from ...core.database import Base
+
+class ActivityBucket(Base):
+    __tablename__ = "activity_buckets"
+
+    subject_type = Column(String(8), primary_key=True)  # 集計対象の種類（project / user）
+    subject_id = Column(Integer, primary_key=True)  # プロジェクトIDまたはユーザーID
+    granularity = Column(String(4), primary_key=True)  # 集計単位（day / week）
+    bucket_start = Column(Date, primary_key=True)  # 集計期間の開始日（週単位は月曜日）
+    messages = Column(Integer, nullable=False, default=0)
+    troubles = Column(Integer, nullable=False, default=0)
+    favorites = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,18 @@
+# app/api/activity/schemas.py
+from pydantic import Field
+from datetime import date
+from typing import List
+
+from ...schemas.base import BaseSchemaModel
+
+class ActivityBucketResponse(BaseSchemaModel):
+    bucket_start: date = Field(..., description="集計期間の開始日（週単位は月曜日）")
+    messages: int = 0
+    troubles: int = 0
+    favorites: int = 0
+
+class ActivityHistogramResponse(BaseSchemaModel):
+    subject_type: str = Field(..., description="集計対象の種類（project / user）")
+    subject_id: int
+    granularity: str = Field(..., description="集計単位（day / week）")
+    buckets: List[ActivityBucketResponse]
@@ -3,18 +3,20 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
 # 相対インポート
 from ...core.database import get_db
-from ...core.security import verify_password, SECRET_KEY, ALGORITHM
+from ...core.security import verify_and_update_password_async, verify_dummy_password_async, SECRET_KEY, ALGORITHM
 # create_access_tokenをimportする
 from ...core.security import create_access_token
 from ...core.config import settings
 from ..users.models import User
 from ..users.schemas import TokenData
+from .sessions import revocation_list
 
 # トークン認証を避けるための修正: core.dependencies からインポート
 # from ...core.dependencies import get_current_user
@@ -22,23 +24,44 @@ from ..users.schemas import TokenData
 # OAuth2のパスワードベアラースキーマを定義
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/token")
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    """ユーザー名とパスワードでユーザーを認証する"""
+def _find_user_by_name(db: Session, username: str) -> Optional[User]:
+    return db.query(User).filter(User.name == username).first()
+
+
+def _save_password_hash(db: Session, user: User, password_hash: str) -> None:
+    """再ハッシュしたパスワードを保存する（失敗してもログイン自体は継続する）"""
+    try:
+        user.password = password_hash
+        db.commit()
+        db.refresh(user)
+    except Exception as e:
+        print(f"パスワードの再ハッシュの保存エラー: {str(e)}")
+        db.rollback()
+
+
+async def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+    """
+    ユーザー名とパスワードでユーザーを認証する
+
+    - DBアクセスはスレッドプール、パスワード検証は専用のスレッドプールで行い、イベントループを占有しない
+    - 平文や低コストのハッシュで保存されている場合は、検証に成功したときに現在の設定で再ハッシュして保存する
+    """
     try:
         # データベースからユーザーを検索
-        user = db.query(User).filter(User.name == username).first()
+        user = await run_in_threadpool(_find_user_by_name, db, username)
         
-        # ユーザーが見つからない場合はデフォルトユーザーを返す
+        # ユーザーが見つからない場合も同じ時間をかけて検証し、応答時間でユーザー名の有無がわからないようにする
         if not user:
+            await verify_dummy_password_async(password)
             return None
         
         # パスワード検証
-        # if verify_password(password, user.password):
-        # パスワード検証 - 直接比較
-        if user.password == password:
-            return user
-        
-        return None
+        verified, new_hash = await verify_and_update_password_async(password, user.password)
+        if not verified:
+            return None
+        if new_hash:
+            await run_in_threadpool(_save_password_hash, db, user, new_hash)
+        return user
     except Exception as e:
         # エラーの詳細をログ出力
         print(f"認証エラー: {str(e)}")
@@ -80,6 +103,11 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
     except JWTError:
         raise credentials_exception
     
+    # ログアウトなどで失効したセッションのトークンを拒否する（通常はメモリ上の判定のみでDBにアクセスしない）
+    session_id = payload.get("sid")
+    if session_id and revocation_list.is_revoked(db, session_id):
+        raise credentials_exception
+    
     # user_idを使用してユーザーを検索
     user = db.query(User).filter(User.user_id == token_data.user_id).first()
     
@@ -88,6 +116,26 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
     
     return user
 
+def is_admin_user(user: User) -> bool:
+    """ユーザーが管理者（ADMIN_USER_IDS に含まれる）かどうか"""
+    admin_user_ids = {
+        int(user_id) for user_id in settings.ADMIN_USER_IDS.split(",") if user_id.strip().isdigit()
+    }
+    return user.user_id in admin_user_ids
+
+def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    """
+    現在のユーザーが管理者（ADMIN_USER_IDS に含まれる）であることを確認する
+
+    :raises: 管理者でない場合は403エラー
+    """
+    if not is_admin_user(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="この操作には管理者権限が必要です"
+        )
+    return current_user
+
 # def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
 #     """
 #     JWTアクセストークンを生成する
@@ -0,0 +1,86 @@
+# app/api/auth/login_tracker.py
+from datetime import datetime
+from typing import Dict, Optional
+import threading
+
+from sqlalchemy import bindparam, update
+
+from ...core.background import register_periodic_task
+from ...core.config import settings
+from ...core.database import SessionLocal
+from ..users.models import User
+
+
+class LoginTracker:
+    """
+    最終ログイン日時をメモリ上に記録し、定期的にまとめて users に反映する
+
+    - ログイン時は記録のみ行い、書き込みトランザクションを発生させない
+    - 同じユーザーの複数回のログインは最新の日時にまとめる
+    - 反映に失敗した分は次回に持ち越す（より新しいログインがあればそちらを優先）
+    """
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+
+    def record(self, user_id: int, at: Optional[datetime] = None) -> None:
+        """ユーザーのログインを記録する"""
+        at = at or datetime.utcnow()
+        with self._lock:
+            self._pending[user_id] = at
+
+    def pending_for(self, user_id: int) -> Optional[datetime]:
+        """まだ反映していない最終ログイン日時（なければ None）"""
+        with self._lock:
+            return self._pending.get(user_id)
+
+    def flush(self) -> int:
+        """記録したログイン日時を users に反映し、更新したユーザー数を返す"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        users = User.__table__
+        statement = update(users).where(users.c.user_id == bindparam("b_user_id")).values(
+            last_login_at=bindparam("b_last_login_at")
+        )
+        items = list(pending.items())
+        db = SessionLocal()
+        try:
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                db.execute(statement, [
+                    {"b_user_id": user_id, "b_last_login_at": at} for user_id, at in batch
+                ])
+                db.commit()
+                # 反映済みの分は持ち越しの対象から外す
+                for user_id, _ in batch:
+                    pending.pop(user_id, None)
+        except Exception:
+            db.rollback()
+            self._restore(pending)
+            raise
+        finally:
+            db.close()
+        return len(items)
+
+    def _restore(self, pending: Dict[int, datetime]) -> None:
+        with self._lock:
+            for user_id, at in pending.items():
+                current = self._pending.get(user_id)
+                if current is None or current < at:
+                    self._pending[user_id] = at
+
+
+# アプリケーション全体で共有するトラッカー
+login_tracker = LoginTracker(settings.LOGIN_TRACKER_BATCH_SIZE)
+
+register_periodic_task(
+    "login-tracker-flush",
+    settings.LOGIN_TRACKER_FLUSH_INTERVAL_SECONDS,
+    login_tracker.flush,
+    run_on_shutdown=True,
+)
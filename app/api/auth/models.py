@@ -0,0 +1,20 @@
+# app/api/auth/models.py
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+
+# 相対インポートに変更
+from ...core.database import Base
+
+class AuthSession(Base):
+    """ログインセッション（リフレッシュトークン）"""
+    __tablename__ = "auth_sessions"
+
+    session_id = Column(String(32), primary_key=True)  # アクセストークンの sid クレーム
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False, index=True)
+    refresh_token_hash = Column(String(64), nullable=False)  # リフレッシュトークンの秘密部分の SHA-256（再発行のたびに置き換える）
+    previous_refresh_token_hash = Column(String(64), nullable=True)  # 直前のリフレッシュトークンの SHA-256（再利用の検出に使う）
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    refreshed_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True, index=True)  # 失効日時（UTC）
@@ -1,22 +1,70 @@
 # app/api/auth/router.py
 from datetime import timedelta, datetime
-from typing import Any
+from typing import Any, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import jwt
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from ...core.database import get_db
-from ...core.security import get_password_hash
+from ...core.integrity import is_unique_violation
+from ...core.security import get_password_hash_async
 from ...core.config import settings
-from .jwt import authenticate_user, create_access_token
+from .jwt import authenticate_user, create_access_token, get_current_user, oauth2_scheme
+from . import sessions
+from .schemas import LogoutResponse, RefreshTokenRequest
+from .login_tracker import login_tracker
 from ..users.models import User
 from ..users.schemas import UserCreate, UserResponse, Token
 
 router = APIRouter()
 
+
+def _token_response(user_id: int, user_name: str, issued: sessions.IssuedSession) -> dict:
+    """セッションIDを含むアクセストークンとリフレッシュトークンを返す"""
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": str(user_id), "sid": issued.session_id},
+        expires_delta=access_token_expires
+    )
+    
+    return {
+        "access_token": access_token, 
+        "token_type": "bearer",
+        "user_id": user_id,
+        "user_name": user_name,
+        "refresh_token": issued.refresh_token
+    }
+
+
+def _insert_user(db: Session, user: User) -> Tuple[int, sessions.IssuedSession]:
+    """
+    ユーザーとログインセッションを保存する（ユーザー名の重複は事前のSELECTではなく一意制約の違反で判定する）
+
+    :return: (ユーザーID, セッション情報)
+    """
+    try:
+        db.add(user)
+        db.flush()
+        user_id = user.user_id
+        issued = sessions.create_session(db, user_id, commit=False)
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if is_unique_violation(e):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="このユーザー名は既に使用されています",
+            )
+        raise
+    return user_id, issued
+
+
 @router.post("/simple-token")
-def simple_token(
+async def simple_token(
     username: str,
     password: str,
     db: Session = Depends(get_db)
@@ -24,7 +72,7 @@ def simple_token(
     """
     簡易トークン取得: フォームなしバージョン
     """
-    user = authenticate_user(db, username, password)
+    user = await authenticate_user(db, username, password)
     
     if not user:
         raise HTTPException(
@@ -32,29 +80,20 @@ def simple_token(
             detail="ユーザー名またはパスワードが無効です",
         )
     
-    # アクセストークンを生成
-    access_token_expires = timedelta(days=30)  # より長い有効期限
-    access_token = create_access_token(
-        data={"sub": str(user.user_id)},
-        expires_delta=access_token_expires
-    )
-    
-    return {
-        "access_token": access_token, 
-        "token_type": "bearer",
-        "user_id": user.user_id,
-        "user_name": user.name
-    }
+    # 有効期限の長いトークンの代わりに、短命のアクセストークンとリフレッシュトークンを発行する
+    user_id, user_name = user.user_id, user.name
+    issued = await run_in_threadpool(sessions.create_session, db, user_id)
+    return _token_response(user_id, user_name, issued)
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), 
     db: Session = Depends(get_db)
 ) -> Any:
     """
     OAuth2互換のトークンログインエンドポイント
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     
     if not user:
         raise HTTPException(
@@ -63,30 +102,16 @@ def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # 最終ログイン時間を更新
-    try:
-        user.last_login_at = datetime.utcnow()
-        db.commit()
-    except Exception as e:
-        print(f"ログイン時間の更新エラー: {str(e)}")
-        db.rollback()  # エラー時はロールバック
+    user_id, user_name = user.user_id, user.name
     
-    # アクセストークンを生成
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.user_id)},
-        expires_delta=access_token_expires
-    )
+    # 最終ログイン時間を記録（users への反映は定期的にまとめて行う）
+    login_tracker.record(user_id)
     
-    return {
-        "access_token": access_token, 
-        "token_type": "bearer",
-        "user_id": user.user_id,
-        "user_name": user.name
-    }
+    issued = await run_in_threadpool(sessions.create_session, db, user_id)
+    return _token_response(user_id, user_name, issued)
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     username: str,
     password: str,
     db: Session = Depends(get_db)
@@ -94,7 +119,7 @@ def login(
     """
     ユーザー名とパスワードでログイン
     """
-    user = authenticate_user(db, username, password)
+    user = await authenticate_user(db, username, password)
     
     if not user:
         raise HTTPException(
@@ -102,30 +127,16 @@ def login(
             detail="ユーザー名またはパスワードが無効です",
         )
     
-    # 最終ログイン時間を更新
-    try:
-        user.last_login_at = datetime.utcnow()
-        db.commit()
-    except Exception as e:
-        print(f"ログイン時間の更新エラー: {str(e)}")
-        db.rollback()  # エラー時はロールバック
+    user_id, user_name = user.user_id, user.name
     
-    # アクセストークンを生成
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.user_id)},
-        expires_delta=access_token_expires
-    )
+    # 最終ログイン時間を記録（users への反映は定期的にまとめて行う）
+    login_tracker.record(user_id)
     
-    return {
-        "access_token": access_token, 
-        "token_type": "bearer",
-        "user_id": user.user_id,
-        "user_name": user.name
-    }
+    issued = await run_in_threadpool(sessions.create_session, db, user_id)
+    return _token_response(user_id, user_name, issued)
 
 @router.post("/register", response_model=Token)
-def register_user(
+async def register_user(
     user_data: UserCreate,
     db: Session = Depends(get_db)
 ) -> Any:
@@ -139,38 +150,54 @@ def register_user(
             detail="パスワードが一致しません",
         )
     
-    # ユーザー名の重複チェック
-    existing_user = db.query(User).filter(User.name == user_data.name).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="このユーザー名は既に使用されています",
-        )
-    
-    # 新しいユーザーを作成
+    # 新しいユーザーを作成（ハッシュ計算は専用のスレッドプールで行う）
     user = User(
         name=user_data.name,
-        password=get_password_hash(user_data.password),
+        password=await get_password_hash_async(user_data.password),
         category_id=str(user_data.category_id) if user_data.category_id else None,
         point_total=0,
         last_login_at=datetime.utcnow()
     )
-    
-    # データベースに保存
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    
-    # アクセストークンを生成
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.user_id)},
-        expires_delta=access_token_expires
-    )
-    
-    return {
-        "access_token": access_token, 
-        "token_type": "bearer",
-        "user_id": user.user_id,
-        "user_name": user.name
-    }
\ No newline at end of file
+    user_id, issued = await run_in_threadpool(_insert_user, db, user)
+    return _token_response(user_id, user_data.name, issued)
+
+@router.post("/refresh", response_model=Token)
+def refresh_access_token(
+    request: RefreshTokenRequest,
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    リフレッシュトークンでアクセストークンを再発行する（リフレッシュトークンも新しいものに置き換える）
+    """
+    rotated = sessions.rotate_session(db, request.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="リフレッシュトークンが無効です",
+        )
+    user_id, issued = rotated
+    user_name = db.query(User.name).filter(User.user_id == user_id).scalar()
+    if user_name is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="リフレッシュトークンが無効です",
+        )
+    return _token_response(user_id, user_name, issued)
+
+@router.post("/logout", response_model=LogoutResponse)
+def logout(
+    all_sessions: bool = Query(False, description="すべての端末のセッションを失効させる"),
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    ログアウトする（現在のセッションのアクセストークン・リフレッシュトークンを失効させる）
+    """
+    if all_sessions:
+        return {"revoked_sessions": sessions.revoke_user_sessions(db, current_user.user_id)}
+    session_id = jwt.get_unverified_claims(token).get("sid")
+    if not session_id:
+        # セッション導入前に発行されたトークンは有効期限まで失効できない
+        return {"revoked_sessions": 0}
+    return {"revoked_sessions": sessions.revoke_sessions(db, [session_id])}
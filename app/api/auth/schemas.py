@@ -0,0 +1,12 @@
+# app/api/auth/schemas.py
+from pydantic import Field
+
+from ...schemas.base import BaseSchemaModel
+
+
+class RefreshTokenRequest(BaseSchemaModel):
+    refresh_token: str = Field(..., description="ログイン時に発行されたリフレッシュトークン")
+
+
+class LogoutResponse(BaseSchemaModel):
+    revoked_sessions: int = Field(..., description="失効させたセッション数")
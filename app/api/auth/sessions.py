@@ -0,0 +1,237 @@
+# app/api/auth/sessions.py
+"""
+ログインセッション（リフレッシュトークン）と失効リスト
+
+- ログインごとに auth_sessions に1行作成し、アクセストークンには sid クレームとしてセッションIDを含める
+- リフレッシュトークンは「セッションID.秘密値」の形式で、DBには秘密値の SHA-256 のみ保存する。
+  再発行のたびに秘密値を置き換え、直前のリフレッシュトークンが再利用された場合は漏えいとみなしてセッションを失効させる
+  （セッションIDはアクセストークンから読めるため、一致しない秘密値は失効させずに拒否するだけにする）
+- アクセストークンの失効確認はメモリ上のブルームフィルタで行い、フィルタに該当した場合のみDBで確認する
+  （失効していないセッションのリクエストではDBにアクセスしない）
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import hashlib
+import hmac
+import secrets
+import threading
+import uuid
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from ...core.background import register_periodic_task
+from ...core.bloom import BloomFilter
+from ...core.config import settings
+from ...core.database import SessionLocal
+from .models import AuthSession
+
+
+class IssuedSession(NamedTuple):
+    session_id: str
+    refresh_token: str
+
+
+def _hash_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+
+def _new_secret() -> Tuple[str, str]:
+    secret = secrets.token_urlsafe(32)
+    return secret, _hash_secret(secret)
+
+
+def create_session(db: Session, user_id: int, commit: bool = True) -> IssuedSession:
+    """
+    ログインセッションを作成する
+
+    :param commit: False の場合は呼び出し元のトランザクションでコミットする
+    """
+    session_id = uuid.uuid4().hex
+    secret, secret_hash = _new_secret()
+    now = datetime.utcnow()
+    db.add(AuthSession(
+        session_id=session_id,
+        user_id=user_id,
+        refresh_token_hash=secret_hash,
+        created_at=now,
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    if commit:
+        db.commit()
+    return IssuedSession(session_id, f"{session_id}.{secret}")
+
+
+def rotate_session(db: Session, refresh_token: str) -> Optional[Tuple[int, IssuedSession]]:
+    """
+    リフレッシュトークンを検証し、新しいリフレッシュトークンを発行する
+
+    :return: (ユーザーID, 新しいセッション情報)。無効・期限切れ・失効済みの場合は None
+    """
+    session_id, _, secret = refresh_token.partition(".")
+    if not session_id or not secret:
+        return None
+    session = db.get(AuthSession, session_id)
+    if session is None or session.revoked_at is not None or session.expires_at <= datetime.utcnow():
+        return None
+    user_id = session.user_id
+    old_hash = session.refresh_token_hash
+    presented_hash = _hash_secret(secret)
+    if not hmac.compare_digest(old_hash, presented_hash):
+        previous_hash = session.previous_refresh_token_hash
+        if previous_hash is not None and hmac.compare_digest(previous_hash, presented_hash):
+            # 置き換え済みのリフレッシュトークンが使われた: 漏えいの可能性があるためセッションごと失効させる
+            revoke_sessions(db, [session_id])
+        return None
+
+    # 同じリフレッシュトークンでの同時の再発行は一方だけを成功させる
+    new_secret, new_hash = _new_secret()
+    result = db.execute(
+        update(AuthSession)
+        .where(AuthSession.session_id == session_id, AuthSession.refresh_token_hash == old_hash)
+        .values(refresh_token_hash=new_hash, previous_refresh_token_hash=old_hash, refreshed_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount != 1:
+        return None
+    return user_id, IssuedSession(session_id, f"{session_id}.{new_secret}")
+
+
+def revoke_sessions(db: Session, session_ids: Iterable[str]) -> int:
+    """セッションを失効させ、失効リストに追加する"""
+    session_ids = list(session_ids)
+    if not session_ids:
+        return 0
+    result = db.execute(
+        update(AuthSession)
+        .where(AuthSession.session_id.in_(session_ids), AuthSession.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    revocation_list.add(session_ids)
+    return result.rowcount
+
+
+def revoke_user_sessions(db: Session, user_id: int) -> int:
+    """ユーザーの有効なセッションをすべて失効させる"""
+    session_ids = [
+        session_id for (session_id,) in db.query(AuthSession.session_id).filter(
+            AuthSession.user_id == user_id,
+            AuthSession.revoked_at.is_(None),
+            AuthSession.expires_at > datetime.utcnow()
+        ).all()
+    ]
+    return revoke_sessions(db, session_ids)
+
+
+class RevocationList:
+    """
+    失効したセッションIDのブルームフィルタ
+
+    - 対象はアクセストークンがまだ有効でありうる（失効から ACCESS_TOKEN_EXPIRE_MINUTES 以内の）セッションのみ
+    - このプロセスで失効させたセッションは即時に、他のワーカーで失効したセッションは定期的に差分で追加する
+    - 要素は削除できないため、対象期間を過ぎた要素がたまった時点（またはフィルタが想定件数を超えた時点）で作り直す
+    """
+
+    def __init__(self, capacity: int, error_rate: float, token_lifetime: timedelta, visibility_lag: timedelta):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.token_lifetime = token_lifetime
+        self.visibility_lag = visibility_lag
+        self._filter = BloomFilter(capacity, error_rate)
+        # DBで失効を確認済みのセッションID（失効は取り消されないためキャッシュしてよい）
+        self._confirmed: Set[str] = set()
+        # このプロセスで失効させたセッションID → 失効日時（作り直しの間の取りこぼしを防ぐ）
+        self._local: Dict[str, datetime] = {}
+        self._watermark: Optional[datetime] = None
+        self._built_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def add(self, session_ids: Iterable[str]) -> None:
+        now = datetime.utcnow()
+        with self._lock:
+            for session_id in session_ids:
+                self._filter.add(session_id)
+                self._local[session_id] = now
+
+    def is_revoked(self, db: Session, session_id: str) -> bool:
+        """セッションが失効しているかどうか（フィルタに該当した場合のみDBで確認する）"""
+        if self._built_at is None:
+            self.rebuild(db)
+        if not self._filter.might_contain(session_id):
+            return False
+        if session_id in self._confirmed:
+            return True
+        revoked_at = db.query(AuthSession.revoked_at).filter(AuthSession.session_id == session_id).scalar()
+        if revoked_at is None:
+            return False
+        with self._lock:
+            self._confirmed.add(session_id)
+        return True
+
+    def might_be_revoked(self, session_id: str) -> bool:
+        """DBにアクセスせずに判定する（False なら失効していない。DBが使えない間のキャッシュ応答で使用する）"""
+        return self._built_at is None or self._filter.might_contain(session_id)
+
+    def _recently_revoked(self, db: Session, since: datetime) -> List[Tuple[str, datetime]]:
+        return db.query(AuthSession.session_id, AuthSession.revoked_at).filter(
+            AuthSession.revoked_at >= since
+        ).all()
+
+    def rebuild(self, db: Session) -> None:
+        """アクセストークンが有効でありうる失効済みセッションだけでフィルタを作り直す"""
+        now = datetime.utcnow()
+        since = now - self.token_lifetime - self.visibility_lag
+        rows = self._recently_revoked(db, since)
+        capacity = max(self.capacity, len(rows) * 2)
+        bloom = BloomFilter.from_items((session_id for session_id, _ in rows), capacity, self.error_rate)
+        with self._lock:
+            # 読み込み後にこのプロセスで失効させたセッションも含める
+            self._local = {session_id: revoked_at for session_id, revoked_at in self._local.items() if revoked_at >= since}
+            for session_id in self._local:
+                if not bloom.might_contain(session_id):
+                    bloom.add(session_id)
+            self._confirmed = {session_id for session_id in self._confirmed if bloom.might_contain(session_id)}
+            self._filter = bloom
+            self._watermark = max((revoked_at for _, revoked_at in rows), default=now)
+            self._built_at = now
+
+    def sync(self) -> None:
+        """他のワーカーで失効したセッションを取り込む（定期実行）"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            if (
+                self._built_at is None
+                or self._filter.is_full
+                or now - self._built_at > self.token_lifetime
+            ):
+                self.rebuild(db)
+                return
+            rows = self._recently_revoked(db, self._watermark - self.visibility_lag)
+            with self._lock:
+                for session_id, revoked_at in rows:
+                    # 重なりの期間に再度読み込んだ分は追加しない（件数を水増ししない）
+                    if not self._filter.might_contain(session_id):
+                        self._filter.add(session_id)
+                    if revoked_at > self._watermark:
+                        self._watermark = revoked_at
+        finally:
+            db.close()
+
+
+# アプリケーション全体で共有する失効リスト
+revocation_list = RevocationList(
+    capacity=settings.REVOCATION_FILTER_CAPACITY,
+    error_rate=settings.REVOCATION_FILTER_ERROR_RATE,
+    token_lifetime=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    visibility_lag=timedelta(seconds=settings.SYNC_VISIBILITY_LAG_SECONDS),
+)
+
+register_periodic_task(
+    "revocation-list-sync",
+    settings.REVOCATION_SYNC_INTERVAL_SECONDS,
+    revocation_list.sync,
+)
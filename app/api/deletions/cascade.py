@@ -0,0 +1,357 @@
+# app/api/deletions/cascade.py
+"""
+お困りごと・プロジェクト・カテゴリーの削除
+
+- API では対象を論理削除（deleted_at を設定）して削除ジョブを登録するだけにし、即座に応答する
+- 依存する行（メッセージ・お気に入りなど）はバックグラウンドで DELETION_BATCH_ROWS 行ずつ、
+  1バッチ1トランザクションで削除し、進捗を deletion_jobs に記録する
+- 中断したジョブは定期タスクが再開する（各ステップは残っている行を対象にするため再実行しても安全）
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+import time
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from ...core.background import register_periodic_task
+from ...core.config import settings
+from ...core.database import SessionLocal
+from ...core.soft_delete import INCLUDE_DELETED
+from ..imports.importer import PROJECT as IMPORTED_PROJECT, TROUBLE as IMPORTED_TROUBLE
+from ..imports.models import ImportedEntity
+from ..messages.models import Message, MessageArchive
+from ..projects import stats
+from ..projects.directory import project_directory
+from ..projects.favorites import favorite_cache
+from ..projects.models import (
+    CoCreationProject, ProjectCategory, ProjectTrendingScore, ProjectTroubleStat,
+    UserProjectFavorite, UserProjectParticipation
+)
+from ..projects.recommendations import project_recommender
+from ..projects.trending import trending_tracker
+from ..sync import changelog
+from ..troubles.models import Trouble, TroubleArchive, TroubleCategory, TroubleResolution
+from ..troubles.directory import trouble_directory
+from ..troubles.similarity import trouble_similarity_index
+from .models import DeletionJob
+
+TROUBLE = "trouble"
+PROJECT = "project"
+TROUBLE_CATEGORY = "trouble_category"
+PROJECT_CATEGORY = "project_category"
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobAborted(Exception):
+    """再実行しても完了できないため中止するジョブ（failed にする）"""
+
+
+def _create_job(db: Session, entity_type: str, entity_id: int, user_id: int) -> DeletionJob:
+    job = DeletionJob(entity_type=entity_type, entity_id=entity_id, requested_by_user_id=user_id, status=PENDING)
+    db.add(job)
+    return job
+
+
+# ---- 論理削除（APIから呼び出す） ----
+
+def request_trouble_deletion(db: Session, trouble: Trouble, user_id: int) -> DeletionJob:
+    """お困りごとを論理削除し、削除ジョブを登録する"""
+    trouble.deleted_at = datetime.utcnow()
+    stats.record_trouble_change(db, trouble.project_id, (trouble.category_id, trouble.status), None)
+    changelog.record(db, changelog.TROUBLE, trouble.trouble_id, changelog.DELETE)
+    job = _create_job(db, TROUBLE, trouble.trouble_id, user_id)
+    db.commit()
+    trouble_similarity_index.remove(trouble.trouble_id)
+    trouble_directory.invalidate(trouble.trouble_id)
+    return job
+
+
+def request_project_deletion(db: Session, project: CoCreationProject, user_id: int) -> DeletionJob:
+    """プロジェクトを論理削除し、削除ジョブを登録する（お困りごとはジョブで論理削除する）"""
+    project.deleted_at = datetime.utcnow()
+    stats.add_project_counts(db, {project.category_id: -1})
+    changelog.record(db, changelog.PROJECT, project.project_id, changelog.DELETE)
+    job = _create_job(db, PROJECT, project.project_id, user_id)
+    db.commit()
+    trending_tracker.forget(project.project_id)
+    project_directory.invalidate(project.project_id)
+    return job
+
+
+def trouble_category_in_use(db: Session, category_id: int, include_deleted: bool = False) -> bool:
+    """お困りごと（アーカイブ済みを含む。include_deleted を指定した場合は削除待ちのものも含む）がカテゴリーを参照しているかどうか"""
+    live = db.query(Trouble.trouble_id).filter(Trouble.category_id == category_id).execution_options(
+        **{INCLUDE_DELETED: include_deleted}
+    ).first()
+    archived = db.query(TroubleArchive.trouble_id).filter(TroubleArchive.category_id == category_id).first()
+    return live is not None or archived is not None
+
+
+def request_category_deletion(db: Session, category, user_id: int) -> DeletionJob:
+    """カテゴリーを論理削除し、削除ジョブを登録する"""
+    category.deleted_at = datetime.utcnow()
+    entity_type = TROUBLE_CATEGORY if isinstance(category, TroubleCategory) else PROJECT_CATEGORY
+    job = _create_job(db, entity_type, category.category_id, user_id)
+    db.commit()
+    return job
+
+
+# ---- バッチ削除 ----
+
+def _advance(db: Session, job: DeletionJob, rows: int) -> None:
+    """バッチをコミットし、進捗を記録する"""
+    job.deleted_rows += rows
+    job.updated_at = datetime.utcnow()
+    db.commit()
+    if settings.DELETION_BATCH_PAUSE_SECONDS:
+        time.sleep(settings.DELETION_BATCH_PAUSE_SECONDS)
+
+
+def _next_ids(db: Session, column, *criteria) -> List[int]:
+    """条件に一致する行のキーを1バッチ分取得する（論理削除済みの行も含む）"""
+    rows = db.query(column).filter(*criteria).execution_options(**{INCLUDE_DELETED: True}).limit(
+        settings.DELETION_BATCH_ROWS
+    ).all()
+    return [row[0] for row in rows]
+
+
+def _delete_messages(db: Session, job: DeletionJob, model, trouble_ids: List[int]) -> None:
+    while True:
+        message_ids = _next_ids(db, model.message_id, model.trouble_id.in_(trouble_ids))
+        if not message_ids:
+            return
+        if model is Message:
+            # 返信の自己参照（外部キー）を外してから削除する
+            db.query(Message).filter(Message.parent_message_id.in_(message_ids)).update(
+                {Message.parent_message_id: None}, synchronize_session=False
+            )
+        deleted = db.query(model).filter(model.message_id.in_(message_ids)).delete(synchronize_session=False)
+        _advance(db, job, deleted)
+
+
+def _delete_troubles(db: Session, job: DeletionJob, trouble_ids: List[int]) -> None:
+    """論理削除済み・アーカイブ済みのお困りごとをメッセージごと削除する"""
+    _delete_messages(db, job, Message, trouble_ids)
+    _delete_messages(db, job, MessageArchive, trouble_ids)
+    db.query(TroubleResolution).filter(TroubleResolution.trouble_id.in_(trouble_ids)).delete(synchronize_session=False)
+    db.query(ImportedEntity).filter(
+        ImportedEntity.entity_type == IMPORTED_TROUBLE,
+        ImportedEntity.entity_id.in_(trouble_ids)
+    ).delete(synchronize_session=False)
+    deleted = db.query(Trouble).filter(Trouble.trouble_id.in_(trouble_ids)).delete(synchronize_session=False)
+    deleted += db.query(TroubleArchive).filter(TroubleArchive.trouble_id.in_(trouble_ids)).delete(synchronize_session=False)
+    _advance(db, job, deleted)
+
+
+def _soft_delete_troubles(db: Session, job: DeletionJob, criterion) -> None:
+    """条件に一致するお困りごとを論理削除する（集計・変更履歴もあわせて更新する）"""
+    while True:
+        rows = db.query(
+            Trouble.trouble_id, Trouble.project_id, Trouble.category_id, Trouble.status
+        ).filter(criterion).limit(settings.DELETION_BATCH_ROWS).all()
+        if not rows:
+            return
+        trouble_ids = [row.trouble_id for row in rows]
+        db.query(Trouble).filter(Trouble.trouble_id.in_(trouble_ids)).update(
+            {Trouble.deleted_at: datetime.utcnow()}, synchronize_session=False
+        )
+        counts: Dict[Tuple[int, int, str], int] = defaultdict(int)
+        for row in rows:
+            counts[(row.project_id, row.category_id, row.status)] -= 1
+            changelog.record(db, changelog.TROUBLE, row.trouble_id, changelog.DELETE)
+        stats.add_trouble_counts(db, counts)
+        _advance(db, job, len(rows))
+        for trouble_id in trouble_ids:
+            trouble_similarity_index.remove(trouble_id)
+            trouble_directory.invalidate(trouble_id)
+
+
+def _delete_matching_troubles(db: Session, job: DeletionJob, live_criterion, archive_criterion) -> None:
+    """条件に一致するお困りごと（アーカイブ済みを含む）を論理削除したうえでバッチ削除する"""
+    _soft_delete_troubles(db, job, live_criterion)
+    while True:
+        trouble_ids = _next_ids(db, Trouble.trouble_id, live_criterion)
+        if not trouble_ids:
+            break
+        _delete_troubles(db, job, trouble_ids)
+    while True:
+        trouble_ids = _next_ids(db, TroubleArchive.trouble_id, archive_criterion)
+        if not trouble_ids:
+            break
+        _delete_troubles(db, job, trouble_ids)
+
+
+def _delete_project_members(db: Session, job: DeletionJob, model, project_id: int) -> None:
+    """お気に入り・参加者をユーザー単位のバッチで削除する"""
+    while True:
+        user_ids = _next_ids(db, model.user_id, model.project_id == project_id)
+        if not user_ids:
+            return
+        deleted = db.query(model).filter(
+            model.project_id == project_id,
+            model.user_id.in_(user_ids)
+        ).delete(synchronize_session=False)
+        _advance(db, job, deleted)
+        if model is UserProjectFavorite:
+            for user_id in user_ids:
+                favorite_cache.invalidate(user_id)
+
+
+# ---- ジョブの種類ごとの処理 ----
+
+def _run_trouble(db: Session, job: DeletionJob) -> None:
+    _delete_troubles(db, job, [job.entity_id])
+
+
+def _run_project(db: Session, job: DeletionJob) -> None:
+    project_id = job.entity_id
+    _delete_matching_troubles(db, job, Trouble.project_id == project_id, TroubleArchive.project_id == project_id)
+    _delete_project_members(db, job, UserProjectFavorite, project_id)
+    _delete_project_members(db, job, UserProjectParticipation, project_id)
+    db.query(ProjectTrendingScore).filter(ProjectTrendingScore.project_id == project_id).delete(synchronize_session=False)
+    db.query(ProjectTroubleStat).filter(ProjectTroubleStat.project_id == project_id).delete(synchronize_session=False)
+    db.query(ImportedEntity).filter(
+        ImportedEntity.entity_type == IMPORTED_PROJECT,
+        ImportedEntity.entity_id == project_id
+    ).delete(synchronize_session=False)
+    deleted = db.query(CoCreationProject).filter(CoCreationProject.project_id == project_id).delete(synchronize_session=False)
+    _advance(db, job, deleted)
+
+
+def _run_trouble_category(db: Session, job: DeletionJob) -> None:
+    """
+    カテゴリーを削除する（お困りごとは削除しない）
+
+    API では参照されていないことを確認して受け付けるが、受け付け後にお困りごとが登録された場合は
+    カテゴリーを元に戻してジョブを中止する。削除待ちのお困りごとが残っている場合は次回の定期実行で再確認する
+    """
+    category_id = job.entity_id
+    if trouble_category_in_use(db, category_id):
+        db.query(TroubleCategory).filter(TroubleCategory.category_id == category_id).execution_options(
+            **{INCLUDE_DELETED: True}
+        ).update({TroubleCategory.deleted_at: None}, synchronize_session=False)
+        db.commit()
+        raise JobAborted(f"お困りごとがカテゴリー {category_id} を参照しているため削除を中止しました")
+    if trouble_category_in_use(db, category_id, include_deleted=True):
+        raise RuntimeError(f"削除待ちのお困りごとがカテゴリー {category_id} を参照しています")
+    deleted = db.query(TroubleCategory).filter(TroubleCategory.category_id == category_id).delete(synchronize_session=False)
+    _advance(db, job, deleted)
+
+
+def _run_project_category(db: Session, job: DeletionJob) -> None:
+    """カテゴリーを参照しているプロジェクトを未分類にしてからカテゴリーを削除する"""
+    category_id = job.entity_id
+    while True:
+        rows = db.query(
+            CoCreationProject.project_id, CoCreationProject.creator_user_id, CoCreationProject.deleted_at
+        ).filter(CoCreationProject.category_id == category_id).execution_options(**{INCLUDE_DELETED: True}).limit(
+            settings.DELETION_BATCH_ROWS
+        ).all()
+        if not rows:
+            break
+        db.query(CoCreationProject).filter(
+            CoCreationProject.project_id.in_([row.project_id for row in rows])
+        ).update({CoCreationProject.category_id: None}, synchronize_session=False)
+        live = [row for row in rows if row.deleted_at is None]
+        stats.add_project_counts(db, {category_id: -len(live), None: len(live)})
+        for row in live:
+            changelog.record(db, changelog.PROJECT, row.project_id)
+        _advance(db, job, len(rows))
+        for row in live:
+            project_recommender.on_project_saved(row.project_id, None, row.creator_user_id)
+    deleted = db.query(ProjectCategory).filter(ProjectCategory.category_id == category_id).delete(synchronize_session=False)
+    _advance(db, job, deleted)
+
+
+_HANDLERS: Dict[str, Callable[[Session, DeletionJob], None]] = {
+    TROUBLE: _run_trouble,
+    PROJECT: _run_project,
+    TROUBLE_CATEGORY: _run_trouble_category,
+    PROJECT_CATEGORY: _run_project_category,
+}
+
+
+# ---- ジョブの実行 ----
+
+def _claim(db: Session, job_id: int) -> bool:
+    """ジョブを実行中にする（他のワーカーが実行中の場合は False）"""
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.DELETION_STALE_JOB_SECONDS)
+    claimed = db.query(DeletionJob).filter(
+        DeletionJob.job_id == job_id,
+        or_(
+            DeletionJob.status == PENDING,
+            and_(DeletionJob.status == RUNNING, DeletionJob.updated_at < stale_before)
+        )
+    ).update(
+        {DeletionJob.status: RUNNING, DeletionJob.updated_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.commit()
+    return claimed == 1
+
+
+def run_job(job_id: int) -> None:
+    """
+    削除ジョブを実行する（API のバックグラウンド処理・定期タスクから呼び出す）
+
+    失敗した場合はエラーを記録して pending に戻し、次回の定期実行で再開する
+    """
+    db = SessionLocal()
+    try:
+        if not _claim(db, job_id):
+            return
+        job = db.query(DeletionJob).filter(DeletionJob.job_id == job_id).first()
+        try:
+            _HANDLERS[job.entity_type](db, job)
+        except JobAborted as e:
+            db.rollback()
+            print(f"削除ジョブ {job_id} を中止しました: {str(e)}")
+            job.status = FAILED
+            job.error = str(e)
+            job.updated_at = datetime.utcnow()
+            db.commit()
+            return
+        except Exception as e:
+            db.rollback()
+            print(f"削除ジョブ {job_id} でエラーが発生しました: {str(e)}")
+            job.status = PENDING
+            job.error = str(e)
+            job.updated_at = datetime.utcnow()
+            db.commit()
+            return
+        job.status = COMPLETED
+        job.error = None
+        job.completed_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def resume_jobs() -> None:
+    """未完了・中断した削除ジョブを再開する（定期実行）"""
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.DELETION_STALE_JOB_SECONDS)
+    db = SessionLocal()
+    try:
+        job_ids = [row[0] for row in db.query(DeletionJob.job_id).filter(
+            or_(
+                DeletionJob.status == PENDING,
+                and_(DeletionJob.status == RUNNING, DeletionJob.updated_at < stale_before)
+            )
+        ).order_by(DeletionJob.job_id).all()]
+    finally:
+        db.close()
+    for job_id in job_ids:
+        run_job(job_id)
+
+
+register_periodic_task(
+    "deletion-jobs",
+    settings.DELETION_RETRY_INTERVAL_SECONDS,
+    resume_jobs,
+)
@@ -0,0 +1,21 @@
+# app/api/deletions/models.py
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime
+
+# 相対インポートに変更
+from ...core.database import Base
+
+class DeletionJob(Base):
+    __tablename__ = "deletion_jobs"
+
+    job_id = Column(Integer, primary_key=True, autoincrement=True)
+    entity_type = Column(String(32), nullable=False)  # trouble / project / trouble_category / project_category
+    entity_id = Column(Integer, nullable=False)
+    requested_by_user_id = Column(Integer, nullable=True)
+    status = Column(String(16), nullable=False, default="pending", index=True)  # pending / running / completed / failed
+    deleted_rows = Column(Integer, nullable=False, default=0)  # 削除・更新済みの行数（進捗）
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # 最後に進捗があった日時（UTC）
+    completed_at = Column(DateTime, nullable=True)
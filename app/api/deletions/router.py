@@ -0,0 +1,23 @@
+# app/api/deletions/router.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from ...core.database import get_db
+from ..auth.jwt import get_current_user
+from ..users.models import User
+from .models import DeletionJob
+from .schemas import DeletionJobResponse
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=DeletionJobResponse)
+def get_deletion_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """削除ジョブの進捗を取得する（削除を依頼したユーザーのみ）"""
+    job = db.query(DeletionJob).filter(DeletionJob.job_id == job_id).first()
+    if not job or job.requested_by_user_id != current_user.user_id:
+        raise HTTPException(status_code=404, detail="削除ジョブが見つかりません")
+    return job
@@ -0,0 +1,16 @@
+# app/api/deletions/schemas.py
+from datetime import datetime
+from typing import Optional
+
+from ...schemas.base import BaseSchemaModel
+
+class DeletionJobResponse(BaseSchemaModel):
+    job_id: int
+    entity_type: str
+    entity_id: int
+    status: str
+    deleted_rows: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    completed_at: Optional[datetime] = None
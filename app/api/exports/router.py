@@ -0,0 +1,171 @@
+# app/api/exports/router.py
+from datetime import datetime
+from typing import Iterator, List, Optional
+import csv
+import io
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+from ...core.database import SessionLocal, get_db
+from ..auth.jwt import get_current_user, is_admin_user
+from ..users.models import User
+from ..projects.models import CoCreationProject
+from ..troubles.models import Trouble, TroubleArchive
+from ..messages.models import Message, MessageArchive
+
+router = APIRouter()
+
+# サーバーサイドカーソルから一度に取り出す行数
+EXPORT_BATCH_SIZE = 1000
+
+_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+TROUBLE_FIELDS = ["trouble_id", "project_id", "category_id", "status", "creator_user_id", "created_at", "description"]
+MESSAGE_FIELDS = ["message_id", "trouble_id", "parent_message_id", "sender_user_id", "sender_name", "sent_at", "content"]
+
+
+def _trouble_select(trouble_model, project_id: int, status_filter, created_from, created_to):
+    statement = select(*[getattr(trouble_model, field) for field in TROUBLE_FIELDS]).where(
+        trouble_model.project_id == project_id
+    )
+    if status_filter:
+        statement = statement.where(trouble_model.status == status_filter)
+    if created_from:
+        statement = statement.where(trouble_model.created_at >= created_from)
+    if created_to:
+        statement = statement.where(trouble_model.created_at < created_to)
+    return statement
+
+
+def _message_select(message_model, trouble_model, project_id: int, status_filter, sent_from, sent_to):
+    columns = [
+        User.name.label("sender_name") if field == "sender_name" else getattr(message_model, field)
+        for field in MESSAGE_FIELDS
+    ]
+    statement = select(*columns).join(
+        trouble_model, trouble_model.trouble_id == message_model.trouble_id
+    ).join(
+        User, User.user_id == message_model.sender_user_id
+    ).where(trouble_model.project_id == project_id)
+    if status_filter:
+        statement = statement.where(trouble_model.status == status_filter)
+    if sent_from:
+        statement = statement.where(message_model.sent_at >= sent_from)
+    if sent_to:
+        statement = statement.where(message_model.sent_at < sent_to)
+    return statement
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _stream_rows(statement, field_names: List[str], export_format: str) -> Iterator[bytes]:
+    """
+    クエリ結果をサーバーサイドカーソルで少しずつ読み出し、NDJSON / CSV に変換して返す
+
+    レスポンス送信中もDB接続を使うため、リクエストのセッションとは別にセッションを開く
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if export_format == "csv" else None
+        if writer is not None:
+            # Excelで文字化けしないようBOMを付ける
+            buffer.write("\ufeff")
+            writer.writerow(field_names)
+
+        for rows in result.partitions():
+            for row in rows:
+                values = [_encode_value(value) for value in row]
+                if writer is not None:
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(field_names, values)), ensure_ascii=False))
+                    buffer.write("\n")
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+        remaining = buffer.getvalue()
+        if remaining:
+            yield remaining.encode("utf-8")
+    finally:
+        db.close()
+
+
+def _check_project_owner(db: Session, project_id: int, current_user: User) -> None:
+    """エクスポートはプロジェクトの作成者と管理者（ADMIN_USER_IDS）のみ実行できる"""
+    creator_user_id = db.query(CoCreationProject.creator_user_id).filter(
+        CoCreationProject.project_id == project_id
+    ).scalar()
+    if creator_user_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="プロジェクトが見つかりません")
+    if creator_user_id != current_user.user_id and not is_admin_user(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="このプロジェクトをエクスポートする権限がありません")
+
+
+def _streaming_response(statement, field_names: List[str], export_format: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_rows(statement, field_names, export_format),
+        media_type=_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'}
+    )
+
+
+@router.get("/troubles")
+def export_troubles(
+    project_id: int,
+    status_filter: Optional[str] = Query(None, alias="status", description="お困りごとの状態（未解決 / 解決）"),
+    created_from: Optional[datetime] = Query(None, alias="from", description="作成日時の開始（この日時を含む）"),
+    created_to: Optional[datetime] = Query(None, alias="to", description="作成日時の終了（この日時を含まない）"),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    プロジェクトのお困りごとをNDJSON / CSVでストリーミング出力する（アーカイブ済みを含む）
+    """
+    _check_project_owner(db, project_id, current_user)
+
+    statement = union_all(
+        _trouble_select(Trouble, project_id, status_filter, created_from, created_to),
+        _trouble_select(TroubleArchive, project_id, status_filter, created_from, created_to)
+    )
+    statement = select(statement.subquery()).order_by("trouble_id")
+
+    return _streaming_response(statement, TROUBLE_FIELDS, export_format, f"project_{project_id}_troubles")
+
+
+@router.get("/messages")
+def export_messages(
+    project_id: int,
+    status_filter: Optional[str] = Query(None, alias="status", description="お困りごとの状態で絞り込む（未解決 / 解決）"),
+    sent_from: Optional[datetime] = Query(None, alias="from", description="送信日時の開始（この日時を含む）"),
+    sent_to: Optional[datetime] = Query(None, alias="to", description="送信日時の終了（この日時を含まない）"),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    プロジェクトのお困りごとに投稿されたメッセージをNDJSON / CSVでストリーミング出力する（アーカイブ済みを含む）
+    """
+    _check_project_owner(db, project_id, current_user)
+
+    statement = union_all(
+        _message_select(Message, Trouble, project_id, status_filter, sent_from, sent_to),
+        _message_select(MessageArchive, TroubleArchive, project_id, status_filter, sent_from, sent_to)
+    )
+    statement = select(statement.subquery()).order_by("message_id")
+
+    return _streaming_response(statement, MESSAGE_FIELDS, export_format, f"project_{project_id}_messages")
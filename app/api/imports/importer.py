@@ -0,0 +1,223 @@
+# app/api/imports/importer.py
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ...core.bulk import insert_returning_ids
+from ..activity import buckets as activity
+from ..projects import stats
+from ..projects.models import CoCreationProject, ProjectCategory
+from ..projects.recommendations import project_recommender
+from ..projects.trending import trending_tracker
+from ..sync import changelog
+from ..sync.models import ChangeLogEntry
+from ..troubles.models import Trouble, TroubleCategory
+from ..troubles.similarity import trouble_similarity_index
+from .models import ImportedEntity
+from .schemas import ImportRowResult, ProjectImportRow, TroubleImportRow
+
+PROJECT = "project"
+TROUBLE = "trouble"
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def _validate(
+    records: Iterable[Tuple[int, object]],
+    schema: type,
+    seen_external_ids: Set[str],
+    results: List[ImportRowResult]
+) -> List[Tuple[int, BaseModel]]:
+    """入力行を検証し、エラー行は結果に記録して有効な行だけを返す"""
+    valid = []
+    for row, record in records:
+        if isinstance(record, str):
+            results.append(ImportRowResult(row=row, status="error", error=record))
+            continue
+        if record.get("external_id") is not None:
+            record["external_id"] = str(record["external_id"])
+        try:
+            item = schema.model_validate(record)
+        except ValidationError as e:
+            results.append(ImportRowResult(
+                row=row, external_id=record.get("external_id"), status="error", error=_format_validation_error(e)
+            ))
+            continue
+        if item.external_id in seen_external_ids:
+            results.append(ImportRowResult(
+                row=row, external_id=item.external_id, status="error", error="外部IDが入力内で重複しています"
+            ))
+            continue
+        seen_external_ids.add(item.external_id)
+        valid.append((row, item))
+    return valid
+
+
+def _existing_entities(db: Session, owner_user_id: int, entity_type: str, external_ids: List[str]) -> Dict[str, int]:
+    """登録済みの外部ID → エンティティIDを取得する"""
+    if not external_ids:
+        return {}
+    return dict(db.query(ImportedEntity.external_id, ImportedEntity.entity_id).filter(
+        ImportedEntity.owner_user_id == owner_user_id,
+        ImportedEntity.entity_type == entity_type,
+        ImportedEntity.external_id.in_(external_ids)
+    ).all())
+
+
+def _record_imported(db: Session, owner_user_id: int, entity_type: str, created: List[Tuple[str, int]]) -> None:
+    """外部IDの対応と変更履歴をまとめて登録する"""
+    db.execute(insert(ImportedEntity.__table__), [
+        {"owner_user_id": owner_user_id, "entity_type": entity_type, "external_id": external_id, "entity_id": entity_id}
+        for external_id, entity_id in created
+    ])
+    db.execute(insert(ChangeLogEntry.__table__), [
+        {"entity_type": entity_type, "entity_id": entity_id, "operation": changelog.UPSERT, "changed_at": datetime.utcnow()}
+        for _, entity_id in created
+    ])
+
+
+def _commit_chunk(db: Session, pending: List[Tuple[int, BaseModel]], results: List[ImportRowResult]) -> bool:
+    """チャンクをコミットする（外部IDの同時登録で競合した場合はチャンク全体をエラーにする）"""
+    try:
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        for row, item in pending:
+            results.append(ImportRowResult(
+                row=row, external_id=item.external_id, status="error",
+                error="同じ外部IDの登録と競合しました。再実行してください"
+            ))
+        return False
+
+
+def import_projects(
+    db: Session,
+    owner_user_id: int,
+    records: List[Tuple[int, object]],
+    seen_external_ids: Set[str]
+) -> List[ImportRowResult]:
+    """プロジェクトのチャンクを検証して一括登録する（コミットは1回）"""
+    results: List[ImportRowResult] = []
+    valid = _validate(records, ProjectImportRow, seen_external_ids, results)
+
+    existing = _existing_entities(db, owner_user_id, PROJECT, [item.external_id for _, item in valid])
+    category_ids = {item.category_id for _, item in valid if item.category_id}
+    known_categories = {
+        row[0] for row in db.query(ProjectCategory.category_id).filter(ProjectCategory.category_id.in_(category_ids)).all()
+    } if category_ids else set()
+
+    pending = []
+    for row, item in valid:
+        if item.external_id in existing:
+            results.append(ImportRowResult(row=row, external_id=item.external_id, status="skipped", entity_id=existing[item.external_id]))
+        elif item.category_id and item.category_id not in known_categories:
+            results.append(ImportRowResult(row=row, external_id=item.external_id, status="error", error="指定されたカテゴリーが見つかりません"))
+        else:
+            pending.append((row, item))
+    if not pending:
+        return results
+
+    now = datetime.now()
+    project_ids = insert_returning_ids(db, CoCreationProject, "project_id", [
+        {
+            "title": item.title,
+            "summary": item.summary,
+            "description": item.description,
+            "creator_user_id": owner_user_id,
+            "category_id": item.category_id,
+            "created_at": now,
+        } for _, item in pending
+    ])
+    _record_imported(db, owner_user_id, PROJECT, [(item.external_id, project_id) for (_, item), project_id in zip(pending, project_ids)])
+    stats.add_project_counts(db, Counter(item.category_id for _, item in pending))
+    if not _commit_chunk(db, pending, results):
+        return results
+
+    for (row, item), project_id in zip(pending, project_ids):
+        project_recommender.on_project_saved(project_id, item.category_id, owner_user_id)
+        results.append(ImportRowResult(row=row, external_id=item.external_id, status="created", entity_id=project_id))
+    return results
+
+
+def import_troubles(
+    db: Session,
+    owner_user_id: int,
+    records: List[Tuple[int, object]],
+    seen_external_ids: Set[str]
+) -> List[ImportRowResult]:
+    """お困りごとのチャンクを検証して一括登録する（コミットは1回）"""
+    results: List[ImportRowResult] = []
+    valid = _validate(records, TroubleImportRow, seen_external_ids, results)
+
+    existing = _existing_entities(db, owner_user_id, TROUBLE, [item.external_id for _, item in valid])
+    project_refs = _existing_entities(
+        db, owner_user_id, PROJECT, [item.project_external_id for _, item in valid if item.project_external_id]
+    )
+    project_ids = {item.project_id for _, item in valid if item.project_id}
+    known_projects = {
+        row[0] for row in db.query(CoCreationProject.project_id).filter(CoCreationProject.project_id.in_(project_ids)).all()
+    } if project_ids else set()
+    category_ids = {item.category_id for _, item in valid}
+    known_categories = {
+        row[0] for row in db.query(TroubleCategory.category_id).filter(TroubleCategory.category_id.in_(category_ids)).all()
+    } if category_ids else set()
+
+    pending = []
+    for row, item in valid:
+        project_id: Optional[int] = item.project_id
+        error = None
+        if item.external_id in existing:
+            results.append(ImportRowResult(row=row, external_id=item.external_id, status="skipped", entity_id=existing[item.external_id]))
+            continue
+        if project_id is None and item.project_external_id:
+            project_id = project_refs.get(item.project_external_id)
+            if project_id is None:
+                error = "project_external_id に対応するプロジェクトが登録されていません"
+        elif project_id is None:
+            error = "project_id または project_external_id を指定してください"
+        elif project_id not in known_projects:
+            error = "プロジェクトが見つかりません"
+        if error is None and item.category_id not in known_categories:
+            error = "指定されたカテゴリーが見つかりません"
+        if error is not None:
+            results.append(ImportRowResult(row=row, external_id=item.external_id, status="error", error=error))
+            continue
+        pending.append((row, item, project_id))
+    if not pending:
+        return results
+
+    now = datetime.now()
+    trouble_ids = insert_returning_ids(db, Trouble, "trouble_id", [
+        {
+            "description": item.description,
+            "project_id": project_id,
+            "category_id": item.category_id,
+            "creator_user_id": owner_user_id,
+            "created_at": now,
+            "status": item.status or "未解決",
+        } for _, item, project_id in pending
+    ])
+    _record_imported(db, owner_user_id, TROUBLE, [(item.external_id, trouble_id) for (_, item, _), trouble_id in zip(pending, trouble_ids)])
+    stats.add_trouble_counts(db, Counter((project_id, item.category_id, item.status) for _, item, project_id in pending))
+    for project_id, count in Counter(project_id for _, _, project_id in pending).items():
+        activity.record(db, activity.PROJECT, project_id, "troubles", amount=count)
+    activity.record(db, activity.USER, owner_user_id, "troubles", amount=len(pending))
+    if not _commit_chunk(db, [(row, item) for row, item, _ in pending], results):
+        return results
+
+    for (row, item, project_id), trouble_id in zip(pending, trouble_ids):
+        trending_tracker.record_trouble(project_id)
+        trouble_similarity_index.add(trouble_id, project_id, item.description)
+        results.append(ImportRowResult(row=row, external_id=item.external_id, status="created", entity_id=trouble_id))
+    return results
@@ -0,0 +1,15 @@
+# app/api/imports/models.py
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+
+# 相対インポートに変更
+from ...core.database import Base
+
+class ImportedEntity(Base):
+    __tablename__ = "imported_entities"
+
+    owner_user_id = Column(Integer, primary_key=True)  # 一括登録を実行したユーザーID（外部IDの名前空間）
+    entity_type = Column(String(16), primary_key=True)  # project / trouble
+    external_id = Column(String(128), primary_key=True)  # クライアントが指定する外部ID
+    entity_id = Column(Integer, nullable=False)  # 登録されたプロジェクトID・お困りごとID
+    imported_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,68 @@
+# app/api/imports/parsing.py
+from typing import AsyncIterator, List, Tuple
+import csv
+import json
+
+
+async def _iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """受信したバイト列を行単位に分割する（全体をメモリに載せない）"""
+    pending = b""
+    async for chunk in stream:
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8-sig").rstrip("\r")
+
+
+async def iter_records(stream: AsyncIterator[bytes], import_format: str) -> AsyncIterator[Tuple[int, object]]:
+    """
+    NDJSON / CSV の入力を1件ずつ返す
+
+    :return: (データ行の番号, 辞書またはパースエラーのメッセージ) を順に返す
+    """
+    row_number = 0
+    if import_format == "ndjson":
+        async for line in _iter_lines(stream):
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, f"JSONとして解析できません: {str(e)}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, "各行はJSONオブジェクトである必要があります"
+                continue
+            yield row_number, record
+        return
+
+    header: List[str] = []
+    buffered: List[str] = []
+    async for line in _iter_lines(stream):
+        buffered.append(line)
+        # 引用符内の改行を含むレコードは引用符の数が揃うまで行をつなげる
+        text = "\n".join(buffered)
+        if text.count('"') % 2 == 1:
+            continue
+        buffered = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if not header:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, f"列数がヘッダーと一致しません（{len(values)}列 / {len(header)}列）"
+            continue
+        yield row_number, {
+            name: (value if value != "" else None)
+            for name, value in zip(header, values)
+        }
+    if buffered:
+        row_number += 1
+        yield row_number, "引用符が閉じられていません"
@@ -0,0 +1,89 @@
+# app/api/imports/router.py
+from typing import Callable, List, Optional, Set, Tuple
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+
+from ...core.database import SessionLocal
+from ..auth.jwt import get_current_user
+from ..users.models import User
+from . import importer
+from .parsing import iter_records
+from .schemas import ImportReport, ImportRowResult
+
+router = APIRouter()
+
+
+def _run_chunk(func: Callable, owner_user_id: int, records: List[Tuple[int, object]], seen_external_ids: Set[str]) -> List[ImportRowResult]:
+    db = SessionLocal()
+    try:
+        return func(db, owner_user_id, records, seen_external_ids)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def _import(request: Request, func: Callable, import_format: Optional[str], chunk_size: int, current_user: User) -> ImportReport:
+    """リクエスト本文を読みながらチャンク単位で検証・登録する"""
+    if import_format is None:
+        import_format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+
+    report = ImportReport()
+    seen_external_ids: Set[str] = set()
+    chunk: List[Tuple[int, object]] = []
+
+    async def flush() -> None:
+        results = await run_in_threadpool(_run_chunk, func, current_user.user_id, chunk, seen_external_ids)
+        report.results.extend(results)
+        chunk.clear()
+
+    async for record in iter_records(request.stream(), import_format):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            await flush()
+    if chunk:
+        await flush()
+
+    report.results.sort(key=lambda result: result.row)
+    for result in report.results:
+        if result.status == "created":
+            report.created += 1
+        elif result.status == "skipped":
+            report.skipped += 1
+        else:
+            report.failed += 1
+    return report
+
+
+@router.post("/projects", response_model=ImportReport)
+async def import_projects(
+    request: Request,
+    import_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$", description="省略時は Content-Type から判定"),
+    chunk_size: int = Query(500, ge=1, le=5000),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    プロジェクトをNDJSON / CSVで一括登録する
+
+    - 列: external_id, title, description, summary, category_id
+    - 登録済みの external_id は skipped として登録済みのIDを返す（再実行しても重複しない）
+    """
+    return await _import(request, importer.import_projects, import_format, chunk_size, current_user)
+
+
+@router.post("/troubles", response_model=ImportReport)
+async def import_troubles(
+    request: Request,
+    import_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$", description="省略時は Content-Type から判定"),
+    chunk_size: int = Query(500, ge=1, le=5000),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    お困りごとをNDJSON / CSVで一括登録する
+
+    - 列: external_id, project_id または project_external_id, description, category_id, status
+    - 登録済みの external_id は skipped として登録済みのIDを返す（再実行しても重複しない）
+    """
+    return await _import(request, importer.import_troubles, import_format, chunk_size, current_user)
@@ -0,0 +1,33 @@
+# app/api/imports/schemas.py
+from pydantic import Field
+from typing import List, Optional
+
+from ...schemas.base import BaseSchemaModel
+
+class ProjectImportRow(BaseSchemaModel):
+    external_id: str = Field(..., min_length=1, max_length=128, description="クライアントが指定する外部ID（再実行時の重複防止）")
+    title: str = Field(..., min_length=1)
+    description: str = Field(..., min_length=10)
+    summary: Optional[str] = Field(None, max_length=1000)
+    category_id: Optional[int] = None
+
+class TroubleImportRow(BaseSchemaModel):
+    external_id: str = Field(..., min_length=1, max_length=128, description="クライアントが指定する外部ID（再実行時の重複防止）")
+    project_id: Optional[int] = Field(None, description="既存プロジェクトのID")
+    project_external_id: Optional[str] = Field(None, description="一括登録したプロジェクトの外部ID（project_id の代わりに指定）")
+    description: str = Field(..., min_length=10, max_length=1000)
+    category_id: int
+    status: Optional[str] = Field("未解決", pattern="^(未解決|解決)$")
+
+class ImportRowResult(BaseSchemaModel):
+    row: int = Field(..., description="入力の行番号（データ行の1始まり）")
+    external_id: Optional[str] = None
+    status: str = Field(..., description="created / skipped（登録済み） / error")
+    entity_id: Optional[int] = None
+    error: Optional[str] = None
+
+class ImportReport(BaseSchemaModel):
+    created: int = 0
+    skipped: int = 0
+    failed: int = 0
+    results: List[ImportRowResult] = Field(default_factory=list)
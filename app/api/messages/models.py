@@ -1,5 +1,5 @@
 # app/api/messages/models.py
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -15,6 +15,7 @@ class Message(Base):
     content = Column(Text, nullable=False)
     sent_at = Column(DateTime(timezone=True), server_default=func.now())
     parent_message_id = Column(Integer, ForeignKey("trouble_messages.message_id"), nullable=True) 
+    insert_token = Column(String(32), nullable=True)  # まとめて登録したメッセージのIDを取得するためのトークン（MySQL。app/core/bulk.py）
     
     # リレーションシップ
     sender = relationship("User", back_populates="messages")
@@ -31,4 +32,15 @@ class Message(Base):
     # 代わりにget_repliesメソッドを追加
     def get_replies(self, db_session):
         """このメッセージへの返信を取得するメソッド"""
-        return db_session.query(Message).filter(Message.parent_message_id == self.message_id).all()
\ No newline at end of file
+        return db_session.query(Message).filter(Message.parent_message_id == self.message_id).all()
+
+class MessageArchive(Base):
+    __tablename__ = "trouble_messages_archive"
+
+    message_id = Column(Integer, primary_key=True)
+    trouble_id = Column(Integer, nullable=False, index=True)
+    sender_user_id = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    sent_at = Column(DateTime(timezone=True))
+    parent_message_id = Column(Integer, nullable=True)
+    archived_at = Column(DateTime, nullable=False)
@@ -0,0 +1,123 @@
+# app/api/messages/partitioning.py
+"""
+trouble_messages の月単位レンジパーティショニング（MySQLのみ・任意）
+
+MySQL のパーティションテーブルには次の制約があるため、初回の変換時にあわせて変更する
+- すべての一意キー（主キー）にパーティションキーを含める必要がある → 主キーを (message_id, sent_at) にする
+- 外部キーを持てない → trouble_messages の外部キーを削除する（整合性はアプリケーション側で保証する）
+
+メッセージの投稿は通常、お困りごと・親メッセージの存在確認を外部キー制約の違反で行うため、
+外部キーがなくなったことを message_foreign_keys で検出し、その場合は INSERT 前に存在確認を行う。
+実行中のワーカーは最大 FOREIGN_KEY_RECHECK_SECONDS 秒で存在確認に切り替わる（直後から確実に切り替えるには再起動する）
+"""
+from datetime import date
+from typing import List, Optional
+import threading
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+TABLE_NAME = "trouble_messages"
+
+# 外部キーの有無を確認し直す間隔（秒）
+FOREIGN_KEY_RECHECK_SECONDS = 60
+
+
+class ForeignKeyState:
+    """trouble_messages に外部キーがあるかどうか（パーティショニングで削除される）をプロセス内で保持する"""
+
+    def __init__(self, recheck_seconds: float = FOREIGN_KEY_RECHECK_SECONDS):
+        self.recheck_seconds = recheck_seconds
+        self._enforced = False
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def enforced(self, db: Session) -> bool:
+        """外部キー制約で参照先の存在を確認できるかどうか（確認できない場合は False）"""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.recheck_seconds:
+            return self._enforced
+        with self._lock:
+            if self._checked_at is None or now - self._checked_at >= self.recheck_seconds:
+                try:
+                    self._enforced = bool(inspect(db.get_bind()).get_foreign_keys(TABLE_NAME))
+                except Exception as e:
+                    print(f"trouble_messages の外部キーを確認できませんでした（存在確認を行います）: {str(e)}")
+                    self._enforced = False
+                self._checked_at = now
+            return self._enforced
+
+
+# アプリケーション全体で共有する外部キーの状態
+message_foreign_keys = ForeignKeyState()
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    month_index = day.year * 12 + (day.month - 1) + offset
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _partition_clause(month: date) -> str:
+    upper = _month_start(month, 1)
+    return f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))"
+
+
+def existing_partitions(connection: Connection) -> List[str]:
+    rows = connection.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"table": TABLE_NAME}).fetchall()
+    return [row[0] for row in rows]
+
+
+def build_partition_ddl(connection: Connection, months_ahead: int, today: date = None) -> List[str]:
+    """
+    パーティショニングのためのDDLを生成する
+
+    - 未パーティションの場合: 外部キー・主キーの変更と、最古のメッセージの月から months_ahead か月先までのパーティションを作成
+    - パーティション済みの場合: pmax を分割して months_ahead か月先までのパーティションを追加
+    """
+    today = today or date.today()
+    last_month = _month_start(today, months_ahead)
+    partitions = existing_partitions(connection)
+
+    if partitions:
+        existing = {name for name in partitions if name != "pmax"}
+        month = _month_start(today)
+        new_clauses = []
+        while month <= last_month:
+            if f"p{month:%Y%m}" not in existing:
+                new_clauses.append(_partition_clause(month))
+            month = _month_start(month, 1)
+        if not new_clauses:
+            return []
+        return [
+            f"ALTER TABLE {TABLE_NAME} REORGANIZE PARTITION pmax INTO ("
+            + ", ".join(new_clauses + ["PARTITION pmax VALUES LESS THAN MAXVALUE"]) + ")"
+        ]
+
+    statements = [
+        f"ALTER TABLE {TABLE_NAME} DROP FOREIGN KEY `{foreign_key['name']}`"
+        for foreign_key in inspect(connection).get_foreign_keys(TABLE_NAME)
+        if foreign_key.get("name")
+    ]
+    statements.append(
+        f"ALTER TABLE {TABLE_NAME} "
+        "MODIFY sent_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        "DROP PRIMARY KEY, ADD PRIMARY KEY (message_id, sent_at)"
+    )
+
+    oldest = connection.execute(text(f"SELECT MIN(sent_at) FROM {TABLE_NAME}")).scalar()
+    month = _month_start(oldest.date() if oldest else today)
+    clauses = []
+    while month <= last_month:
+        clauses.append(_partition_clause(month))
+        month = _month_start(month, 1)
+    clauses.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    statements.append(
+        f"ALTER TABLE {TABLE_NAME} PARTITION BY RANGE (TO_DAYS(sent_at)) (" + ", ".join(clauses) + ")"
+    )
+    return statements
@@ -1,14 +1,27 @@
 # app/api/messages/router.py
 from typing import List
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from ...core.database import get_db
+from ...core.integrity import is_foreign_key_violation, violated_column
 from ..auth.jwt import get_current_user
 # from ...core.dependencies import get_current_user
 from ..users.models import User
+from ..users.directory import user_directory
+from ..users import points
+from ..activity import buckets as activity
+from ..sync import changelog
+from ..troubles.experts import expert_index
+from ..troubles import archive
+from ..troubles.directory import trouble_directory
 from ..troubles.models import Trouble
+from ..projects.trending import trending_tracker
 from .models import Message
+from .partitioning import message_foreign_keys
+from .write_buffer import message_write_buffer
 from . import schemas
 
 router = APIRouter()
@@ -22,43 +35,112 @@ def create_message(
     """
     新しいメッセージを作成する
     """
-    # お困りごとの存在確認
-    trouble = db.query(Trouble).filter(Trouble.trouble_id == message.trouble_id).first()
+    # お困りごとの存在確認（参照キャッシュから取得し、通常はDBにアクセスしない）
+    trouble = trouble_directory.get(db, message.trouble_id)
     if not trouble:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="指定されたお困りごとが見つかりません"
         )
+    if trouble.archived:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="アーカイブ済みのお困りごとにはメッセージを投稿できません"
+        )
     
-    # 親メッセージの存在確認（指定されている場合）
-    if message.parent_message_id:
-        parent_message = db.query(Message).filter(Message.message_id == message.parent_message_id).first()
-        if not parent_message:
+    # コミット後は current_user の属性が失効して再読み込みが発生するため、必要な値は先に取り出す
+    sender_user_id = current_user.user_id
+    sender_name = current_user.name
+    is_answer = sender_user_id != trouble.creator_user_id
+    department_id = current_user.get_category_id()
+    num_answer = current_user.num_answer or 0
+    
+    if not message_foreign_keys.enforced(db):
+        # パーティショニングで外部キーを削除した場合は制約違反で検出できないため、INSERT 前に存在を確認する
+        if db.query(Trouble.trouble_id).filter(Trouble.trouble_id == message.trouble_id).first() is None:
+            trouble_directory.invalidate(message.trouble_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="指定されたお困りごとが見つかりません"
+            )
+        if message.parent_message_id and db.query(Message.message_id).filter(
+            Message.message_id == message.parent_message_id
+        ).first() is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="指定された親メッセージが見つかりません"
             )
     
     # 新しいメッセージを作成
-    new_message = Message(
-        content=message.content,
-        sender_user_id=current_user.user_id,  # user_idからsender_user_idに変更
-        trouble_id=message.trouble_id,
-        parent_message_id=message.parent_message_id
-    )
+    # 親メッセージの存在確認は外部キー制約で行い（外部キーがない場合は上で確認済み）、
+    # 送信日時はコミット後の再読み込みを避けるためアプリケーション側で設定する
+    sent_at = datetime.now()
+    row = {
+        "content": message.content,
+        "sender_user_id": sender_user_id,  # user_idからsender_user_idに変更
+        "trouble_id": message.trouble_id,
+        "parent_message_id": message.parent_message_id,
+        "sent_at": sent_at,
+    }
     
-    db.add(new_message)
-    db.commit()
-    db.refresh(new_message)
+    def after_insert(session: Session, message_id: int) -> None:
+        """メッセージと同じトランザクションで記録する"""
+        changelog.record(session, changelog.MESSAGE, message_id)
+        if is_answer:
+            # 他のユーザーのお困りごとへの返信にポイントを付与（集計は非同期）
+            points.award(session, sender_user_id, points.REPLY, trouble.trouble_id)
+        activity.record_message(session, trouble.project_id, sender_user_id)
+    
+    try:
+        # 書き込みバッファが有効な場合は同時に投稿されたメッセージとまとめてコミットする
+        if message_write_buffer.active:
+            # 完了を待つ間にコネクションを保持し続けないよう、参照のみのトランザクションを終えてプールへ返す
+            db.rollback()
+        message_id = message_write_buffer.submit(row, after_insert)
+        if message_id is None:
+            new_message = Message(**row)
+            db.add(new_message)
+            db.flush()
+            message_id = new_message.message_id
+            after_insert(db, message_id)
+            db.commit()
+    except TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="メッセージの登録が混み合っています。しばらくしてから再度お試しください"
+        )
+    except IntegrityError as e:
+        db.rollback()
+        if not is_foreign_key_violation(e):
+            raise
+        trouble_directory.invalidate(message.trouble_id)
+        if message.parent_message_id and violated_column(e, ["trouble_id"]) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="指定された親メッセージが見つかりません"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="指定されたお困りごとが見つかりません"
+        )
+    trending_tracker.record_message(trouble.project_id)
+    if is_answer:
+        # お困りごとの作成者以外のメッセージを回答として記録
+        expert_index.record_answer(
+            trouble.category_id,
+            sender_user_id,
+            department_id,
+            num_answer
+        )
     
     return schemas.MessageResponse(
-        message_id=new_message.message_id,  # idからmessage_idに変更
-        content=new_message.content,
-        sender_user_id=new_message.sender_user_id,  # user_idからsender_user_idに変更
-        sender_name=current_user.name,  # user_nameからsender_nameに変更
-        trouble_id=new_message.trouble_id,
-        sent_at=new_message.sent_at,  # created_atからsent_atに変更
-        parent_message_id=new_message.parent_message_id
+        message_id=message_id,  # idからmessage_idに変更
+        content=message.content,
+        sender_user_id=sender_user_id,  # user_idからsender_user_idに変更
+        sender_name=sender_name,  # user_nameからsender_nameに変更
+        trouble_id=message.trouble_id,
+        sent_at=sent_at,  # created_atからsent_atに変更
+        parent_message_id=message.parent_message_id
     )
 
 @router.get("/trouble/{trouble_id}", response_model=schemas.MessagesListResponse)
@@ -72,8 +154,8 @@ def get_messages_by_trouble(
     """
     特定のお困りごとに関するメッセージの一覧を取得する
     """
-    # お困りごとの存在確認
-    trouble = db.query(Trouble).filter(Trouble.trouble_id == trouble_id).first()
+    # お困りごとの存在確認（アーカイブ済みの場合はアーカイブから取得）
+    trouble = archive.get_trouble(db, trouble_id)
     if not trouble:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -81,15 +163,19 @@ def get_messages_by_trouble(
         )
     
     # メッセージの取得
-    query = db.query(Message).filter(Message.trouble_id == trouble_id)
+    message_model = archive.message_model_for(trouble)
+    query = db.query(message_model).filter(message_model.trouble_id == trouble_id)
     total = query.count()
 
-    messages = query.order_by(Message.sent_at).offset(skip).limit(limit).all()
+    messages = query.order_by(message_model.sent_at).offset(skip).limit(limit).all()
+    
+    # 送信者情報をまとめて取得
+    senders = user_directory.get_many(db, [msg.sender_user_id for msg in messages])
     
     # レスポンスの作成
     message_responses = []
     for msg in messages:
-        user = db.query(User).filter(User.user_id == msg.sender_user_id).first()
+        user = senders.get(msg.sender_user_id)
         message_responses.append(schemas.MessageResponse(
             message_id=msg.message_id,
             content=msg.content,
@@ -0,0 +1,227 @@
+# app/api/messages/write_buffer.py
+"""
+メッセージ投稿の書き込みバッファ（グループコミット）
+
+同時に投稿されたメッセージを最大 MESSAGE_WRITE_BUFFER_MAX_DELAY_MS ミリ秒まとめ、
+1回の複数行 INSERT と1回のコミットで登録する。各投稿者には自分のメッセージIDを返す。
+（MySQL では RETURNING の代わりに insert_token で採番されたIDを取得する。app/core/bulk.py）
+
+- 待ち行列が上限に達している・ワーカーが停止している場合は None を返し、呼び出し元で直接 INSERT する
+- まとめた書き込みが失敗した場合は1件ずつのトランザクションでやり直し、失敗した投稿にだけ例外を返す
+- コミット前にプロセスが停止した場合、投稿者には完了を返していないため書き込みは失われても不整合にならない
+- 完了を待ちきれずに 503 を返す書き込みは取り消し、後から登録しない（再送しても重複しない）。
+  INSERT を始めていた書き込みは取り消せないため、もう一度 MESSAGE_WRITE_BUFFER_RESULT_TIMEOUT_SECONDS まで完了を待ち、
+  それでも終わらない場合だけ 503 を返す（この場合は登録されている可能性がある）
+- フラッシュ中の予期しない例外（セッションの作成・ロールバックの失敗など）はまとめた書き込みすべてに返し、
+  ワーカーは次のバッチの処理を続ける。ワーカーが異常終了した場合は受け付けを止め、呼び出し元で直接 INSERT させる
+"""
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional
+import queue
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from ...core.background import register_worker
+from ...core.bulk import insert_returning_ids
+from ...core.config import settings
+from ...core.database import SessionLocal
+from .models import Message
+
+# INSERT と同じトランザクションで行う処理（変更履歴・ポイント付与など）。引数は (セッション, メッセージID)
+AfterInsert = Callable[[Session, int], None]
+
+_STOP = object()
+
+
+class _PendingWrite:
+    __slots__ = ("row", "after_insert", "future")
+
+    def __init__(self, row: Dict, after_insert: AfterInsert):
+        self.row = row
+        self.after_insert = after_insert
+        self.future: Future = Future()
+
+
+class MessageWriteBuffer:
+    def __init__(
+        self,
+        enabled: bool,
+        max_delay_seconds: float,
+        max_batch: int,
+        queue_size: int,
+        result_timeout_seconds: float,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.enabled = enabled
+        self.max_delay_seconds = max_delay_seconds
+        self.max_batch = max_batch
+        self.result_timeout_seconds = result_timeout_seconds
+        self.session_factory = session_factory
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    # ---- 呼び出し側 ----
+
+    @property
+    def active(self) -> bool:
+        """書き込みを受け付けている（有効かつワーカーが動作中）かどうか"""
+        return self.enabled and self._running
+
+    def submit(self, row: Dict, after_insert: AfterInsert) -> Optional[int]:
+        """
+        メッセージをバッファ経由で登録し、採番されたメッセージIDを返す
+
+        :return: バッファを使えない（無効・停止中・待ち行列が満杯）場合は None
+        :raises: 書き込みに失敗した場合はその例外（IntegrityError など）、完了を待ちきれない場合は TimeoutError
+        """
+        if not self.active:
+            return None
+        pending = _PendingWrite(row, after_insert)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            return None
+        try:
+            return pending.future.result(timeout=self.result_timeout_seconds)
+        except FutureTimeoutError:
+            pass
+        # まだ書き込みを始めていなければ取り消す（始めている場合は期限付きで完了を待つ）
+        if not pending.future.cancel():
+            try:
+                return pending.future.result(timeout=self.result_timeout_seconds)
+            except FutureTimeoutError:
+                pass
+        # Python 3.10 では組み込みの TimeoutError と別クラスのため変換する
+        raise TimeoutError("メッセージの書き込み完了を待ちきれませんでした")
+
+    # ---- ワーカー ----
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="message-write-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """新規の受け付けを止め、待ち行列に残っている書き込みをフラッシュしてから停止する"""
+        if self._thread is None:
+            return
+        self._running = False
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        try:
+            self._loop()
+        except BaseException as e:
+            # 受け付けを止め、待ち行列に残った書き込みを失敗させる（呼び出し元は直接 INSERT に切り替わる）
+            self._running = False
+            print(f"メッセージ書き込みバッファのワーカーが停止しました: {str(e)}")
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP and item.future.set_running_or_notify_cancel():
+                    item.future.set_exception(e)
+            raise
+
+    def _loop(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush_safely(batch)
+
+        # 停止要求までに受け付けた書き込みを残さずフラッシュする
+        remaining_items = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                remaining_items.append(item)
+        for start in range(0, len(remaining_items), self.max_batch):
+            self._flush_safely(remaining_items[start:start + self.max_batch])
+
+    def _flush_safely(self, batch: List[_PendingWrite]) -> None:
+        """フラッシュし、予期しない例外は結果の決まっていない書き込みすべてに返す（ワーカーは止めない）"""
+        try:
+            self._flush(batch)
+        except Exception as e:
+            print(f"メッセージの書き込みに失敗しました: {str(e)}")
+            self._fail(batch, e)
+        except BaseException as e:
+            self._fail(batch, e)
+            raise
+
+    @staticmethod
+    def _fail(batch: List[_PendingWrite], error: BaseException) -> None:
+        for pending in batch:
+            if not pending.future.done():
+                pending.future.set_exception(error)
+
+    def _flush(self, batch: List[_PendingWrite]) -> None:
+        # 待ちきれずに取り消された書き込みを除き、残りは取り消せない状態にする
+        batch = [pending for pending in batch if pending.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        db = self.session_factory()
+        try:
+            try:
+                message_ids = insert_returning_ids(db, Message, "message_id", [pending.row for pending in batch])
+                for pending, message_id in zip(batch, message_ids):
+                    pending.after_insert(db, message_id)
+                db.commit()
+            except Exception:
+                db.rollback()
+                # 1件の制約違反などでまとめた全件を失敗させないよう、1件ずつやり直す
+                for pending in batch:
+                    self._flush_one(db, pending)
+                return
+            for pending, message_id in zip(batch, message_ids):
+                pending.future.set_result(message_id)
+        finally:
+            db.close()
+
+    def _flush_one(self, db: Session, pending: _PendingWrite) -> None:
+        try:
+            message_id = insert_returning_ids(db, Message, "message_id", [pending.row])[0]
+            pending.after_insert(db, message_id)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            pending.future.set_exception(e)
+            return
+        pending.future.set_result(message_id)
+
+
+# アプリケーション全体で共有する書き込みバッファ（MESSAGE_WRITE_BUFFER_ENABLED で有効化）
+message_write_buffer = register_worker(MessageWriteBuffer(
+    enabled=settings.MESSAGE_WRITE_BUFFER_ENABLED,
+    max_delay_seconds=settings.MESSAGE_WRITE_BUFFER_MAX_DELAY_MS / 1000,
+    max_batch=settings.MESSAGE_WRITE_BUFFER_MAX_BATCH,
+    queue_size=settings.MESSAGE_WRITE_BUFFER_QUEUE_SIZE,
+    result_timeout_seconds=settings.MESSAGE_WRITE_BUFFER_RESULT_TIMEOUT_SECONDS,
+))
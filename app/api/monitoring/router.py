@@ -0,0 +1,35 @@
+# app/api/monitoring/router.py
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from ...core.circuit_breaker import db_circuit
+from ...core.metrics import metrics
+from ...core.warmup import is_ready, readiness_report
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    """
+    メトリクスを Prometheus のテキスト形式で返す（受け付け制御の対象外）
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/healthz", include_in_schema=False)
+async def get_health() -> dict:
+    """
+    プロセスが応答できるかどうか（liveness。DBにはアクセスしない）
+    """
+    return {"status": "ok"}
+
+@router.get("/readyz", include_in_schema=False)
+async def get_readiness() -> JSONResponse:
+    """
+    リクエストを受けられる状態かどうか（readiness）
+
+    起動後のウォームアップ（コネクションプール・参照キャッシュ・インデックスの準備）が完了するまで 503 を返す。
+    DBの障害は全ワーカーに共通するため判定には含めず、サーキットブレーカーの状態は参考として返す。
+    """
+    report = readiness_report()
+    report["database_circuit"] = db_circuit.state
+    return JSONResponse(status_code=200 if is_ready() else 503, content=report)
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from ...core.database import get_db
-from ..auth.jwt import get_current_user
+from ..auth.jwt import get_current_admin_user, get_current_user
 from ..users.models import User
+from ..deletions import cascade
+from ..deletions.schemas import DeletionJobResponse
 from .models import ProjectCategory
 from .schemas import CategoryResponse, CategoryCreate
 
@@ -129,22 +131,18 @@ def update_category(
         name=db_category.name
     )
 
-@router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{category_id}", status_code=status.HTTP_202_ACCEPTED, response_model=DeletionJobResponse)
 def delete_category(
     category_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_admin_user)
 ):
     """
     カテゴリーを削除します。（管理者専用）
+
+    カテゴリーは即座に非表示になり、関連プロジェクトの未分類化と削除はバックグラウンドのジョブで行います。
     """
-    # 管理者権限のチェック
-    # if not current_user.is_admin:
-    #     raise HTTPException(
-    #         status_code=status.HTTP_403_FORBIDDEN,
-    #         detail="この操作には管理者権限が必要です"
-    #     )
-    
     # 削除対象のカテゴリーを取得
     db_category = db.query(ProjectCategory).filter(
         ProjectCategory.category_id == category_id
@@ -156,14 +154,8 @@ def delete_category(
             detail="カテゴリーが見つかりません"
         )
     
-    # TODO: このカテゴリーに関連付けられたプロジェクトの処理
-    # 例: 関連プロジェクトのカテゴリーをnullに設定する
-    # db.query(CoCreationProject).filter(CoCreationProject.category_id == category_id).update(
-    #     {"category_id": None}
-    # )
-    
-    # カテゴリーを削除
-    db.delete(db_category)
-    db.commit()
+    # 論理削除して削除ジョブを登録（関連プロジェクトのカテゴリーはジョブでnullに設定する）
+    job = cascade.request_category_deletion(db, db_category, current_user.user_id)
+    background_tasks.add_task(cascade.run_job, job.job_id)
     
-    return None
\ No newline at end of file
+    return job
\ No newline at end of file
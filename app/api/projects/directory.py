@@ -0,0 +1,39 @@
+# app/api/projects/directory.py
+from typing import Dict, NamedTuple, Set
+
+from sqlalchemy.orm import Session
+
+from ...core.config import settings
+from ...core.row_cache import RowCache
+from ...core.warmup import register_warmup
+from .models import CoCreationProject
+
+
+class ProjectRef(NamedTuple):
+    """お困りごと作成時などに参照するプロジェクトの情報"""
+    project_id: int
+    title: str
+    creator_user_id: int
+
+
+def _load_projects(db: Session, project_ids: Set[int]) -> Dict[int, ProjectRef]:
+    rows = db.query(
+        CoCreationProject.project_id, CoCreationProject.title, CoCreationProject.creator_user_id
+    ).filter(CoCreationProject.project_id.in_(project_ids)).all()
+    return {row.project_id: ProjectRef(row.project_id, row.title, row.creator_user_id) for row in rows}
+
+
+# アプリケーション全体で共有するプロジェクト参照キャッシュ（タイトル変更・削除時に invalidate する）
+project_directory: RowCache[ProjectRef] = RowCache(_load_projects)
+
+
+def _warm_project_directory(db: Session) -> None:
+    """最近のプロジェクトを参照キャッシュに読み込んでおく（起動後のウォームアップ）"""
+    recent_ids = [
+        row_id for (row_id,) in db.query(CoCreationProject.project_id)
+        .order_by(CoCreationProject.project_id.desc()).limit(settings.WARMUP_REFERENCE_ROWS).all()
+    ]
+    project_directory.get_many(db, recent_ids)
+
+
+register_warmup("project-directory", _warm_project_directory)
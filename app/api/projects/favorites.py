@@ -0,0 +1,115 @@
+# app/api/projects/favorites.py
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from ...core.config import settings
+from .models import UserProjectFavorite
+
+
+class FavoriteSetCache:
+    """
+    ユーザーごとのお気に入りプロジェクトIDをソート済み配列で保持するキャッシュ
+
+    - 初回アクセス時に1クエリでユーザーのお気に入りを読み込む
+    - 以降の is_favorite 判定は二分探索のみで行う（DBアクセスなし）
+    - お気に入り追加/削除APIから add/remove を呼び出して同期する
+    - add/remove は同じワーカーのキャッシュにしか反映されないため、各エントリは ttl_seconds で読み直す
+      （他のワーカーでの追加/削除は最大 ttl_seconds 遅れて反映される）
+    """
+
+    def __init__(self, max_users: int = 10000, ttl_seconds: float = 30):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        # ユーザーID → (読み込んだ時刻（time.monotonic() 基準）, お気に入りプロジェクトID)
+        self._sets: "OrderedDict[int, Tuple[float, array]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 読み込み中に更新があった場合に古い内容をキャッシュしないための世代番号
+        self._generation = 0
+
+    def get(self, db: Session, user_id: int) -> array:
+        """ユーザーのお気に入りプロジェクトID（昇順）を取得する"""
+        with self._lock:
+            entry = self._sets.get(user_id)
+            if entry is not None:
+                if time.monotonic() - entry[0] < self.ttl_seconds:
+                    self._sets.move_to_end(user_id)
+                    return entry[1]
+                del self._sets[user_id]
+            generation = self._generation
+
+        loaded_at = time.monotonic()
+        rows = db.query(UserProjectFavorite.project_id).filter(
+            UserProjectFavorite.user_id == user_id
+        ).all()
+        ids = array("l", sorted(row[0] for row in rows))
+
+        with self._lock:
+            if generation == self._generation:
+                self._sets[user_id] = (loaded_at, ids)
+                self._sets.move_to_end(user_id)
+                while len(self._sets) > self.max_users:
+                    self._sets.popitem(last=False)
+        return ids
+
+    def contains(self, db: Session, user_id: int, project_id: int) -> bool:
+        """指定プロジェクトがユーザーのお気に入りかどうかを判定する"""
+        ids = self.get(db, user_id)
+        index = bisect_left(ids, project_id)
+        return index < len(ids) and ids[index] == project_id
+
+    def flags(self, db: Session, user_id: int, project_ids: Iterable[int]) -> Dict[int, bool]:
+        """複数プロジェクトのお気に入りフラグをまとめて取得する"""
+        ids = self.get(db, user_id)
+        result = {}
+        for project_id in project_ids:
+            index = bisect_left(ids, project_id)
+            result[project_id] = index < len(ids) and ids[index] == project_id
+        return result
+
+    def add(self, user_id: int, project_id: int) -> None:
+        """お気に入り追加をキャッシュに反映する（コミット後に呼び出す）"""
+        with self._lock:
+            self._generation += 1
+            entry = self._sets.get(user_id)
+            if entry is None:
+                return
+            loaded_at, ids = entry
+            index = bisect_left(ids, project_id)
+            if index == len(ids) or ids[index] != project_id:
+                # 読み取り中の配列を壊さないようコピーしてから差し替える（読み込んだ時刻は変えない）
+                updated = array("l", ids)
+                updated.insert(index, project_id)
+                self._sets[user_id] = (loaded_at, updated)
+
+    def remove(self, user_id: int, project_id: int) -> None:
+        """お気に入り削除をキャッシュに反映する（コミット後に呼び出す）"""
+        with self._lock:
+            self._generation += 1
+            entry = self._sets.get(user_id)
+            if entry is None:
+                return
+            loaded_at, ids = entry
+            index = bisect_left(ids, project_id)
+            if index < len(ids) and ids[index] == project_id:
+                updated = array("l", ids)
+                del updated[index]
+                self._sets[user_id] = (loaded_at, updated)
+
+    def invalidate(self, user_id: int = None) -> None:
+        """キャッシュを破棄する（user_id 未指定の場合は全ユーザー）"""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._sets.clear()
+            else:
+                self._sets.pop(user_id, None)
+
+
+# アプリケーション全体で共有するキャッシュインスタンス
+favorite_cache = FavoriteSetCache(ttl_seconds=settings.FAVORITE_CACHE_TTL_SECONDS)
@@ -1,20 +1,24 @@
 # app/api/projects/models.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 # 相対インポートに変更
 from ...core.database import Base
+from ...core.soft_delete import soft_deletable
 
+@soft_deletable
 class ProjectCategory(Base):
     __tablename__ = "project_categories"
 
     category_id = Column(Integer, primary_key=True, index=True)
     name = Column(Text, nullable=False)
+    deleted_at = Column(DateTime, nullable=True)  # 論理削除日時（削除ジョブの完了までの間）
     
     # リレーションシップ
     projects = relationship("CoCreationProject", back_populates="category")
 
+@soft_deletable
 class CoCreationProject(Base):
     __tablename__ = "co_creation_projects"
 
@@ -26,6 +30,8 @@ class CoCreationProject(Base):
     category_id = Column(Integer, ForeignKey("project_categories.category_id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    deleted_at = Column(DateTime, nullable=True)  # 論理削除日時（削除ジョブの完了までの間）
+    insert_token = Column(String(32), nullable=True)  # 一括登録で採番されたIDを取得するためのトークン（MySQL。app/core/bulk.py）
 
     # リレーションシップ
     creator = relationship("User", back_populates="projects")
@@ -53,4 +59,25 @@ class UserProjectParticipation(Base):
     
     # リレーションシップ
     user = relationship("User", back_populates="participating_projects")
-    project = relationship("CoCreationProject", back_populates="participants")
\ No newline at end of file
+    project = relationship("CoCreationProject", back_populates="participants")
+
+class ProjectTrendingScore(Base):
+    __tablename__ = "project_trending_scores"
+
+    project_id = Column(Integer, ForeignKey("co_creation_projects.project_id"), primary_key=True)
+    score = Column(Float, nullable=False, default=0.0)  # スナップショット時点の減衰済みスコア
+    updated_at = Column(DateTime, nullable=False)  # スナップショット日時（UTC）
+
+class ProjectTroubleStat(Base):
+    __tablename__ = "project_trouble_stats"
+
+    project_id = Column(Integer, ForeignKey("co_creation_projects.project_id"), primary_key=True)
+    trouble_category_id = Column(Integer, primary_key=True)  # お困りごとのカテゴリーID
+    status = Column(String(16), primary_key=True)  # お困りごとの状態
+    trouble_count = Column(Integer, nullable=False, default=0)
+
+class ProjectCategoryStat(Base):
+    __tablename__ = "project_category_stats"
+
+    category_id = Column(Integer, primary_key=True)  # プロジェクトのカテゴリーID（未分類は0）
+    project_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,421 @@
+# app/api/projects/recommendations.py
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import threading
+
+from sqlalchemy.orm import Session
+
+from ...core.background import register_periodic_task
+from ...core.config import settings
+from ...core.database import SessionLocal
+from ...core.warmup import register_warmup
+from .favorites import favorite_cache
+from .models import CoCreationProject, UserProjectFavorite
+
+# スコアの重み（類似度は最大値で正規化した 0〜1 の値）
+CATEGORY_WEIGHT = 0.3  # ユーザーのカテゴリーと一致するプロジェクトへの加点
+POPULARITY_WEIGHT = 0.05  # お気に入り数による加点（お気に入りがないユーザー向け）
+
+# 差分がこの件数を超えたら共起行列に畳み込む
+_MAX_DELTA_ENTRIES = 200000
+
+
+class ProjectRecommender:
+    """
+    お気に入りの共起（アイテム間類似度）とユーザーのカテゴリーによるプロジェクト推薦
+
+    - user_project_favorites を一括で読み込み、SciPy の疎行列で共起行列 C = XᵀX を構築する
+    - お気に入りの追加/削除は差分（delta）として記録し、一定量たまったら共起行列に畳み込む
+    - 再構築中（DBの読み込みから差し替えまで）に変更されたユーザーのお気に入り・プロジェクト情報は記録しておき、
+      差し替え時に読み込んだ内容との差分を適用する（読み込み後の変更が再構築で失われないようにする）
+    - 類似度はコサイン類似度 C[i, j] / sqrt(n_i * n_j) を用いる
+    - 推薦結果はアクティブユーザーごとに事前計算し、取得は辞書参照のみで行う
+    """
+
+    def __init__(self, max_active_users: int = 5000, max_results: int = 50):
+        self.max_active_users = max_active_users
+        self.max_results = max_results
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._built = False
+
+        # プロジェクトID ↔ 行列のインデックス
+        self._project_ids: List[int] = []
+        self._index: Dict[int, int] = {}
+        # 共起行列（基準）と、その後の差分 {i: {j: 増減}}
+        self._cooccurrence = None
+        self._delta: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self._delta_entries = 0
+        # インデックスごとのお気に入り数・カテゴリーID・作成者ID（numpy配列）
+        self._counts = None
+        self._categories = None
+        self._creators = None
+
+        # 再構築中に変更されたユーザーの最新のお気に入り {user_id: (project_id, ...)} と
+        # プロジェクト情報 {project_id: (category_id, creator_user_id)}（再構築中でなければ None）
+        self._rebuild_favorites: Optional[Dict[int, Tuple[int, ...]]] = None
+        self._rebuild_projects: Optional[Dict[int, Tuple[Optional[int], int]]] = None
+
+        # アクティブユーザーごとの推薦結果 {user_id: (category_id, [(project_id, score), ...])}
+        self._recommendations: "OrderedDict[int, Tuple[Optional[int], List[Tuple[int, float]]]]" = OrderedDict()
+
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    # ---- 構築 ----
+
+    def ensure_built(self, db: Session) -> None:
+        """未構築の場合にDBから一括構築する"""
+        if self._built:
+            return
+        with self._build_lock:
+            if not self._built:
+                self.build(db)
+
+    def build(self, db: Session) -> None:
+        """user_project_favorites と co_creation_projects から共起行列を構築する"""
+        with self._lock:
+            # 読み込み以降の変更を記録する
+            self._rebuild_favorites = {}
+            self._rebuild_projects = {}
+        try:
+            favorites = db.query(UserProjectFavorite.user_id, UserProjectFavorite.project_id).all()
+            projects = db.query(
+                CoCreationProject.project_id,
+                CoCreationProject.category_id,
+                CoCreationProject.creator_user_id
+            ).all()
+            self.build_from_arrays(
+                [row[0] for row in favorites],
+                [row[1] for row in favorites],
+                projects,
+            )
+        finally:
+            with self._lock:
+                self._rebuild_favorites = None
+                self._rebuild_projects = None
+
+    def build_from_arrays(
+        self,
+        favorite_user_ids: Sequence[int],
+        favorite_project_ids: Sequence[int],
+        projects: Iterable[Tuple[int, Optional[int], Optional[int]]],
+    ) -> None:
+        """
+        お気に入りの組とプロジェクト情報から共起行列を構築する
+
+        :param favorite_user_ids: お気に入りのユーザーID（favorite_project_ids と同じ長さ）
+        :param favorite_project_ids: お気に入りのプロジェクトID
+        :param projects: (プロジェクトID, カテゴリーID, 作成者ID) の一覧
+        """
+        import numpy as np
+        from scipy import sparse
+
+        projects = list(projects)
+        project_ids = sorted({row[0] for row in projects} | set(favorite_project_ids))
+        index = {project_id: i for i, project_id in enumerate(project_ids)}
+        n_items = len(project_ids)
+
+        user_ids = np.asarray(favorite_user_ids, dtype=np.int64)
+        item_ids = np.asarray(favorite_project_ids, dtype=np.int64)
+        if len(user_ids):
+            _, user_codes = np.unique(user_ids, return_inverse=True)
+            item_codes = np.searchsorted(np.asarray(project_ids, dtype=np.int64), item_ids)
+            n_users = int(user_codes.max()) + 1
+        else:
+            user_codes = item_codes = np.zeros(0, dtype=np.int64)
+            n_users = 0
+
+        # ユーザー×プロジェクトの0/1行列
+        matrix = sparse.csr_matrix(
+            (np.ones(len(user_codes), dtype=np.int32), (user_codes, item_codes)),
+            shape=(n_users, n_items),
+        )
+        matrix.data[:] = 1  # 重複行を1に揃える
+
+        # プロジェクト×プロジェクトの共起行列（対角成分は除く）
+        cooccurrence = (matrix.T @ matrix).tocsr()
+        cooccurrence.setdiag(0)
+        cooccurrence.eliminate_zeros()
+
+        counts = np.asarray(matrix.sum(axis=0)).ravel().astype(np.int64)
+        categories = np.full(n_items, -1, dtype=np.int64)
+        creators = np.full(n_items, -1, dtype=np.int64)
+        for project_id, category_id, creator_user_id in projects:
+            i = index[project_id]
+            categories[i] = category_id if category_id is not None else -1
+            creators[i] = creator_user_id if creator_user_id is not None else -1
+
+        with self._lock:
+            self._project_ids = project_ids
+            self._index = index
+            self._cooccurrence = cooccurrence
+            self._delta = defaultdict(lambda: defaultdict(int))
+            self._delta_entries = 0
+            self._counts = counts
+            self._categories = categories
+            self._creators = creators
+            self._built = True
+            self._replay_rebuild_changes(favorite_user_ids, favorite_project_ids)
+
+    def _replay_rebuild_changes(self, favorite_user_ids: Sequence[int], favorite_project_ids: Sequence[int]) -> None:
+        """再構築中に記録した変更を、読み込んだ内容との差分として適用する（ロック取得済みで呼び出す）"""
+        changed_projects = self._rebuild_projects or {}
+        self._rebuild_projects = None
+        for project_id, (category_id, creator_user_id) in changed_projects.items():
+            i = self._ensure_index(project_id)
+            self._categories[i] = category_id if category_id is not None else -1
+            self._creators[i] = creator_user_id
+
+        changed_favorites = self._rebuild_favorites or {}
+        self._rebuild_favorites = None
+        if not changed_favorites:
+            return
+        loaded: Dict[int, set] = defaultdict(set)
+        for user_id, project_id in zip(favorite_user_ids, favorite_project_ids):
+            if user_id in changed_favorites:
+                loaded[user_id].add(project_id)
+        for user_id, latest in changed_favorites.items():
+            before, after = loaded[user_id], set(latest)
+            if before == after:
+                continue
+            for project_id in after - before:
+                i = self._ensure_index(project_id)
+                self._counts[i] += 1
+            for project_id in before - after:
+                i = self._ensure_index(project_id)
+                self._counts[i] = max(self._counts[i] - 1, 0)
+            # 共起の差分 = after 内の組 - before 内の組
+            for sign, members, other in ((1, after, before), (-1, before, after)):
+                for p in members:
+                    for q in members:
+                        if p != q and not (p in other and q in other):
+                            i, j = self._ensure_index(p), self._ensure_index(q)
+                            self._delta[i][j] += sign
+                            self._delta_entries += 1
+
+    def _ensure_index(self, project_id: int) -> int:
+        """プロジェクトのインデックスを取得する（新規の場合は末尾に追加する）"""
+        import numpy as np
+
+        i = self._index.get(project_id)
+        if i is not None:
+            return i
+        i = len(self._project_ids)
+        self._project_ids.append(project_id)
+        self._index[project_id] = i
+        self._counts = np.append(self._counts, 0)
+        self._categories = np.append(self._categories, -1)
+        self._creators = np.append(self._creators, -1)
+        return i
+
+    def _fold_delta(self) -> None:
+        """差分を共起行列に畳み込む（ロック取得済みで呼び出す）"""
+        import numpy as np
+        from scipy import sparse
+
+        n_items = len(self._project_ids)
+        rows, cols, values = [], [], []
+        for i, row in self._delta.items():
+            for j, value in row.items():
+                if value:
+                    rows.append(i)
+                    cols.append(j)
+                    values.append(value)
+        cooccurrence = self._cooccurrence.copy()
+        cooccurrence.resize((n_items, n_items))
+        if values:
+            cooccurrence = cooccurrence + sparse.csr_matrix(
+                (np.asarray(values, dtype=np.int32), (rows, cols)),
+                shape=(n_items, n_items),
+            )
+            cooccurrence.eliminate_zeros()
+        self._cooccurrence = cooccurrence.tocsr()
+        self._delta = defaultdict(lambda: defaultdict(int))
+        self._delta_entries = 0
+
+    # ---- 差分更新 ----
+
+    def _apply_favorite(self, user_id: int, user_favorites: Iterable[int], project_id: int, sign: int) -> None:
+        user_favorites = tuple(user_favorites)
+        with self._lock:
+            if self._rebuild_favorites is not None:
+                self._rebuild_favorites[user_id] = user_favorites
+            if not self._built:
+                return
+            i = self._ensure_index(project_id)
+            self._counts[i] = max(self._counts[i] + sign, 0)
+            for other_id in user_favorites:
+                if other_id == project_id:
+                    continue
+                j = self._ensure_index(other_id)
+                self._delta[i][j] += sign
+                self._delta[j][i] += sign
+                self._delta_entries += 2
+            if self._delta_entries > _MAX_DELTA_ENTRIES:
+                self._fold_delta()
+            # お気に入りが変わったユーザーの推薦結果は再計算する
+            entry = self._recommendations.get(user_id)
+            if entry is not None:
+                self._recommendations[user_id] = (entry[0], self._compute(user_id, user_favorites, entry[0]))
+
+    def add_favorite(self, user_id: int, user_favorites: Iterable[int], project_id: int) -> None:
+        """
+        お気に入り追加を反映する
+
+        :param user_favorites: 追加後のユーザーのお気に入りプロジェクトID
+        """
+        self._apply_favorite(user_id, user_favorites, project_id, 1)
+
+    def remove_favorite(self, user_id: int, user_favorites: Iterable[int], project_id: int) -> None:
+        """
+        お気に入り削除を反映する
+
+        :param user_favorites: 削除後のユーザーのお気に入りプロジェクトID
+        """
+        self._apply_favorite(user_id, user_favorites, project_id, -1)
+
+    def on_favorite_added(self, db: Session, user_id: int, project_id: int) -> None:
+        """お気に入り追加APIから呼び出す（favorite_cache 更新後に呼び出す）"""
+        if self._built or self._rebuild_favorites is not None:
+            self.add_favorite(user_id, list(favorite_cache.get(db, user_id)), project_id)
+
+    def on_favorite_removed(self, db: Session, user_id: int, project_id: int) -> None:
+        """お気に入り削除APIから呼び出す（favorite_cache 更新後に呼び出す）"""
+        if self._built or self._rebuild_favorites is not None:
+            self.remove_favorite(user_id, list(favorite_cache.get(db, user_id)), project_id)
+
+    def on_project_saved(self, project_id: int, category_id: Optional[int], creator_user_id: int) -> None:
+        """プロジェクトの作成・更新を反映する"""
+        with self._lock:
+            if self._rebuild_projects is not None:
+                self._rebuild_projects[project_id] = (category_id, creator_user_id)
+            if not self._built:
+                return
+            i = self._ensure_index(project_id)
+            self._categories[i] = category_id if category_id is not None else -1
+            self._creators[i] = creator_user_id
+
+    # ---- 推薦 ----
+
+    def _compute(self, user_id: int, user_favorites: Iterable[int], category_id: Optional[int]) -> List[Tuple[int, float]]:
+        """1ユーザー分の推薦結果を計算する（ロック取得済みで呼び出す）"""
+        import numpy as np
+
+        n_items = len(self._project_ids)
+        if n_items == 0:
+            return []
+        scores = np.zeros(n_items, dtype=np.float64)
+        counts = self._counts.astype(np.float64)
+        inverse_norm = 1.0 / np.sqrt(np.maximum(counts, 1.0))
+
+        favorite_indexes = [self._index[p] for p in user_favorites if p in self._index]
+        if favorite_indexes:
+            # 基準の共起行列から、お気に入り各行を 1/sqrt(n_i) で重み付けして合算
+            base_size = self._cooccurrence.shape[0]
+            base_rows = [i for i in favorite_indexes if i < base_size]
+            if base_rows:
+                rows = self._cooccurrence[base_rows]
+                scores[:base_size] += rows.T @ inverse_norm[base_rows]
+            # 構築後の差分を加算
+            for i in favorite_indexes:
+                row = self._delta.get(i)
+                if row:
+                    for j, value in row.items():
+                        scores[j] += value * inverse_norm[i]
+            scores *= inverse_norm
+            max_score = scores.max()
+            if max_score > 0:
+                scores /= max_score
+
+        if category_id is not None:
+            scores += CATEGORY_WEIGHT * (self._categories == category_id)
+        max_count = counts.max()
+        if max_count > 0:
+            scores += POPULARITY_WEIGHT * counts / max_count
+
+        # お気に入り済み・自分のプロジェクトは除外
+        if favorite_indexes:
+            scores[favorite_indexes] = 0.0
+        scores[self._creators == user_id] = 0.0
+
+        k = min(self.max_results, n_items)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._project_ids[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def recommend_for(self, user_id: int, user_favorites: Iterable[int], category_id: Optional[int]) -> List[Tuple[int, float]]:
+        """
+        ユーザーの推薦結果を取得する（事前計算済みであれば辞書参照のみ）
+
+        :return: (プロジェクトID, スコア) のリスト（スコア降順）
+        """
+        with self._lock:
+            entry = self._recommendations.get(user_id)
+            if entry is not None and entry[0] == category_id:
+                self._recommendations.move_to_end(user_id)
+                return entry[1]
+            recommendations = self._compute(user_id, user_favorites, category_id)
+            self._recommendations[user_id] = (category_id, recommendations)
+            while len(self._recommendations) > self.max_active_users:
+                self._recommendations.popitem(last=False)
+            return recommendations
+
+    def recommend(self, db: Session, user_id: int, category_id: Optional[int]) -> List[Tuple[int, float]]:
+        """推薦APIから呼び出す"""
+        self.ensure_built(db)
+        with self._lock:
+            entry = self._recommendations.get(user_id)
+            if entry is not None and entry[0] == category_id:
+                self._recommendations.move_to_end(user_id)
+                return entry[1]
+        return self.recommend_for(user_id, list(favorite_cache.get(db, user_id)), category_id)
+
+    def refresh(self) -> None:
+        """差分を畳み込み、アクティブユーザーの推薦結果を再計算する（定期実行）"""
+        if not self._built:
+            return
+        with self._lock:
+            if self._delta_entries:
+                self._fold_delta()
+            active_users = [(user_id, entry[0]) for user_id, entry in self._recommendations.items()]
+
+        db = SessionLocal()
+        try:
+            for user_id, category_id in active_users:
+                user_favorites = list(favorite_cache.get(db, user_id))
+                with self._lock:
+                    if user_id in self._recommendations:
+                        self._recommendations[user_id] = (
+                            category_id, self._compute(user_id, user_favorites, category_id)
+                        )
+        finally:
+            db.close()
+
+    def rebuild(self) -> None:
+        """共起行列をDBから再構築する（定期実行）"""
+        if not self._built:
+            return
+        db = SessionLocal()
+        try:
+            self.build(db)
+        finally:
+            db.close()
+        self.refresh()
+
+
+# アプリケーション全体で共有するレコメンダー
+project_recommender = ProjectRecommender()
+
+register_periodic_task(
+    "recommendation-refresh",
+    settings.RECOMMENDATION_REFRESH_INTERVAL_SECONDS,
+    project_recommender.refresh,
+)
+register_periodic_task(
+    "recommendation-rebuild",
+    settings.RECOMMENDATION_REBUILD_INTERVAL_SECONDS,
+    project_recommender.rebuild,
+)
+register_warmup("recommendations", project_recommender.ensure_built)
@@ -2,30 +2,105 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Query  # Queryを追加
+from fastapi import BackgroundTasks
 from datetime import datetime, timedelta
 
 from ...core.database import get_db
 from ...core.config import settings 
+from ...core.integrity import is_foreign_key_violation
 from ..auth.jwt import get_current_user
 # from ...core.dependencies import get_current_user
 from ..users.models import User
+from ..users.directory import user_directory
+from ..users import points
 from .models import CoCreationProject, UserProjectFavorite, ProjectCategory
+from .favorites import favorite_cache
+from .directory import ProjectRef, project_directory
+from .trending import trending_tracker
+from .recommendations import project_recommender
+from . import stats
+from ..activity import buckets as activity
+from ..activity.schemas import ActivityHistogramResponse
+from ..sync import changelog
+from ..deletions import cascade
+from ..deletions.schemas import DeletionJobResponse
 from .schemas import (
     ProjectResponse, 
     ProjectListResponse, 
     ProjectCreate, 
     ProjectUpdate,
     CategoryResponse,
-    RankingUser
+    RankingUser,
+    FavoriteFlagsResponse,
+    TrendingProjectResponse,
+    RecommendedProjectResponse,
+    ProjectStatsResponse,
+    TroubleStatCount,
+    CategoryProjectCountResponse
 )
-# 追加: Messageモデルをインポート（コメント数取得用）
-from ..messages.models import Message
+from ..troubles.models import TroubleCategory
+from ..troubles import archive as trouble_archive
 
 router = APIRouter()
 
+def _load_project_cards(db: Session, project_ids: List[int], user_id: int) -> dict:
+    """
+    指定したプロジェクトのレスポンス用データをまとめて取得する
+    （プロジェクト・作成者・カテゴリー・いいね数・コメント数をIDリスト単位で一括取得）
+    
+    :return: プロジェクトID → ProjectResponse の引数となる辞書
+    """
+    if not project_ids:
+        return {}
+    
+    projects = db.query(CoCreationProject).filter(
+        CoCreationProject.project_id.in_(project_ids)
+    ).all()
+    creators = user_directory.get_many(db, [p.creator_user_id for p in projects])
+    favorite_flags = favorite_cache.flags(db, user_id, project_ids)
+    
+    category_ids = {p.category_id for p in projects if p.category_id}
+    categories = {
+        category.category_id: category for category in
+        db.query(ProjectCategory).filter(ProjectCategory.category_id.in_(category_ids)).all()
+    } if category_ids else {}
+    
+    likes = dict(
+        db.query(UserProjectFavorite.project_id, func.count())
+        .filter(UserProjectFavorite.project_id.in_(project_ids))
+        .group_by(UserProjectFavorite.project_id)
+        .all()
+    )
+    comments = trouble_archive.project_comment_counts(db, project_ids)
+    
+    cards = {}
+    for project in projects:
+        creator = creators.get(project.creator_user_id)
+        category = categories.get(project.category_id)
+        cards[project.project_id] = dict(
+            project_id=project.project_id,
+            title=project.title,
+            summary=project.summary,
+            description=project.description,
+            creator_user_id=project.creator_user_id,
+            creator_name=creator.name if creator else "不明",
+            created_at=project.created_at,
+            updated_at=project.updated_at,
+            likes=likes.get(project.project_id, 0),
+            comments=comments.get(project.project_id, 0),
+            is_favorite=favorite_flags[project.project_id],
+            category_id=project.category_id,
+            category=CategoryResponse(
+                category_id=category.category_id,
+                name=category.name
+            ) if category else None
+        )
+    return cards
+
 @router.get("/user", response_model=List[ProjectResponse])
 def get_user_projects(
     db: Session = Depends(get_db),
@@ -42,17 +117,18 @@ def get_user_projects(
         .all()
     )
 
+    # お気に入り判定（ユーザーのお気に入り集合からまとめて判定）
+    favorite_flags = favorite_cache.flags(db, user_id, [p.project_id for p in user_projects])
+
+    # プロジェクト作成者の情報をまとめて取得
+    creators = user_directory.get_many(db, [p.creator_user_id for p in user_projects])
+
     # プロジェクトをレスポンススキーマに変換
     result = []
     for project in user_projects:
-        # お気に入り判定
-        is_favorite = db.query(UserProjectFavorite).filter(
-            UserProjectFavorite.user_id == user_id,
-            UserProjectFavorite.project_id == project.project_id
-        ).first() is not None
+        is_favorite = favorite_flags[project.project_id]
 
-        # プロジェクト作成者の情報取得
-        creator = db.query(User).filter(User.user_id == project.creator_user_id).first()
+        creator = creators.get(project.creator_user_id)
 
         # カテゴリー情報の取得
         category = None
@@ -66,13 +142,9 @@ def get_user_projects(
             UserProjectFavorite.project_id == project.project_id
         ).count()
 
-        # 修正: 実際のコメント数を取得（メッセージテーブルから）
+        # 修正: 実際のコメント数を取得（アーカイブ済みのお困りごとのメッセージを含む）
         try:
-            comments_count = db.query(Message).filter(
-                Message.trouble_id.in_(
-                    db.query(Trouble.trouble_id).filter(Trouble.project_id == project.project_id)
-                )
-            ).count()
+            comments_count = trouble_archive.project_comment_counts(db, [project.project_id]).get(project.project_id, 0)
         except Exception as e:
             print(f"コメント数取得エラー: {str(e)}")
             comments_count = 0
@@ -126,16 +198,17 @@ def get_projects(
     # プロジェクト総数
     total_projects = db.query(CoCreationProject).count()
 
+    # プロジェクト作成者の情報をまとめて取得
+    creators = user_directory.get_many(
+        db, [p.creator_user_id for p in new_projects + favorite_projects]
+    )
+
     # プロジェクトをレスポンススキーマに変換
     def convert_project(project):
-        # お気に入り判定
-        is_favorite = db.query(UserProjectFavorite).filter(
-            UserProjectFavorite.user_id == user_id,
-            UserProjectFavorite.project_id == project.project_id
-        ).first() is not None
+        # お気に入り判定（DBアクセスなし）
+        is_favorite = favorite_cache.contains(db, user_id, project.project_id)
 
-        # プロジェクト作成者の情報取得
-        creator = db.query(User).filter(User.user_id == project.creator_user_id).first()
+        creator = creators.get(project.creator_user_id)
 
         # カテゴリー情報の取得
         category = None
@@ -151,17 +224,8 @@ def get_projects(
         
         # 修正: 実際のコメント数を取得
         try:
-            from ..troubles.models import Trouble
-            # プロジェクトに関連するお困りごとを取得
-            trouble_ids = [
-                trouble.trouble_id for trouble in 
-                db.query(Trouble).filter(Trouble.project_id == project.project_id).all()
-            ]
-            
-            # お困りごとに関連するメッセージをカウント
-            comments_count = db.query(Message).filter(
-                Message.trouble_id.in_(trouble_ids) if trouble_ids else False
-            ).count()
+            # プロジェクトのお困りごと（アーカイブ済みを含む）に関連するメッセージをカウント
+            comments_count = trouble_archive.project_comment_counts(db, [project.project_id]).get(project.project_id, 0)
         except Exception as e:
             print(f"コメント数取得エラー: {str(e)}")
             comments_count = 0
@@ -252,36 +316,115 @@ def create_project(
             detail="自分以外のユーザーIDでプロジェクトを作成することはできません"
         )
 
-    # カテゴリーが指定されている場合は存在確認
-    if hasattr(project, 'category_id') and project.category_id:
-        category = db.query(ProjectCategory).filter(
-            ProjectCategory.category_id == project.category_id
-        ).first()
-        if not category:
-            raise HTTPException(
-                status_code=404,
-                detail="指定されたカテゴリーが見つかりません"
-            )
-
     # プロジェクトを作成
+    # カテゴリーの存在確認は事前のSELECTではなく外部キー制約で行う（INSERT時に違反すれば404）
+    creator_user_id = current_user.user_id
+    category_id = project.category_id if hasattr(project, 'category_id') else None
     new_project = CoCreationProject(
         title=project.title,
         summary=project.summary,
         description=project.description,
-        creator_user_id=current_user.user_id,
+        creator_user_id=creator_user_id,
         created_at=datetime.now(),
-        category_id=project.category_id if hasattr(project, 'category_id') else None
+        category_id=category_id
     )
     
-    db.add(new_project)
+    try:
+        db.add(new_project)
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        if category_id and is_foreign_key_violation(e):
+            raise HTTPException(
+                status_code=404,
+                detail="指定されたカテゴリーが見つかりません"
+            )
+        raise
+    # コミット後は属性が失効して再読み込みが発生するため、必要な値はコミット前に取り出す
+    project_id = new_project.project_id
+    stats.record_project_change(db, None, category_id, created=True)
+    changelog.record(db, changelog.PROJECT, project_id)
     db.commit()
-    db.refresh(new_project)
+    project_directory.put(project_id, ProjectRef(project_id, project.title, creator_user_id))
+    project_recommender.on_project_saved(project_id, category_id, creator_user_id)
 
     return {
         "message": "プロジェクトを登録しました", 
-        "project_id": new_project.project_id
+        "project_id": project_id
     }
 
+# カテゴリーごとのプロジェクト数（集計テーブルから取得）
+@router.get("/stats/categories", response_model=List[CategoryProjectCountResponse])
+def get_category_project_stats(db: Session = Depends(get_db)):
+    category_names = dict(db.query(ProjectCategory.category_id, ProjectCategory.name).all())
+    return [
+        CategoryProjectCountResponse(
+            category_id=category_id,
+            name=category_names.get(category_id),
+            project_count=count
+        ) for category_id, count in sorted(stats.get_category_project_counts(db))
+    ]
+
+# トレンドプロジェクト取得用のエンドポイント
+@router.get("/trending", response_model=List[TrendingProjectResponse])
+def get_trending_projects(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    最近のお気に入り・お困りごと・メッセージを時間減衰で重み付けしたトレンド順にプロジェクトを取得する
+    """
+    # メモリ上のスコアから上位K件を取得
+    ranked = trending_tracker.top(db, limit, skip)
+    if not ranked:
+        return []
+    project_ids = [project_id for project_id, _ in ranked]
+    
+    # ページ内のプロジェクト情報をまとめて取得
+    project_cards = _load_project_cards(db, project_ids, current_user.user_id)
+    
+    result = []
+    for project_id, score in ranked:
+        card = project_cards.get(project_id)
+        if card is None:
+            # 削除済みのプロジェクトはランキングから除外
+            trending_tracker.forget(project_id)
+            continue
+        result.append(TrendingProjectResponse(**card, trending_score=score))
+    
+    return result
+
+# おすすめプロジェクト取得用のエンドポイント
+@router.get("/recommended", response_model=List[RecommendedProjectResponse])
+def get_recommended_projects(
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    お気に入りの共起（似たユーザーが一緒にお気に入りしたプロジェクト）と
+    ユーザーのカテゴリーをもとにおすすめのプロジェクトを取得する
+    """
+    # 事前計算済みの推薦結果を取得
+    recommended = project_recommender.recommend(
+        db, current_user.user_id, current_user.get_category_id()
+    )[:limit]
+    if not recommended:
+        return []
+    
+    # ページ内のプロジェクト情報をまとめて取得
+    project_cards = _load_project_cards(
+        db, [project_id for project_id, _ in recommended], current_user.user_id
+    )
+    
+    return [
+        RecommendedProjectResponse(**project_cards[project_id], recommendation_score=score)
+        for project_id, score in recommended
+        if project_id in project_cards
+    ]
+
 # 新着プロジェクト取得用のエンドポイント
 @router.get("/recent", response_model=List[ProjectResponse])
 def get_recent_projects(
@@ -302,17 +445,20 @@ def get_recent_projects(
         .all()
     )
     
+    # お気に入り判定（ユーザーのお気に入り集合からまとめて判定）
+    favorite_flags = favorite_cache.flags(
+        db, current_user.user_id, [p.project_id for p in recent_projects]
+    )
+
+    # プロジェクト作成者の情報をまとめて取得
+    creators = user_directory.get_many(db, [p.creator_user_id for p in recent_projects])
+
     # プロジェクトをレスポンススキーマに変換
     result = []
     for project in recent_projects:
-        # お気に入り判定
-        is_favorite = db.query(UserProjectFavorite).filter(
-            UserProjectFavorite.user_id == current_user.user_id,
-            UserProjectFavorite.project_id == project.project_id
-        ).first() is not None
+        is_favorite = favorite_flags[project.project_id]
         
-        # プロジェクト作成者の情報取得
-        creator = db.query(User).filter(User.user_id == project.creator_user_id).first()
+        creator = creators.get(project.creator_user_id)
         
         # カテゴリー情報の取得
         category = None
@@ -328,17 +474,8 @@ def get_recent_projects(
         
         # 修正: 実際のコメント数を取得
         try:
-            from ..troubles.models import Trouble
-            # プロジェクトに関連するお困りごとを取得
-            trouble_ids = [
-                trouble.trouble_id for trouble in 
-                db.query(Trouble).filter(Trouble.project_id == project.project_id).all()
-            ]
-            
-            # お困りごとに関連するメッセージをカウント
-            comments_count = db.query(Message).filter(
-                Message.trouble_id.in_(trouble_ids) if trouble_ids else False
-            ).count()
+            # プロジェクトのお困りごと（アーカイブ済みを含む）に関連するメッセージをカウント
+            comments_count = trouble_archive.project_comment_counts(db, [project.project_id]).get(project.project_id, 0)
         except Exception as e:
             print(f"コメント数取得エラー: {str(e)}")
             comments_count = 0
@@ -386,13 +523,15 @@ def get_favorite_projects(
         .all()
     )
     
+    # プロジェクト作成者の情報をまとめて取得
+    creators = user_directory.get_many(db, [p.creator_user_id for p in favorite_projects])
+
     # 結果変換用の配列
     result = []
     
     # プロジェクトを変換
     for project in favorite_projects:
-        # プロジェクト作成者の情報取得
-        creator = db.query(User).filter(User.user_id == project.creator_user_id).first()
+        creator = creators.get(project.creator_user_id)
         
         # カテゴリー情報の取得
         category = None
@@ -423,6 +562,20 @@ def get_favorite_projects(
     
     return result
 
+# お気に入りフラグ一括取得 API
+@router.get("/favorites/flags", response_model=FavoriteFlagsResponse)
+def get_favorite_flags(
+    project_ids: List[int] = Query(..., max_length=200, description="判定するプロジェクトIDのリスト（最大200件）"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    指定した複数プロジェクトのお気に入りフラグを1回の呼び出しで取得する
+    """
+    return FavoriteFlagsResponse(
+        flags=favorite_cache.flags(db, current_user.user_id, project_ids)
+    )
+
 # いいねしたプロジェクト取得 API
 @router.get("/liked", response_model=List[ProjectResponse])
 def get_liked_projects(
@@ -443,11 +596,13 @@ def get_liked_projects(
         .all()
     )
     
+    # プロジェクト作成者の情報をまとめて取得
+    creators = user_directory.get_many(db, [p.creator_user_id for p in liked_projects])
+
     # プロジェクトをレスポンススキーマに変換
     result = []
     for project in liked_projects:
-        # プロジェクト作成者の情報取得
-        creator = db.query(User).filter(User.user_id == project.creator_user_id).first()
+        creator = creators.get(project.creator_user_id)
         
         # カテゴリー情報の取得
         category = None
@@ -504,13 +659,10 @@ def get_project(
     # お気に入り判定
     is_favorite = False
     if current_user:
-        is_favorite = db.query(UserProjectFavorite).filter(
-            UserProjectFavorite.user_id == current_user.user_id,
-            UserProjectFavorite.project_id == project_id
-        ).first() is not None
+        is_favorite = favorite_cache.contains(db, current_user.user_id, project_id)
     
     # プロジェクト作成者の情報取得
-    creator = db.query(User).filter(User.user_id == project.creator_user_id).first()
+    creator = user_directory.get(db, project.creator_user_id)
     
     # カテゴリー情報の取得
     category = None
@@ -574,18 +726,25 @@ def update_project(
     
     # 更新データを適用
     update_data = project_update.dict(exclude_unset=True)
+    previous_category_id = db_project.category_id
     
     for key, value in update_data.items():
         setattr(db_project, key, value)
+    stats.record_project_change(db, previous_category_id, db_project.category_id)
+    changelog.record(db, changelog.PROJECT, db_project.project_id)
     
     # 更新日時を設定
     db_project.updated_at = datetime.now()
     
     db.commit()
     db.refresh(db_project)
+    project_directory.invalidate(db_project.project_id)
+    project_recommender.on_project_saved(
+        db_project.project_id, db_project.category_id, db_project.creator_user_id
+    )
     
     # プロジェクト作成者の情報取得
-    creator = db.query(User).filter(User.user_id == db_project.creator_user_id).first()
+    creator = user_directory.get(db, db_project.creator_user_id)
     
     # カテゴリー情報の取得
     category = None
@@ -612,6 +771,98 @@ def update_project(
             name=category.name
         ) if category else None
     )
+
+@router.delete("/{project_id}", status_code=status.HTTP_202_ACCEPTED, response_model=DeletionJobResponse)
+def delete_project(
+    project_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    プロジェクトを削除
+
+    即座に非表示にし、お困りごと・メッセージ・お気に入りなどの削除はバックグラウンドのジョブで行う（進捗は /deletions/{job_id}）
+    """
+    db_project = db.query(CoCreationProject).filter(CoCreationProject.project_id == project_id).first()
+    
+    if not db_project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="プロジェクトが見つかりません"
+        )
+    
+    # プロジェクトの所有者のみが削除可能
+    if db_project.creator_user_id != current_user.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="このプロジェクトを削除する権限がありません"
+        )
+    
+    job = cascade.request_project_deletion(db, db_project, current_user.user_id)
+    background_tasks.add_task(cascade.run_job, job.job_id)
+    
+    return job
+
+@router.get("/{project_id}/stats", response_model=ProjectStatsResponse)
+def get_project_stats(
+    project_id: int,
+    db: Session = Depends(get_db)
+):
+    """プロジェクトのお困りごと数を状態・カテゴリー別に取得する（集計テーブルから取得）"""
+    exists = db.query(CoCreationProject.project_id).filter(CoCreationProject.project_id == project_id).first()
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="プロジェクトが見つかりません"
+        )
+    
+    rows = stats.get_project_trouble_stats(db, project_id)
+    category_names = dict(db.query(TroubleCategory.category_id, TroubleCategory.name).all())
+    by_status = {}
+    by_category = {}
+    for category_id, trouble_status, count in rows:
+        by_status[trouble_status] = by_status.get(trouble_status, 0) + count
+        by_category[category_id] = by_category.get(category_id, 0) + count
+    
+    return ProjectStatsResponse(
+        project_id=project_id,
+        total_troubles=sum(by_status.values()),
+        by_status=by_status,
+        by_category=by_category,
+        counts=[
+            TroubleStatCount(
+                category_id=category_id,
+                category_name=category_names.get(category_id),
+                status=trouble_status,
+                count=count
+            ) for category_id, trouble_status, count in rows
+        ]
+    )
+
+@router.get("/{project_id}/activity", response_model=ActivityHistogramResponse)
+def get_project_activity(
+    project_id: int,
+    granularity: str = Query("day", pattern="^(day|week)$"),
+    periods: int = Query(30, ge=1, le=104),
+    db: Session = Depends(get_db)
+):
+    """プロジェクトのメッセージ・お困りごと・お気に入り数を日別／週別に取得する（集計バケットから取得）"""
+    exists = db.query(CoCreationProject.project_id).filter(CoCreationProject.project_id == project_id).first()
+    if not exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="プロジェクトが見つかりません"
+        )
+    
+    activity.check_periods(granularity, periods)
+    
+    return ActivityHistogramResponse(
+        subject_type=activity.PROJECT,
+        subject_id=project_id,
+        granularity=granularity,
+        buckets=activity.get_histogram(db, activity.PROJECT, project_id, granularity, periods)
+    )
     
 # --- 以下、新規追加のエンドポイント ---
 
@@ -658,7 +909,14 @@ def add_project_to_favorites(
     )
     
     db.add(new_favorite)
+    if project.creator_user_id != current_user.user_id:
+        points.award(db, project.creator_user_id, points.FAVORITE_RECEIVED, project_id)
+    activity.record_favorite(db, project_id, current_user.user_id)
+    changelog.record(db, changelog.FAVORITE, project_id, user_id=current_user.user_id)
     db.commit()
+    favorite_cache.add(current_user.user_id, project_id)
+    trending_tracker.record_favorite(project_id)
+    project_recommender.on_favorite_added(db, current_user.user_id, project_id)
     
     return {
         "message": "プロジェクトをお気に入りに追加しました",
@@ -692,7 +950,15 @@ def remove_project_from_favorites(
     
     # お気に入りから削除
     db.delete(favorite)
+    creator_user_id = db.query(CoCreationProject.creator_user_id).filter(
+        CoCreationProject.project_id == project_id
+    ).scalar()
+    if creator_user_id is not None and creator_user_id != current_user.user_id:
+        points.award(db, creator_user_id, points.FAVORITE_REMOVED, project_id)
+    changelog.record(db, changelog.FAVORITE, project_id, changelog.DELETE, user_id=current_user.user_id)
     db.commit()
+    favorite_cache.remove(current_user.user_id, project_id)
+    project_recommender.on_favorite_removed(db, current_user.user_id, project_id)
     
     return {
         "message": "プロジェクトをお気に入りから削除しました",
@@ -717,7 +983,7 @@ def get_simple_project(
             raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
         
         # プロジェクト作成者の情報取得
-        creator = db.query(User).filter(User.user_id == project.creator_user_id).first()
+        creator = user_directory.get(db, project.creator_user_id)
         
         # カテゴリー情報の取得
         category = None
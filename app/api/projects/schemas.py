@@ -1,7 +1,7 @@
 # app/api/projects/schemas.py
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from ...schemas.base import BaseSchemaModel
 
@@ -61,6 +61,12 @@ class ProjectResponse(BaseSchemaModel):
     def isFavorite(self) -> bool:
         return self.is_favorite
 
+class TrendingProjectResponse(ProjectResponse):
+    trending_score: float = Field(..., description="時間減衰を適用したトレンドスコア")
+
+class RecommendedProjectResponse(ProjectResponse):
+    recommendation_score: float = Field(..., description="お気に入りの共起とカテゴリーによる推薦スコア")
+
 class ProjectListResponse(BaseSchemaModel):
     new_projects: List[ProjectResponse]
     favorite_projects: List[ProjectResponse]
@@ -71,7 +77,28 @@ class UserProjectFavoriteCreate(BaseSchemaModel):
     user_id: int
     project_id: int
 
+class FavoriteFlagsResponse(BaseSchemaModel):
+    flags: Dict[int, bool] = Field(..., description="プロジェクトIDごとのお気に入りフラグ")
+
 class RankingUser(BaseSchemaModel):
     name: str
     points: int
     rank: int
+
+class TroubleStatCount(BaseSchemaModel):
+    category_id: int = Field(..., description="お困りごとのカテゴリーID")
+    category_name: Optional[str] = None
+    status: str
+    count: int
+
+class ProjectStatsResponse(BaseSchemaModel):
+    project_id: int
+    total_troubles: int
+    by_status: Dict[str, int] = Field(..., description="状態ごとのお困りごと数")
+    by_category: Dict[int, int] = Field(..., description="お困りごとのカテゴリーごとの件数")
+    counts: List[TroubleStatCount] = Field(..., description="カテゴリー×状態ごとの件数")
+
+class CategoryProjectCountResponse(BaseSchemaModel):
+    category_id: int = Field(..., description="プロジェクトのカテゴリーID（未分類は0）")
+    name: Optional[str] = None
+    project_count: int
@@ -0,0 +1,122 @@
+# app/api/projects/stats.py
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ...core.counters import increment_counter
+from ..troubles.models import Trouble
+from .models import CoCreationProject, ProjectCategoryStat, ProjectTroubleStat
+
+# カテゴリー未設定のプロジェクトを集計するキー
+UNCATEGORIZED = 0
+DEFAULT_STATUS = "未解決"
+
+
+def _trouble_key(category_id: int, status: Optional[str]) -> Tuple[int, str]:
+    return category_id, status or DEFAULT_STATUS
+
+
+def record_trouble_change(
+    db: Session,
+    project_id: int,
+    before: Optional[Tuple[int, Optional[str]]],
+    after: Optional[Tuple[int, Optional[str]]]
+) -> None:
+    """
+    お困りごとの作成・更新・削除を集計テーブルに反映する（呼び出し元のトランザクションに含める）
+
+    :param before: 変更前の (カテゴリーID, 状態)。作成時は None
+    :param after: 変更後の (カテゴリーID, 状態)。削除時は None
+    """
+    before = _trouble_key(*before) if before is not None else None
+    after = _trouble_key(*after) if after is not None else None
+    if before == after:
+        return
+    table = ProjectTroubleStat.__table__
+    if before is not None:
+        increment_counter(db, table, {"project_id": project_id, "trouble_category_id": before[0], "status": before[1]}, {"trouble_count": -1})
+    if after is not None:
+        increment_counter(db, table, {"project_id": project_id, "trouble_category_id": after[0], "status": after[1]}, {"trouble_count": 1})
+
+
+def record_project_change(db: Session, before_category_id: Optional[int], after_category_id: Optional[int], created: bool = False) -> None:
+    """プロジェクトの作成・カテゴリー変更を集計テーブルに反映する（呼び出し元のトランザクションに含める）"""
+    before = before_category_id or UNCATEGORIZED
+    after = after_category_id or UNCATEGORIZED
+    table = ProjectCategoryStat.__table__
+    if created:
+        increment_counter(db, table, {"category_id": after}, {"project_count": 1})
+        return
+    if before == after:
+        return
+    increment_counter(db, table, {"category_id": before}, {"project_count": -1})
+    increment_counter(db, table, {"category_id": after}, {"project_count": 1})
+
+
+def add_trouble_counts(db: Session, counts: Dict[Tuple[int, int, Optional[str]], int]) -> None:
+    """一括登録したお困りごとを (プロジェクトID, カテゴリーID, 状態) ごとの件数でまとめて反映する"""
+    table = ProjectTroubleStat.__table__
+    for (project_id, category_id, status), count in counts.items():
+        category_id, status = _trouble_key(category_id, status)
+        increment_counter(db, table, {"project_id": project_id, "trouble_category_id": category_id, "status": status}, {"trouble_count": count})
+
+
+def add_project_counts(db: Session, counts: Dict[Optional[int], int]) -> None:
+    """一括登録したプロジェクトをカテゴリーごとの件数でまとめて反映する"""
+    table = ProjectCategoryStat.__table__
+    for category_id, count in counts.items():
+        increment_counter(db, table, {"category_id": category_id or UNCATEGORIZED}, {"project_count": count})
+
+
+def get_project_trouble_stats(db: Session, project_id: int) -> List[Tuple[int, str, int]]:
+    """プロジェクトのお困りごと数を (カテゴリーID, 状態, 件数) で取得する"""
+    return db.query(
+        ProjectTroubleStat.trouble_category_id,
+        ProjectTroubleStat.status,
+        ProjectTroubleStat.trouble_count
+    ).filter(
+        ProjectTroubleStat.project_id == project_id,
+        ProjectTroubleStat.trouble_count > 0
+    ).all()
+
+
+def get_category_project_counts(db: Session) -> List[Tuple[int, int]]:
+    """カテゴリーごとのプロジェクト数を (カテゴリーID, 件数) で取得する"""
+    return db.query(
+        ProjectCategoryStat.category_id,
+        ProjectCategoryStat.project_count
+    ).filter(ProjectCategoryStat.project_count > 0).all()
+
+
+def rebuild_stats(db: Session) -> Tuple[int, int]:
+    """
+    集計テーブルを troubles / co_creation_projects から作り直す
+
+    :return: (お困りごとの集計行数, カテゴリーの集計行数)
+    """
+    trouble_rows = db.query(
+        Trouble.project_id,
+        Trouble.category_id,
+        func.coalesce(Trouble.status, DEFAULT_STATUS),
+        func.count(Trouble.trouble_id)
+    ).group_by(
+        Trouble.project_id, Trouble.category_id, func.coalesce(Trouble.status, DEFAULT_STATUS)
+    ).all()
+    category_rows = db.query(
+        func.coalesce(CoCreationProject.category_id, UNCATEGORIZED),
+        func.count(CoCreationProject.project_id)
+    ).group_by(func.coalesce(CoCreationProject.category_id, UNCATEGORIZED)).all()
+
+    db.query(ProjectTroubleStat).delete(synchronize_session=False)
+    db.query(ProjectCategoryStat).delete(synchronize_session=False)
+    db.bulk_insert_mappings(ProjectTroubleStat, [
+        {"project_id": project_id, "trouble_category_id": category_id, "status": status, "trouble_count": count}
+        for project_id, category_id, status, count in trouble_rows
+    ])
+    db.bulk_insert_mappings(ProjectCategoryStat, [
+        {"category_id": category_id, "project_count": count}
+        for category_id, count in category_rows
+    ])
+    db.commit()
+    return len(trouble_rows), len(category_rows)
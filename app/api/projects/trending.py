@@ -0,0 +1,251 @@
+# app/api/projects/trending.py
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+import heapq
+import math
+import threading
+import time
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ...core.background import register_periodic_task
+from ...core.config import settings
+from ...core.database import SessionLocal
+from ...core.warmup import register_warmup
+from ..messages.models import Message
+from ..troubles.models import Trouble
+from .models import ProjectTrendingScore
+
+# イベントごとの重み
+FAVORITE_WEIGHT = 3.0
+TROUBLE_WEIGHT = 2.0
+MESSAGE_WEIGHT = 1.0
+
+# 基準時刻からの経過でスコアが大きくなりすぎないよう再計算する指数の上限
+_REBASE_EXPONENT = 50.0
+# これより小さいスコアは再計算時に破棄する
+_MIN_SCORE = 1e-3
+
+
+class TrendingTracker:
+    """
+    プロジェクトのトレンドスコアを指数減衰でインクリメンタルに保持する
+
+    - スコアは基準時刻に換算した値で保持するため、イベント記録は O(1)
+      （時刻 t のイベントは weight * exp(λ(t - 基準時刻)) を加算する）
+    - 上位K件の取得はメモリ上の値から行い、DBの集計は行わない
+    - project_trending_scores テーブルを全ワーカーで共有する。各ワーカーは前回の保存以降に記録した増分だけを
+      定期的に加算し（行ロックを取り、保存済みのスコアを現在まで減衰させてから加える）、
+      加算後にテーブル全体を読み直してメモリ上のスコアを置き換える。
+      そのため他のワーカーで記録したイベントも保存間隔の遅れで反映され、再起動時はテーブルから復元する
+    """
+
+    def __init__(self, half_life_hours: float):
+        self.half_life_hours = half_life_hours
+        self.decay_rate = math.log(2) / (half_life_hours * 3600)
+        self._scores: Dict[int, float] = {}
+        # 前回の保存以降に記録した増分（_scores と同じく基準時刻に換算した値）
+        self._pending: Dict[int, float] = {}
+        self._reference_time = time.time()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    def record(self, project_id: int, weight: float, at: Optional[float] = None) -> None:
+        """プロジェクトにイベントを1件記録する"""
+        now = at if at is not None else time.time()
+        with self._lock:
+            exponent = self.decay_rate * (now - self._reference_time)
+            if exponent > _REBASE_EXPONENT:
+                self._rebase(now)
+                exponent = 0.0
+            value = weight * math.exp(exponent)
+            self._scores[project_id] = self._scores.get(project_id, 0.0) + value
+            self._pending[project_id] = self._pending.get(project_id, 0.0) + value
+
+    def record_favorite(self, project_id: int) -> None:
+        self.record(project_id, FAVORITE_WEIGHT)
+
+    def record_trouble(self, project_id: int) -> None:
+        self.record(project_id, TROUBLE_WEIGHT)
+
+    def record_message(self, project_id: int) -> None:
+        self.record(project_id, MESSAGE_WEIGHT)
+
+    def forget(self, project_id: int) -> None:
+        """プロジェクトをランキングから除外する"""
+        with self._lock:
+            self._scores.pop(project_id, None)
+            self._pending.pop(project_id, None)
+
+    def _rebase(self, now: float) -> None:
+        """基準時刻を現在に移し、減衰しきったスコアを破棄する（ロック取得済みで呼び出す）"""
+        factor = math.exp(-self.decay_rate * (now - self._reference_time))
+        self._scores = {
+            project_id: value * factor
+            for project_id, value in self._scores.items()
+            if value * factor >= _MIN_SCORE
+        }
+        self._pending = {project_id: value * factor for project_id, value in self._pending.items()}
+        self._reference_time = now
+
+    def current_scores(self) -> Dict[int, float]:
+        """現時点まで減衰させたスコアを取得する"""
+        now = time.time()
+        with self._lock:
+            factor = math.exp(-self.decay_rate * (now - self._reference_time))
+            return {project_id: value * factor for project_id, value in self._scores.items()}
+
+    def top(self, db: Session, limit: int, offset: int = 0) -> List[Tuple[int, float]]:
+        """
+        トレンド上位のプロジェクトを取得する
+
+        :return: (プロジェクトID, 現在のスコア) のリスト（スコア降順）
+        """
+        self.ensure_loaded(db)
+        now = time.time()
+        with self._lock:
+            ranked = heapq.nlargest(offset + limit, self._scores.items(), key=itemgetter(1))
+            factor = math.exp(-self.decay_rate * (now - self._reference_time))
+        return [(project_id, value * factor) for project_id, value in ranked[offset:]]
+
+    def ensure_loaded(self, db: Session) -> None:
+        """共有テーブル（空の場合は直近のお困りごと・メッセージから作成する）からスコアを復元する"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            if db.query(ProjectTrendingScore.project_id).first() is None:
+                self._bootstrap(db)
+            self._reload(db)
+            self._loaded = True
+
+    def _decayed_rows(self, db: Session) -> Dict[int, float]:
+        """共有テーブルのスコアを現在まで減衰させて取得する"""
+        now_utc = datetime.utcnow()
+        scores = {}
+        for project_id, score, updated_at in db.query(
+            ProjectTrendingScore.project_id, ProjectTrendingScore.score, ProjectTrendingScore.updated_at
+        ).all():
+            age = max((now_utc - updated_at).total_seconds(), 0.0)
+            scores[project_id] = score * math.exp(-self.decay_rate * age)
+        return scores
+
+    def _reload(self, db: Session) -> None:
+        """共有テーブルのスコアにまだ保存していない増分を加えて、メモリ上のスコアを置き換える"""
+        scores = self._decayed_rows(db)
+        now = time.time()
+        with self._lock:
+            factor = math.exp(-self.decay_rate * (now - self._reference_time))
+            self._pending = {project_id: value * factor for project_id, value in self._pending.items()}
+            for project_id, value in self._pending.items():
+                scores[project_id] = scores.get(project_id, 0.0) + value
+            self._scores = {project_id: value for project_id, value in scores.items() if value >= _MIN_SCORE}
+            self._reference_time = now
+
+    def _bootstrap(self, db: Session) -> None:
+        """
+        共有テーブルが空の場合に一度だけ直近のイベントから集計して保存する
+
+        複数のワーカーが同時に集計した場合は先に保存したものを使う（主キーの重複で後のワーカーは保存しない）
+        """
+        window = timedelta(hours=self.half_life_hours * 5)
+        now = time.time()
+        scores: Dict[int, float] = {}
+
+        def add(project_id: int, weight: float, timestamp: datetime) -> None:
+            reference = datetime.now(timestamp.tzinfo) if timestamp.tzinfo else datetime.now()
+            age = max((reference - timestamp).total_seconds(), 0.0)
+            scores[project_id] = scores.get(project_id, 0.0) + weight * math.exp(-self.decay_rate * age)
+
+        cutoff = datetime.now() - window
+        troubles = db.query(Trouble.project_id, Trouble.created_at).filter(
+            Trouble.created_at >= cutoff
+        ).all()
+        for project_id, created_at in troubles:
+            if created_at is not None:
+                add(project_id, TROUBLE_WEIGHT, created_at)
+
+        messages = db.query(Trouble.project_id, Message.sent_at).join(
+            Trouble, Trouble.trouble_id == Message.trouble_id
+        ).filter(Message.sent_at >= cutoff).all()
+        for project_id, sent_at in messages:
+            if sent_at is not None:
+                add(project_id, MESSAGE_WEIGHT, sent_at)
+
+        snapshot_at = datetime.utcnow()
+        try:
+            db.bulk_insert_mappings(ProjectTrendingScore, [
+                {"project_id": project_id, "score": score, "updated_at": snapshot_at}
+                for project_id, score in scores.items()
+                if score >= _MIN_SCORE
+            ])
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+
+    def _save_pending(self, db: Session, deltas: Dict[int, float]) -> None:
+        """増分を共有テーブルに加算する（対象の行をロックし、保存済みのスコアを現在まで減衰させてから加える）"""
+        snapshot_at = datetime.utcnow()
+        rows = {
+            row.project_id: row for row in db.query(ProjectTrendingScore).filter(
+                ProjectTrendingScore.project_id.in_(list(deltas))
+            ).with_for_update().all()
+        }
+        for project_id, delta in deltas.items():
+            row = rows.get(project_id)
+            if row is None:
+                db.add(ProjectTrendingScore(project_id=project_id, score=delta, updated_at=snapshot_at))
+                continue
+            age = max((snapshot_at - row.updated_at).total_seconds(), 0.0)
+            row.score = row.score * math.exp(-self.decay_rate * age) + delta
+            row.updated_at = snapshot_at
+        db.commit()
+
+    def snapshot(self) -> None:
+        """前回以降の増分を project_trending_scores テーブルに加算し、他のワーカーの分を含むスコアを読み直す"""
+        if not self._loaded:
+            return
+        now = time.time()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            factor = math.exp(-self.decay_rate * (now - self._reference_time))
+        deltas = {project_id: value * factor for project_id, value in pending.items() if value * factor >= _MIN_SCORE}
+        db = SessionLocal()
+        try:
+            if deltas:
+                try:
+                    self._save_pending(db, deltas)
+                except Exception:
+                    db.rollback()
+                    # 保存できなかった増分は次回に持ち越す（新規行の同時作成による主キーの重複など）
+                    with self._lock:
+                        scale = math.exp(self.decay_rate * (now - self._reference_time))
+                        for project_id, delta in deltas.items():
+                            self._pending[project_id] = self._pending.get(project_id, 0.0) + delta * scale
+                    raise
+            self._reload(db)
+            # 減衰しきった行を削除する
+            expired = [project_id for project_id, score in self._decayed_rows(db).items() if score < _MIN_SCORE]
+            if expired:
+                db.query(ProjectTrendingScore).filter(
+                    ProjectTrendingScore.project_id.in_(expired)
+                ).delete(synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+
+
+# アプリケーション全体で共有するトラッカー
+trending_tracker = TrendingTracker(settings.TRENDING_HALF_LIFE_HOURS)
+
+register_periodic_task(
+    "trending-snapshot",
+    settings.TRENDING_SNAPSHOT_INTERVAL_SECONDS,
+    trending_tracker.snapshot,
+    run_on_shutdown=True,
+)
+register_warmup("trending", trending_tracker.ensure_loaded)
@@ -0,0 +1,141 @@
+# app/api/sync/changelog.py
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from ...core.background import register_periodic_task
+from ...core.config import settings
+from ...core.database import SessionLocal
+from .models import ChangeLogEntry, SyncWatermark
+
+PROJECT = "project"
+TROUBLE = "trouble"
+MESSAGE = "message"
+FAVORITE = "favorite"
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+_WATERMARK_NAME = "change_log"
+
+
+def record(db: Session, entity_type: str, entity_id: int, operation: str = UPSERT, user_id: Optional[int] = None) -> None:
+    """
+    変更履歴を追加する（呼び出し元のトランザクションに含める）
+
+    :param user_id: 特定ユーザーにだけ配信する変更（お気に入り）の場合に指定する
+    """
+    db.add(ChangeLogEntry(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        operation=operation,
+        user_id=user_id
+    ))
+
+
+def get_watermark(db: Session) -> int:
+    """削除済みの変更履歴の最大ID（これより前のトークンは再同期が必要）"""
+    value = db.query(SyncWatermark.change_id).filter(SyncWatermark.name == _WATERMARK_NAME).scalar()
+    return value or 0
+
+
+def get_latest_token(db: Session) -> int:
+    return db.query(func.max(ChangeLogEntry.change_id)).scalar() or 0
+
+
+def read_changes(db: Session, since: int, user_id: int, limit: int) -> Tuple[Dict[Tuple[str, int], str], int, bool]:
+    """
+    トークン以降の変更をエンティティごとにまとめて取得する
+
+    :return: ({(エンティティ種別, ID): 最後の操作}, 次のトークン, 続きがあるかどうか)
+    """
+    entries = db.query(
+        ChangeLogEntry.change_id,
+        ChangeLogEntry.entity_type,
+        ChangeLogEntry.entity_id,
+        ChangeLogEntry.operation,
+        ChangeLogEntry.changed_at
+    ).filter(
+        ChangeLogEntry.change_id > since,
+        or_(ChangeLogEntry.user_id.is_(None), ChangeLogEntry.user_id == user_id)
+    ).order_by(ChangeLogEntry.change_id).limit(limit + 1).all()
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # 同じエンティティへの複数の変更は最後の操作だけを返す
+    changes: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+    for _, entity_type, entity_id, operation, _ in entries:
+        key = (entity_type, entity_id)
+        changes.pop(key, None)
+        changes[key] = operation
+
+    # IDの採番順とコミット順が前後する可能性があるため、直近の変更はトークンを進めず次回も返す
+    visible_before = datetime.utcnow() - timedelta(seconds=settings.SYNC_VISIBILITY_LAG_SECONDS)
+    next_token = since
+    for change_id, _, _, _, changed_at in entries:
+        if changed_at > visible_before:
+            break
+        next_token = change_id
+    if has_more and next_token == since and entries:
+        # 1ページすべてが直近の変更の場合は先に進める
+        next_token = entries[-1].change_id
+    return changes, next_token, has_more
+
+
+def prune(db: Session, retention_days: int, batch_size: int = 5000) -> int:
+    """
+    保持期間を過ぎた変更履歴を削除し、ウォーターマークを進める
+
+    :return: 削除した行数
+    """
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    boundary = db.query(func.max(ChangeLogEntry.change_id)).filter(ChangeLogEntry.changed_at < cutoff).scalar()
+    if boundary is None:
+        return 0
+
+    # 先にウォーターマークを進め、削除途中のトークンも再同期扱いにする
+    watermark = db.query(SyncWatermark).filter(SyncWatermark.name == _WATERMARK_NAME).first()
+    if watermark is None:
+        db.add(SyncWatermark(name=_WATERMARK_NAME, change_id=boundary))
+    elif watermark.change_id < boundary:
+        watermark.change_id = boundary
+    db.commit()
+
+    deleted = 0
+    while True:
+        ids = [
+            row[0] for row in db.query(ChangeLogEntry.change_id).filter(
+                ChangeLogEntry.change_id <= boundary
+            ).order_by(ChangeLogEntry.change_id).limit(batch_size).all()
+        ]
+        if not ids:
+            break
+        db.query(ChangeLogEntry).filter(
+            ChangeLogEntry.change_id.in_(ids)
+        ).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+    return deleted
+
+
+def prune_change_log() -> None:
+    """変更履歴の保持期間管理（定期実行）"""
+    db = SessionLocal()
+    try:
+        prune(db, settings.SYNC_RETENTION_DAYS)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+register_periodic_task(
+    "change-log-pruning",
+    settings.SYNC_PRUNE_INTERVAL_SECONDS,
+    prune_change_log,
+)
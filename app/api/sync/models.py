@@ -0,0 +1,27 @@
+# app/api/sync/models.py
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, DateTime, Index
+
+# 相対インポートに変更
+from ...core.database import Base
+
+class ChangeLogEntry(Base):
+    __tablename__ = "change_log"
+
+    change_id = Column(Integer, primary_key=True, autoincrement=True)  # 同期トークン（単調増加）
+    entity_type = Column(String(16), nullable=False)  # project / trouble / message / favorite
+    entity_id = Column(Integer, nullable=False)
+    operation = Column(String(8), nullable=False)  # upsert / delete
+    user_id = Column(Integer, nullable=True)  # 特定ユーザーだけに関係する変更（お気に入り）の場合のユーザーID
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)  # 変更日時（UTC）
+
+    __table_args__ = (
+        Index("ix_change_log_entity", "entity_type", "entity_id"),
+    )
+
+class SyncWatermark(Base):
+    __tablename__ = "sync_watermarks"
+
+    name = Column(String(32), primary_key=True)
+    change_id = Column(Integer, nullable=False, default=0)  # この値以下の変更履歴は削除済み
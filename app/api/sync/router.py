@@ -0,0 +1,80 @@
+# app/api/sync/router.py
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from ...core.database import get_db
+from ..auth.jwt import get_current_user
+from ..users.models import User
+from ..projects.models import CoCreationProject, UserProjectFavorite
+from ..troubles.models import Trouble
+from ..messages.models import Message
+from . import changelog
+from . import schemas
+
+router = APIRouter()
+
+# エンティティ種別 → (モデル, 主キー列, レスポンス型, レスポンス・削除一覧の格納先)
+_ENTITIES = {
+    changelog.PROJECT: (CoCreationProject, CoCreationProject.project_id, schemas.SyncProject, "projects"),
+    changelog.TROUBLE: (Trouble, Trouble.trouble_id, schemas.SyncTrouble, "troubles"),
+    changelog.MESSAGE: (Message, Message.message_id, schemas.SyncMessage, "messages"),
+}
+
+@router.get("", response_model=schemas.SyncResponse)
+def sync_changes(
+    since: Optional[int] = Query(None, ge=0, description="前回の同期で受け取った next_token（初回は省略）"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    トークン以降に変更されたプロジェクト・お困りごと・メッセージ・お気に入りを取得する
+
+    初回（since 省略時）やトークンが保持期間より古い場合は resync_required を返すため、
+    一覧を再取得してから返された next_token で同期を再開する
+    """
+    watermark = changelog.get_watermark(db)
+    if since is None or since < watermark:
+        return schemas.SyncResponse(
+            next_token=max(changelog.get_latest_token(db), watermark),
+            resync_required=True
+        )
+    
+    changes, next_token, has_more = changelog.read_changes(db, since, current_user.user_id, limit)
+    response = schemas.SyncResponse(next_token=next_token, has_more=has_more)
+    
+    # 種別ごとに現在の状態をまとめて取得する
+    upserts = {}
+    for (entity_type, entity_id), operation in changes.items():
+        if entity_type == changelog.FAVORITE:
+            continue
+        if operation == changelog.DELETE:
+            getattr(response.deleted, _ENTITIES[entity_type][3]).append(entity_id)
+        else:
+            upserts.setdefault(entity_type, []).append(entity_id)
+    
+    for entity_type, entity_ids in upserts.items():
+        model, primary_key, schema, field = _ENTITIES[entity_type]
+        rows = {getattr(row, primary_key.key): row for row in db.query(model).filter(primary_key.in_(entity_ids)).all()}
+        for entity_id in entity_ids:
+            row = rows.get(entity_id)
+            if row is None:
+                # 変更後に削除された
+                getattr(response.deleted, field).append(entity_id)
+            else:
+                getattr(response, field).append(schema.model_validate(row))
+    
+    # お気に入りは最後の操作ではなく現在の状態で判定する
+    favorite_ids = [entity_id for (entity_type, entity_id) in changes if entity_type == changelog.FAVORITE]
+    if favorite_ids:
+        current = {
+            row[0] for row in db.query(UserProjectFavorite.project_id).filter(
+                UserProjectFavorite.user_id == current_user.user_id,
+                UserProjectFavorite.project_id.in_(favorite_ids)
+            ).all()
+        }
+        response.favorites_added = [project_id for project_id in favorite_ids if project_id in current]
+        response.favorites_removed = [project_id for project_id in favorite_ids if project_id not in current]
+    
+    return response
@@ -0,0 +1,49 @@
+# app/api/sync/schemas.py
+from pydantic import Field
+from datetime import datetime
+from typing import List, Optional
+
+from ...schemas.base import BaseSchemaModel
+
+class SyncProject(BaseSchemaModel):
+    project_id: int
+    title: str
+    summary: Optional[str] = None
+    description: str
+    creator_user_id: int
+    category_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class SyncTrouble(BaseSchemaModel):
+    trouble_id: int
+    project_id: int
+    description: str
+    category_id: int
+    creator_user_id: int
+    status: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class SyncMessage(BaseSchemaModel):
+    message_id: int
+    trouble_id: int
+    sender_user_id: int
+    content: str
+    sent_at: Optional[datetime] = None
+    parent_message_id: Optional[int] = None
+
+class SyncDeleted(BaseSchemaModel):
+    projects: List[int] = Field(default_factory=list)
+    troubles: List[int] = Field(default_factory=list)
+    messages: List[int] = Field(default_factory=list)
+
+class SyncResponse(BaseSchemaModel):
+    next_token: int = Field(..., description="次回の同期で since に指定するトークン")
+    resync_required: bool = Field(False, description="トークンが古すぎるため一覧の再取得が必要")
+    has_more: bool = Field(False, description="続きの変更がある場合はtrue（next_token で再度取得する）")
+    projects: List[SyncProject] = Field(default_factory=list)
+    troubles: List[SyncTrouble] = Field(default_factory=list)
+    messages: List[SyncMessage] = Field(default_factory=list)
+    favorites_added: List[int] = Field(default_factory=list, description="お気に入りに追加されたプロジェクトID")
+    favorites_removed: List[int] = Field(default_factory=list, description="お気に入りから削除されたプロジェクトID")
+    deleted: SyncDeleted = Field(default_factory=SyncDeleted)
@@ -0,0 +1,289 @@
+# app/api/troubles/archive.py
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+import time
+
+from sqlalchemy import false, func, insert, literal, select, true, union_all, update
+from sqlalchemy.orm import Session
+
+from ...core.background import register_periodic_task
+from ...core.config import settings
+from ...core.database import SessionLocal
+from ..messages.models import Message, MessageArchive
+from .directory import trouble_directory
+from .models import Trouble, TroubleArchive, TroubleResolution
+
+RESOLVED_STATUS = "解決"
+
+
+# ---- 参照（ライブテーブルになければアーカイブを参照する） ----
+
+def get_trouble(db: Session, trouble_id: int) -> Optional[Union[Trouble, TroubleArchive]]:
+    """お困りごとを取得する（アーカイブ済みの場合は TroubleArchive を返す）"""
+    trouble = db.query(Trouble).filter(Trouble.trouble_id == trouble_id).first()
+    if trouble is not None:
+        return trouble
+    return db.query(TroubleArchive).filter(TroubleArchive.trouble_id == trouble_id).first()
+
+
+def is_archived(trouble) -> bool:
+    return isinstance(trouble, TroubleArchive)
+
+
+def message_model_for(trouble):
+    """お困りごとのメッセージを格納しているモデル"""
+    return MessageArchive if is_archived(trouble) else Message
+
+
+class TroubleRow(NamedTuple):
+    """一覧に表示するお困りごと（ライブテーブル・アーカイブのどちらか）"""
+    trouble_id: int
+    description: str
+    category_id: int
+    project_id: int
+    creator_user_id: int
+    created_at: Optional[datetime]
+    status: Optional[str]
+    archived: bool
+
+
+def _list_columns(model, archived: bool):
+    return [
+        model.trouble_id, model.description, model.category_id, model.project_id,
+        model.creator_user_id, model.created_at, model.status,
+        (true() if archived else false()).label("archived"),
+    ]
+
+
+def list_troubles(
+    db: Session,
+    project_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 10
+) -> Tuple[List[TroubleRow], int]:
+    """
+    条件に一致するお困りごとをアーカイブ済みを含めて作成日時の降順で取得する
+
+    :return: (ページ内のお困りごと, 総数)
+    """
+    selects = []
+    for model, archived in ((Trouble, False), (TroubleArchive, True)):
+        statement = select(*_list_columns(model, archived))
+        if model is Trouble:
+            statement = statement.where(Trouble.deleted_at.is_(None))
+        if project_id:
+            statement = statement.where(model.project_id == project_id)
+        if category_id:
+            statement = statement.where(model.category_id == category_id)
+        if status:
+            statement = statement.where(model.status == status)
+        selects.append(statement)
+    combined = union_all(*selects).subquery()
+    total = db.execute(select(func.count()).select_from(combined)).scalar() or 0
+    rows = db.execute(
+        select(combined).order_by(combined.c.created_at.desc(), combined.c.trouble_id.desc()).offset(skip).limit(limit)
+    ).all()
+    return [TroubleRow(*row[:7], bool(row[7])) for row in rows], total
+
+
+def comment_counts(db: Session, troubles: Iterable) -> Dict[int, int]:
+    """お困りごとごとのメッセージ数（アーカイブ済みのお困りごとはアーカイブのメッセージを数える）"""
+    counts: Dict[int, int] = {}
+    live_ids = [t.trouble_id for t in troubles if not getattr(t, "archived", is_archived(t))]
+    archived_ids = [t.trouble_id for t in troubles if getattr(t, "archived", is_archived(t))]
+    for model, trouble_ids in ((Message, live_ids), (MessageArchive, archived_ids)):
+        if trouble_ids:
+            counts.update(db.query(model.trouble_id, func.count(model.message_id)).filter(
+                model.trouble_id.in_(trouble_ids)
+            ).group_by(model.trouble_id).all())
+    return counts
+
+
+def project_comment_counts(db: Session, project_ids: List[int]) -> Dict[int, int]:
+    """プロジェクトごとのメッセージ数（アーカイブ済みのお困りごとのメッセージを含む）"""
+    counts: Dict[int, int] = {}
+    if not project_ids:
+        return counts
+    for trouble_model, message_model in ((Trouble, Message), (TroubleArchive, MessageArchive)):
+        for project_id, count in db.query(trouble_model.project_id, func.count(message_model.message_id)).join(
+            message_model, message_model.trouble_id == trouble_model.trouble_id
+        ).filter(trouble_model.project_id.in_(project_ids)).group_by(trouble_model.project_id).all():
+            counts[project_id] = counts.get(project_id, 0) + count
+    return counts
+
+
+# ---- 解決日時の記録 ----
+
+def record_status_change(db: Session, trouble_id: int, status: Optional[str]) -> None:
+    """解決済みにした日時を記録する（未解決に戻した場合は削除する）"""
+    resolution = db.query(TroubleResolution).filter(TroubleResolution.trouble_id == trouble_id).first()
+    if status == RESOLVED_STATUS:
+        if resolution is None:
+            db.add(TroubleResolution(trouble_id=trouble_id, resolved_at=datetime.utcnow()))
+    elif resolution is not None:
+        db.delete(resolution)
+
+
+def backfill_resolutions(db: Session) -> int:
+    """解決日時が記録されていない解決済みのお困りごとに現在日時を記録する"""
+    missing = select(Trouble.trouble_id, literal(datetime.utcnow())).outerjoin(
+        TroubleResolution, TroubleResolution.trouble_id == Trouble.trouble_id
+    ).where(
+        Trouble.status == RESOLVED_STATUS,
+        TroubleResolution.trouble_id.is_(None)
+    )
+    result = db.execute(
+        insert(TroubleResolution).from_select(["trouble_id", "resolved_at"], missing)
+    )
+    db.commit()
+    return result.rowcount or 0
+
+
+# ---- アーカイブ ----
+
+def _next_batch(db: Session, cutoff: datetime, max_rows: int) -> List[int]:
+    """
+    次にアーカイブするお困りごとを選ぶ
+
+    メッセージ数の合計が max_rows を超えないように選ぶ（1件で超える場合はその1件のみ）
+    """
+    candidates = db.query(Trouble.trouble_id).join(
+        TroubleResolution, TroubleResolution.trouble_id == Trouble.trouble_id
+    ).filter(
+        Trouble.status == RESOLVED_STATUS,
+        TroubleResolution.resolved_at < cutoff
+    ).order_by(TroubleResolution.resolved_at).limit(max_rows).all()
+    trouble_ids = [row[0] for row in candidates]
+    if not trouble_ids:
+        return []
+
+    message_counts = dict(db.query(Message.trouble_id, func.count(Message.message_id)).filter(
+        Message.trouble_id.in_(trouble_ids)
+    ).group_by(Message.trouble_id).all())
+
+    batch = []
+    rows = 0
+    for trouble_id in trouble_ids:
+        rows += message_counts.get(trouble_id, 0) + 1
+        if batch and rows > max_rows:
+            break
+        batch.append(trouble_id)
+    return batch
+
+
+def _move_messages(db: Session, message_ids: List[int], archived_at: datetime) -> int:
+    """メッセージをアーカイブテーブルに移す（コピーしたメッセージIDだけを削除する。コミットは呼び出し元で行う）"""
+    if not message_ids:
+        return 0
+    db.execute(insert(MessageArchive).from_select(
+        ["message_id", "trouble_id", "sender_user_id", "content", "sent_at", "parent_message_id", "archived_at"],
+        select(
+            Message.message_id, Message.trouble_id, Message.sender_user_id, Message.content,
+            Message.sent_at, Message.parent_message_id, literal(archived_at)
+        ).where(Message.message_id.in_(message_ids))
+    ))
+    # 返信の自己参照があるため、親メッセージの参照を外してから削除する（アーカイブ側には元の値が残る）
+    db.execute(
+        update(Message).where(
+            Message.message_id.in_(message_ids),
+            Message.parent_message_id.isnot(None)
+        ).values(parent_message_id=None).execution_options(synchronize_session=False)
+    )
+    db.query(Message).filter(Message.message_id.in_(message_ids)).delete(synchronize_session=False)
+    return len(message_ids)
+
+
+def _move_batch(db: Session, trouble_ids: List[int]) -> Tuple[int, int]:
+    """
+    お困りごととメッセージを1トランザクションでアーカイブテーブルに移す
+
+    メッセージはコピーしたIDだけを削除する（コピーの後に投稿されたメッセージを消さない）。
+    そのようなメッセージは、外部キーがある場合はお困りごとの削除が失敗してバッチごとやり直しになり、
+    外部キーがない（パーティショニング済みの）場合は残ったものを次回の _move_orphaned_messages で移す
+    """
+    archived_at = datetime.utcnow()
+    db.execute(insert(TroubleArchive).from_select(
+        ["trouble_id", "description", "category_id", "project_id", "creator_user_id", "created_at", "status", "archived_at"],
+        select(
+            Trouble.trouble_id, Trouble.description, Trouble.category_id, Trouble.project_id,
+            Trouble.creator_user_id, Trouble.created_at, Trouble.status, literal(archived_at)
+        ).where(Trouble.trouble_id.in_(trouble_ids))
+    ))
+    message_ids = [row[0] for row in db.query(Message.message_id).filter(Message.trouble_id.in_(trouble_ids)).all()]
+    moved_messages = _move_messages(db, message_ids, archived_at)
+    moved_troubles = db.query(Trouble).filter(Trouble.trouble_id.in_(trouble_ids)).delete(synchronize_session=False)
+    db.commit()
+    for trouble_id in trouble_ids:
+        trouble_directory.invalidate(trouble_id)
+    return moved_troubles, moved_messages
+
+
+def _move_orphaned_messages(db: Session, batch_rows: int) -> int:
+    """アーカイブ済みのお困りごとに残っている（アーカイブ中に投稿された）メッセージを移す"""
+    message_ids = [row[0] for row in db.query(Message.message_id).join(
+        TroubleArchive, TroubleArchive.trouble_id == Message.trouble_id
+    ).limit(batch_rows).all()]
+    moved = _move_messages(db, message_ids, datetime.utcnow())
+    db.commit()
+    return moved
+
+
+def archive_resolved(
+    db: Session,
+    resolved_days: int,
+    batch_rows: int,
+    pause_seconds: float = 0.0,
+    max_batches: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    解決から resolved_days 日以上経過したお困りごとをメッセージごとアーカイブする
+
+    1トランザクションで移動する行数を batch_rows 程度に抑え、バッチ間で pause_seconds 待機する
+
+    :return: (アーカイブしたお困りごと数, メッセージ数)
+    """
+    backfill_resolutions(db)
+    cutoff = datetime.utcnow() - timedelta(days=resolved_days)
+    total_troubles = 0
+    total_messages = _move_orphaned_messages(db, batch_rows)
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        trouble_ids = _next_batch(db, cutoff, batch_rows)
+        if not trouble_ids:
+            break
+        troubles, messages = _move_batch(db, trouble_ids)
+        total_troubles += troubles
+        total_messages += messages
+        batches += 1
+        if pause_seconds:
+            time.sleep(pause_seconds)
+    return total_troubles, total_messages
+
+
+def run_archival() -> None:
+    """解決済みのお困りごとのアーカイブ（定期実行）"""
+    if settings.ARCHIVE_RESOLVED_TROUBLE_DAYS <= 0:
+        return
+    db = SessionLocal()
+    try:
+        archive_resolved(
+            db,
+            settings.ARCHIVE_RESOLVED_TROUBLE_DAYS,
+            settings.ARCHIVE_BATCH_ROWS,
+            settings.ARCHIVE_BATCH_PAUSE_SECONDS,
+            settings.ARCHIVE_MAX_BATCHES_PER_RUN
+        )
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+register_periodic_task(
+    "trouble-archival",
+    settings.ARCHIVE_INTERVAL_SECONDS,
+    run_archival,
+)
@@ -1,11 +1,13 @@
 # app/api/troubles/categories.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from ...core.database import get_db
-from ..auth.jwt import get_current_user
+from ..auth.jwt import get_current_admin_user, get_current_user
 from ..users.models import User
+from ..deletions import cascade
+from ..deletions.schemas import DeletionJobResponse
 from .models import TroubleCategory
 from .schemas import TroubleCategoryResponse, TroubleCategoryCreate
 
@@ -116,14 +118,18 @@ def update_category(
         name=db_category.name
     )
 
-@router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{category_id}", status_code=status.HTTP_202_ACCEPTED, response_model=DeletionJobResponse)
 def delete_category(
     category_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_admin_user)
 ):
     """
     カテゴリーを削除します。（管理者専用）
+
+    お困りごと（アーカイブ済みを含む）が参照しているカテゴリーは削除できません（409）。先に別のカテゴリーへ変更してください。
+    カテゴリーは即座に非表示になり、カテゴリー自体の削除はバックグラウンドのジョブで行います。
     """
     # 削除対象のカテゴリーを取得
     db_category = db.query(TroubleCategory).filter(
@@ -136,14 +142,15 @@ def delete_category(
             detail="カテゴリーが見つかりません"
         )
     
-    # このカテゴリーに関連付けられたお困りごとの処理
-    # 例: 関連お困りごとのカテゴリーをnullに設定する
-    # db.query(Trouble).filter(Trouble.category_id == category_id).update(
-    #     {"category_id": None}
-    # )
+    # お困りごとが参照している間は削除しない（お困りごと・メッセージを巻き込んで削除しないため）
+    if cascade.trouble_category_in_use(db, category_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="このカテゴリーのお困りごとがあるため削除できません"
+        )
     
-    # カテゴリーを削除
-    db.delete(db_category)
-    db.commit()
+    # 論理削除して削除ジョブを登録
+    job = cascade.request_category_deletion(db, db_category, current_user.user_id)
+    background_tasks.add_task(cascade.run_job, job.job_id)
     
-    return None
\ No newline at end of file
+    return job
\ No newline at end of file
@@ -0,0 +1,49 @@
+# app/api/troubles/directory.py
+from typing import Dict, NamedTuple, Set
+
+from sqlalchemy.orm import Session
+
+from ...core.config import settings
+from ...core.row_cache import RowCache
+from ...core.warmup import register_warmup
+from .models import Trouble, TroubleArchive
+
+
+class TroubleRef(NamedTuple):
+    """メッセージ投稿時などに参照するお困りごとの情報"""
+    trouble_id: int
+    project_id: int
+    category_id: int
+    creator_user_id: int
+    archived: bool
+
+
+def _load_troubles(db: Session, trouble_ids: Set[int]) -> Dict[int, TroubleRef]:
+    """ライブテーブルにないお困りごとはアーカイブから取得する"""
+    result = {}
+    for model, archived in ((Trouble, False), (TroubleArchive, True)):
+        missing = trouble_ids - result.keys()
+        if not missing:
+            break
+        rows = db.query(
+            model.trouble_id, model.project_id, model.category_id, model.creator_user_id
+        ).filter(model.trouble_id.in_(missing)).all()
+        for row in rows:
+            result[row.trouble_id] = TroubleRef(row.trouble_id, row.project_id, row.category_id, row.creator_user_id, archived)
+    return result
+
+
+# アプリケーション全体で共有するお困りごと参照キャッシュ（カテゴリー変更・削除・アーカイブ時に invalidate する）
+trouble_directory: RowCache[TroubleRef] = RowCache(_load_troubles)
+
+
+def _warm_trouble_directory(db: Session) -> None:
+    """最近のお困りごとを参照キャッシュに読み込んでおく（起動後のウォームアップ）"""
+    recent_ids = [
+        row_id for (row_id,) in db.query(Trouble.trouble_id)
+        .order_by(Trouble.trouble_id.desc()).limit(settings.WARMUP_REFERENCE_ROWS).all()
+    ]
+    trouble_directory.get_many(db, recent_ids)
+
+
+register_warmup("trouble-directory", _warm_trouble_directory)
@@ -0,0 +1,181 @@
+# app/api/troubles/experts.py
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import heapq
+import math
+import threading
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ...core.config import settings
+from ..messages.models import Message
+from ..users.models import User
+from .models import Trouble
+
+# 部署（ユーザーのカテゴリー）がプロジェクトのカテゴリーと一致する場合の加点
+DEPARTMENT_BONUS = 0.5
+# 全体の回答数（users.num_answer）の重み
+TOTAL_ANSWERS_WEIGHT = 0.1
+
+
+class HelperCandidate(NamedTuple):
+    """お困りごとの回答者候補"""
+    user_id: int
+    department_id: Optional[int]
+    answers: int  # このカテゴリーでの回答数
+    last_answered_at: Optional[float]  # このカテゴリーでの最終回答時刻（UNIX時間）
+    score: float
+
+
+def _to_timestamp(value: Optional[datetime]) -> Optional[float]:
+    """DBの日時をUNIX時間に変換する（タイムゾーンなしはローカル時刻とみなす）"""
+    if value is None:
+        return None
+    return value.timestamp()
+
+
+def _parse_department(category_id) -> Optional[int]:
+    try:
+        return int(category_id) if category_id is not None else None
+    except (ValueError, TypeError):
+        return None
+
+
+class ExpertIndex:
+    """
+    お困りごとのカテゴリー → 回答者候補のインデックス
+
+    - 起動後の初回利用時に trouble_messages をカテゴリー×送信者で一度だけ集計する
+      （お困りごとの作成者自身のメッセージは回答として数えない）
+    - 以降はメッセージ投稿時に差分で更新するため、検索時にメッセージテーブルは参照しない
+    - スコア = log(1 + カテゴリー内回答数) × (0.5 + 最終回答からの経過による減衰)
+              + 全体回答数の補正 + 部署一致の加点
+    """
+
+    def __init__(self, recency_half_life_days: float):
+        self.decay_rate = math.log(2) / (recency_half_life_days * 86400)
+        # {トラブルカテゴリーID: {ユーザーID: [回答数, 最終回答時刻]}}
+        self._answers: Dict[Optional[int], Dict[int, list]] = {}
+        # {ユーザーID: (部署ID, 全体の回答数)}
+        self._users: Dict[int, Tuple[Optional[int], int]] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        # 集計中に投稿された回答（集計完了後に再適用する）
+        self._loading = False
+        self._backlog: List[Tuple] = []
+
+    def ensure_loaded(self, db: Session) -> None:
+        """未集計の場合にメッセージテーブルから一度だけ集計する"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            with self._lock:
+                self._loading = True
+                self._backlog = []
+            try:
+                self._load(db)
+            finally:
+                with self._lock:
+                    self._loading = False
+                    backlog, self._backlog = self._backlog, []
+                for entry in backlog:
+                    self.record_answer(*entry)
+
+    def _load(self, db: Session) -> None:
+        rows = db.query(
+            Trouble.category_id,
+            Message.sender_user_id,
+            func.count(Message.message_id),
+            func.max(Message.sent_at)
+        ).join(
+            Trouble, Trouble.trouble_id == Message.trouble_id
+        ).filter(
+            Message.sender_user_id != Trouble.creator_user_id
+        ).group_by(
+            Trouble.category_id, Message.sender_user_id
+        ).all()
+
+        answers: Dict[Optional[int], Dict[int, list]] = {}
+        sender_ids = set()
+        for category_id, user_id, count, last_sent_at in rows:
+            answers.setdefault(category_id, {})[user_id] = [count, _to_timestamp(last_sent_at)]
+            sender_ids.add(user_id)
+
+        users: Dict[int, Tuple[Optional[int], int]] = {}
+        if sender_ids:
+            for user_id, category_id, num_answer in db.query(
+                User.user_id, User.category_id, User.num_answer
+            ).filter(User.user_id.in_(sender_ids)).all():
+                users[user_id] = (_parse_department(category_id), num_answer or 0)
+
+        with self._lock:
+            self._answers = answers
+            self._users = users
+            self._loaded = True
+
+    def record_answer(
+        self,
+        category_id: Optional[int],
+        user_id: int,
+        department_id: Optional[int],
+        num_answer: int,
+        at: Optional[float] = None
+    ) -> None:
+        """お困りごとへの回答（作成者以外のメッセージ）を1件記録する"""
+        at = at if at is not None else time.time()
+        with self._lock:
+            if self._loading:
+                self._backlog.append((category_id, user_id, department_id, num_answer, at))
+                return
+            if not self._loaded:
+                # 未集計の場合は初回集計に含まれる
+                return
+            entry = self._answers.setdefault(category_id, {}).get(user_id)
+            if entry is None:
+                self._answers[category_id][user_id] = [1, at]
+            else:
+                entry[0] += 1
+                entry[1] = max(entry[1] or at, at)
+            self._users[user_id] = (department_id, num_answer or 0)
+
+    def update_user(self, user_id: int, department_id: Optional[int], num_answer: Optional[int] = None) -> None:
+        """ユーザーの部署・全体回答数の変更を反映する"""
+        with self._lock:
+            current = self._users.get(user_id)
+            if current is None:
+                return
+            self._users[user_id] = (department_id, current[1] if num_answer is None else num_answer)
+
+    def suggest(
+        self,
+        db: Session,
+        category_id: Optional[int],
+        project_category_id: Optional[int] = None,
+        limit: int = 5,
+        exclude_user_ids: Tuple[int, ...] = ()
+    ) -> List[HelperCandidate]:
+        """カテゴリーの回答者候補をスコア順に取得する"""
+        self.ensure_loaded(db)
+        now = time.time()
+        with self._lock:
+            candidates = []
+            for user_id, (answers, last_answered_at) in self._answers.get(category_id, {}).items():
+                if user_id in exclude_user_ids:
+                    continue
+                department_id, total_answers = self._users.get(user_id, (None, 0))
+                age = max(now - last_answered_at, 0.0) if last_answered_at is not None else math.inf
+                score = math.log1p(answers) * (0.5 + math.exp(-self.decay_rate * age))
+                score += TOTAL_ANSWERS_WEIGHT * math.log1p(total_answers)
+                if project_category_id is not None and department_id == project_category_id:
+                    score += DEPARTMENT_BONUS
+                candidates.append(HelperCandidate(user_id, department_id, answers, last_answered_at, score))
+        return heapq.nlargest(limit, candidates, key=lambda candidate: candidate.score)
+
+
+# アプリケーション全体で共有するインデックス
+expert_index = ExpertIndex(settings.EXPERT_RECENCY_HALF_LIFE_DAYS)
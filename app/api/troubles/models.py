@@ -5,16 +5,20 @@ from sqlalchemy.sql import func
 
 # 相対インポートに変更
 from ...core.database import Base
+from ...core.soft_delete import soft_deletable
 
+@soft_deletable
 class TroubleCategory(Base):
     __tablename__ = "trouble_categories"
 
     category_id = Column(Integer, primary_key=True, index=True)
     name = Column(Text, nullable=False)
+    deleted_at = Column(DateTime, nullable=True)  # 論理削除日時（削除ジョブの完了までの間）
     
     # リレーションシップ
     troubles = relationship("Trouble", back_populates="category")
 
+@soft_deletable
 class Trouble(Base):
     __tablename__ = "troubles"
 
@@ -25,9 +29,30 @@ class Trouble(Base):
     creator_user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     status = Column(String, default="未解決")
+    deleted_at = Column(DateTime, nullable=True)  # 論理削除日時（削除ジョブの完了までの間）
+    insert_token = Column(String(32), nullable=True)  # 一括登録で採番されたIDを取得するためのトークン（MySQL。app/core/bulk.py）
     
     # リレーションシップ
     project = relationship("CoCreationProject", back_populates="troubles")
     creator = relationship("User", back_populates="troubles")
     category = relationship("TroubleCategory", back_populates="troubles")
     messages = relationship("Message", back_populates="trouble")
+
+class TroubleResolution(Base):
+    __tablename__ = "trouble_resolutions"
+
+    # アーカイブ後も参照するため外部キーは設定しない
+    trouble_id = Column(Integer, primary_key=True)
+    resolved_at = Column(DateTime, nullable=False, index=True)  # 解決済みにした日時
+
+class TroubleArchive(Base):
+    __tablename__ = "troubles_archive"
+
+    trouble_id = Column(Integer, primary_key=True)
+    description = Column(Text, nullable=False)
+    category_id = Column(Integer, nullable=False)
+    project_id = Column(Integer, nullable=False, index=True)
+    creator_user_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    status = Column(String(16))
+    archived_at = Column(DateTime, nullable=False)
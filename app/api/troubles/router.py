@@ -1,17 +1,32 @@
 # app/api/troubles/router.py
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, NamedTuple, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 from ...core.database import get_db
+from ...core.integrity import is_foreign_key_violation, violated_column
 from ..auth.jwt import get_current_user
 # from ...core.dependencies import get_current_user
 from ...core.dependencies import get_current_user
 from ..users.models import User
+from ..users.directory import user_directory
+from ..users import points
 from ..projects.models import CoCreationProject
+from ..projects.trending import trending_tracker
+from ..projects.directory import project_directory
 from .models import Trouble, TroubleCategory
+from .similarity import trouble_similarity_index
+from .experts import expert_index
+from .directory import TroubleRef, trouble_directory
+from . import archive
+from ..projects import stats
+from ..activity import buckets as activity
+from ..sync import changelog
+from ..deletions import cascade
+from ..deletions.schemas import DeletionJobResponse
 from ..messages.models import Message  # Messageモデルをインポート
 from .schemas import (
     TroubleResponse, TroubleCreate, TroubleUpdate, 
@@ -23,43 +38,98 @@ from . import schemas
 
 router = APIRouter()
 
-@router.post("/", response_model=schemas.TroubleResponse)
+def _similar_trouble_responses(similar_troubles) -> List[schemas.SimilarTroubleResponse]:
+    """類似検索の結果をレスポンス形式に変換する"""
+    return [
+        schemas.SimilarTroubleResponse(
+            trouble_id=item.trouble_id,
+            project_id=item.project_id,
+            description=item.snippet,
+            similarity=item.similarity
+        ) for item in similar_troubles
+    ]
+
+@router.post("/", response_model=schemas.TroubleCreateResponse)
 def create_trouble(
     trouble: schemas.TroubleCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # プロジェクトが存在するか確認
-    project = db.query(CoCreationProject).filter(CoCreationProject.project_id == trouble.project_id).first()
+    # プロジェクトが存在するか確認（参照キャッシュから取得し、通常はDBにアクセスしない）
+    project = project_directory.get(db, trouble.project_id)
     if not project:
         raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
     
+    # 重複の可能性があるお困りごとを検出（登録は行い、警告として返す）
+    possible_duplicates = trouble_similarity_index.find_duplicates(db, trouble.description)
+    
     # お困りごと作成
-    new_trouble = Trouble(
+    creator_name = current_user.name
+    new_trouble = _insert_trouble(db, current_user, trouble.project_id, trouble.category_id, trouble.description, "未解決")
+    
+    return schemas.TroubleCreateResponse(
+        trouble_id=new_trouble.trouble_id,
         description=trouble.description,
-        project_id=trouble.project_id,
         category_id=trouble.category_id,
-        creator_user_id=current_user.user_id,
+        project_id=trouble.project_id,
+        project_title=project.title,
+        creator_user_id=new_trouble.creator_user_id,
+        creator_name=creator_name,
+        created_at=new_trouble.created_at,
+        status="未解決",
+        comments=0,  # 新規作成時はコメント数0
+        possible_duplicates=_similar_trouble_responses(possible_duplicates)
+    )
+
+class _CreatedTrouble(NamedTuple):
+    trouble_id: int
+    creator_user_id: int
+    created_at: datetime
+
+
+def _insert_trouble(db: Session, current_user: User, project_id: int, category_id: int, description: str, status_value: Optional[str]) -> _CreatedTrouble:
+    """
+    お困りごとを登録してコミットする
+
+    プロジェクト・カテゴリーの存在確認は外部キー制約で行い、違反した場合は404にする。
+    コミット後の再読み込み（refresh）を避けるため、作成日時はアプリケーション側で設定する
+    """
+    creator_user_id = current_user.user_id
+    new_trouble = Trouble(
+        description=description,
+        project_id=project_id,
+        category_id=category_id,
+        creator_user_id=creator_user_id,
         created_at=datetime.now(),
-        status="未解決"
+        status=status_value
     )
     
-    db.add(new_trouble)
+    try:
+        db.add(new_trouble)
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        if is_foreign_key_violation(e):
+            column = violated_column(e, ["project_id", "category_id"])
+            if column == "project_id":
+                raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
+            if column == "category_id":
+                raise HTTPException(status_code=404, detail="指定されたカテゴリーが見つかりません")
+            raise HTTPException(status_code=404, detail="プロジェクトまたはカテゴリーが見つかりません")
+        raise
+    trouble_id = new_trouble.trouble_id
+    created_at = new_trouble.created_at
+    changelog.record(db, changelog.TROUBLE, trouble_id)
+    stats.record_trouble_change(db, project_id, None, (category_id, status_value))
+    activity.record_trouble(db, project_id, creator_user_id)
     db.commit()
-    db.refresh(new_trouble)
     
-    return schemas.TroubleResponse(
-        trouble_id=new_trouble.trouble_id,
-        description=new_trouble.description,
-        category_id=new_trouble.category_id,
-        project_id=new_trouble.project_id,
-        project_title=project.title,
-        creator_user_id=new_trouble.creator_user_id,
-        creator_name=current_user.name,
-        created_at=new_trouble.created_at,
-        status=new_trouble.status,
-        comments=0  # 新規作成時はコメント数0
-    )
+    ref = TroubleRef(trouble_id, project_id, category_id, creator_user_id, False)
+    trouble_directory.put(trouble_id, ref)
+    trending_tracker.record_trouble(project_id)
+    trouble_similarity_index.add(trouble_id, project_id, description)
+    return _CreatedTrouble(trouble_id, creator_user_id, created_at)
+
 
 # 簡易版のお困りごと作成エンドポイント
 @router.post("/simple", status_code=status.HTTP_201_CREATED)
@@ -74,24 +144,8 @@ def create_trouble_simple(
     """
     スキーマ検証をバイパスする簡易版のお困りごと作成エンドポイント
     """
-    # プロジェクトが存在するか確認
-    project = db.query(CoCreationProject).filter(CoCreationProject.project_id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
-    
-    # お困りごと作成
-    new_trouble = Trouble(
-        description=description,
-        project_id=project_id,
-        category_id=category_id,
-        creator_user_id=current_user.user_id,
-        created_at=datetime.now(),
-        status=status
-    )
-    
-    db.add(new_trouble)
-    db.commit()
-    db.refresh(new_trouble)
+    # プロジェクトの存在確認は外部キー制約で行う
+    new_trouble = _insert_trouble(db, current_user, project_id, category_id, description, status)
     
     return {
         "trouble_id": new_trouble.trouble_id,
@@ -108,30 +162,13 @@ def get_troubles(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # クエリ作成
-    query = db.query(Trouble)
-    
-    # プロジェクトIDによるフィルタリング
-    if project_id:
-        query = query.filter(Trouble.project_id == project_id)
-    
-    # カテゴリによるフィルタリング
-    if category_id:
-        query = query.filter(Trouble.category_id == category_id)
-    
-    # 状態によるフィルタリング
-    if status:
-        query = query.filter(Trouble.status == status)
-    
-    # 作成日時で降順ソート
-    query = query.order_by(Trouble.created_at.desc())
-    
-    # 総数取得
-    total = query.count()
-    
-    # ページネーション適用
-    troubles = query.offset(skip).limit(limit).all()
+    # アーカイブ済みのお困りごとを含めて取得（作成日時で降順ソート）
+    troubles, total = archive.list_troubles(db, project_id, category_id, status, skip, limit)
     
+    # 作成者情報・コメント数（メッセージとして扱う）をまとめて取得
+    creators = user_directory.get_many(db, [t.creator_user_id for t in troubles])
+    comments = archive.comment_counts(db, troubles)
+
     # レスポンス形式に変換
     trouble_list = []
     for trouble in troubles:
@@ -139,27 +176,9 @@ def get_troubles(
         project = db.query(CoCreationProject).filter(CoCreationProject.project_id == trouble.project_id).first()
         
         # 作成者情報取得
-        creator = db.query(User).filter(User.user_id == trouble.creator_user_id).first()
+        creator = creators.get(trouble.creator_user_id)
         
-        # コメント数取得（メッセージとして扱う）
-        # <!-- 修正: メッセージ数取得時のエラーハンドリングを追加 -->
-        comments_count = 0  # デフォルト値
-        try:
-            from ..messages.models import Message
-            comments_count = db.query(Message).filter(Message.trouble_id == trouble.trouble_id).count()
-        except Exception as e:
-            print(f"メッセージ数取得時にエラーが発生しました: {e}")
-            # テーブル名が異なる場合は正しいテーブル名を使って再試行
-            try:
-                # SQLAlchemyで直接クエリを実行してみる
-                result = db.execute(f"SELECT COUNT(*) FROM trouble_messages WHERE trouble_id = {trouble.trouble_id}")
-                for row in result:
-                    comments_count = row[0]
-                    break
-            except Exception as e2:
-                print(f"再試行時にエラーが発生しました: {e2}")
-                # エラー時はコメント数を0とする
-                comments_count = 0
+        comments_count = comments.get(trouble.trouble_id, 0)
         
         trouble_list.append(schemas.TroubleResponse(
             trouble_id=trouble.trouble_id,
@@ -185,8 +204,8 @@ def get_trouble_detail(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # お困りごと取得
-    trouble = db.query(Trouble).filter(Trouble.trouble_id == trouble_id).first()
+    # お困りごと取得（アーカイブ済みの場合はアーカイブから取得）
+    trouble = archive.get_trouble(db, trouble_id)
     if not trouble:
         raise HTTPException(status_code=404, detail="お困りごとが見つかりません")
     
@@ -194,14 +213,14 @@ def get_trouble_detail(
     project = db.query(CoCreationProject).filter(CoCreationProject.project_id == trouble.project_id).first()
     
     # 作成者情報取得
-    creator = db.query(User).filter(User.user_id == trouble.creator_user_id).first()
+    creator = user_directory.get(db, trouble.creator_user_id)
     
     # コメント数取得（メッセージとして扱う）
     # <!-- 修正: メッセージ数取得時のエラーハンドリングを追加 -->
     comments_count = 0  # デフォルト値
     try:
-        from ..messages.models import Message
-        comments_count = db.query(Message).filter(Message.trouble_id == trouble.trouble_id).count()
+        message_model = archive.message_model_for(trouble)
+        comments_count = db.query(message_model).filter(message_model.trouble_id == trouble.trouble_id).count()
     except Exception as e:
         print(f"メッセージ数取得時にエラーが発生しました: {e}")
         # テーブル名が異なる場合は正しいテーブル名を使って再試行
@@ -216,6 +235,11 @@ def get_trouble_detail(
             # エラー時はコメント数を0とする
             comments_count = 0
     
+    # 説明が似ているお困りごと
+    similar_troubles = trouble_similarity_index.similar(
+        db, trouble.description, limit=5, exclude_id=trouble.trouble_id
+    )
+    
     return schemas.TroubleDetailResponse(
         trouble_id=trouble.trouble_id,
         description=trouble.description,
@@ -226,7 +250,8 @@ def get_trouble_detail(
         creator_name=creator.name if creator else "Unknown User",
         created_at=trouble.created_at,
         status=trouble.status,
-        comments=comments_count
+        comments=comments_count,
+        similar_troubles=_similar_trouble_responses(similar_troubles)
     )
 
 @router.put("/{trouble_id}", response_model=schemas.TroubleResponse)
@@ -246,6 +271,7 @@ def update_trouble(
         raise HTTPException(status_code=403, detail="自分のお困りごとのみ更新できます")
     
     # 更新処理
+    previous_stat_key = (trouble.category_id, trouble.status)
     if trouble_update.description is not None:
         trouble.description = trouble_update.description
     if trouble_update.category_id is not None:
@@ -253,10 +279,20 @@ def update_trouble(
     if trouble_update.status is not None:
         if trouble_update.status not in ["未解決", "解決"]:
             raise HTTPException(status_code=400, detail="ステータスは「未解決」または「解決」のみ設定可能です")
+        if trouble_update.status == "解決" and trouble.status != "解決":
+            # 解決時のポイントはお困りごとごとに1回のみ付与
+            points.award_once(db, trouble.creator_user_id, points.TROUBLE_RESOLVED, trouble.trouble_id)
+        if trouble_update.status != trouble.status:
+            archive.record_status_change(db, trouble.trouble_id, trouble_update.status)
         trouble.status = trouble_update.status
+    stats.record_trouble_change(db, trouble.project_id, previous_stat_key, (trouble.category_id, trouble.status))
+    changelog.record(db, changelog.TROUBLE, trouble.trouble_id)
     
     db.commit()
     db.refresh(trouble)
+    trouble_directory.invalidate(trouble.trouble_id)
+    if trouble_update.description is not None:
+        trouble_similarity_index.add(trouble.trouble_id, trouble.project_id, trouble.description)
     
     # プロジェクト情報取得
     project = db.query(CoCreationProject).filter(CoCreationProject.project_id == trouble.project_id).first()
@@ -283,12 +319,18 @@ def update_trouble(
         comments=0  # 実際のコメント数は再取得する必要がある
     )
 
-@router.delete("/{trouble_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{trouble_id}", status_code=status.HTTP_202_ACCEPTED, response_model=DeletionJobResponse)
 def delete_trouble(
     trouble_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """
+    お困りごとを削除する
+
+    即座に非表示にし、メッセージなどの削除はバックグラウンドのジョブで行う（進捗は /deletions/{job_id}）
+    """
     # お困りごと取得
     trouble = db.query(Trouble).filter(Trouble.trouble_id == trouble_id).first()
     if not trouble:
@@ -298,11 +340,11 @@ def delete_trouble(
     if trouble.creator_user_id != current_user.user_id:
         raise HTTPException(status_code=403, detail="自分のお困りごとのみ削除できます")
     
-    # 削除
-    db.delete(trouble)
-    db.commit()
+    # 論理削除して削除ジョブを登録
+    job = cascade.request_trouble_deletion(db, trouble, current_user.user_id)
+    background_tasks.add_task(cascade.run_job, job.job_id)
     
-    return None
+    return job
 
 @router.get("/categories", response_model=List[schemas.TroubleCategoryResponse])
 def get_trouble_categories(
@@ -342,7 +384,7 @@ def get_trouble_participants(
     特定のお困りごとに関連する参加者リストを取得する
     """
     # お困りごとの存在確認
-    trouble = db.query(Trouble).filter(Trouble.trouble_id == trouble_id).first()
+    trouble = archive.get_trouble(db, trouble_id)
     if not trouble:
         raise HTTPException(status_code=404, detail="お困りごとが見つかりません")
     
@@ -351,16 +393,27 @@ def get_trouble_participants(
     if not project:
         raise HTTPException(status_code=404, detail="関連するプロジェクトが見つかりません")
     
+    # メッセージの送信者IDを取得（重複を排除）
+    message_model = archive.message_model_for(trouble)
+    sender_ids = [
+        row[0] for row in db.query(message_model.sender_user_id)
+        .filter(message_model.trouble_id == trouble_id)
+        .distinct().all()
+    ]
+    
+    # オーナー・作成者・送信者の情報をまとめて取得
+    cards = user_directory.get_many(
+        db, [project.creator_user_id, trouble.creator_user_id] + sender_ids
+    )
+    
     # プロジェクト作成者（オーナー）情報
-    owner = db.query(User).filter(User.user_id == project.creator_user_id).first()
+    owner = cards.get(project.creator_user_id)
     
     # お困りごと作成者
-    creator = db.query(User).filter(User.user_id == trouble.creator_user_id).first()
+    creator = cards.get(trouble.creator_user_id)
     
-    # メッセージの送信者たちを取得（重複を排除）
-    message_senders = db.query(User).join(Message, User.user_id == Message.sender_user_id)\
-        .filter(Message.trouble_id == trouble_id)\
-        .distinct().all()
+    # メッセージの送信者たち
+    message_senders = [cards[sender_id] for sender_id in sender_ids if sender_id in cards]
     
     # 参加者リストを作成
     participants = []
@@ -371,7 +424,7 @@ def get_trouble_participants(
             "user_id": owner.user_id,
             "name": owner.name,
             "role": "オーナー",
-            "avatar": owner.name[0] if owner.name else "不"  # 名前の頭文字
+            "avatar": owner.avatar  # 名前の頭文字
         })
     
     # お困りごと作成者を追加（オーナーと異なる場合）
@@ -380,7 +433,7 @@ def get_trouble_participants(
             "user_id": creator.user_id,
             "name": creator.name,
             "role": "作成者",
-            "avatar": creator.name[0] if creator.name else "不"
+            "avatar": creator.avatar
         })
     
     # メッセージ送信者を追加（重複を避ける）
@@ -391,7 +444,48 @@ def get_trouble_participants(
                 "user_id": sender.user_id,
                 "name": sender.name,
                 "role": "応援者",
-                "avatar": sender.name[0] if sender.name else "不"
+                "avatar": sender.avatar
             })
     
-    return participants
\ No newline at end of file
+    return participants
+
+@router.get("/{trouble_id}/suggested-helpers", response_model=List[schemas.SuggestedHelperResponse])
+def get_suggested_helpers(
+    trouble_id: int,
+    limit: int = Query(5, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    お困りごとの回答者候補を取得する（カテゴリーでの回答実績・最近の活動・部署で順位付け）
+    """
+    # お困りごとの存在確認
+    trouble = archive.get_trouble(db, trouble_id)
+    if not trouble:
+        raise HTTPException(status_code=404, detail="お困りごとが見つかりません")
+    
+    project_category_id = db.query(CoCreationProject.category_id).filter(
+        CoCreationProject.project_id == trouble.project_id
+    ).scalar()
+    
+    # お困りごとの作成者本人は候補から除外
+    candidates = expert_index.suggest(
+        db,
+        trouble.category_id,
+        project_category_id=project_category_id,
+        limit=limit,
+        exclude_user_ids=(trouble.creator_user_id,)
+    )
+    cards = user_directory.get_many(db, [candidate.user_id for candidate in candidates])
+    
+    return [
+        schemas.SuggestedHelperResponse(
+            user_id=candidate.user_id,
+            name=cards[candidate.user_id].name,
+            avatar=cards[candidate.user_id].avatar,
+            department_id=candidate.department_id,
+            answers_in_category=candidate.answers,
+            last_answered_at=datetime.fromtimestamp(candidate.last_answered_at) if candidate.last_answered_at is not None else None,
+            score=round(candidate.score, 4)
+        ) for candidate in candidates if candidate.user_id in cards
+    ]
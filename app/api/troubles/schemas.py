@@ -39,10 +39,19 @@ class TroubleResponse(BaseSchemaModel):
     status: str
     comments: int = 0
 
+class SimilarTroubleResponse(BaseSchemaModel):
+    trouble_id: int
+    project_id: int
+    description: str = Field(..., description="お困りごとの説明（先頭の抜粋）")
+    similarity: float = Field(..., description="類似度（0〜1）")
+
+class TroubleCreateResponse(TroubleResponse):
+    possible_duplicates: List[SimilarTroubleResponse] = Field(default_factory=list, description="重複の可能性があるお困りごと")
+
 class TroubleDetailResponse(TroubleResponse):
     # メッセージ関連の情報を追加する場合
     # messages: List[MessageResponse] = []
-    pass
+    similar_troubles: List[SimilarTroubleResponse] = Field(default_factory=list, description="説明が似ているお困りごと")
 
 class TroublesListResponse(BaseSchemaModel):
     troubles: List[TroubleResponse]
@@ -52,4 +61,13 @@ class ParticipantResponse(BaseSchemaModel):
     user_id: int
     name: str
     role: str
-    avatar: str
\ No newline at end of file
+    avatar: str
+
+class SuggestedHelperResponse(BaseSchemaModel):
+    user_id: int
+    name: str
+    avatar: str
+    department_id: Optional[int] = Field(None, description="部署（ユーザーのカテゴリーID）")
+    answers_in_category: int = Field(..., description="このカテゴリーのお困りごとへの回答数")
+    last_answered_at: Optional[datetime] = Field(None, description="このカテゴリーでの最終回答日時")
+    score: float = Field(..., description="推薦スコア")
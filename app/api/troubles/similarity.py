@@ -0,0 +1,387 @@
+# app/api/troubles/similarity.py
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import math
+import re
+import threading
+import unicodedata
+import zlib
+
+from sqlalchemy.orm import Session
+
+from ...core.background import register_periodic_task
+from ...core.config import settings
+from ...core.database import SessionLocal
+from ...core.warmup import register_warmup
+from .models import Trouble
+
+# TF-IDF の文字n-gram（日本語は単語区切りがないため文字単位で扱う）
+NGRAM_MIN = 2
+NGRAM_MAX = 3
+N_FEATURES = 1 << 18  # ハッシュトリックの次元数
+
+# MinHash / LSH の設定（32バンド×4行: 類似度 約0.42 以上が候補になりやすい）
+NUM_PERM = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 3
+
+DUPLICATE_THRESHOLD = 0.7  # 重複とみなす推定Jaccard係数
+SIMILAR_MIN_SCORE = 0.1  # 類似お困りごととして返すコサイン類似度の下限
+SNIPPET_LENGTH = 100
+
+# 構築後の追加・削除がこの件数を超えたら再構築する
+REBUILD_THRESHOLD = 1000
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WHITESPACE = re.compile(r"\s+")
+
+
+class SimilarTrouble(NamedTuple):
+    trouble_id: int
+    project_id: int
+    snippet: str
+    similarity: float
+
+
+def normalize_text(text: str) -> str:
+    """全角/半角・大文字/小文字・空白の違いを吸収する"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _hash(value: str) -> int:
+    return zlib.crc32(value.encode("utf-8"))
+
+
+def _features(text: str) -> Counter:
+    """文字n-gramをハッシュした特徴量の出現回数"""
+    counts: Counter = Counter()
+    for n in range(NGRAM_MIN, NGRAM_MAX + 1):
+        for i in range(len(text) - n + 1):
+            counts[_hash(text[i:i + n]) % N_FEATURES] += 1
+    return counts
+
+
+def _shingles(text: str):
+    """MinHash用のシングル（文字3-gramのハッシュ値）"""
+    import numpy as np
+
+    if len(text) < SHINGLE_SIZE:
+        grams = {text} if text else set()
+    else:
+        grams = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    return np.fromiter((_hash(gram) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+class TroubleSimilarityIndex:
+    """
+    お困りごとの説明文の類似検索インデックス
+
+    - 文字n-gramの TF-IDF ベクトル（コサイン類似度）で類似お困りごとを検索する
+    - MinHash + LSH で重複に近いお困りごとを候補バケットから数ミリ秒で検出する
+    - 作成・更新・削除は差分として反映し、一定量たまったらDBから一括で再構築する
+      （TF-IDF 行列と MinHash 署名の計算は NumPy/SciPy でベクトル化）
+    """
+
+    def __init__(self, seed: int = 1):
+        self.seed = seed
+        # MinHashのハッシュ関数の係数（NumPyの読み込みを遅らせるため初回使用時に生成）
+        self._perm_a = None
+        self._perm_b = None
+
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._built = False
+        # 構築中の更新を記録し、構築完了後に再適用する
+        self._building = False
+        self._journal: List[Tuple] = []
+
+        # 一括構築したTF-IDF行列（列方向の検索用にCSC形式）
+        self._base_ids: List[int] = []
+        self._matrix = None
+        self._idf = None
+        self._removed: set = set()
+        # 構築後に追加されたお困りごとのベクトル {trouble_id: (列, 値)}
+        self._pending: Dict[int, Tuple] = {}
+
+        # MinHash署名とLSHバケット
+        self._signatures: Dict[int, object] = {}
+        self._buckets: List[Dict[bytes, set]] = [{} for _ in range(LSH_BANDS)]
+        # 表示用の情報 {trouble_id: (project_id, 抜粋)}
+        self._meta: Dict[int, Tuple[int, str]] = {}
+
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    # ---- ベクトル化 ----
+
+    def _vectorize(self, counts: Counter):
+        """出現回数を正規化済みのTF-IDFベクトル（列, 値）に変換する"""
+        import numpy as np
+
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float64, count=len(counts)))
+        values *= self._idf[columns]
+        norm = np.sqrt(np.dot(values, values))
+        if norm > 0:
+            values /= norm
+        order = np.argsort(columns)
+        return columns[order], values[order]
+
+    def _permutations(self):
+        import numpy as np
+
+        if self._perm_a is None:
+            rng = np.random.RandomState(self.seed)
+            self._perm_a = rng.randint(1, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+            self._perm_b = rng.randint(0, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+        return self._perm_a, self._perm_b
+
+    def _signature(self, shingles):
+        """シングル集合のMinHash署名"""
+        import numpy as np
+
+        perm_a, perm_b = self._permutations()
+        if len(shingles) == 0:
+            return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+        hashed = (np.outer(shingles, perm_a) + perm_b) % np.uint64(_MERSENNE_PRIME)
+        return (hashed & np.uint64(_MAX_HASH)).min(axis=0)
+
+    def _signatures_batch(self, shingle_sets: List, chunk_size: int = 256) -> List:
+        """複数文書のMinHash署名をまとめて計算する"""
+        import numpy as np
+
+        perm_a, perm_b = self._permutations()
+        signatures = []
+        for start in range(0, len(shingle_sets), chunk_size):
+            chunk = shingle_sets[start:start + chunk_size]
+            lengths = np.array([max(len(s), 1) for s in chunk])
+            values = np.concatenate([
+                s if len(s) else np.zeros(1, dtype=np.uint64) for s in chunk
+            ])
+            hashed = (np.outer(values, perm_a) + perm_b) % np.uint64(_MERSENNE_PRIME)
+            hashed &= np.uint64(_MAX_HASH)
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            minimums = np.minimum.reduceat(hashed, offsets, axis=0)
+            for row, shingles in zip(minimums, chunk):
+                signatures.append(row if len(shingles) else np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64))
+        return signatures
+
+    @staticmethod
+    def _band_keys(signature) -> List[bytes]:
+        return [
+            signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+            for band in range(LSH_BANDS)
+        ]
+
+    # ---- 構築 ----
+
+    def ensure_built(self, db: Session) -> None:
+        """未構築の場合にDBから一括構築する"""
+        if self._built:
+            return
+        with self._build_lock:
+            if not self._built:
+                self.build(db)
+
+    def build(self, db: Session) -> None:
+        """troubles テーブルから一括構築する"""
+        with self._lock:
+            self._building = True
+            self._journal = []
+        try:
+            rows = db.query(Trouble.trouble_id, Trouble.project_id, Trouble.description).all()
+            self.build_from_rows(rows)
+        finally:
+            with self._lock:
+                self._building = False
+                journal, self._journal = self._journal, []
+                # 構築中に行われた追加・削除を再適用
+                for operation in journal:
+                    if operation[0] == "add":
+                        self.add(*operation[1:])
+                    else:
+                        self.remove(operation[1])
+
+    def build_from_rows(self, rows: Iterable[Tuple[int, int, str]]) -> None:
+        """(trouble_id, project_id, description) の一覧から一括構築する"""
+        import numpy as np
+        from scipy import sparse
+
+        rows = list(rows)
+        texts = [normalize_text(description) for _, _, description in rows]
+
+        # 文字n-gramの出現回数（サブリニアTF）を疎行列にまとめる
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for text in texts:
+            counts = _features(text)
+            indices.extend(counts.keys())
+            data.extend(1.0 + math.log(count) for count in counts.values())
+            indptr.append(len(indices))
+        matrix = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+            shape=(len(rows), N_FEATURES),
+        )
+
+        # IDFで重み付けし、行ごとにL2正規化
+        document_frequency = np.bincount(matrix.indices, minlength=N_FEATURES)
+        idf = np.log((1.0 + len(rows)) / (1.0 + document_frequency)) + 1.0
+        matrix = matrix @ sparse.diags(idf)
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        matrix = (sparse.diags(1.0 / norms) @ matrix).tocsc()
+
+        signatures = self._signatures_batch([_shingles(text) for text in texts])
+        buckets: List[Dict[bytes, set]] = [{} for _ in range(LSH_BANDS)]
+        signature_map = {}
+        for (trouble_id, _, _), signature in zip(rows, signatures):
+            signature_map[trouble_id] = signature
+            for band, key in enumerate(self._band_keys(signature)):
+                buckets[band].setdefault(key, set()).add(trouble_id)
+
+        with self._lock:
+            self._base_ids = [trouble_id for trouble_id, _, _ in rows]
+            self._matrix = matrix
+            self._idf = idf
+            self._removed = set()
+            self._pending = {}
+            self._signatures = signature_map
+            self._buckets = buckets
+            self._meta = {
+                trouble_id: (project_id, (description or "")[:SNIPPET_LENGTH])
+                for trouble_id, project_id, description in rows
+            }
+            self._built = True
+
+    def maintain(self) -> None:
+        """差分が一定量を超えていれば再構築する（定期実行）"""
+        if not self._built or len(self._pending) + len(self._removed) < REBUILD_THRESHOLD:
+            return
+        db = SessionLocal()
+        try:
+            with self._build_lock:
+                self.build(db)
+        finally:
+            db.close()
+
+    # ---- 差分更新 ----
+
+    def add(self, trouble_id: int, project_id: int, description: str) -> None:
+        """お困りごとの作成・説明文の更新を反映する"""
+        with self._lock:
+            if self._building:
+                self._journal.append(("add", trouble_id, project_id, description))
+            if not self._built:
+                return
+            self._discard(trouble_id)
+            text = normalize_text(description)
+            self._pending[trouble_id] = self._vectorize(_features(text))
+            signature = self._signature(_shingles(text))
+            self._signatures[trouble_id] = signature
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, set()).add(trouble_id)
+            self._meta[trouble_id] = (project_id, (description or "")[:SNIPPET_LENGTH])
+
+    def remove(self, trouble_id: int) -> None:
+        """お困りごとの削除を反映する"""
+        with self._lock:
+            if self._building:
+                self._journal.append(("remove", trouble_id))
+            if self._built:
+                self._discard(trouble_id)
+
+    def _discard(self, trouble_id: int) -> None:
+        """インデックスからお困りごとを取り除く（ロック取得済みで呼び出す）"""
+        if self._pending.pop(trouble_id, None) is None:
+            # 一括構築した行列内の行は検索時に除外する
+            self._removed.add(trouble_id)
+        signature = self._signatures.pop(trouble_id, None)
+        if signature is not None:
+            for band, key in enumerate(self._band_keys(signature)):
+                bucket = self._buckets[band].get(key)
+                if bucket is not None:
+                    bucket.discard(trouble_id)
+                    if not bucket:
+                        del self._buckets[band][key]
+        self._meta.pop(trouble_id, None)
+
+    # ---- 検索 ----
+
+    def similar(self, db: Session, description: str, limit: int = 5, exclude_id: Optional[int] = None) -> List[SimilarTrouble]:
+        """説明文がTF-IDFのコサイン類似度で近いお困りごとを取得する"""
+        import numpy as np
+
+        self.ensure_built(db)
+        with self._lock:
+            columns, values = self._vectorize(_features(normalize_text(description)))
+            if len(columns) == 0:
+                return []
+
+            candidates: Dict[int, float] = {}
+            if self._base_ids:
+                scores = np.asarray(self._matrix[:, columns] @ values).ravel()
+                k = min(len(scores), limit + len(self._removed) + 1)
+                top = np.argpartition(-scores, k - 1)[:k]
+                for position in top[np.argsort(-scores[top])]:
+                    score = float(scores[position])
+                    if score < SIMILAR_MIN_SCORE:
+                        break
+                    trouble_id = self._base_ids[position]
+                    if trouble_id not in self._removed:
+                        candidates[trouble_id] = score
+
+            for trouble_id, (pending_columns, pending_values) in self._pending.items():
+                _, left, right = np.intersect1d(columns, pending_columns, assume_unique=True, return_indices=True)
+                score = float(np.dot(values[left], pending_values[right]))
+                if score >= SIMILAR_MIN_SCORE:
+                    candidates[trouble_id] = score
+
+            candidates.pop(exclude_id, None)
+            ranked = sorted(candidates.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [self._result(trouble_id, score) for trouble_id, score in ranked if trouble_id in self._meta]
+
+    def find_duplicates(self, db: Session, description: str, limit: int = 5, exclude_id: Optional[int] = None) -> List[SimilarTrouble]:
+        """MinHash/LSH で重複の可能性が高いお困りごとを取得する"""
+        import numpy as np
+
+        self.ensure_built(db)
+        signature = self._signature(_shingles(normalize_text(description)))
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            candidates.discard(exclude_id)
+            if not candidates:
+                return []
+
+            # 候補の署名をまとめて比較し、一致率から Jaccard 係数を推定する
+            candidate_ids = list(candidates)
+            estimates = (np.stack([self._signatures[trouble_id] for trouble_id in candidate_ids]) == signature).mean(axis=1)
+            order = np.argsort(-estimates)[:limit]
+            return [
+                self._result(candidate_ids[position], float(estimates[position]))
+                for position in order
+                if estimates[position] >= DUPLICATE_THRESHOLD
+            ]
+
+    def _result(self, trouble_id: int, similarity: float) -> SimilarTrouble:
+        project_id, snippet = self._meta[trouble_id]
+        return SimilarTrouble(trouble_id, project_id, snippet, round(similarity, 4))
+
+
+# アプリケーション全体で共有するインデックス
+trouble_similarity_index = TroubleSimilarityIndex()
+
+register_periodic_task(
+    "trouble-similarity-maintenance",
+    settings.TROUBLE_SIMILARITY_MAINTENANCE_INTERVAL_SECONDS,
+    trouble_similarity_index.maintain,
+)
+register_warmup("trouble-similarity", trouble_similarity_index.ensure_built)
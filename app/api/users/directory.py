@@ -0,0 +1,108 @@
+# app/api/users/directory.py
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from ...core.config import settings
+from .models import User
+
+
+class UserCard(NamedTuple):
+    """表示用のユーザー情報（作成者名・送信者名・参加者表示に使用）"""
+    user_id: int
+    name: str
+    avatar: str
+    points: int
+
+
+def build_user_card(user_id: int, name: str, point_total: Optional[int]) -> UserCard:
+    """ユーザー情報から表示用カードを生成する"""
+    return UserCard(
+        user_id=user_id,
+        name=name,
+        avatar=name[0] if name else "不",  # 名前の頭文字
+        points=point_total or 0,
+    )
+
+
+class UserDirectory:
+    """
+    ユーザーID → 表示用カードの上限付きキャッシュ
+
+    - get_many でキャッシュにないIDを1回の IN クエリでまとめて取得する
+    - ユーザー名などが変わった場合は invalidate で該当エントリを破棄する
+    - invalidate は同じワーカーのキャッシュにしか効かないため、各エントリは ttl_seconds で読み直す
+      （他のワーカーでの名前・ポイントの変更は最大 ttl_seconds 遅れて反映される）
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # ユーザーID → (読み込んだ時刻（time.monotonic() 基準）, カード)
+        self._cards: "OrderedDict[int, Tuple[float, UserCard]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 読み込み中に無効化された古い内容をキャッシュしないための世代番号
+        self._generation = 0
+
+    def get(self, db: Session, user_id: int) -> Optional[UserCard]:
+        """1ユーザー分のカードを取得する（存在しない場合はNone）"""
+        return self.get_many(db, [user_id]).get(user_id)
+
+    def get_many(self, db: Session, user_ids: Iterable[int]) -> Dict[int, UserCard]:
+        """複数ユーザーのカードを取得する（存在しないIDは結果に含まれない）"""
+        result: Dict[int, UserCard] = {}
+        missing = set()
+        now = time.monotonic()
+        with self._lock:
+            for user_id in user_ids:
+                if user_id is None:
+                    continue
+                entry = self._cards.get(user_id)
+                if entry is not None and now - entry[0] < self.ttl_seconds:
+                    self._cards.move_to_end(user_id)
+                    result[user_id] = entry[1]
+                else:
+                    missing.add(user_id)
+            generation = self._generation
+
+        if not missing:
+            return result
+
+        # キャッシュにない（期限切れを含む）ユーザーを1クエリで取得
+        loaded_at = time.monotonic()
+        rows = db.query(User.user_id, User.name, User.point_total).filter(
+            User.user_id.in_(missing)
+        ).all()
+        loaded = {
+            row.user_id: build_user_card(row.user_id, row.name, row.point_total)
+            for row in rows
+        }
+        result.update(loaded)
+
+        with self._lock:
+            if generation == self._generation:
+                for user_id, card in loaded.items():
+                    self._cards[user_id] = (loaded_at, card)
+                    self._cards.move_to_end(user_id)
+                # 削除されたユーザーの期限切れエントリを残さない
+                for user_id in missing.difference(loaded):
+                    self._cards.pop(user_id, None)
+                while len(self._cards) > self.max_size:
+                    self._cards.popitem(last=False)
+        return result
+
+    def invalidate(self, user_id: int = None) -> None:
+        """キャッシュを破棄する（user_id 未指定の場合は全ユーザー）"""
+        with self._lock:
+            self._generation += 1
+            if user_id is None:
+                self._cards.clear()
+            else:
+                self._cards.pop(user_id, None)
+
+
+# アプリケーション全体で共有するユーザーディレクトリ
+user_directory = UserDirectory(ttl_seconds=settings.USER_DIRECTORY_TTL_SECONDS)
@@ -1,5 +1,5 @@
 # app/api/users/models.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -60,3 +60,22 @@ class User(Base):
                 self.category_id = str(int(category_id))  # 整数に変換して文字列として保存
             except (ValueError, TypeError):
                 self.category_id = None
+
+class PointLedgerEntry(Base):
+    __tablename__ = "point_ledger"
+    
+    entry_id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False, index=True)
+    reason = Column(String(32), nullable=False)  # 付与ルール（reply, trouble_resolved など）
+    source_id = Column(Integer, nullable=True)  # 付与のもとになったお困りごと・プロジェクトのID
+    points = Column(Integer, nullable=False, default=0)  # ポイントの増減
+    answers = Column(Integer, nullable=False, default=0)  # 回答数の増減
+    applied = Column(Boolean, nullable=False, default=False, index=True)  # users への反映済みフラグ
+    once_only = Column(Boolean, nullable=True)  # 同じユーザー・理由・対象に1回だけ付与するエントリは True（それ以外は NULL）
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_point_ledger_reason_source", "reason", "source_id"),
+        # 1回のみのエントリの重複を防ぐ（NULL は重複とみなされないため、繰り返し付与するエントリは制約を受けない）
+        Index("ux_point_ledger_once", "user_id", "reason", "source_id", "once_only", unique=True),
+    )
@@ -0,0 +1,217 @@
+# app/api/users/points.py
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ...core.background import register_periodic_task
+from ...core.config import settings
+from ...core.database import SessionLocal
+from .directory import user_directory
+from .models import PointLedgerEntry, User
+
+
+class PointRule(NamedTuple):
+    """ポイント付与ルール"""
+    reason: str
+    points: int
+    answers: int = 0
+
+
+# 他のユーザーのお困りごとに返信した
+REPLY = PointRule("reply", 10, answers=1)
+# 自分のお困りごとを解決済みにした
+TROUBLE_RESOLVED = PointRule("trouble_resolved", 5)
+# 自分のプロジェクトがお気に入りに追加された／解除された
+FAVORITE_RECEIVED = PointRule("favorite_received", 3)
+FAVORITE_REMOVED = PointRule("favorite_removed", -3)
+# 照合時に既存の合計値を台帳に取り込む
+OPENING_BALANCE = "opening_balance"
+
+
+def _ledger_entry(user_id: int, rule: PointRule, source_id: Optional[int], once_only: Optional[bool] = None) -> PointLedgerEntry:
+    return PointLedgerEntry(
+        user_id=user_id,
+        reason=rule.reason,
+        source_id=source_id,
+        points=rule.points,
+        answers=rule.answers,
+        applied=False,
+        once_only=once_only
+    )
+
+
+def award(db: Session, user_id: int, rule: PointRule, source_id: Optional[int] = None) -> None:
+    """
+    ポイント台帳にエントリを追加する
+
+    呼び出し元のトランザクションに含めて INSERT するだけで、users の更新は行わない
+    （合計値への反映はバックグラウンドの集計処理で行う）
+    """
+    db.add(_ledger_entry(user_id, rule, source_id))
+
+
+def award_once(db: Session, user_id: int, rule: PointRule, source_id: int) -> bool:
+    """
+    同じ理由・対象で付与済みでない場合のみポイントを付与する
+
+    同時に呼び出された場合の重複は一意インデックス（ux_point_ledger_once）で防ぎ、
+    INSERT が重複で失敗した場合はセーブポイントまで戻して付与済みとして扱う
+    （呼び出し元のトランザクションの他の変更は残る）
+    """
+    exists = db.query(PointLedgerEntry.entry_id).filter(
+        PointLedgerEntry.reason == rule.reason,
+        PointLedgerEntry.source_id == source_id,
+        PointLedgerEntry.user_id == user_id
+    ).first()
+    if exists:
+        return False
+    try:
+        with db.begin_nested():
+            db.add(_ledger_entry(user_id, rule, source_id, once_only=True))
+    except IntegrityError:
+        # 他のリクエストが先に付与した
+        return False
+    return True
+
+
+def aggregate_pending(db: Session, batch_size: int) -> int:
+    """
+    未反映の台帳エントリを1バッチ分 users に反映する
+
+    :return: 反映したエントリ数（他のワーカーと競合した場合は0）
+    """
+    entries = db.query(
+        PointLedgerEntry.entry_id,
+        PointLedgerEntry.user_id,
+        PointLedgerEntry.points,
+        PointLedgerEntry.answers
+    ).filter(
+        PointLedgerEntry.applied.is_(False)
+    ).order_by(
+        PointLedgerEntry.entry_id
+    ).limit(batch_size).with_for_update(skip_locked=True).all()
+    if not entries:
+        return 0
+
+    # ユーザーごとに増減をまとめる
+    totals: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+    for _, user_id, points, answers in entries:
+        totals[user_id][0] += points or 0
+        totals[user_id][1] += answers or 0
+
+    entry_ids = [entry.entry_id for entry in entries]
+    claimed = db.query(PointLedgerEntry).filter(
+        PointLedgerEntry.entry_id.in_(entry_ids),
+        PointLedgerEntry.applied.is_(False)
+    ).update({PointLedgerEntry.applied: True}, synchronize_session=False)
+    if claimed != len(entry_ids):
+        # 他のワーカーが先に反映した
+        db.rollback()
+        return 0
+
+    users = User.__table__
+    db.execute(
+        update(users).where(users.c.user_id == bindparam("b_user_id")).values(
+            point_total=func.coalesce(users.c.point_total, 0) + bindparam("b_points"),
+            num_answer=func.coalesce(users.c.num_answer, 0) + bindparam("b_answers")
+        ),
+        [
+            {"b_user_id": user_id, "b_points": points, "b_answers": answers}
+            for user_id, (points, answers) in totals.items()
+        ]
+    )
+    db.commit()
+
+    for user_id in totals:
+        user_directory.invalidate(user_id)
+    return len(entry_ids)
+
+
+def aggregate_points(max_batches: int = 100) -> int:
+    """未反映の台帳エントリを users.point_total / num_answer に反映する（定期実行）"""
+    db = SessionLocal()
+    applied = 0
+    try:
+        for _ in range(max_batches):
+            count = aggregate_pending(db, settings.POINTS_AGGREGATION_BATCH_SIZE)
+            if count == 0:
+                break
+            applied += count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return applied
+
+
+def reconcile_points(db: Session, opening_balance: bool = False) -> List[Tuple[int, int, int]]:
+    """
+    users の合計値と反映済み台帳の合計を照合する
+
+    :param opening_balance: True の場合は差分を反映済みの期首残高エントリとして台帳に記録する
+                            （台帳導入前の合計値を引き継ぐ）。False の場合は users を台帳に合わせる
+    :return: 差分のあったユーザーの (ユーザーID, ポイント差分, 回答数差分) のリスト
+             （差分 = 台帳の合計 - users の値）
+    """
+    ledger = {
+        user_id: (points or 0, answers or 0)
+        for user_id, points, answers in db.query(
+            PointLedgerEntry.user_id,
+            func.sum(PointLedgerEntry.points),
+            func.sum(PointLedgerEntry.answers)
+        ).filter(
+            PointLedgerEntry.applied.is_(True)
+        ).group_by(PointLedgerEntry.user_id).all()
+    }
+
+    drifts = []
+    for user_id, point_total, num_answer in db.query(User.user_id, User.point_total, User.num_answer).all():
+        ledger_points, ledger_answers = ledger.get(user_id, (0, 0))
+        point_diff = ledger_points - (point_total or 0)
+        answer_diff = ledger_answers - (num_answer or 0)
+        if point_diff or answer_diff:
+            drifts.append((user_id, point_diff, answer_diff))
+
+    if not drifts:
+        return drifts
+
+    if opening_balance:
+        db.bulk_insert_mappings(PointLedgerEntry, [
+            {
+                "user_id": user_id,
+                "reason": OPENING_BALANCE,
+                "points": -point_diff,
+                "answers": -answer_diff,
+                "applied": True
+            } for user_id, point_diff, answer_diff in drifts
+        ])
+    else:
+        # 差分で更新し、照合中に集計処理が反映した分を上書きしないようにする
+        users = User.__table__
+        db.execute(
+            update(users).where(users.c.user_id == bindparam("b_user_id")).values(
+                point_total=func.coalesce(users.c.point_total, 0) + bindparam("b_points"),
+                num_answer=func.coalesce(users.c.num_answer, 0) + bindparam("b_answers")
+            ),
+            [
+                {"b_user_id": user_id, "b_points": point_diff, "b_answers": answer_diff}
+                for user_id, point_diff, answer_diff in drifts
+            ]
+        )
+    db.commit()
+
+    for user_id, _, _ in drifts:
+        user_directory.invalidate(user_id)
+    return drifts
+
+
+register_periodic_task(
+    "points-aggregation",
+    settings.POINTS_AGGREGATION_INTERVAL_SECONDS,
+    aggregate_points,
+    run_on_shutdown=True,
+)
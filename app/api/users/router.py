@@ -1,14 +1,20 @@
 # app/api/users/router.py
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from ...core.database import get_db
-from ...core.security import get_password_hash
+from ...core.security import get_password_hash_async
 from ..auth.jwt import get_current_user
+from ..auth.login_tracker import login_tracker
 # from ...core.dependencies import get_current_user
 from .models import User
+from .directory import user_directory
+from ..troubles.experts import expert_index
+from ..activity import buckets as activity
+from ..activity.schemas import ActivityHistogramResponse
 from .schemas import UserCreate, UserResponse, UserUpdate
 
 router = APIRouter()
@@ -31,11 +37,12 @@ def get_current_user_info(
         "category_id": category_id,
         "category_name": category_name,
         "points": current_user.point_total,
-        "last_login_at": current_user.last_login_at
+        # 反映待ちのログインがあればそちらを返す
+        "last_login_at": login_tracker.pending_for(current_user.user_id) or current_user.last_login_at
     }
 
 @router.put("/me", response_model=UserResponse)
-def update_user_info(
+async def update_user_info(
     user_data: UserUpdate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -50,6 +57,12 @@ def update_user_info(
             detail="パスワードが一致しません",
         )
     
+    # ハッシュ計算は専用のスレッドプールで行い、DBの更新はスレッドプールで行う
+    password_hash = await get_password_hash_async(user_data.password) if user_data.password else None
+    return await run_in_threadpool(_apply_user_update, db, current_user, user_data, password_hash)
+
+def _apply_user_update(db: Session, current_user: User, user_data: UserUpdate, password_hash: Optional[str]) -> Any:
+    """ユーザー情報の更新（スレッドプールで実行する）"""
     # ユーザー名の変更がある場合、重複チェック
     if user_data.name and user_data.name != current_user.name:
         existing_user = db.query(User).filter(User.name == user_data.name).first()
@@ -61,17 +74,21 @@ def update_user_info(
         current_user.name = user_data.name
     
     # パスワードの更新（入力されている場合）
-    if user_data.password:
-        current_user.password = get_password_hash(user_data.password)
+    if password_hash:
+        current_user.password = password_hash
     
     # カテゴリーの更新（入力されている場合）
-    if user_data.categories is not None:
-        current_user.set_categories_list(user_data.categories)
+    if user_data.category_id is not None:
+        current_user.set_category_id(user_data.category_id)
     
     # データベースを更新
     db.commit()
     db.refresh(current_user)
     
+    # 表示名のキャッシュを破棄
+    user_directory.invalidate(current_user.user_id)
+    expert_index.update_user(current_user.user_id, current_user.get_category_id())
+    
     # カテゴリー情報を取得
     category_id = current_user.get_category_id()
     category_name = current_user.get_category_name(db)
@@ -83,9 +100,29 @@ def update_user_info(
         "category_id": category_id,
         "category_name": category_name,
         "points": current_user.point_total,
-        "last_login_at": current_user.last_login_at
+        # 反映待ちのログインがあればそちらを返す
+        "last_login_at": login_tracker.pending_for(current_user.user_id) or current_user.last_login_at
     }
 
+@router.get("/me/activity", response_model=ActivityHistogramResponse)
+def get_current_user_activity(
+    granularity: str = Query("day", pattern="^(day|week)$"),
+    periods: int = Query(30, ge=1, le=104),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    現在のログインユーザーのメッセージ・お困りごと・お気に入り数を日別／週別に取得
+    """
+    activity.check_periods(granularity, periods)
+    
+    return ActivityHistogramResponse(
+        subject_type=activity.USER,
+        subject_id=current_user.user_id,
+        granularity=granularity,
+        buckets=activity.get_histogram(db, activity.USER, current_user.user_id, granularity, periods)
+    )
+
 @router.get("/categories", response_model=List[str])
 def get_user_categories() -> List[str]:
     """
@@ -35,6 +35,7 @@ class Token(BaseSchemaModel):
     token_type: str = "bearer"
     user_id: int
     user_name: str
+    refresh_token: Optional[str] = None  # アクセストークンの再発行に使う（/auth/refresh）
 
 class TokenData(BaseSchemaModel):
     user_id: Optional[int] = None
@@ -0,0 +1,111 @@
+# app/application.py
+"""
+FastAPI アプリケーションの構成
+
+エントリーポイント（main.py / app/main.py）はどちらも create_app() でアプリケーションを作成する。
+起動時はDBにアクセスしない（テーブル作成・初期データの投入は python -m app.manage migrate / seed で行う）ため、
+ワーカーの再起動やスケールアウト時に最初のリクエストまでの時間がDBの状態に左右されない。
+コネクションプール・キャッシュの準備は起動後にバックグラウンドで行い、完了は /readyz で確認する（app/core/warmup.py）。
+"""
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+from app.core.config import settings
+
+
+def _add_middlewares(app: FastAPI) -> None:
+    from app.core.admission import AdmissionControlMiddleware
+    from app.core.circuit_breaker import DatabaseUnavailable, database_unavailable_handler
+    from app.core.deadlines import DeadlineExceeded, RequestDeadlineMiddleware, deadline_exceeded_handler
+    from app.core.rate_limit import RateLimitMiddleware
+    from app.core.stale_cache import StaleCacheMiddleware
+
+    # リクエストの期限の設定（期限はDBの文単位のタイムアウトとして伝え、超えた場合は 504 を返す）
+    app.add_middleware(RequestDeadlineMiddleware)
+    app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+
+    # 受け付け制御ミドルウェアの設定（同時実行数を制限し、あふれたリクエストは 503 で遮断する）
+    app.add_middleware(AdmissionControlMiddleware)
+
+    # DBのサーキットブレーカーが開いている間の設定（参照系は直近の正常なレスポンス、それ以外は 503 を返す）
+    app.add_middleware(StaleCacheMiddleware)
+    app.add_exception_handler(DatabaseUnavailable, database_unavailable_handler)
+
+    # レート制限ミドルウェアの設定（ログイン試行と書き込みの集中からDBを保護する）
+    app.add_middleware(RateLimitMiddleware)
+
+    # CORSミドルウェアの設定
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.CORS_ORIGINS(),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+
+def _include_routers(app: FastAPI) -> None:
+    from app.api.auth.router import login_for_access_token, router as auth_router
+    from app.api.deletions.router import router as deletions_router
+    from app.api.exports.router import router as exports_router
+    from app.api.imports.router import router as imports_router
+    from app.api.messages.router import router as messages_router
+    from app.api.monitoring.router import router as monitoring_router
+    from app.api.projects.categories import router as project_categories_router
+    from app.api.projects.router import router as projects_router
+    from app.api.sync.router import router as sync_router
+    from app.api.troubles.categories import router as trouble_categories_router
+    from app.api.troubles.router import router as troubles_router
+    from app.api.users.router import router as users_router
+    from app.api.users.schemas import Token
+
+    app.include_router(troubles_router, prefix=f"{settings.API_V1_STR}/troubles", tags=["troubles"])
+    app.include_router(projects_router, prefix=f"{settings.API_V1_STR}/projects", tags=["projects"])
+    app.include_router(users_router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
+    app.include_router(messages_router, prefix=f"{settings.API_V1_STR}/messages", tags=["messages"])
+    app.include_router(auth_router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
+    app.include_router(sync_router, prefix=f"{settings.API_V1_STR}/sync", tags=["sync"])
+    app.include_router(exports_router, prefix=f"{settings.API_V1_STR}/exports", tags=["exports"])
+    app.include_router(imports_router, prefix=f"{settings.API_V1_STR}/imports", tags=["imports"])
+    app.include_router(deletions_router, prefix=f"{settings.API_V1_STR}/deletions", tags=["deletions"])
+    app.include_router(project_categories_router, prefix=f"{settings.API_V1_STR}/project-categories", tags=["project-categories"])
+    app.include_router(trouble_categories_router, prefix=f"{settings.API_V1_STR}/trouble-categories", tags=["trouble-categories"])
+
+    # ルートレベルに /metrics・/healthz・/readyz エンドポイントを追加
+    app.include_router(monitoring_router, tags=["monitoring"])
+
+    # ルートレベルに /token エンドポイントを追加
+    app.post("/token", response_model=Token)(login_for_access_token)
+
+
+def create_app() -> FastAPI:
+    """アプリケーションを作成する（起動処理ではDBへの接続を待たない）"""
+    from app.core.admission import configure_threadpool
+    from app.core.background import start_background_tasks, stop_background_tasks
+    from app.core.warmup import start_warmup
+
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        description="コラボゲームズのバックエンドAPIサービス",
+        version="0.1.0"
+    )
+    _add_middlewares(app)
+    _include_routers(app)
+
+    @app.on_event("startup")
+    async def startup_event():
+        """スレッドプールの大きさを設定し、バックグラウンドタスク（スナップショット保存など）とウォームアップを開始する"""
+        configure_threadpool()
+        start_background_tasks()
+        start_warmup()
+
+    @app.on_event("shutdown")
+    def shutdown_event():
+        """バックグラウンドタスクを停止する"""
+        stop_background_tasks()
+
+    @app.get("/")
+    def read_root():
+        return {"message": f"Welcome to {settings.PROJECT_NAME}"}
+
+    return app
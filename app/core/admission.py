@@ -0,0 +1,210 @@
+# app/core/admission.py
+"""
+受け付け制御（アドミッションコントロール）と負荷遮断
+
+同期ハンドラはスレッドプールで実行されるため、負荷が集中するとリクエストが上限なく待たされ、
+待ち終えたリクエストがそれぞれDBコネクションを取り合って全体の応答時間が悪化する。
+このミドルウェアで同時に処理するリクエスト数を制限し、あふれた分は待ち行列で期限付きで待たせ、
+待ち行列が満杯・期限切れの場合は 503 と Retry-After を即座に返す。
+
+- 全体の上限: ADMISSION_MAX_CONCURRENCY（既定はスレッド数とDBコネクション数の小さい方）
+- パスの接頭辞ごとの上限: ADMISSION_ROUTE_LIMITS（エクスポートなど長時間コネクションを使う処理向け）
+- 枠はレスポンスの送信完了時に解放する（送信後の BackgroundTasks の実行中は占有しない）
+- 待ち行列の長さ・受け付け/拒否の件数は /metrics で確認できる
+"""
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+import asyncio
+import json
+
+import anyio
+
+from .config import settings
+from .metrics import metrics
+
+# 受け付け制御の対象外のパス（監視用）
+EXEMPT_PATHS = frozenset({"/metrics", "/healthz", "/readyz"})
+
+REJECTED_QUEUE_FULL = "queue_full"
+REJECTED_TIMEOUT = "timeout"
+
+
+class ConcurrencyGate:
+    """
+    同時実行数の上限と、上限付きの待ち行列
+
+    イベントループ上でのみ操作するためロックは不要。
+    空きができたときは待ち行列の先頭に枠をそのまま引き渡す（割り込みを防ぐ）。
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self, timeout: float) -> Optional[str]:
+        """
+        枠を確保する
+
+        :return: 確保できた場合は None、できなかった場合は理由（REJECTED_QUEUE_FULL / REJECTED_TIMEOUT）
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return None
+        if timeout <= 0:
+            return REJECTED_TIMEOUT
+        if len(self._waiters) >= self.queue_size:
+            return REJECTED_QUEUE_FULL
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return None
+        except asyncio.TimeoutError:
+            if self._abandon(waiter):
+                return REJECTED_TIMEOUT
+            return None
+        except asyncio.CancelledError:
+            # クライアントの切断などで待機が取り消された場合も枠を残さない
+            if not self._abandon(waiter):
+                self.release()
+            raise
+
+    def _abandon(self, waiter: asyncio.Future) -> bool:
+        """待機をやめる。すでに枠を引き渡されていた場合は False を返す"""
+        if waiter.done():
+            return False
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+        return True
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # 枠を引き渡すため in_flight は変えない
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+def parse_route_limits(value: str) -> List[Tuple[str, int]]:
+    """"接頭辞=上限" のカンマ区切りを解析する（長い接頭辞から照合するよう並べ替える）"""
+    limits = []
+    for item in value.split(","):
+        prefix, _, limit = item.strip().partition("=")
+        if not prefix or not limit.strip().isdigit():
+            continue
+        limits.append((prefix.strip(), int(limit)))
+    return sorted(limits, key=lambda item: len(item[0]), reverse=True)
+
+
+class AdmissionControlMiddleware:
+    """同時実行数を制限し、あふれたリクエストを 503 で遮断するASGIミドルウェア"""
+
+    def __init__(self, app):
+        self.app = app
+        self.timeout_seconds = settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000
+        self.global_gate = ConcurrencyGate("global", settings.ADMISSION_MAX_CONCURRENCY, settings.ADMISSION_QUEUE_SIZE)
+        self.route_gates: List[Tuple[str, ConcurrencyGate]] = [
+            (prefix, ConcurrencyGate(prefix, limit, settings.ADMISSION_QUEUE_SIZE))
+            for prefix, limit in parse_route_limits(settings.ADMISSION_ROUTE_LIMITS)
+        ]
+        self._register_metrics()
+
+    def _gates(self) -> List[ConcurrencyGate]:
+        return [self.global_gate] + [gate for _, gate in self.route_gates]
+
+    def _register_metrics(self) -> None:
+        metrics.counter("admission_requests_total", "受け付け制御の判定件数（outcome: admitted / queue_full / timeout）")
+        metrics.counter("admission_wait_seconds_total", "空きを待った時間の合計（秒）")
+        metrics.register_gauge(
+            "admission_in_flight", "処理中のリクエスト数",
+            lambda: [({"gate": gate.name}, gate.in_flight) for gate in self._gates()]
+        )
+        metrics.register_gauge(
+            "admission_queue_depth", "空きを待っているリクエスト数",
+            lambda: [({"gate": gate.name}, gate.queue_depth) for gate in self._gates()]
+        )
+        metrics.register_gauge(
+            "admission_limit", "同時実行数の上限",
+            lambda: [({"gate": gate.name}, gate.limit) for gate in self._gates()]
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        gates = [gate for prefix, gate in self.route_gates if path.startswith(prefix)][:1] + [self.global_gate]
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.timeout_seconds
+        acquired: List[ConcurrencyGate] = []
+        for gate in gates:
+            rejected = await gate.acquire(deadline - loop.time())
+            if rejected:
+                for held in reversed(acquired):
+                    held.release()
+                metrics.inc("admission_requests_total", gate=gate.name, outcome=rejected)
+                await self._reject(send)
+                return
+            acquired.append(gate)
+
+        waited = loop.time() - started
+        if waited > 0:
+            metrics.inc("admission_wait_seconds_total", waited, gate=acquired[0].name)
+        metrics.inc("admission_requests_total", gate=acquired[0].name, outcome="admitted")
+
+        def release() -> None:
+            while acquired:
+                acquired.pop().release()
+
+        async def send_and_release(message) -> None:
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # 送信後に続くバックグラウンド処理（BackgroundTasks）の間は枠を占有しない
+                release()
+
+        try:
+            await self.app(scope, receive, send_and_release)
+        finally:
+            release()
+
+    async def _reject(self, send) -> None:
+        body = json.dumps(
+            {"detail": "サーバーが混み合っています。しばらくしてから再度お試しください"},
+            ensure_ascii=False
+        ).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, round(self.timeout_seconds))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def configure_threadpool() -> None:
+    """同期ハンドラを実行するスレッドプールの大きさを設定する（起動時にイベントループ上で呼び出す）"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    connections = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    if not settings.USE_AZURE and settings.ADMISSION_MAX_CONCURRENCY > connections:
+        print(
+            f"警告: ADMISSION_MAX_CONCURRENCY ({settings.ADMISSION_MAX_CONCURRENCY}) が "
+            f"DBコネクション数 ({connections}) を超えています。コネクション待ちが発生する可能性があります"
+        )
@@ -0,0 +1,98 @@
+# app/core/background.py
+from typing import Callable, List, Optional, Protocol
+import threading
+import traceback
+
+
+class PeriodicTask:
+    """
+    一定間隔で関数を実行するバックグラウンドタスク
+    - デーモンスレッドで動作し、例外が発生しても次の周期で再実行する
+    """
+
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[], None], run_on_shutdown: bool = False):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self.run_on_shutdown = run_on_shutdown
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """タスクのスレッドを開始する（起動済みの場合は何もしない）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            self.run_once()
+
+    def run_once(self) -> None:
+        """タスクを1回実行する"""
+        try:
+            self.func()
+        except Exception as e:
+            print(f"バックグラウンドタスク {self.name} でエラーが発生しました: {str(e)}")
+            traceback.print_exc()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """タスクを停止する（必要に応じて最後に1回実行する）"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.run_on_shutdown:
+            self.run_once()
+
+
+class BackgroundWorker(Protocol):
+    """アプリケーションの起動・終了にあわせて開始・停止するワーカー"""
+
+    def start(self) -> None: ...
+
+    def stop(self, timeout: float = 5.0) -> None: ...
+
+
+# 登録済みのバックグラウンドタスク
+_tasks: List[BackgroundWorker] = []
+
+
+def register_periodic_task(
+    name: str,
+    interval_seconds: float,
+    func: Callable[[], None],
+    run_on_shutdown: bool = False
+) -> PeriodicTask:
+    """
+    定期実行タスクを登録する
+
+    :param name: タスク名（スレッド名・ログに使用）
+    :param interval_seconds: 実行間隔（秒）
+    :param func: 実行する関数（引数なし）
+    :param run_on_shutdown: アプリケーション終了時に最後に1回実行するかどうか
+    :return: 登録したタスク
+    """
+    task = PeriodicTask(name, interval_seconds, func, run_on_shutdown)
+    _tasks.append(task)
+    return task
+
+
+def register_worker(worker: BackgroundWorker) -> BackgroundWorker:
+    """定期実行以外のワーカー（書き込みバッファのフラッシュなど）を登録する"""
+    _tasks.append(worker)
+    return worker
+
+
+def start_background_tasks() -> None:
+    """登録済みのタスクをすべて開始する（アプリケーション起動時に呼び出す）"""
+    for task in _tasks:
+        task.start()
+
+
+def stop_background_tasks() -> None:
+    """登録済みのタスクをすべて停止する（アプリケーション終了時に呼び出す）"""
+    for task in _tasks:
+        task.stop()
@@ -0,0 +1,54 @@
+# app/core/bloom.py
+from typing import Iterable
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    ブルームフィルタ（要素の有無を偽陰性なしで判定する）
+
+    - might_contain が False なら確実に含まれない。True の場合は誤検出の可能性があるため呼び出し元で確認する
+    - 要素の削除はできないため、不要になった要素を除くには作り直す
+    - ビット位置は blake2b の128ビットを2つの64ビット値に分けたダブルハッシュで求める
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    @classmethod
+    def from_items(cls, items: Iterable[str], capacity: int, error_rate: float = 0.001) -> "BloomFilter":
+        bloom = cls(capacity, error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return [(first + index * second) % size for index in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        bits = self._bits
+        for position in self._positions(item):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def might_contain(self, item: str) -> bool:
+        bits = self._bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def is_full(self) -> bool:
+        """想定件数を超え、誤検出率が設定値を上回っているかどうか"""
+        return self.count > self.capacity
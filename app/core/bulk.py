@@ -0,0 +1,50 @@
+# app/core/bulk.py
+from typing import List
+import uuid
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+# 一括INSERTで採番された主キーを取得するためのカラム（MySQL。RETURNING の代わりに使う）
+INSERT_TOKEN_COLUMN = "insert_token"
+
+
+def insert_returning_ids(db: Session, model, primary_key: str, rows: List[dict]) -> List[int]:
+    """
+    行をまとめて INSERT し、採番された主キーを入力順に返す（コミットは呼び出し元で行う）
+
+    - RETURNING 付きの executemany に対応したDB（SQLite / PostgreSQL / MariaDB）では1文で登録する
+    - MySQL は RETURNING に対応しておらず、複数行 INSERT の採番も連続する保証がない
+      （innodb_autoinc_lock_mode = 2 では他の INSERT と交互に採番されることがある）ため、
+      呼び出しごとのトークンを insert_token カラムに入れて複数行 INSERT を1文で実行し、
+      LAST_INSERT_ID()（最初の行の主キー）以降でトークンが一致する行を主キー順に取得する。
+      1文の中の行は入力順に採番されるため、主キー順が入力順になる
+    - どちらにも当てはまらない場合（insert_token カラムのないモデルなど）は ORM のフラッシュで1行ずつ登録する
+    """
+    if not rows:
+        return []
+    table = model.__table__
+    dialect = db.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = db.execute(
+            insert(table).returning(table.c[primary_key], sort_by_parameter_order=True),
+            rows
+        )
+        return [row[0] for row in result]
+    if dialect.name == "mysql" and INSERT_TOKEN_COLUMN in table.c:
+        token = uuid.uuid4().hex
+        result = db.execute(insert(table).values([{**row, INSERT_TOKEN_COLUMN: token} for row in rows]))
+        first_id = result.lastrowid
+        ids = [row[0] for row in db.execute(
+            select(table.c[primary_key]).where(
+                table.c[primary_key] >= first_id,
+                table.c[INSERT_TOKEN_COLUMN] == token
+            ).order_by(table.c[primary_key])
+        )]
+        if len(ids) != len(rows):
+            raise RuntimeError(f"{table.name} に登録した行の主キーを取得できませんでした（{len(ids)} / {len(rows)} 行）")
+        return ids
+    objects = [model(**row) for row in rows]
+    db.add_all(objects)
+    db.flush()
+    return [getattr(obj, primary_key) for obj in objects]
@@ -0,0 +1,181 @@
+# app/core/circuit_breaker.py
+"""
+DBのサーキットブレーカー
+
+DBが停止・応答遅延すると、各リクエストがコネクションの取得（pool_pre_ping）で待たされて API 全体が止まる。
+接続の失敗やコネクション取得の遅延が続いた場合はブレーカーを開き、get_db で即座に 503 を返す
+（参照系の一部は StaleCacheMiddleware が直近の正常なレスポンスを返す）。
+
+- 閉: 通常状態。接続の失敗が DB_CIRCUIT_FAILURE_THRESHOLD 回、
+  または DB_CIRCUIT_SLOW_CHECKOUT_MS を超えるコネクション取得が DB_CIRCUIT_SLOW_THRESHOLD 回続くと開く
+- 開: リクエストではDBにアクセスしない。DB_CIRCUIT_OPEN_SECONDS 経過後にバックグラウンドで疎通確認を行う
+- 半開: 疎通確認中。成功すれば閉じ、失敗すれば再び開く
+"""
+from typing import Optional
+import threading
+import time
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from .background import register_periodic_task
+from .config import settings
+from .metrics import metrics
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+_STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+
+class DatabaseUnavailable(Exception):
+    """ブレーカーが開いているためDBにアクセスしなかった"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, slow_threshold: int, slow_seconds: float, open_seconds: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.slow_threshold = max(1, slow_threshold)
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self.state = STATE_CLOSED
+        self._failures = 0
+        self._slow_calls = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == STATE_CLOSED
+
+    def record_success(self, elapsed: float) -> None:
+        """DBへのアクセスに成功した（elapsed はコネクション取得にかかった秒数）"""
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                return
+            self._failures = 0
+            if elapsed < self.slow_seconds:
+                self._slow_calls = 0
+                return
+            self._slow_calls += 1
+            if self._slow_calls >= self.slow_threshold:
+                self._open("slow")
+
+    def record_failure(self) -> None:
+        """DBへの接続に失敗した"""
+        with self._lock:
+            if self.state != STATE_CLOSED:
+                return
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._open("failure")
+
+    def _open(self, reason: str) -> None:
+        # 呼び出し元でロックを取得していること
+        if self.state != STATE_OPEN:
+            print(f"DBのサーキットブレーカーを開きました（理由: {reason}）")
+            metrics.inc("db_circuit_transitions_total", to=STATE_OPEN, reason=reason)
+        self.state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._failures = 0
+        self._slow_calls = 0
+
+    def _close(self) -> None:
+        if self.state != STATE_CLOSED:
+            print("DBのサーキットブレーカーを閉じました")
+            metrics.inc("db_circuit_transitions_total", to=STATE_CLOSED, reason="probe")
+        self.state = STATE_CLOSED
+        self._failures = 0
+        self._slow_calls = 0
+
+    def probe(self, check) -> None:
+        """開いてから一定時間が経過していれば check() で疎通を確認する（定期実行）"""
+        with self._lock:
+            if self.state != STATE_OPEN or time.monotonic() - self._opened_at < self.open_seconds:
+                return
+            self.state = STATE_HALF_OPEN
+        try:
+            started = time.monotonic()
+            check()
+            healthy = time.monotonic() - started < self.slow_seconds
+        except Exception as e:
+            print(f"DBの疎通確認エラー: {str(e)}")
+            healthy = False
+        with self._lock:
+            if healthy:
+                self._close()
+            else:
+                self._open("probe")
+
+
+# アプリケーション全体で共有するブレーカー
+db_circuit = CircuitBreaker(
+    "database",
+    failure_threshold=settings.DB_CIRCUIT_FAILURE_THRESHOLD,
+    slow_threshold=settings.DB_CIRCUIT_SLOW_THRESHOLD,
+    slow_seconds=settings.DB_CIRCUIT_SLOW_CHECKOUT_MS / 1000,
+    open_seconds=settings.DB_CIRCUIT_OPEN_SECONDS,
+)
+
+
+def check_circuit() -> None:
+    """ブレーカーが開いていれば DatabaseUnavailable を送出する（get_db から呼び出す）"""
+    if settings.DB_CIRCUIT_ENABLED and not db_circuit.is_closed:
+        metrics.inc("db_circuit_rejected_total")
+        raise DatabaseUnavailable()
+
+
+def install_circuit_breaker(engine: Engine, session_factory: sessionmaker) -> None:
+    """
+    接続の失敗とコネクション取得の所要時間をブレーカーに記録するイベントと、疎通確認のタスクを登録する
+
+    コネクション取得の所要時間は、トランザクション開始（最初のクエリ）からコネクションの取得・pre_ping を終えるまでの時間とする
+    """
+    metrics.counter("db_circuit_transitions_total", "DBのサーキットブレーカーの状態遷移の回数")
+    metrics.counter("db_circuit_rejected_total", "ブレーカーが開いていたため拒否したリクエスト数")
+    metrics.register_gauge(
+        "db_circuit_state", "DBのサーキットブレーカーの状態（0: 閉, 1: 半開, 2: 開）",
+        lambda: [({"circuit": db_circuit.name}, _STATE_VALUES[db_circuit.state])]
+    )
+
+    @event.listens_for(engine, "handle_error")
+    def _record_connection_error(exception_context):
+        # pre_ping の失敗は再接続で回復しうるため数えず、その後の接続の失敗と実行中の切断を数える
+        if exception_context.is_pre_ping:
+            return
+        if exception_context.connection is None or exception_context.is_disconnect:
+            db_circuit.record_failure()
+
+    @event.listens_for(session_factory, "after_transaction_create")
+    def _start_checkout_timer(session, transaction):
+        if transaction.parent is None:
+            session.info["checkout_started"] = time.monotonic()
+
+    @event.listens_for(session_factory, "after_begin")
+    def _record_checkout(session, transaction, connection):
+        started: Optional[float] = session.info.pop("checkout_started", None)
+        if started is not None:
+            db_circuit.record_success(time.monotonic() - started)
+
+    def _check_database() -> None:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    register_periodic_task(
+        "db-circuit-probe",
+        settings.DB_CIRCUIT_PROBE_INTERVAL_SECONDS,
+        lambda: db_circuit.probe(_check_database),
+    )
+
+
+async def database_unavailable_handler(request, exc: DatabaseUnavailable) -> JSONResponse:
+    """ブレーカーが開いている間のリクエストに 503 を返す"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "データベースに接続できません。しばらくしてから再度お試しください"},
+        headers={"Retry-After": str(max(1, round(settings.DB_CIRCUIT_OPEN_SECONDS)))}
+    )
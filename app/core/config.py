@@ -53,6 +53,131 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "fallback_secret_key_please_change_in_production")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    ADMIN_USER_IDS: str = os.getenv("ADMIN_USER_IDS", "1")  # 管理者専用の操作（カテゴリーの削除など）を許可するユーザーID（カンマ区切り。seed で作成する管理者は ID=1）
+    REFRESH_TOKEN_EXPIRE_DAYS: int = parse_int_env("REFRESH_TOKEN_EXPIRE_DAYS", 30)  # リフレッシュトークン（ログインセッション）の有効期間（日）
+    REVOCATION_SYNC_INTERVAL_SECONDS: int = parse_int_env("REVOCATION_SYNC_INTERVAL_SECONDS", 5)  # 他のワーカーで失効したセッションを取り込む間隔（秒）
+    REVOCATION_FILTER_CAPACITY: int = parse_int_env("REVOCATION_FILTER_CAPACITY", 10000)  # 失効リストのブルームフィルタの想定件数（超えると作り直す）
+    REVOCATION_FILTER_ERROR_RATE: float = float(os.getenv("REVOCATION_FILTER_ERROR_RATE", "0.001"))  # ブルームフィルタの誤検出率
+
+    # トレンド集計設定
+    TRENDING_HALF_LIFE_HOURS: float = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "24"))  # スコアの半減期（時間）
+    TRENDING_SNAPSHOT_INTERVAL_SECONDS: int = parse_int_env("TRENDING_SNAPSHOT_INTERVAL_SECONDS", 300)  # スナップショット保存間隔（秒）
+
+    # レコメンド設定
+    RECOMMENDATION_REFRESH_INTERVAL_SECONDS: int = parse_int_env("RECOMMENDATION_REFRESH_INTERVAL_SECONDS", 60)  # アクティブユーザーの推薦結果の再計算間隔（秒）
+    RECOMMENDATION_REBUILD_INTERVAL_SECONDS: int = parse_int_env("RECOMMENDATION_REBUILD_INTERVAL_SECONDS", 3600)  # 共起行列の再構築間隔（秒）
+
+    # 類似お困りごと検索設定
+    TROUBLE_SIMILARITY_MAINTENANCE_INTERVAL_SECONDS: int = parse_int_env("TROUBLE_SIMILARITY_MAINTENANCE_INTERVAL_SECONDS", 60)  # 差分量を確認して再構築する間隔（秒）
+
+    # 回答者候補の推薦設定
+    EXPERT_RECENCY_HALF_LIFE_DAYS: float = float(os.getenv("EXPERT_RECENCY_HALF_LIFE_DAYS", "30"))  # 最終回答からの経過による重みの半減期（日）
+
+    # プロセス内キャッシュ設定（他のワーカーでの変更はこの秒数以内に反映される）
+    FAVORITE_CACHE_TTL_SECONDS: int = parse_int_env("FAVORITE_CACHE_TTL_SECONDS", 30)  # ユーザーごとのお気に入りプロジェクトIDを保持する時間（秒）
+    USER_DIRECTORY_TTL_SECONDS: int = parse_int_env("USER_DIRECTORY_TTL_SECONDS", 60)  # 表示用のユーザー情報（名前・ポイント）を保持する時間（秒）
+
+    # ポイント集計設定
+    POINTS_AGGREGATION_INTERVAL_SECONDS: int = parse_int_env("POINTS_AGGREGATION_INTERVAL_SECONDS", 30)  # 台帳を users に反映する間隔（秒）
+    POINTS_AGGREGATION_BATCH_SIZE: int = parse_int_env("POINTS_AGGREGATION_BATCH_SIZE", 1000)  # 1回のトランザクションで反映するエントリ数
+
+    # 最終ログイン日時の反映設定
+    LOGIN_TRACKER_FLUSH_INTERVAL_SECONDS: int = parse_int_env("LOGIN_TRACKER_FLUSH_INTERVAL_SECONDS", 10)  # ログイン日時を users にまとめて反映する間隔（秒）
+    LOGIN_TRACKER_BATCH_SIZE: int = parse_int_env("LOGIN_TRACKER_BATCH_SIZE", 1000)  # 1回のトランザクションで更新するユーザー数
+
+    # アクティビティ集計設定
+    ACTIVITY_DAILY_RETENTION_DAYS: int = parse_int_env("ACTIVITY_DAILY_RETENTION_DAYS", 56)  # 日次バケットを保持する日数（以降は週次に畳み込む）
+    ACTIVITY_COMPACTION_INTERVAL_SECONDS: int = parse_int_env("ACTIVITY_COMPACTION_INTERVAL_SECONDS", 3600)  # 日次バケットの圧縮間隔（秒）
+
+    # 差分同期設定
+    SYNC_RETENTION_DAYS: int = parse_int_env("SYNC_RETENTION_DAYS", 7)  # 変更履歴の保持日数（これより古いトークンは再同期）
+    SYNC_PRUNE_INTERVAL_SECONDS: int = parse_int_env("SYNC_PRUNE_INTERVAL_SECONDS", 3600)  # 変更履歴の削除間隔（秒）
+    SYNC_VISIBILITY_LAG_SECONDS: int = parse_int_env("SYNC_VISIBILITY_LAG_SECONDS", 5)  # コミット順の前後を吸収するためトークンを進めない直近の秒数
+
+    # アーカイブ設定
+    ARCHIVE_RESOLVED_TROUBLE_DAYS: int = parse_int_env("ARCHIVE_RESOLVED_TROUBLE_DAYS", 180)  # 解決からこの日数を過ぎたお困りごとをアーカイブ（0で無効）
+    ARCHIVE_BATCH_ROWS: int = parse_int_env("ARCHIVE_BATCH_ROWS", 1000)  # 1トランザクションで移動する行数の目安
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = float(os.getenv("ARCHIVE_BATCH_PAUSE_SECONDS", "0.5"))  # バッチ間の待機時間（秒）
+    ARCHIVE_MAX_BATCHES_PER_RUN: int = parse_int_env("ARCHIVE_MAX_BATCHES_PER_RUN", 100)  # 1回の定期実行で処理するバッチ数の上限
+    ARCHIVE_INTERVAL_SECONDS: int = parse_int_env("ARCHIVE_INTERVAL_SECONDS", 3600)  # アーカイブの実行間隔（秒）
+
+    # 削除ジョブ設定
+    DELETION_BATCH_ROWS: int = parse_int_env("DELETION_BATCH_ROWS", 500)  # 1トランザクションで削除する行数
+    DELETION_BATCH_PAUSE_SECONDS: float = float(os.getenv("DELETION_BATCH_PAUSE_SECONDS", "0.1"))  # バッチ間の待機時間（秒）
+    DELETION_RETRY_INTERVAL_SECONDS: int = parse_int_env("DELETION_RETRY_INTERVAL_SECONDS", 60)  # 未完了の削除ジョブを再開する間隔（秒）
+    DELETION_STALE_JOB_SECONDS: int = parse_int_env("DELETION_STALE_JOB_SECONDS", 600)  # 進捗がこの秒数ない実行中ジョブを中断とみなす
+
+    # メッセージ書き込みバッファ設定（グループコミット）
+    MESSAGE_WRITE_BUFFER_ENABLED: bool = os.getenv("MESSAGE_WRITE_BUFFER_ENABLED", "False").lower() == "true"  # 同時に投稿されたメッセージをまとめてコミットする
+    MESSAGE_WRITE_BUFFER_MAX_DELAY_MS: int = parse_int_env("MESSAGE_WRITE_BUFFER_MAX_DELAY_MS", 5)  # 最初のメッセージからフラッシュまでの最大待ち時間（ミリ秒）
+    MESSAGE_WRITE_BUFFER_MAX_BATCH: int = parse_int_env("MESSAGE_WRITE_BUFFER_MAX_BATCH", 100)  # 1回のコミットでまとめる最大件数
+    MESSAGE_WRITE_BUFFER_QUEUE_SIZE: int = parse_int_env("MESSAGE_WRITE_BUFFER_QUEUE_SIZE", 1000)  # 待機できる件数の上限（超えた分は直接INSERT）
+    MESSAGE_WRITE_BUFFER_RESULT_TIMEOUT_SECONDS: int = parse_int_env("MESSAGE_WRITE_BUFFER_RESULT_TIMEOUT_SECONDS", 10)  # 書き込み完了を待つ最大時間（秒）
+
+    # パスワードハッシュ設定
+    PASSWORD_HASH_ROUNDS: int = parse_int_env("PASSWORD_HASH_ROUNDS", 12)  # bcrypt のコスト（これより低いコストのハッシュはログイン時に再ハッシュ）
+    PASSWORD_HASH_WORKERS: int = parse_int_env("PASSWORD_HASH_WORKERS", 4)  # ハッシュ計算・検証を行う専用スレッド数
+
+    # 同時実行数の制御設定（スレッドプール・DBコネクションプール・受け付け制御はあわせて調整する）
+    THREADPOOL_SIZE: int = parse_int_env("THREADPOOL_SIZE", 40)  # 同期ハンドラを実行するスレッド数
+    DB_POOL_SIZE: int = parse_int_env("DB_POOL_SIZE", 20)  # DBコネクションプールの常時保持数（USE_AZURE では NullPool のため無効）
+    DB_MAX_OVERFLOW: int = parse_int_env("DB_MAX_OVERFLOW", 10)  # 一時的に追加できるコネクション数
+    DB_POOL_TIMEOUT_SECONDS: int = parse_int_env("DB_POOL_TIMEOUT_SECONDS", 10)  # コネクションの空きを待つ最大時間（秒）
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "True").lower() == "true"
+    # 同時に処理するリクエスト数の上限（既定ではスレッド数とコネクション数の小さい方。受け付けたリクエストがコネクション待ちにならない）
+    ADMISSION_MAX_CONCURRENCY: int = parse_int_env("ADMISSION_MAX_CONCURRENCY", min(THREADPOOL_SIZE, DB_POOL_SIZE + DB_MAX_OVERFLOW))
+    ADMISSION_QUEUE_SIZE: int = parse_int_env("ADMISSION_QUEUE_SIZE", 100)  # 空きを待てるリクエスト数（超えた分は即座に 503）
+    ADMISSION_QUEUE_TIMEOUT_MS: int = parse_int_env("ADMISSION_QUEUE_TIMEOUT_MS", 2000)  # 空きを待つ最大時間（ミリ秒）
+    # パスの接頭辞ごとの同時実行数の上限（"接頭辞=上限" のカンマ区切り。長時間コネクションを使う処理が全体を占有しないようにする）
+    ADMISSION_ROUTE_LIMITS: str = os.getenv(
+        "ADMISSION_ROUTE_LIMITS",
+        f"{API_V1_STR}/exports=4,{API_V1_STR}/imports=2,{API_V1_STR}/auth=8"
+    )
+
+    # リクエストの期限設定（期限はDBの文単位のタイムアウトとして伝える。0で無効）
+    REQUEST_TIMEOUT_MS: int = parse_int_env("REQUEST_TIMEOUT_MS", 10000)  # 既定の期限（ミリ秒）
+    # パスの接頭辞ごとの期限（"接頭辞=ミリ秒" のカンマ区切り。ストリーミングするエクスポート・インポートは期限なし）
+    REQUEST_TIMEOUT_ROUTES: str = os.getenv(
+        "REQUEST_TIMEOUT_ROUTES",
+        f"{API_V1_STR}/exports=0,{API_V1_STR}/imports=0,{API_V1_STR}/troubles=5000,{API_V1_STR}/projects=5000"
+    )
+
+    # 起動後のウォームアップ設定（完了するまで /readyz は 503 を返す）
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "True").lower() == "true"
+    WARMUP_RETRY_INTERVAL_SECONDS: int = parse_int_env("WARMUP_RETRY_INTERVAL_SECONDS", 5)  # 失敗した準備処理を再実行する間隔（秒）
+    DB_POOL_WARMUP_CONNECTIONS: int = parse_int_env("DB_POOL_WARMUP_CONNECTIONS", 5)  # 起動後に用意しておくコネクション数（DB_POOL_SIZE まで）
+    WARMUP_REFERENCE_ROWS: int = parse_int_env("WARMUP_REFERENCE_ROWS", 1000)  # 参照キャッシュに読み込んでおく最近のプロジェクト・お困りごとの件数
+
+    # DBのサーキットブレーカー設定（DBの停止・遅延時にリクエストを待たせず 503 または直近のキャッシュを返す）
+    DB_CIRCUIT_ENABLED: bool = os.getenv("DB_CIRCUIT_ENABLED", "True").lower() == "true"
+    DB_CIRCUIT_FAILURE_THRESHOLD: int = parse_int_env("DB_CIRCUIT_FAILURE_THRESHOLD", 5)  # ブレーカーを開く連続した接続の失敗回数
+    DB_CIRCUIT_SLOW_CHECKOUT_MS: int = parse_int_env("DB_CIRCUIT_SLOW_CHECKOUT_MS", 1000)  # 遅延とみなすコネクション取得の所要時間（ミリ秒）
+    DB_CIRCUIT_SLOW_THRESHOLD: int = parse_int_env("DB_CIRCUIT_SLOW_THRESHOLD", 5)  # ブレーカーを開く連続した遅延の回数
+    DB_CIRCUIT_OPEN_SECONDS: int = parse_int_env("DB_CIRCUIT_OPEN_SECONDS", 10)  # 開いてから疎通確認を始めるまでの時間（秒）
+    DB_CIRCUIT_PROBE_INTERVAL_SECONDS: int = parse_int_env("DB_CIRCUIT_PROBE_INTERVAL_SECONDS", 2)  # 疎通確認の間隔（秒）
+    DB_CONNECT_TIMEOUT_SECONDS: int = parse_int_env("DB_CONNECT_TIMEOUT_SECONDS", 5)  # MySQLへの接続を待つ最大時間（秒）
+    # ブレーカーが開いている間に直近の正常なレスポンスを返すパス（"{...}" は1階層の任意の値。カンマ区切り）
+    STALE_CACHE_ROUTES: str = os.getenv(
+        "STALE_CACHE_ROUTES",
+        f"{API_V1_STR}/project-categories,{API_V1_STR}/project-categories/{{category_id}},"
+        f"{API_V1_STR}/trouble-categories,{API_V1_STR}/trouble-categories/{{category_id}},"
+        f"{API_V1_STR}/projects/categories,{API_V1_STR}/projects/,{API_V1_STR}/projects/user,"
+        f"{API_V1_STR}/projects/{{project_id}}"
+    )
+    STALE_CACHE_MAX_ENTRIES: int = parse_int_env("STALE_CACHE_MAX_ENTRIES", 5000)  # 保持するレスポンス数の上限
+    STALE_CACHE_MAX_BODY_BYTES: int = parse_int_env("STALE_CACHE_MAX_BODY_BYTES", 256 * 1024)  # これより大きいレスポンスは保持しない
+    STALE_CACHE_MAX_AGE_SECONDS: int = parse_int_env("STALE_CACHE_MAX_AGE_SECONDS", 3600)  # これより古いレスポンスは返さない
+
+    # レート制限設定（上限は「バースト件数」と「1分あたりの補充件数」で指定する）
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+    RATE_LIMIT_BACKEND_URL: str = os.getenv("RATE_LIMIT_BACKEND_URL", "")  # 複数ワーカーで共有する場合は redis:// のURL（未指定ならプロセス内で保持）
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = os.getenv("RATE_LIMIT_TRUST_FORWARDED_FOR", "False").lower() == "true"  # リバースプロキシ配下で X-Forwarded-For をクライアントIPとして使う
+    RATE_LIMIT_LOGIN_IP_BURST: int = parse_int_env("RATE_LIMIT_LOGIN_IP_BURST", 20)  # IPアドレスごとのログイン試行
+    RATE_LIMIT_LOGIN_IP_PER_MINUTE: int = parse_int_env("RATE_LIMIT_LOGIN_IP_PER_MINUTE", 30)
+    RATE_LIMIT_LOGIN_USERNAME_BURST: int = parse_int_env("RATE_LIMIT_LOGIN_USERNAME_BURST", 5)  # ユーザー名ごとのログイン試行
+    RATE_LIMIT_LOGIN_USERNAME_PER_MINUTE: int = parse_int_env("RATE_LIMIT_LOGIN_USERNAME_PER_MINUTE", 5)
+    RATE_LIMIT_WRITE_BURST: int = parse_int_env("RATE_LIMIT_WRITE_BURST", 60)  # ユーザーごと（未認証はIPアドレスごと）の書き込み
+    RATE_LIMIT_WRITE_PER_MINUTE: int = parse_int_env("RATE_LIMIT_WRITE_PER_MINUTE", 120)
 
     # CORS設定
     CORS_ORIGINS_STR: str = Field(default="http://localhost:3000")
@@ -0,0 +1,52 @@
+# app/core/counters.py
+from typing import Dict
+
+from sqlalchemy import Table, update
+from sqlalchemy.orm import Session
+
+
+def increment_counter(db: Session, table: Table, keys: Dict[str, object], deltas: Dict[str, int]) -> None:
+    """
+    集計テーブルの行を1文で加算する（行がなければ作成する）
+
+    - MySQL: INSERT ... ON DUPLICATE KEY UPDATE
+    - SQLite / PostgreSQL: INSERT ... ON CONFLICT DO UPDATE
+    - それ以外: UPDATE して対象行がなければ INSERT
+
+    :param table: 主キーが keys の列で構成される集計テーブル
+    :param keys: 主キーの値
+    :param deltas: 加算する列と増減値
+    """
+    dialect = db.get_bind().dialect.name
+    values = {**keys, **deltas}
+
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        statement = insert(table).values(**values)
+        statement = statement.on_duplicate_key_update({
+            column: table.c[column] + statement.inserted[column] for column in deltas
+        })
+    elif dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        statement = insert(table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={column: table.c[column] + statement.excluded[column] for column in deltas}
+        )
+    else:
+        condition = [table.c[column] == value for column, value in keys.items()]
+        result = db.execute(
+            update(table).where(*condition).values({
+                column: table.c[column] + delta for column, delta in deltas.items()
+            })
+        )
+        if result.rowcount:
+            return
+        statement = table.insert().values(**values)
+
+    db.execute(statement)
@@ -1,5 +1,6 @@
 # app/core/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
@@ -9,6 +10,8 @@ from pathlib import Path  # Pathをインポート追加
 
 # 相対インポートに変更
 from .config import settings
+from .circuit_breaker import check_circuit, db_circuit, install_circuit_breaker
+from .deadlines import install_statement_timeouts
 
 # データベース接続設定
 def get_db_connect_args() -> Dict[str, Any]:
@@ -23,33 +26,58 @@ def get_db_connect_args() -> Dict[str, Any]:
             project_root = Path(__file__).parent.parent.parent
             ssl_cert_path = project_root / "DigiCertGlobalRootCA.crt.pem"
             
-            # デバッグのためパスを表示
-            print(f"Using SSL certificate: {ssl_cert_path}")
-            
             connect_args["ssl"] = {
                 "ssl_ca": str(ssl_cert_path)  # Pathオブジェクトを文字列に変換
             }
     elif "sqlite" in settings.SQLALCHEMY_DATABASE_URL:
         # SQLiteの場合は同時接続チェックをオフ
         connect_args["check_same_thread"] = False
-        
-    # デバッグ: 接続引数を表示
-    print(f"Database connection arguments: {connect_args}")
+
+    if settings.SQLALCHEMY_DATABASE_URL.startswith("mysql"):
+        # DBが応答しない場合に接続で待ち続けない
+        connect_args["connect_timeout"] = settings.DB_CONNECT_TIMEOUT_SECONDS
     
     return connect_args
 
+def get_pool_args() -> Dict[str, Any]:
+    """コネクションプールの設定を取得（スレッドプール・受け付け制御の上限とあわせて Settings で調整する）"""
+    if settings.USE_AZURE:
+        # Azureの場合のみNullPoolを使用
+        return {"poolclass": NullPool}
+    if settings.SQLALCHEMY_DATABASE_URL.startswith("sqlite") and ":memory:" in settings.SQLALCHEMY_DATABASE_URL:
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+
 # エンジンの作成
 engine = create_engine(
     settings.SQLALCHEMY_DATABASE_URL,
     connect_args=get_db_connect_args(),
     pool_pre_ping=True,  # 接続が生きているか確認
-    poolclass=NullPool if settings.USE_AZURE else None,  # Azureの場合のみNullPoolを使用
-    echo=settings.DEBUG  # デバッグモードの場合、SQLクエリをコンソールに表示
+    echo=settings.DEBUG,  # デバッグモードの場合、SQLクエリをコンソールに表示
+    **get_pool_args()
 )
 
+# SQLiteでも外部キー制約を有効にする（存在確認を制約違反の判定で行うため）
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
 # セッションファクトリーの作成
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 接続の失敗・遅延が続いた場合にDBへのアクセスを止めるサーキットブレーカー
+install_circuit_breaker(engine, SessionLocal)
+
+# リクエストの期限をDBの文単位のタイムアウトとして伝える
+install_statement_timeouts(engine)
+
 # ベースクラスの作成
 Base = declarative_base()
 
@@ -58,9 +86,16 @@ def get_db():
     """
     依存性注入用のデータベースセッション取得関数
     FastAPIのDependsで使用する
+
+    DBのサーキットブレーカーが開いている場合はコネクションを取得せずに DatabaseUnavailable（503）を送出する
     """
+    check_circuit()
     db = SessionLocal()
     try:
         yield db
+    except PoolTimeoutError:
+        # コネクションの空きを待ちきれなかった（DBが応答せずコネクションが返らない場合に発生する）
+        db_circuit.record_failure()
+        raise
     finally:
         db.close()
\ No newline at end of file
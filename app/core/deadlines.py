@@ -0,0 +1,211 @@
+# app/core/deadlines.py
+"""
+リクエストの期限とDBの文単位のタイムアウト
+
+- RequestDeadlineMiddleware がパスに応じた期限（REQUEST_TIMEOUT_MS / REQUEST_TIMEOUT_ROUTES）を設定する
+  （コンテキスト変数で保持するため、スレッドプールで実行される同期ハンドラにも引き継がれる）
+- DBの各文の実行前に残り時間を確認し、期限切れなら実行せずに DeadlineExceeded を送出する
+- 残り時間は文のタイムアウトとしてDBに伝える
+  - MySQL: SELECT に MAX_EXECUTION_TIME オプティマイザヒントを付ける
+  - それ以外（SQLite・PostgreSQL）: 期限になったら監視スレッドから実行中の文を中断する
+- 期限切れのリクエストは 504 を返し、セッションの終了とともにコネクションをプールへ返す
+- レスポンスの送信後に実行されるバックグラウンド処理には期限を適用しない
+"""
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+import heapq
+import itertools
+import threading
+import time
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .admission import parse_route_limits
+from .config import settings
+from .metrics import metrics
+
+# MySQL の「最大実行時間を超えたため中断」エラー
+_MYSQL_MAX_EXECUTION_TIME_EXCEEDED = 3024
+# ヒントを付けられない短すぎる残り時間（ミリ秒）
+_MIN_TIMEOUT_MS = 1
+
+
+class DeadlineExceeded(Exception):
+    """リクエストの期限を過ぎたため処理を中断した"""
+
+
+class RequestDeadline:
+    __slots__ = ("route", "expires_at")
+
+    def __init__(self, route: str, expires_at: float):
+        self.route = route
+        self.expires_at = expires_at  # time.monotonic() 基準
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+_current_deadline: ContextVar[Optional[RequestDeadline]] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[RequestDeadline]:
+    return _current_deadline.get()
+
+
+def check_deadline() -> None:
+    """期限を過ぎていれば DeadlineExceeded を送出する（DB以外の長い処理の区切りで呼び出す）"""
+    deadline = _current_deadline.get()
+    if deadline is not None and deadline.remaining() <= 0:
+        raise DeadlineExceeded()
+
+
+# ---- 実行中の文の中断（MySQL 以外） ----
+
+class _Watchdog:
+    """期限になったらコールバックを呼び出す監視スレッド（1スレッドですべての文を監視する）"""
+
+    def __init__(self):
+        self._heap: List[list] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, at: float, callback: Callable[[], None]) -> list:
+        entry = [at, next(self._sequence), callback]
+        with self._condition:
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="statement-watchdog", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return entry
+
+    def cancel(self, entry: list) -> None:
+        # ヒープからは取り除かず、期限になった時点で読み飛ばす
+        with self._condition:
+            entry[2] = None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                entry = self._heap[0]
+                wait = entry[0] - time.monotonic()
+                if entry[2] is not None and wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                callback, entry[2] = entry[2], None
+            if callback is not None:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"実行中の文の中断エラー: {str(e)}")
+
+
+_watchdog = _Watchdog()
+
+
+def _interrupt_function(dbapi_connection) -> Optional[Callable[[], None]]:
+    # sqlite3: interrupt() / psycopg2: cancel()
+    return getattr(dbapi_connection, "interrupt", None) or getattr(dbapi_connection, "cancel", None)
+
+
+def install_statement_timeouts(engine: Engine) -> None:
+    """エンジンにリクエストの期限を文のタイムアウトとして伝えるイベントを登録する"""
+    is_mysql = engine.dialect.name == "mysql"
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def _apply_deadline(conn, cursor, statement, parameters, context, executemany):
+        deadline = _current_deadline.get()
+        if deadline is None:
+            return statement, parameters
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            metrics.inc("db_statement_timeouts_total", route=deadline.route)
+            raise DeadlineExceeded()
+        if is_mysql:
+            stripped = statement.lstrip()
+            if stripped[:6].upper() == "SELECT":
+                # ヒントは SELECT の直後にのみ書ける（UPDATE などは実行前の確認のみ）
+                timeout_ms = max(_MIN_TIMEOUT_MS, int(remaining * 1000))
+                statement = f"SELECT /*+ MAX_EXECUTION_TIME({timeout_ms}) */{stripped[6:]}"
+            return statement, parameters
+        interrupt = _interrupt_function(cursor.connection)
+        if interrupt is not None:
+            conn.info["deadline_watch"] = _watchdog.schedule(deadline.expires_at, interrupt)
+        return statement, parameters
+
+    def _clear_watch(conn) -> None:
+        entry = conn.info.pop("deadline_watch", None)
+        if entry is not None:
+            _watchdog.cancel(entry)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish_statement(conn, cursor, statement, parameters, context, executemany):
+        _clear_watch(conn)
+
+    @event.listens_for(engine, "handle_error")
+    def _map_timeout(exception_context):
+        if exception_context.connection is not None:
+            _clear_watch(exception_context.connection)
+        deadline = _current_deadline.get()
+        if deadline is None:
+            return
+        error = exception_context.original_exception
+        error_code = error.args[0] if getattr(error, "args", None) else None
+        if deadline.remaining() <= 0 or error_code == _MYSQL_MAX_EXECUTION_TIME_EXCEEDED:
+            metrics.inc("db_statement_timeouts_total", route=deadline.route)
+            raise DeadlineExceeded() from error
+
+
+# ---- ミドルウェア ----
+
+class RequestDeadlineMiddleware:
+    """パスに応じたリクエストの期限を設定するASGIミドルウェア"""
+
+    def __init__(self, app):
+        self.app = app
+        self.route_timeouts = parse_route_limits(settings.REQUEST_TIMEOUT_ROUTES)
+        metrics.counter("request_deadline_exceeded_total", "期限切れで中断したリクエスト数")
+        metrics.counter("db_statement_timeouts_total", "期限切れで中断・拒否したDBの文の数")
+
+    def _timeout_for(self, path: str):
+        for prefix, timeout_ms in self.route_timeouts:
+            if path.startswith(prefix):
+                return prefix, timeout_ms
+        return "default", settings.REQUEST_TIMEOUT_MS
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route, timeout_ms = self._timeout_for(scope["path"])
+        if timeout_ms <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_and_release_deadline(message) -> None:
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # 送信後に続くバックグラウンド処理（BackgroundTasks）には期限を適用しない
+                _current_deadline.set(None)
+
+        token = _current_deadline.set(RequestDeadline(route, time.monotonic() + timeout_ms / 1000))
+        try:
+            await self.app(scope, receive, send_and_release_deadline)
+        finally:
+            _current_deadline.reset(token)
+
+
+async def deadline_exceeded_handler(request, exc: DeadlineExceeded) -> JSONResponse:
+    """期限切れで中断したリクエストに 504 を返す（セッションは get_db の終了時にロールバックされ、コネクションはプールへ戻る）"""
+    deadline = _current_deadline.get()
+    metrics.inc("request_deadline_exceeded_total", route=deadline.route if deadline else "unknown")
+    return JSONResponse(
+        status_code=504,
+        content={"detail": "処理に時間がかかりすぎたため中断しました。条件を絞って再度お試しください"}
+    )
@@ -18,6 +18,7 @@ from .config import settings
 # アプリケーションのモジュールをインポート
 from app.api.users.models import User
 from app.api.users.schemas import TokenData
+from app.api.auth.sessions import revocation_list
 
 # async def get_current_user(
 #     db: Session = Depends(get_db),
@@ -115,6 +116,11 @@ async def get_current_user(
         # JWTエラーまたは整数変換エラー
         raise credentials_exception
     
+    # ログアウトなどで失効したセッションのトークンを拒否する（通常はメモリ上の判定のみでDBにアクセスしない）
+    session_id = payload.get("sid")
+    if session_id and revocation_list.is_revoked(db, session_id):
+        raise credentials_exception
+    
     # ユーザーIDからユーザーを検索
     user = db.query(User).filter(User.user_id == token_data.user_id).first()
     
@@ -0,0 +1,48 @@
+# app/core/integrity.py
+"""
+制約違反（IntegrityError）の判定
+
+事前の存在確認・重複確認の SELECT を省き、INSERT 時の外部キー・一意制約の違反を
+HTTPエラーに変換するために使用する
+"""
+from typing import Iterable, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+# MySQL のエラーコード
+_MYSQL_DUPLICATE_ENTRY = 1062
+_MYSQL_NO_REFERENCED_ROW = (1216, 1452)
+
+
+def _error_code(error: IntegrityError) -> Optional[int]:
+    args = getattr(error.orig, "args", ())
+    return args[0] if args and isinstance(args[0], int) else None
+
+
+def is_unique_violation(error: IntegrityError) -> bool:
+    """一意制約（主キーを含む）の違反かどうか"""
+    message = str(error.orig).lower()
+    return (
+        _error_code(error) == _MYSQL_DUPLICATE_ENTRY
+        or "unique constraint" in message
+        or "duplicate key" in message
+    )
+
+
+def is_foreign_key_violation(error: IntegrityError) -> bool:
+    """外部キー制約の違反（参照先が存在しない）かどうか"""
+    message = str(error.orig).lower()
+    return _error_code(error) in _MYSQL_NO_REFERENCED_ROW or "foreign key constraint" in message
+
+
+def violated_column(error: IntegrityError, columns: Iterable[str]) -> Optional[str]:
+    """
+    エラーメッセージから違反したカラムを特定する
+
+    MySQL は制約の定義（カラム名）を含むが、SQLite は含まないため特定できない場合は None を返す
+    """
+    message = str(error.orig)
+    for column in columns:
+        if f"`{column}`" in message or f".{column}" in message or f"({column})" in message:
+            return column
+    return None
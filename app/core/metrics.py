@@ -0,0 +1,80 @@
+# app/core/metrics.py
+"""
+アプリケーションのメトリクス（Prometheus のテキスト形式で /metrics から公開する）
+
+- カウンター: inc() で加算する累計値（率は Prometheus 側で rate() により求める）
+- ゲージ: register_gauge() で登録した関数を出力時に呼び出して現在値を取得する
+"""
+from typing import Callable, Dict, Iterable, List, Tuple
+import threading
+
+Labels = Tuple[Tuple[str, str], ...]
+GaugeCollector = Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._descriptions: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, GaugeCollector] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str) -> None:
+        """カウンターを定義する（値が0でも出力されるようにする）"""
+        with self._lock:
+            self._descriptions[name] = ("counter", description)
+            self._counters.setdefault(name, {})
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def register_gauge(self, name: str, description: str, collect: GaugeCollector) -> None:
+        """出力時に collect() が返す (ラベル, 値) をゲージとして出力する"""
+        with self._lock:
+            self._descriptions[name] = ("gauge", description)
+            self._gauges[name] = collect
+
+    def render(self) -> str:
+        """Prometheus のテキスト形式で出力する"""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            gauges = dict(self._gauges)
+            descriptions = dict(self._descriptions)
+
+        lines: List[str] = []
+        for name in sorted(set(counters) | set(gauges)):
+            metric_type, description = descriptions.get(name, ("counter" if name in counters else "gauge", ""))
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            if name in counters:
+                samples = counters[name].items()
+            else:
+                try:
+                    samples = [(_labels(labels), value) for labels, value in gauges[name]()]
+                except Exception as e:
+                    print(f"メトリクス {name} の取得エラー: {str(e)}")
+                    continue
+            for labels, value in sorted(samples):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+# アプリケーション全体で共有するレジストリ
+metrics = MetricsRegistry()
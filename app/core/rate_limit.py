@@ -0,0 +1,295 @@
+# app/core/rate_limit.py
+"""
+トークンバケットによるレート制限（ASGIミドルウェア）
+
+- ログイン系エンドポイント: IPアドレスごと・ユーザー名ごとのバケット
+- 書き込み（POST/PUT/PATCH/DELETE）: ユーザーごと（トークンがない場合はIPアドレスごと）のバケット
+- 上限を超えたリクエストは 429 と Retry-After ヘッダーを返し、アプリケーション（DB）には到達させない
+
+バケットは既定ではプロセス内の辞書で保持する（イベントループ上でのみ操作するためロック不要）。
+複数ワーカーで上限を共有する場合は RATE_LIMIT_BACKEND_URL に redis:// のURLを指定する（redis パッケージが必要）。
+共有ストアに接続できない場合はリクエストを許可し、レート制限がサービス全体の障害点にならないようにする。
+"""
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote_plus
+import json
+import math
+import time
+
+from jose import JWTError, jwt
+
+from .config import settings
+
+
+class RateLimit:
+    """バケットの容量（バースト件数）と1秒あたりの補充量"""
+    __slots__ = ("name", "capacity", "refill_per_second")
+
+    def __init__(self, name: str, burst: int, per_minute: int):
+        self.name = name
+        self.capacity = float(max(1, burst))
+        self.refill_per_second = max(1, per_minute) / 60.0
+
+
+class InMemoryBucketStore:
+    """プロセス内のトークンバケット（キーごとに [残りトークン, 最終更新時刻] を保持する）"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, List[float]] = {}
+
+    def take(self, key: str, limit: RateLimit, now: Optional[float] = None) -> float:
+        """
+        トークンを1つ消費する
+
+        :return: 許可する場合は 0、拒否する場合は次のトークンが補充されるまでの秒数
+        """
+        if now is None:
+            now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            self._buckets[key] = [limit.capacity - 1.0, now]
+            return 0.0
+        tokens = bucket[0] + (now - bucket[1]) * limit.refill_per_second
+        if tokens > limit.capacity:
+            tokens = limit.capacity
+        bucket[1] = now
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return 0.0
+        bucket[0] = tokens
+        return (1.0 - tokens) / limit.refill_per_second
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        return self.take(key, limit)
+
+    def _prune(self, now: float) -> None:
+        """満杯まで補充済みのバケット（初期状態と同じ）を削除する。それでも多すぎる場合はすべて破棄する"""
+        # 補充速度はキーごとに異なるため、最も遅い補充（1分あたり1件）でも満杯になる時間を目安にする
+        horizon = now - 3600.0
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[1] > horizon}
+        if len(self._buckets) >= self.max_keys:
+            self._buckets.clear()
+
+
+# Redis 上で補充と消費を不可分に行うスクリプト（時刻は Redis サーバーの時計を使い、ワーカー間のずれを避ける）
+_REDIS_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisBucketStore:
+    """複数ワーカーで共有するトークンバケット（Redis）"""
+
+    def __init__(self, url: str, key_prefix: str = "ratelimit:"):
+        import redis.asyncio as redis
+
+        self.key_prefix = key_prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TAKE_SCRIPT)
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        try:
+            result = await self._script(keys=[self.key_prefix + key], args=[limit.capacity, limit.refill_per_second])
+            return float(result)
+        except Exception as e:
+            print(f"レート制限ストアへの接続エラー（リクエストを許可します）: {str(e)}")
+            return 0.0
+
+
+def create_bucket_store():
+    """設定に応じたバケットのストアを作成する"""
+    if settings.RATE_LIMIT_BACKEND_URL:
+        try:
+            return RedisBucketStore(settings.RATE_LIMIT_BACKEND_URL)
+        except ImportError:
+            print("RATE_LIMIT_BACKEND_URL が指定されていますが redis パッケージがありません。プロセス内のバケットを使用します")
+    return InMemoryBucketStore()
+
+
+LOGIN_BY_IP = RateLimit("login-ip", settings.RATE_LIMIT_LOGIN_IP_BURST, settings.RATE_LIMIT_LOGIN_IP_PER_MINUTE)
+LOGIN_BY_USERNAME = RateLimit("login-user", settings.RATE_LIMIT_LOGIN_USERNAME_BURST, settings.RATE_LIMIT_LOGIN_USERNAME_PER_MINUTE)
+WRITE = RateLimit("write", settings.RATE_LIMIT_WRITE_BURST, settings.RATE_LIMIT_WRITE_PER_MINUTE)
+
+# ログイン系エンドポイント（ユーザー名をクエリ文字列またはフォームで受け取る）
+LOGIN_PATHS = frozenset({
+    "/token",
+    f"{settings.API_V1_STR}/auth/token",
+    f"{settings.API_V1_STR}/auth/login",
+    f"{settings.API_V1_STR}/auth/simple-token",
+})
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+# フォームからユーザー名を読むときに受け付ける本文の上限
+_MAX_FORM_BYTES = 64 * 1024
+
+Scope = Dict
+Receive = Callable[[], Awaitable[Dict]]
+Send = Callable[[Dict], Awaitable[None]]
+
+
+class RateLimitMiddleware:
+    """ログインと書き込みのリクエストにレート制限をかけるASGIミドルウェア"""
+
+    def __init__(self, app, store=None, max_cached_tokens: int = 10000):
+        self.app = app
+        self.store = store if store is not None else create_bucket_store()
+        self.max_cached_tokens = max_cached_tokens
+        # アクセストークン → ユーザーID（署名の検証はトークンごとに1回だけ行う）
+        self._token_subjects: Dict[str, Optional[str]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path in LOGIN_PATHS:
+            retry_after, receive = await self._check_login(scope, receive)
+        elif scope["method"] in WRITE_METHODS and path.startswith(settings.API_V1_STR):
+            retry_after = await self._check_write(scope)
+        else:
+            retry_after = 0.0
+
+        if retry_after > 0:
+            await self._reject(send, retry_after)
+            return
+        await self.app(scope, receive, send)
+
+    # ---- 判定 ----
+
+    async def _check_login(self, scope: Scope, receive: Receive) -> Tuple[float, Receive]:
+        retry_after = await self.store.acquire(f"{LOGIN_BY_IP.name}:{self._client_ip(scope)}", LOGIN_BY_IP)
+        if retry_after > 0:
+            return retry_after, receive
+        username, receive = await self._read_username(scope, receive)
+        if username:
+            retry_after = await self.store.acquire(f"{LOGIN_BY_USERNAME.name}:{username.lower()}", LOGIN_BY_USERNAME)
+        return retry_after, receive
+
+    async def _check_write(self, scope: Scope) -> float:
+        user_id = self._user_id(scope)
+        key = f"{WRITE.name}:u:{user_id}" if user_id else f"{WRITE.name}:ip:{self._client_ip(scope)}"
+        return await self.store.acquire(key, WRITE)
+
+    # ---- リクエストからの識別子の取得 ----
+
+    def _client_ip(self, scope: Scope) -> str:
+        if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+            forwarded = _header(scope, b"x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",", 1)[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _user_id(self, scope: Scope) -> Optional[str]:
+        authorization = _header(scope, b"authorization")
+        if not authorization or authorization[:7].lower() != "bearer ":
+            return None
+        token = authorization[7:]
+        if token in self._token_subjects:
+            return self._token_subjects[token]
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            subject = str(payload.get("sub")) if payload.get("sub") is not None else None
+        except JWTError:
+            subject = None
+        if len(self._token_subjects) >= self.max_cached_tokens:
+            self._token_subjects.clear()
+        self._token_subjects[token] = subject
+        return subject
+
+    async def _read_username(self, scope: Scope, receive: Receive) -> Tuple[Optional[str], Receive]:
+        """クエリ文字列またはフォーム本文からユーザー名を取得する（読み取った本文はアプリケーションに渡し直す）"""
+        username = _form_value(scope.get("query_string", b""), b"username")
+        if username:
+            return username, receive
+        if "application/x-www-form-urlencoded" not in (_header(scope, b"content-type") or ""):
+            return None, receive
+
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                # 切断された場合はそのまま渡す
+                return None, _replay([message], receive)
+            chunk = message.get("body", b"")
+            chunks.append(chunk)
+            size += len(chunk)
+            if not message.get("more_body", False) or size > _MAX_FORM_BYTES:
+                more_body = message.get("more_body", False)
+                break
+        body = b"".join(chunks)
+        replayed = _replay([{"type": "http.request", "body": body, "more_body": more_body}], receive)
+        if more_body:
+            return None, replayed
+        return _form_value(body, b"username"), replayed
+
+    # ---- 応答 ----
+
+    async def _reject(self, send: Send, retry_after: float) -> None:
+        body = json.dumps(
+            {"detail": "リクエストが多すぎます。しばらくしてから再度お試しください"},
+            ensure_ascii=False
+        ).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _form_value(encoded: bytes, name: bytes) -> Optional[str]:
+    """application/x-www-form-urlencoded 形式から1つの値を取り出す（全体を解析するより速い）"""
+    prefix = name + b"="
+    for pair in encoded.split(b"&"):
+        if pair.startswith(prefix):
+            return unquote_plus(pair[len(prefix):].decode("latin-1"), encoding="utf-8", errors="replace") or None
+    return None
+
+
+def _replay(messages: List[Dict], receive: Receive) -> Receive:
+    """読み取り済みのメッセージを先に返し、その後は元の receive に委ねる"""
+    pending = list(messages)
+
+    async def replayed_receive() -> Dict:
+        if pending:
+            return pending.pop(0)
+        return await receive()
+
+    return replayed_receive
@@ -0,0 +1,77 @@
+# app/core/row_cache.py
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, Iterable, Optional, Set, TypeVar
+import threading
+
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+
+class RowCache(Generic[T]):
+    """
+    ID → 参照用の行（NamedTuple など不変の値）の上限付きキャッシュ
+
+    - get_many でキャッシュにないIDを loader でまとめて取得する
+    - 作成時は put で登録し、更新・削除時は invalidate で該当エントリを破棄する
+    """
+
+    def __init__(self, loader: Callable[[Session, Set[int]], Dict[int, T]], max_size: int = 10000):
+        self.loader = loader
+        self.max_size = max_size
+        self._rows: "OrderedDict[int, T]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 読み込み中に無効化された古い内容をキャッシュしないための世代番号
+        self._generation = 0
+
+    def get(self, db: Session, key: int) -> Optional[T]:
+        """1件取得する（存在しない場合はNone）"""
+        return self.get_many(db, [key]).get(key)
+
+    def get_many(self, db: Session, keys: Iterable[int]) -> Dict[int, T]:
+        """複数件取得する（存在しないIDは結果に含まれない）"""
+        result: Dict[int, T] = {}
+        missing = set()
+        with self._lock:
+            for key in keys:
+                if key is None:
+                    continue
+                row = self._rows.get(key)
+                if row is not None:
+                    self._rows.move_to_end(key)
+                    result[key] = row
+                else:
+                    missing.add(key)
+            generation = self._generation
+
+        if not missing:
+            return result
+
+        loaded = self.loader(db, missing)
+        result.update(loaded)
+
+        with self._lock:
+            if generation == self._generation:
+                self._store(loaded)
+        return result
+
+    def put(self, key: int, row: T) -> None:
+        """作成した行を登録する（コミット後に呼び出す）"""
+        with self._lock:
+            self._store({key: row})
+
+    def _store(self, rows: Dict[int, T]) -> None:
+        self._rows.update(rows)
+        for key in rows:
+            self._rows.move_to_end(key)
+        while len(self._rows) > self.max_size:
+            self._rows.popitem(last=False)
+
+    def invalidate(self, key: int = None) -> None:
+        """キャッシュを破棄する（key 未指定の場合はすべて）"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._rows.clear()
+            else:
+                self._rows.pop(key, None)
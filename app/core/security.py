@@ -1,7 +1,9 @@
 # app/core/security.py の内容を以下のように変更
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import asyncio
 
 from jose import jwt
 from passlib.context import CryptContext
@@ -14,30 +16,61 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 
 # パスワードハッシュ用のコンテキスト
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# - 以前の平文保存のパスワードも検証できるよう plaintext を非推奨スキームとして残し、ログイン時に bcrypt へ置き換える
+# - PASSWORD_HASH_ROUNDS より低いコストの bcrypt ハッシュも再ハッシュの対象にする
+pwd_context = CryptContext(
+    schemes=["bcrypt", "plaintext"],
+    deprecated=["plaintext"],
+    bcrypt__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
+
+# ハッシュ計算・検証専用のスレッドプール（bcrypt は計算中に GIL を解放する）
+# 同時に計算する数を制限し、ログインが集中してもリクエスト処理用のスレッドやイベントループを占有しないようにする
+_hash_executor = ThreadPoolExecutor(max_workers=max(1, settings.PASSWORD_HASH_WORKERS), thread_name_prefix="password-hash")
+
+
+# 存在しないユーザー名でのログイン時に検証する固定のハッシュ（どのパスワードとも一致しない）
+# 検証にかかる時間を実在するユーザーと揃え、応答時間からユーザー名の有無を推測されないようにする
+_DUMMY_PASSWORD_HASH = f"$2b${settings.PASSWORD_HASH_ROUNDS:02d}$OP55aFi3tDhQ0dnnQSVAou9qanKDspAsSTPtvMZ83dYj6CpP/pbii"
+
 
 def verify_password(plain_password: str, stored_password: str) -> bool:
     """
     平文のパスワードとデータベースに保存されたパスワードを検証する
-    ハッシュ化せずに直接比較
     """
-    # 開発環境では単純な文字列比較も許可
-    # if settings.DEBUG and plain_password == stored_password:
-    #     return True
-    # # 通常のハッシュ検証
-    # return pwd_context.verify(plain_password, stored_password)
-    #
-    # 直接文字列比較
-    return plain_password == stored_password
+    return pwd_context.verify(plain_password, stored_password)
+
+
+def verify_and_update_password(plain_password: str, stored_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    パスワードを検証し、保存形式が古い（平文・低コスト）場合は新しいハッシュもあわせて返す
+
+    :return: (検証結果, 再ハッシュが必要な場合は新しいハッシュ・不要なら None)
+    """
+    return pwd_context.verify_and_update(plain_password, stored_password)
 
 
 def get_password_hash(password: str) -> str:
-    """パスワードをハッシュ化せずそのまま返す"""
-    # 開発環境ではハッシュ化せずにそのまま返すこともできる
-    # if settings.DEBUG and settings.PROJECT_NAME == "COLLABOAGAMES0406 API":
-    return password
-    # ハッシュ化
-    # return pwd_context.hash(password)
+    """パスワードを bcrypt でハッシュ化する"""
+    return pwd_context.hash(password)
+
+
+async def verify_and_update_password_async(plain_password: str, stored_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password を専用スレッドプールで実行する"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_and_update_password, plain_password, stored_password)
+
+
+async def verify_dummy_password_async(plain_password: str) -> None:
+    """存在しないユーザーのログインで、実在するユーザーと同じ時間をかけて固定のハッシュを検証する"""
+    await verify_and_update_password_async(plain_password, _DUMMY_PASSWORD_HASH)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash を専用スレッドプールで実行する"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, get_password_hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -0,0 +1,36 @@
+# app/core/soft_delete.py
+"""
+論理削除（deleted_at）されたレコードをORMの検索結果から除外する
+
+- @soft_deletable を付けたモデルは、Session で実行するSELECTに自動で deleted_at IS NULL の条件が付く
+- 削除処理など論理削除済みの行も扱う場合は execution_options(include_deleted=True) を指定する
+"""
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+
+INCLUDE_DELETED = "include_deleted"
+
+_soft_deletable_models: List[type] = []
+
+
+def soft_deletable(model: type) -> type:
+    """論理削除の対象モデルとして登録する（deleted_at カラムが必要）"""
+    _soft_deletable_models.append(model)
+    return model
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_deleted(execute_state: ORMExecuteState) -> None:
+    if (
+        not execute_state.is_select
+        or execute_state.is_column_load
+        or execute_state.is_relationship_load
+        or execute_state.execution_options.get(INCLUDE_DELETED, False)
+    ):
+        return
+    execute_state.statement = execute_state.statement.options(*[
+        with_loader_criteria(model, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+        for model in _soft_deletable_models
+    ])
@@ -0,0 +1,175 @@
+# app/core/stale_cache.py
+"""
+DBが使えない間の参照系レスポンスのキャッシュ
+
+- STALE_CACHE_ROUTES のパスへの GET の正常なレスポンス（200）を、パス・クエリ・Authorization ヘッダーごとに保持する
+  （ユーザーごとに内容が異なるため、同じトークンのリクエストにのみ返す）
+- DBのサーキットブレーカーが開いている間は、保持しているレスポンスを Warning / Age ヘッダー付きで返す。
+  保持していない場合はそのままアプリケーションに渡し、get_db で 503 を返す
+- ブレーカーが閉じている間はキャッシュを返さない（最新の内容のみ返す）
+"""
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+import hashlib
+import re
+import time
+
+from jose import JWTError, jwt
+
+from ..api.auth.sessions import revocation_list
+from .circuit_breaker import db_circuit
+from .config import settings
+from .metrics import metrics
+
+_EXCLUDED_HEADERS = frozenset({b"content-length", b"set-cookie", b"date"})
+
+
+class CachedResponse(NamedTuple):
+    stored_at: float  # time.monotonic() 基準
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+def compile_routes(value: str) -> Optional["re.Pattern"]:
+    """"/a/{id}" 形式のパスのカンマ区切りを1つの正規表現にする（"{...}" は1階層の任意の値）"""
+    patterns = []
+    for route in value.split(","):
+        route = route.strip()
+        if not route:
+            continue
+        parts = re.split(r"\{[^}]*\}", route)
+        patterns.append("[^/]+".join(re.escape(part) for part in parts))
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+class StaleResponseCache:
+    """最近使われたものから上限件数まで保持するキャッシュ（イベントループ上でのみ操作するためロックは不要）"""
+
+    def __init__(self, max_entries: int, max_age_seconds: float):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.stored_at > self.max_age_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, headers: List[Tuple[bytes, bytes]], body: bytes) -> None:
+        self._entries[key] = CachedResponse(time.monotonic(), headers, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _authorization(scope) -> bytes:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            return value
+    return b""
+
+
+def _token_still_valid(authorization: bytes) -> bool:
+    """キャッシュを返してよいトークンかどうか（DBにアクセスせずに有効期限と失効を確認する）"""
+    if not authorization:
+        return True
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return False
+    session_id = payload.get("sid")
+    return not (session_id and revocation_list.might_be_revoked(session_id))
+
+
+class StaleCacheMiddleware:
+    """DBのサーキットブレーカーが開いている間、参照系のパスに直近の正常なレスポンスを返すASGIミドルウェア"""
+
+    def __init__(self, app):
+        self.app = app
+        self.routes = compile_routes(settings.STALE_CACHE_ROUTES)
+        self.max_body_bytes = settings.STALE_CACHE_MAX_BODY_BYTES
+        self.cache = StaleResponseCache(settings.STALE_CACHE_MAX_ENTRIES, settings.STALE_CACHE_MAX_AGE_SECONDS)
+        metrics.counter("stale_cache_responses_total", "ブレーカーが開いている間の参照系リクエスト数（outcome: hit / miss）")
+        metrics.register_gauge("stale_cache_entries", "保持しているレスポンス数", lambda: [({}, len(self.cache))])
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not settings.DB_CIRCUIT_ENABLED
+            or self.routes is None
+            or not self.routes.fullmatch(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        authorization = _authorization(scope)
+        key = "{}?{}#{}".format(
+            scope["path"],
+            scope["query_string"].decode("latin-1"),
+            hashlib.sha256(authorization).hexdigest() if authorization else ""
+        )
+
+        if not db_circuit.is_closed:
+            entry = self.cache.get(key)
+            if entry is not None and _token_still_valid(authorization):
+                metrics.inc("stale_cache_responses_total", outcome="hit")
+                await self._send_stale(send, entry)
+                return
+            metrics.inc("stale_cache_responses_total", outcome="miss")
+            await self.app(scope, receive, send)
+            return
+
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        size = 0
+        cacheable = False
+
+        async def send_and_store(message) -> None:
+            nonlocal size, cacheable
+            if message["type"] == "http.response.start":
+                cacheable = message["status"] == 200
+                headers.extend(
+                    (name, value) for name, value in message.get("headers", [])
+                    if name.lower() not in _EXCLUDED_HEADERS
+                )
+            elif message["type"] == "http.response.body" and cacheable:
+                body = message.get("body", b"")
+                size += len(body)
+                if size > self.max_body_bytes:
+                    cacheable = False
+                    chunks.clear()
+                else:
+                    chunks.append(body)
+                    if not message.get("more_body", False):
+                        self.cache.put(key, headers, b"".join(chunks))
+            await send(message)
+
+        await self.app(scope, receive, send_and_store)
+
+    async def _send_stale(self, send, entry: CachedResponse) -> None:
+        age = int(time.monotonic() - entry.stored_at)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": entry.headers + [
+                (b"content-length", str(len(entry.body)).encode()),
+                (b"age", str(age).encode()),
+                (b"warning", b'110 - "Response is Stale"'),
+                (b"x-cache-status", b"stale"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": entry.body})
@@ -0,0 +1,167 @@
+# app/core/warmup.py
+"""
+起動後のウォームアップと準備状態（/readyz）
+
+起動時はDBにアクセスしないため、コネクションプール・参照キャッシュ・ランキングなどのインデックスは空の状態で始まる。
+このまま振り分けられると最初のリクエストがそれらの構築を待つため、起動後にバックグラウンドで順に準備し、
+すべて完了するまで /readyz は 503 を返す（ロードバランサーは準備中のワーカーにリクエストを振り分けない）。
+
+- 各モジュールは register_warmup() で準備処理を登録する（定期実行タスクの登録と同じくインポート時に行う）
+- 失敗した処理は WARMUP_RETRY_INTERVAL_SECONDS ごとに再実行する
+- 各処理の所要時間は /readyz と /metrics で確認できる
+"""
+from typing import Callable, Dict, List, Optional
+import threading
+import time
+
+from sqlalchemy.orm import Session, configure_mappers
+
+from .config import settings
+from .database import SessionLocal, engine
+from .metrics import metrics
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class WarmupStep:
+    def __init__(self, name: str, func: Callable[[Session], None]):
+        self.name = name
+        self.func = func
+        self.status = STATUS_PENDING
+        self.duration: Optional[float] = None
+        self.attempts = 0
+        self.error: Optional[str] = None
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "name": self.name,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "attempts": self.attempts,
+            "error": self.error,
+        }
+
+
+# 登録済みの準備処理（登録順に実行する）
+_steps: List[WarmupStep] = []
+_started_at: Optional[float] = None
+_finished_at: Optional[float] = None
+_thread: Optional[threading.Thread] = None
+
+
+def register_warmup(name: str, func: Callable[[Session], None]) -> WarmupStep:
+    """
+    起動後に1回実行する準備処理を登録する
+
+    :param name: 処理名（/readyz・メトリクスに表示する）
+    :param func: 実行する関数（引数はDBセッション。処理ごとに新しいセッションを渡す）
+    """
+    step = WarmupStep(name, func)
+    _steps.append(step)
+    return step
+
+
+def _run_step(step: WarmupStep) -> bool:
+    step.status = STATUS_RUNNING
+    step.attempts += 1
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        step.func(db)
+        step.status = STATUS_DONE
+        step.error = None
+        return True
+    except Exception as e:
+        print(f"ウォームアップ {step.name} でエラーが発生しました: {str(e)}")
+        step.status = STATUS_FAILED
+        step.error = str(e)
+        return False
+    finally:
+        db.close()
+        step.duration = time.perf_counter() - started
+
+
+def _open_pool_connections(db: Session) -> None:
+    """コネクションプールに DB_POOL_WARMUP_CONNECTIONS 本（プールの常時保持数まで）のコネクションを用意する"""
+    pool_size = getattr(engine.pool, "size", None)
+    if pool_size is None:
+        # NullPool（USE_AZURE）はコネクションを保持しない
+        return
+    connections = []
+    try:
+        for _ in range(min(settings.DB_POOL_WARMUP_CONNECTIONS, pool_size())):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def _configure_mappers(db: Session) -> None:
+    """モデル間のリレーションを解決する（最初のクエリで行われる処理を先に済ませる）"""
+    configure_mappers()
+
+
+register_warmup("db-pool", _open_pool_connections)
+register_warmup("orm-mappers", _configure_mappers)
+
+
+def run_warmup(retry_interval: Optional[float] = None) -> None:
+    """登録済みの準備処理を順に実行する（retry_interval を指定した場合は失敗した処理をすべて成功するまで再実行する）"""
+    global _started_at, _finished_at
+    _started_at = time.perf_counter()
+    while True:
+        pending = [step for step in _steps if step.status != STATUS_DONE]
+        for step in pending:
+            _run_step(step)
+        if all(step.status == STATUS_DONE for step in _steps):
+            _finished_at = time.perf_counter()
+            print(f"ウォームアップが完了しました（{(_finished_at - _started_at) * 1000:.0f} ms）")
+            return
+        if retry_interval is None:
+            return
+        time.sleep(retry_interval)
+
+
+def start_warmup() -> None:
+    """準備処理をバックグラウンドのスレッドで開始する（アプリケーション起動時に呼び出す）"""
+    global _thread
+    if not settings.WARMUP_ENABLED or (_thread is not None and _thread.is_alive()):
+        return
+    _thread = threading.Thread(
+        target=run_warmup, args=(settings.WARMUP_RETRY_INTERVAL_SECONDS,), name="warmup", daemon=True
+    )
+    _thread.start()
+
+
+def is_ready() -> bool:
+    return not settings.WARMUP_ENABLED or all(step.status == STATUS_DONE for step in _steps)
+
+
+def readiness_report() -> Dict[str, object]:
+    """準備状態と各処理の所要時間"""
+    if is_ready():
+        status = "ready"
+    elif any(step.status == STATUS_FAILED for step in _steps):
+        status = "failed"
+    else:
+        status = "warming_up"
+    total = None
+    if _started_at is not None:
+        total = ((_finished_at or time.perf_counter()) - _started_at) * 1000
+    return {
+        "status": status,
+        "total_ms": round(total, 1) if total is not None else None,
+        "steps": [step.report() for step in _steps],
+    }
+
+
+metrics.register_gauge("ready", "準備が完了しているかどうか（1: 完了）", lambda: [({}, 1 if is_ready() else 0)])
+metrics.register_gauge(
+    "warmup_step_duration_seconds", "準備処理の所要時間（秒）",
+    lambda: [({"step": step.name}, step.duration) for step in _steps if step.duration is not None]
+)
@@ -0,0 +1,235 @@
+# app/manage.py
+"""
+管理コマンド
+
+使い方:
+    python -m app.manage migrate    # 未作成のテーブル・NULL許容カラム・インデックスを作成する
+    python -m app.manage seed [--admin-password PASSWORD]    # 管理者ユーザー（ID=1）がいなければ作成する（省略時はランダムなパスワードを1回だけ表示する）
+    python -m app.manage reconcile-points [--opening-balance]    # ポイント合計を台帳と照合する
+    python -m app.manage rebuild-stats    # プロジェクト統計の集計テーブルを作り直す
+    python -m app.manage archive [--days N]    # 解決済みのお困りごとをアーカイブする
+    python -m app.manage partition-messages [--apply]    # trouble_messages を月単位でパーティション分割する（MySQL）
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+
+def import_models() -> None:
+    """Base.metadata にすべてのモデルを登録するためにインポートする"""
+    from app.api.users import models as _users_models  # noqa: F401
+    from app.api.projects import models as _projects_models  # noqa: F401
+    from app.api.troubles import models as _troubles_models  # noqa: F401
+    from app.api.messages import models as _messages_models  # noqa: F401
+    from app.api.activity import models as _activity_models  # noqa: F401
+    from app.api.sync import models as _sync_models  # noqa: F401
+    from app.api.imports import models as _imports_models  # noqa: F401
+    from app.api.deletions import models as _deletions_models  # noqa: F401
+    from app.api.auth import models as _auth_models  # noqa: F401
+
+
+def migrate(args: argparse.Namespace) -> None:
+    """
+    未作成のテーブルを作成する
+
+    既存のテーブルには、モデルに追加されたNULL許容カラム（deleted_at など）とインデックスのみ追加する
+    """
+    from sqlalchemy import inspect
+    from sqlalchemy.schema import CreateColumn
+    from app.core.database import Base, engine
+
+    import_models()
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+                print(f"カラムを追加しました: {table.name}.{column.name}")
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+                index.create(connection)
+                print(f"インデックスを追加しました: {table.name}.{index.name}")
+    print("テーブルの作成が完了しました")
+
+
+def seed(args: argparse.Namespace) -> None:
+    """
+    初期データ（管理者ユーザー）を作成する
+
+    以前はアプリケーションの起動時に各ワーカーで確認していたが、起動を遅らせないようにデプロイ時に1回実行する
+    """
+    from datetime import datetime
+    import secrets
+    from app.core.database import SessionLocal
+    from app.core.security import get_password_hash
+
+    import_models()
+    from app.api.users.models import User
+
+    db = SessionLocal()
+    try:
+        if db.get(User, 1) is not None:
+            print("管理者ユーザーは作成済みです")
+            return
+        # パスワードの指定がない場合は推測できないパスワードを生成する（表示はこの1回のみ）
+        password = args.admin_password or secrets.token_urlsafe(16)
+        # ポイントは台帳（point_ledger）経由でのみ付与するため初期値は0とする
+        db.add(User(
+            user_id=1,
+            name="admin",
+            password=get_password_hash(password),
+            category_id="システム部",
+            last_login_at=datetime.utcnow()
+        ))
+        db.commit()
+    finally:
+        db.close()
+    print("管理者ユーザーを作成しました: ID=1, name=admin")
+    if not args.admin_password:
+        print(f"管理者ユーザーのパスワード（再表示できません）: {password}")
+
+
+def reconcile_points(args: argparse.Namespace) -> None:
+    """未反映の台帳エントリを反映したうえで、users のポイント合計・回答数を台帳と照合する"""
+    from app.core.database import SessionLocal
+
+    import_models()
+    from app.api.users import points
+
+    applied = points.aggregate_points(max_batches=1_000_000)
+    print(f"未反映の台帳エントリを反映しました: {applied}件")
+
+    db = SessionLocal()
+    try:
+        drifts = points.reconcile_points(db, opening_balance=args.opening_balance)
+    finally:
+        db.close()
+
+    for user_id, point_diff, answer_diff in drifts:
+        print(f"ユーザー {user_id}: ポイント差分 {point_diff:+d} / 回答数差分 {answer_diff:+d}")
+    if not drifts:
+        print("差分はありません")
+    elif args.opening_balance:
+        print(f"{len(drifts)}人分の差分を期首残高として台帳に記録しました")
+    else:
+        print(f"{len(drifts)}人分の合計値を台帳に合わせて修正しました")
+
+
+def rebuild_stats(args: argparse.Namespace) -> None:
+    """プロジェクト統計の集計テーブルを troubles / co_creation_projects から作り直す"""
+    from app.core.database import SessionLocal
+
+    import_models()
+    from app.api.projects import stats
+
+    db = SessionLocal()
+    try:
+        trouble_rows, category_rows = stats.rebuild_stats(db)
+    finally:
+        db.close()
+    print(f"集計テーブルを再構築しました（お困りごと: {trouble_rows}行 / カテゴリー: {category_rows}行）")
+
+
+def archive(args: argparse.Namespace) -> None:
+    """解決から一定日数を過ぎたお困りごととメッセージをアーカイブテーブルに移す"""
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+
+    import_models()
+    from app.api.troubles import archive as trouble_archive
+
+    db = SessionLocal()
+    try:
+        troubles, messages = trouble_archive.archive_resolved(
+            db,
+            args.days if args.days is not None else settings.ARCHIVE_RESOLVED_TROUBLE_DAYS,
+            settings.ARCHIVE_BATCH_ROWS,
+            settings.ARCHIVE_BATCH_PAUSE_SECONDS
+        )
+    finally:
+        db.close()
+    print(f"アーカイブしました（お困りごと: {troubles}件 / メッセージ: {messages}件）")
+
+
+def partition_messages(args: argparse.Namespace) -> None:
+    """trouble_messages を sent_at の月単位でレンジパーティション分割する（MySQLのみ）"""
+    from app.core.database import engine
+    from app.api.messages.partitioning import FOREIGN_KEY_RECHECK_SECONDS, build_partition_ddl
+
+    if engine.dialect.name != "mysql":
+        print("パーティショニングはMySQLでのみ利用できます")
+        return
+
+    with engine.connect() as connection:
+        statements = build_partition_ddl(connection, args.months_ahead)
+        if not statements:
+            print("追加するパーティションはありません")
+            return
+        for statement in statements:
+            print(statement + ";")
+            if args.apply:
+                connection.exec_driver_sql(statement)
+        if args.apply:
+            connection.commit()
+            print("パーティショニングを適用しました")
+            print(
+                "メッセージ投稿時の存在確認は外部キー制約から明示的な確認に切り替わります"
+                f"（実行中のワーカーは最大{FOREIGN_KEY_RECHECK_SECONDS}秒後。すぐに切り替えるには再起動してください）"
+            )
+        else:
+            print("（--apply を指定すると上記のDDLを実行します）")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="コラボゲームズ 管理コマンド")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="未作成のテーブルを作成する")
+    migrate_parser.set_defaults(func=migrate)
+
+    seed_parser = subparsers.add_parser("seed", help="管理者ユーザーがいなければ作成する")
+    seed_parser.add_argument(
+        "--admin-password",
+        default=None,
+        help="作成する管理者ユーザーのパスワード（省略時はランダムに生成して1回だけ表示する）",
+    )
+    seed_parser.set_defaults(func=seed)
+
+    reconcile_parser = subparsers.add_parser("reconcile-points", help="ポイント合計・回答数を台帳と照合して修正する")
+    reconcile_parser.add_argument(
+        "--opening-balance",
+        action="store_true",
+        help="users を修正せず、差分を期首残高として台帳に記録する（台帳導入時に1回実行する）",
+    )
+    reconcile_parser.set_defaults(func=reconcile_points)
+
+    stats_parser = subparsers.add_parser("rebuild-stats", help="プロジェクト統計の集計テーブルを作り直す")
+    stats_parser.set_defaults(func=rebuild_stats)
+
+    archive_parser = subparsers.add_parser("archive", help="解決済みのお困りごととメッセージをアーカイブする")
+    archive_parser.add_argument("--days", type=int, default=None, help="解決からの経過日数（省略時は ARCHIVE_RESOLVED_TROUBLE_DAYS）")
+    archive_parser.set_defaults(func=archive)
+
+    partition_parser = subparsers.add_parser(
+        "partition-messages",
+        help="trouble_messages を月単位でパーティション分割する（MySQL・初回は外部キーを削除し主キーを変更する）",
+    )
+    partition_parser.add_argument("--months-ahead", type=int, default=3, help="何か月先までのパーティションを作成するか")
+    partition_parser.add_argument("--apply", action="store_true", help="DDLを表示するだけでなく実行する")
+    partition_parser.set_defaults(func=partition_messages)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
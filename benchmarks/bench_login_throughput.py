@@ -0,0 +1,156 @@
+# benchmarks/bench_login_throughput.py
+"""
+ログインのスループットのベンチマーク
+
+SQLite（一時ファイル）上のユーザーに対して同時にログインし、以下を計測する
+- ログインのスループット（件/秒）と応答時間
+- ログインが集中している間の軽いエンドポイント（GET /ping）の応答時間
+
+「変更前」はリクエスト処理用のスレッドプール上で bcrypt の検証をそのまま行う同期エンドポイント、
+「変更後」は現在の /login エンドポイント（DBアクセスはスレッドプール、検証は専用のスレッドプール）。
+
+使い方:
+    python benchmarks/bench_login_throughput.py [--logins 200] [--concurrency 50] [--rounds 12] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ログインのスループットのベンチマーク")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    return parser.parse_args()
+
+
+args = parse_args()
+# 設定はインポート時に読み込まれるため、アプリケーションのモジュールより先に指定する
+os.environ["PASSWORD_HASH_ROUNDS"] = str(args.rounds)
+os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.manage import import_models
+
+import_models()
+
+from app.core.database import Base, get_db
+from app.core.security import get_password_hash, verify_password
+from app.api.auth.router import router as auth_router
+from app.api.users.models import User
+
+
+def legacy_login(username: str, password: str, db: Session = Depends(get_db)):
+    user = db.query(User).filter(User.name == username).first()
+    if not user or not verify_password(password, user.password):
+        raise HTTPException(status_code=401)
+    user.last_login_at = datetime.utcnow()
+    db.commit()
+    return {"user_id": user.user_id}
+
+
+def ping():
+    return {"ok": True}
+
+
+def build_app(Session) -> FastAPI:
+    app = FastAPI()
+    app.include_router(auth_router, prefix="/auth")
+    app.add_api_route("/legacy/login", legacy_login, methods=["POST"])
+    app.add_api_route("/ping", ping, methods=["GET"])
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app
+
+
+async def run(app: FastAPI, login_path: str) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+        login_latencies = []
+        ping_latencies = []
+        done = asyncio.Event()
+
+        async def login(index: int) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(login_path, params={"username": f"user{index % args.users}", "password": "password123"})
+                assert response.status_code == 200, response.text
+                login_latencies.append(time.perf_counter() - started)
+
+        async def probe() -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/ping")
+                ping_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*[login(index) for index in range(args.logins)])
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    def percentile(values, ratio):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))] * 1000
+
+    return {
+        "throughput": args.logins / elapsed,
+        "login_p50": statistics.median(login_latencies) * 1000,
+        "login_p95": percentile(login_latencies, 0.95),
+        "ping_p50": statistics.median(ping_latencies) * 1000,
+        "ping_p95": percentile(ping_latencies, 0.95),
+    }
+
+
+def main() -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, pool_size=args.concurrency)
+    # 同時書き込みで読み取りとロックが衝突しないよう WAL モードにする
+    event.listen(engine, "connect", lambda connection, record: connection.execute("PRAGMA journal_mode=WAL"))
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    # 全ユーザーで同じハッシュを使う（検証コストは同じ）
+    password_hash = get_password_hash("password123")
+    db = Session()
+    db.add_all([User(name=f"user{index}", password=password_hash, point_total=0) for index in range(args.users)])
+    db.commit()
+    db.close()
+
+    app = build_app(Session)
+    print(f"bcrypt コスト: {args.rounds} / 専用スレッド数: {args.workers} / ログイン: {args.logins}件（同時 {args.concurrency}）")
+    print(f"{'処理':<8}{'件/秒':>10}{'ログインp50':>14}{'p95':>10}{'ping p50':>12}{'p95':>10}")
+    for label, login_path in [("変更前", "/legacy/login"), ("変更後", "/auth/login")]:
+        result = asyncio.run(run(app, login_path))
+        print(
+            f"{label:<8}{result['throughput']:>10.1f}{result['login_p50']:>12.1f}ms{result['login_p95']:>8.1f}ms"
+            f"{result['ping_p50']:>10.1f}ms{result['ping_p95']:>8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
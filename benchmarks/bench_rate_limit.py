@@ -0,0 +1,89 @@
+# benchmarks/bench_rate_limit.py
+"""
+レート制限の判定時間のベンチマーク
+
+以下の1回あたりの時間を計測する（目標: 10マイクロ秒未満）
+- プロセス内のトークンバケットの判定（InMemoryBucketStore.take）
+- ミドルウェアでの判定（下流のアプリケーションは何もしない）
+  - 書き込み: Authorization ヘッダーからのユーザーの特定（検証済みトークンのキャッシュ）+ バケットの判定
+  - ログイン: クエリ文字列からのユーザー名の取得 + IPアドレスとユーザー名のバケットの判定
+
+使い方:
+    python benchmarks/bench_rate_limit.py [--iterations 200000] [--keys 10000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import InMemoryBucketStore, RateLimit, RateLimitMiddleware
+from app.core.security import create_access_token
+
+
+async def noop_app(scope, receive, send) -> None:
+    return None
+
+
+async def noop_receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def noop_send(message) -> None:
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="レート制限の判定時間のベンチマーク")
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=10000)
+    args = parser.parse_args()
+
+    # 判定時間だけを計測するため、上限に達しないよう十分大きな容量にする
+    limit = RateLimit("bench", burst=10 ** 9, per_minute=10 ** 9)
+    store = InMemoryBucketStore()
+    keys = [f"bench:{index}" for index in range(args.keys)]
+    started = time.perf_counter()
+    for index in range(args.iterations):
+        store.take(keys[index % args.keys], limit)
+    bucket_us = (time.perf_counter() - started) / args.iterations * 1e6
+
+    middleware = RateLimitMiddleware(noop_app, store=InMemoryBucketStore())
+    tokens = [create_access_token({"sub": str(user_id)}) for user_id in range(1, 1001)]
+    write_scopes = [{
+        "type": "http", "method": "POST", "path": f"{settings.API_V1_STR}/messages/",
+        "query_string": b"", "client": ("10.0.0.1", 50000),
+        "headers": [(b"content-type", b"application/json"), (b"authorization", f"Bearer {token}".encode())],
+    } for token in tokens]
+    login_scopes = [{
+        "type": "http", "method": "POST", "path": f"{settings.API_V1_STR}/auth/login",
+        "query_string": f"username=user{index}&password=secret".encode(), "client": (f"10.0.{index % 250}.1", 50000),
+        "headers": [],
+    } for index in range(1000)]
+
+    async def run(scopes) -> float:
+        # 初回のトークン検証をキャッシュに載せてから計測する
+        for scope in scopes:
+            await middleware(scope, noop_receive, noop_send)
+        started = time.perf_counter()
+        for index in range(args.iterations):
+            await middleware(scopes[index % len(scopes)], noop_receive, noop_send)
+        return (time.perf_counter() - started) / args.iterations * 1e6
+
+    # 計測中に上限へ達しないよう、すべてのバケットを十分大きな容量にする
+    rate_limit.WRITE.capacity = rate_limit.LOGIN_BY_IP.capacity = rate_limit.LOGIN_BY_USERNAME.capacity = 1e12
+    write_us = asyncio.run(run(write_scopes))
+    login_us = asyncio.run(run(login_scopes))
+
+    print(f"1回あたりの判定時間（{args.iterations:,}回の平均）")
+    print(f"バケットの判定:              {bucket_us:6.2f} µs")
+    print(f"ミドルウェア（書き込み）:    {write_us:6.2f} µs")
+    print(f"ミドルウェア（ログイン）:    {login_us:6.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_recommendations.py
+"""
+プロジェクト推薦（共起行列）のベンチマーク
+
+合成データ（既定: 10万ユーザー・5,000プロジェクト）で以下を計測する
+- 共起行列の一括構築時間
+- お気に入り追加1件あたりの差分更新時間
+- ユーザー1人分の推薦計算時間（初回）と事前計算済み結果の取得時間
+
+使い方:
+    python benchmarks/bench_recommendations.py [--users 100000] [--projects 5000] [--mean-favorites 8]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.api.projects.recommendations import ProjectRecommender
+
+
+def generate_favorites(users: int, projects: int, mean_favorites: float, seed: int):
+    """人気に偏り（Zipf分布）のあるお気に入りの組を生成する"""
+    rng = np.random.default_rng(seed)
+    per_user = np.maximum(rng.poisson(mean_favorites, users), 1)
+    popularity = 1.0 / np.arange(1, projects + 1) ** 0.8
+    popularity /= popularity.sum()
+    user_ids = np.repeat(np.arange(1, users + 1), per_user)
+    project_ids = rng.choice(np.arange(1, projects + 1), size=len(user_ids), p=popularity)
+    categories = rng.integers(1, 9, projects)
+    creators = rng.integers(1, users + 1, projects)
+    project_rows = [
+        (project_id, int(categories[project_id - 1]), int(creators[project_id - 1]))
+        for project_id in range(1, projects + 1)
+    ]
+    return user_ids, project_ids, project_rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="プロジェクト推薦のベンチマーク")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--projects", type=int, default=5000)
+    parser.add_argument("--mean-favorites", type=float, default=8.0)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    user_ids, project_ids, project_rows = generate_favorites(
+        args.users, args.projects, args.mean_favorites, args.seed
+    )
+    print(f"ユーザー数: {args.users:,} / プロジェクト数: {args.projects:,} / お気に入り数: {len(user_ids):,}")
+
+    # ユーザーごとのお気に入り（差分更新・推薦計算の入力）
+    favorites_by_user = {}
+    for user_id, project_id in zip(user_ids.tolist(), project_ids.tolist()):
+        favorites_by_user.setdefault(user_id, set()).add(project_id)
+
+    recommender = ProjectRecommender(max_active_users=args.samples)
+
+    started = time.perf_counter()
+    recommender.build_from_arrays(user_ids, project_ids, project_rows)
+    build_seconds = time.perf_counter() - started
+    print(f"共起行列の構築: {build_seconds:.2f} 秒 (非ゼロ要素: {recommender._cooccurrence.nnz:,})")
+
+    rng = random.Random(args.seed)
+    sample_users = rng.sample(sorted(favorites_by_user), args.samples)
+
+    # 初回の推薦計算（事前計算に相当）
+    started = time.perf_counter()
+    for user_id in sample_users:
+        recommender.recommend_for(user_id, favorites_by_user[user_id], rng.randint(1, 8))
+    compute_ms = (time.perf_counter() - started) / args.samples * 1000
+    print(f"推薦計算（1ユーザーあたり）: {compute_ms:.2f} ms")
+
+    # 事前計算済み結果の取得
+    categories = {user_id: recommender._recommendations[user_id][0] for user_id in sample_users}
+    started = time.perf_counter()
+    for _ in range(10):
+        for user_id in sample_users:
+            recommender.recommend_for(user_id, (), categories[user_id])
+    serve_us = (time.perf_counter() - started) / (args.samples * 10) * 1_000_000
+    print(f"事前計算済み結果の取得: {serve_us:.2f} µs")
+
+    # お気に入り追加の差分更新（アクティブでないユーザー）
+    inactive_users = [u for u in rng.sample(sorted(favorites_by_user), args.samples) if u not in categories]
+    started = time.perf_counter()
+    for user_id in inactive_users:
+        project_id = rng.randint(1, args.projects)
+        favorites = favorites_by_user[user_id] | {project_id}
+        recommender.add_favorite(user_id, favorites, project_id)
+    update_us = (time.perf_counter() - started) / max(len(inactive_users), 1) * 1_000_000
+    print(f"お気に入り追加の差分更新: {update_us:.1f} µs")
+
+    # 差分の畳み込み
+    started = time.perf_counter()
+    with recommender._lock:
+        recommender._fold_delta()
+    print(f"差分の畳み込み: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
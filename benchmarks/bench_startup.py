@@ -0,0 +1,149 @@
+# benchmarks/bench_startup.py
+"""
+起動時間のベンチマーク（ワーカーの再起動・スケールアウト時のコールドスタート）
+
+新しいプロセスで以下をそれぞれ計測する
+- アプリケーションモジュール（main）のインポート時間
+- プロセスの起動から最初のレスポンス（GET /）を受け取るまでの時間
+- プロセスの起動から最初のDBを使うレスポンス（GET /api/v1/project-categories）を受け取るまでの時間
+- プロセスの起動からウォームアップが完了する（GET /readyz が 200 を返す）までの時間
+
+DBはSQLite（一時ファイル）を使用し、テーブルは計測前に python -m app.manage migrate と同じ処理で作成する。
+--importtime を指定すると、インポート時間の長いモジュール（累計）も表示する。
+
+使い方:
+    python benchmarks/bench_startup.py [--runs 5] [--app main:app] [--importtime 15]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SQLite を使うように設定を差し替えてからアプリケーションを読み込む（子プロセスで実行する）
+BOOTSTRAP = """
+import sys
+sys.path.insert(0, {root!r})
+import app.core.config as config
+config.Settings.SQLALCHEMY_DATABASE_URL = property(lambda self: {url!r})
+{body}
+"""
+
+IMPORT_BODY = """
+import time
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+SERVE_BODY = """
+import uvicorn
+uvicorn.run({app!r}, host="127.0.0.1", port={port}, log_level="warning")
+"""
+
+MIGRATE_BODY = """
+from app.manage import main
+main(["migrate"])
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="起動時間のベンチマーク")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--app", default="main:app", help="計測するアプリケーション（モジュール:変数）")
+    parser.add_argument("--timeout", type=float, default=60.0, help="最初のレスポンスを待つ最大時間（秒）")
+    parser.add_argument("--importtime", type=int, default=0, help="インポート時間の長いモジュールを指定件数表示する")
+    return parser.parse_args()
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, deadline: float) -> float:
+    """url が 200 を返すまで待ち、その時刻を返す"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"{url} から応答がありません")
+
+
+def measure_first_response(app: str, url: str, timeout: float):
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", BOOTSTRAP.format(root=ROOT, url=url, body=SERVE_BODY.format(app=app, port=port))],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        first = wait_for(f"http://127.0.0.1:{port}/", deadline)
+        first_db = wait_for(f"http://127.0.0.1:{port}/api/v1/project-categories", deadline)
+        ready = wait_for(f"http://127.0.0.1:{port}/readyz", deadline)
+        return first - started, first_db - started, ready - started
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+def summary(values) -> str:
+    values = [value * 1000 for value in values]
+    return f"中央値 {statistics.median(values):7.1f} ms / 最小 {min(values):7.1f} ms / 最大 {max(values):7.1f} ms"
+
+
+def main() -> None:
+    args = parse_args()
+    module = args.app.split(":")[0]
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        run_python(BOOTSTRAP.format(root=ROOT, url=url, body=MIGRATE_BODY))
+
+        import_times = [
+            float(run_python(BOOTSTRAP.format(root=ROOT, url=url, body=IMPORT_BODY.format(module=module))).stdout.split()[-1])
+            for _ in range(args.runs)
+        ]
+        first_responses = [measure_first_response(args.app, url, args.timeout) for _ in range(args.runs)]
+
+        print(f"アプリケーション: {args.app}（{args.runs}回）")
+        print(f"  インポート時間:                 {summary(import_times)}")
+        print(f"  最初のレスポンスまで:           {summary([first for first, _, _ in first_responses])}")
+        print(f"  最初のDBを使うレスポンスまで:   {summary([first_db for _, first_db, _ in first_responses])}")
+        print(f"  準備完了（/readyz）まで:        {summary([ready for _, _, ready in first_responses])}")
+
+        if args.importtime:
+            stderr = run_python(BOOTSTRAP.format(root=ROOT, url=url, body=f"import {module}"), "-X", "importtime").stderr
+            rows = []
+            for line in stderr.splitlines():
+                if not line.startswith("import time:") or "|" not in line:
+                    continue
+                _, cumulative, name = line.split("|")
+                if cumulative.strip().isdigit():
+                    rows.append((int(cumulative), name.strip()))
+            print(f"インポート時間の長いモジュール（累計・上位{args.importtime}件）:")
+            for cumulative, name in sorted(rows, reverse=True)[:args.importtime]:
+                print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_trouble_similarity.py
+"""
+類似お困りごと検索（TF-IDF + MinHash/LSH）のベンチマーク
+
+合成データ（既定: 5万件）で以下を計測する
+- 一括構築時間
+- 類似お困りごと検索・重複検出の1件あたりの時間
+- 作成時の差分更新1件あたりの時間
+
+使い方:
+    python benchmarks/bench_trouble_similarity.py [--troubles 50000] [--samples 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.troubles.similarity import TroubleSimilarityIndex
+
+WORDS = [
+    "サーバー", "起動", "デプロイ", "データベース", "接続", "エラー", "デザイン", "配色", "予算",
+    "スケジュール", "メンバー", "募集", "会議", "資料", "共有", "テスト", "環境", "ログイン",
+    "画面", "表示", "遅い", "困っています", "相談したい", "わからない", "うまくいかない", "設定",
+]
+
+
+def generate_description(rng: random.Random) -> str:
+    return "の".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12))) + "。"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="類似お困りごと検索のベンチマーク")
+    parser.add_argument("--troubles", type=int, default=50000)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = [
+        (trouble_id, rng.randint(1, 500), generate_description(rng))
+        for trouble_id in range(1, args.troubles + 1)
+    ]
+    print(f"お困りごと数: {args.troubles:,}")
+
+    index = TroubleSimilarityIndex()
+    started = time.perf_counter()
+    index.build_from_rows(rows)
+    print(f"一括構築: {time.perf_counter() - started:.2f} 秒")
+
+    queries = [generate_description(rng) for _ in range(args.samples)]
+    # 重複検出用に既存の説明文をそのまま使うクエリも混ぜる
+    duplicates = [rows[rng.randrange(len(rows))][2] for _ in range(args.samples)]
+
+    # 構築済みのためDBセッションは使われない
+    started = time.perf_counter()
+    for query in queries:
+        index.similar(None, query)
+    print(f"類似お困りごと検索（1件あたり）: {(time.perf_counter() - started) / args.samples * 1000:.2f} ms")
+
+    started = time.perf_counter()
+    for query in queries + duplicates:
+        index.find_duplicates(None, query)
+    print(f"重複検出（1件あたり）: {(time.perf_counter() - started) / (args.samples * 2) * 1000:.2f} ms")
+
+    started = time.perf_counter()
+    for offset, query in enumerate(queries):
+        index.add(args.troubles + offset + 1, 1, query)
+    print(f"差分更新（1件あたり）: {(time.perf_counter() - started) / args.samples * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
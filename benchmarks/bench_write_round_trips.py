@@ -0,0 +1,197 @@
+# benchmarks/bench_write_round_trips.py
+"""
+作成系エンドポイントのDBラウンドトリップ数のベンチマーク
+
+SQLite（一時ファイル）上で、各エンドポイントの処理本体が発行するSQL文とCOMMITの回数を数える。
+「変更前」は事前の存在確認・重複確認の SELECT と commit 後の refresh（および失効した属性の再読み込み）を
+行う従来の処理手順を再現したもの、「変更後」は現在のエンドポイント関数そのものを呼び出す。
+（認証で current_user を取得する1回は両方とも含めない）
+
+使い方:
+    python benchmarks/bench_write_round_trips.py [--writes 100]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# ラウンドトリップ数には影響しないため、パスワードハッシュのコストは最小にする
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "4")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.manage import import_models
+
+import_models()
+
+from app.core.database import Base
+from app.core.security import get_password_hash
+from app.api.activity import buckets as activity
+from app.api.auth.router import register_user
+from app.api.messages.models import Message
+from app.api.messages.router import create_message
+from app.api.messages.schemas import MessageCreate
+from app.api.projects import stats
+from app.api.projects.models import CoCreationProject, ProjectCategory
+from app.api.projects.router import create_project
+from app.api.projects.schemas import ProjectCreate
+from app.api.sync import changelog
+from app.api.troubles.models import Trouble, TroubleCategory
+from app.api.troubles.router import create_trouble
+from app.api.troubles.schemas import TroubleCreate
+from app.api.users import points
+from app.api.users.models import User
+from app.api.users.schemas import UserCreate
+
+
+class RoundTripCounter:
+    """エンジンに送られたSQL文・COMMITの回数を数える"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, *args, **kwargs) -> None:
+        self.count += 1
+
+    def _on_commit(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+# ---- 変更前の処理手順 ----
+
+def legacy_register(db, name: str) -> None:
+    db.query(User).filter(User.name == name).first()
+    user = User(name=name, password="x", point_total=0, last_login_at=datetime.utcnow())
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+
+def legacy_create_project(db, user: User, category_id: int) -> None:
+    db.query(ProjectCategory).filter(ProjectCategory.category_id == category_id).first()
+    project = CoCreationProject(
+        title="ベンチマーク", description="ベンチマーク用のプロジェクト",
+        creator_user_id=user.user_id, created_at=datetime.now(), category_id=category_id
+    )
+    db.add(project)
+    db.flush()
+    stats.record_project_change(db, None, project.category_id, created=True)
+    changelog.record(db, changelog.PROJECT, project.project_id)
+    db.commit()
+    db.refresh(project)
+
+
+def legacy_create_trouble(db, user: User, project_id: int, category_id: int) -> None:
+    project = db.query(CoCreationProject).filter(CoCreationProject.project_id == project_id).first()
+    trouble = Trouble(
+        description="ベンチマーク用のお困りごとです", project_id=project_id, category_id=category_id,
+        creator_user_id=user.user_id, created_at=datetime.now(), status="未解決"
+    )
+    db.add(trouble)
+    db.flush()
+    changelog.record(db, changelog.TROUBLE, trouble.trouble_id)
+    stats.record_trouble_change(db, trouble.project_id, None, (trouble.category_id, trouble.status))
+    activity.record_trouble(db, trouble.project_id, user.user_id)
+    db.commit()
+    db.refresh(trouble)
+    # レスポンス生成時に失効した属性を再読み込みする
+    _ = project.title, user.name
+
+
+def legacy_create_message(db, user: User, trouble_id: int, parent_message_id: int) -> None:
+    trouble = db.query(Trouble).filter(Trouble.trouble_id == trouble_id).first()
+    db.query(Message).filter(Message.message_id == parent_message_id).first()
+    message = Message(content="ベンチマーク", sender_user_id=user.user_id, trouble_id=trouble_id, parent_message_id=parent_message_id)
+    db.add(message)
+    db.flush()
+    changelog.record(db, changelog.MESSAGE, message.message_id)
+    points.award(db, user.user_id, points.REPLY, trouble.trouble_id)
+    activity.record_message(db, trouble.project_id, user.user_id)
+    db.commit()
+    db.refresh(message)
+    _ = trouble.creator_user_id, user.num_answer, user.name
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="作成系エンドポイントのDBラウンドトリップ数のベンチマーク")
+    parser.add_argument("--writes", type=int, default=100)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    counter = RoundTripCounter(engine)
+
+    db = Session()
+    owner = User(name="owner", password=get_password_hash("password123"), point_total=0)
+    helper = User(name="helper", password="x", point_total=0)
+    db.add_all([owner, helper, ProjectCategory(category_id=1, name="ゲーム"), TroubleCategory(category_id=1, name="技術相談")])
+    db.flush()
+    project = CoCreationProject(title="p", description="d", creator_user_id=owner.user_id, category_id=1)
+    db.add(project)
+    db.flush()
+    trouble = Trouble(description="d", project_id=project.project_id, category_id=1, creator_user_id=owner.user_id)
+    db.add(trouble)
+    db.flush()
+    parent = Message(content="親", sender_user_id=owner.user_id, trouble_id=trouble.trouble_id)
+    db.add(parent)
+    db.commit()
+    owner_id, helper_id = owner.user_id, helper.user_id
+    project_id, trouble_id, parent_id = project.project_id, trouble.trouble_id, parent.message_id
+    db.close()
+
+    def measure(label: str, write) -> float:
+        total = 0
+        for index in range(args.writes):
+            session = Session()
+            user = session.get(User, helper_id if "メッセージ" in label else owner_id)
+            before = counter.count
+            write(session, user, index)
+            total += counter.count - before
+            session.close()
+        return total / args.writes
+
+    cases = [
+        (
+            "ユーザー登録",
+            lambda s, u, i: legacy_register(s, f"legacy{i}"),
+            lambda s, u, i: asyncio.run(register_user(UserCreate(name=f"user{i}", password="password123", confirm_password="password123"), s)),
+        ),
+        (
+            "プロジェクト作成",
+            lambda s, u, i: legacy_create_project(s, u, 1),
+            lambda s, u, i: create_project(ProjectCreate(
+                title="ベンチマーク", description="ベンチマーク用のプロジェクト", creator_user_id=u.user_id, category_id=1
+            ), s, u),
+        ),
+        (
+            "お困りごと作成",
+            lambda s, u, i: legacy_create_trouble(s, u, project_id, 1),
+            lambda s, u, i: create_trouble(TroubleCreate(
+                description="ベンチマーク用のお困りごとです", project_id=project_id, category_id=1
+            ), u, s),
+        ),
+        (
+            "メッセージ作成",
+            lambda s, u, i: legacy_create_message(s, u, trouble_id, parent_id),
+            lambda s, u, i: create_message(MessageCreate(
+                trouble_id=trouble_id, content="ベンチマーク", parent_message_id=parent_id
+            ), u, s),
+        ),
+    ]
+
+    print(f"1件あたりのラウンドトリップ数（SQL文 + COMMIT、{args.writes}件の平均）")
+    print(f"{'処理':<12}{'変更前':>8}{'変更後':>8}")
+    for label, legacy, current in cases:
+        print(f"{label:<12}{measure(label, legacy):>8.2f}{measure(label, current):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# tests/conftest.py
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+
+@pytest.fixture
+def session_factory():
+    """全テーブルを作成したインメモリSQLiteのセッションを作る関数（同じDBを共有する）"""
+    from app.core.database import Base
+    from app.manage import import_models
+
+    import_models()
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    """インメモリSQLiteのセッション"""
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def run():
+    """コルーチンを新しいイベントループで実行する"""
+    return asyncio.run
@@ -0,0 +1,52 @@
+# tests/test_activity.py
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.activity import buckets
+from app.api.activity.models import ActivityBucket
+
+
+def test_daily_histogram_includes_empty_days(db):
+    today = date.today()
+    buckets.record_message(db, 1, 9)
+    buckets.record_message(db, 1, 9)
+    buckets.record(db, buckets.PROJECT, 1, "troubles", on=today - timedelta(days=2))
+    buckets.record(db, buckets.PROJECT, 2, "messages")
+    db.commit()
+
+    histogram = buckets.get_histogram(db, buckets.PROJECT, 1, buckets.DAY, 3)
+    assert [entry["bucket_start"] for entry in histogram] == [today - timedelta(days=offset) for offset in (2, 1, 0)]
+    assert [(entry["messages"], entry["troubles"]) for entry in histogram] == [(0, 1), (0, 0), (2, 0)]
+    assert buckets.get_histogram(db, buckets.USER, 9, buckets.DAY, 1)[0]["messages"] == 2
+
+
+def test_compaction_preserves_weekly_totals(db):
+    today = date.today()
+    old = buckets.week_start(today) - timedelta(weeks=10)
+    for offset in range(7):
+        buckets.record(db, buckets.PROJECT, 1, "messages", on=old + timedelta(days=offset), amount=offset + 1)
+    buckets.record(db, buckets.PROJECT, 1, "favorites", on=old + timedelta(days=7))
+    buckets.record_favorite(db, 1, 9)
+    db.commit()
+    before = buckets.get_histogram(db, buckets.PROJECT, 1, buckets.WEEK, 12)
+
+    assert buckets.compact(db, retention_days=14, batch_size=1) == 8
+    # 2回目は対象がない
+    assert buckets.compact(db, retention_days=14) == 0
+    assert buckets.get_histogram(db, buckets.PROJECT, 1, buckets.WEEK, 12) == before
+    weekly = db.query(ActivityBucket).filter(ActivityBucket.granularity == buckets.WEEK).order_by(ActivityBucket.bucket_start).all()
+    assert [(bucket.bucket_start, bucket.messages, bucket.favorites) for bucket in weekly] == [
+        (old, 28, 0), (old + timedelta(weeks=1), 0, 1)
+    ]
+    # 直近の日次バケットは残る
+    assert buckets.get_histogram(db, buckets.PROJECT, 1, buckets.DAY, 1)[0]["favorites"] == 1
+
+
+def test_check_periods_limits_daily_range():
+    buckets.check_periods(buckets.DAY, buckets.max_day_periods())
+    buckets.check_periods(buckets.WEEK, 1000)
+    with pytest.raises(HTTPException) as error:
+        buckets.check_periods(buckets.DAY, buckets.max_day_periods() + 1)
+    assert error.value.status_code == 400
@@ -0,0 +1,64 @@
+# tests/test_archive.py
+from datetime import datetime, timedelta
+
+from app.api.messages.models import Message, MessageArchive
+from app.api.troubles import archive
+from app.api.troubles.models import Trouble, TroubleArchive, TroubleResolution
+
+
+def _resolved_trouble(db, messages=2, days_ago=200):
+    trouble = Trouble(description="resolved", category_id=1, project_id=1, creator_user_id=1, status=archive.RESOLVED_STATUS)
+    db.add(trouble)
+    db.flush()
+    db.add(TroubleResolution(trouble_id=trouble.trouble_id, resolved_at=datetime.utcnow() - timedelta(days=days_ago)))
+    parent = None
+    for index in range(messages):
+        message = Message(
+            trouble_id=trouble.trouble_id, sender_user_id=1, content=f"message-{index}",
+            parent_message_id=parent.message_id if parent else None
+        )
+        db.add(message)
+        db.flush()
+        parent = message
+    db.commit()
+    return trouble.trouble_id
+
+
+def test_archive_moves_troubles_with_their_messages(db):
+    old = _resolved_trouble(db)
+    recent = _resolved_trouble(db, days_ago=1)
+
+    assert archive.archive_resolved(db, resolved_days=180, batch_rows=100) == (1, 2)
+    assert db.query(Trouble.trouble_id).all() == [(recent,)]
+    assert db.query(TroubleArchive.trouble_id).all() == [(old,)]
+    assert db.query(Message).filter(Message.trouble_id == old).count() == 0
+    archived = db.query(MessageArchive).filter(MessageArchive.trouble_id == old).order_by(MessageArchive.message_id).all()
+    # 返信の親メッセージはアーカイブ側に元の値で残る
+    assert archived[1].parent_message_id == archived[0].message_id
+
+    # 一覧と件数はアーカイブ後も変わらない
+    rows, total = archive.list_troubles(db, None, None, None, 0, 10)
+    assert total == 2
+    assert {row.trouble_id for row in rows} == {old, recent}
+
+
+def test_message_posted_during_archive_is_not_lost(db, monkeypatch):
+    trouble_id = _resolved_trouble(db)
+    move_messages = archive._move_messages
+
+    def move_then_receive_reply(session, message_ids, archived_at):
+        if message_ids:
+            # 移すメッセージを決めた後に投稿されたメッセージ（外部キーのないパーティション済みテーブルを想定）
+            session.add(Message(trouble_id=trouble_id, sender_user_id=1, content="late reply"))
+            session.flush()
+        return move_messages(session, message_ids, archived_at)
+
+    monkeypatch.setattr(archive, "_move_messages", move_then_receive_reply)
+    assert archive.archive_resolved(db, resolved_days=180, batch_rows=100) == (1, 2)
+    monkeypatch.undo()
+    assert db.query(Message.content).filter(Message.trouble_id == trouble_id).all() == [("late reply",)]
+
+    # 次回の実行でアーカイブ側に移る
+    assert archive.archive_resolved(db, resolved_days=180, batch_rows=100) == (0, 1)
+    assert db.query(Message).count() == 0
+    assert db.query(MessageArchive).filter(MessageArchive.trouble_id == trouble_id).count() == 3
@@ -0,0 +1,38 @@
+# tests/test_bloom.py
+from app.core.bloom import BloomFilter
+
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter.from_items((f"session-{index}" for index in range(1000)), capacity=1000)
+    assert all(bloom.might_contain(f"session-{index}") for index in range(1000))
+    assert bloom.count == 1000
+    assert not bloom.is_full
+
+
+def test_false_positive_rate_stays_near_configured_rate():
+    bloom = BloomFilter.from_items((f"in-{index}" for index in range(5000)), capacity=5000, error_rate=0.01)
+    false_positives = sum(bloom.might_contain(f"out-{index}") for index in range(20000))
+    assert false_positives / 20000 < 0.02
+
+
+def test_empty_filter_contains_nothing():
+    bloom = BloomFilter(100)
+    assert not bloom.might_contain("anything")
+
+
+def test_is_full_after_capacity_exceeded():
+    bloom = BloomFilter(2)
+    for item in ("a", "b"):
+        bloom.add(item)
+    assert not bloom.is_full
+    bloom.add("c")
+    assert bloom.is_full
+
+
+def test_sizing_follows_capacity_and_error_rate():
+    small = BloomFilter(1000, 0.01)
+    strict = BloomFilter(1000, 0.0001)
+    assert strict.size > small.size
+    assert strict.hash_count > small.hash_count
+    # 容量0でも最低限の大きさで作成できる
+    assert BloomFilter(0).size >= 8
@@ -0,0 +1,132 @@
+# tests/test_circuit_breaker.py
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.circuit_breaker import (
+    STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker, DatabaseUnavailable,
+    check_circuit, database_unavailable_handler, db_circuit
+)
+from app.core.config import settings
+from app.core.stale_cache import StaleCacheMiddleware, StaleResponseCache, compile_routes
+
+
+def _breaker(**overrides):
+    options = dict(failure_threshold=3, slow_threshold=2, slow_seconds=0.5, open_seconds=0)
+    options.update(overrides)
+    return CircuitBreaker("test", **options)
+
+
+def test_opens_after_consecutive_failures_only():
+    breaker = _breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    # 成功で連続失敗の数はリセットされる
+    breaker.record_success(0.01)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+
+def test_opens_after_consecutive_slow_checkouts():
+    breaker = _breaker()
+    breaker.record_success(1.0)
+    breaker.record_success(0.01)
+    breaker.record_success(1.0)
+    assert breaker.is_closed
+    breaker.record_success(1.0)
+    assert breaker.state == STATE_OPEN
+
+
+def test_probe_closes_or_reopens():
+    breaker = _breaker(open_seconds=60)
+    for _ in range(3):
+        breaker.record_failure()
+    # 一定時間が経過するまでは疎通確認しない
+    breaker.probe(lambda: pytest.fail("疎通確認が早すぎます"))
+    assert breaker.state == STATE_OPEN
+
+    breaker.open_seconds = 0
+    states = []
+
+    def failing_check():
+        states.append(breaker.state)
+        raise ConnectionError("refused")
+
+    breaker.probe(failing_check)
+    assert states == [STATE_HALF_OPEN]
+    assert breaker.state == STATE_OPEN
+    breaker.probe(lambda: time.sleep(0.6))
+    assert breaker.state == STATE_OPEN
+    breaker.probe(lambda: None)
+    assert breaker.is_closed
+
+
+def test_check_circuit_rejects_while_open(monkeypatch):
+    monkeypatch.setattr(db_circuit, "state", STATE_OPEN)
+    with pytest.raises(DatabaseUnavailable):
+        check_circuit()
+    monkeypatch.setattr(settings, "DB_CIRCUIT_ENABLED", False)
+    check_circuit()
+
+
+def test_stale_response_cache_evicts_least_recent_and_expired():
+    cache = StaleResponseCache(max_entries=2, max_age_seconds=60)
+    cache.put("a", [], b"1")
+    cache.put("b", [], b"2")
+    assert cache.get("a").body == b"1"
+    cache.put("c", [], b"3")
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    cache.max_age_seconds = -1
+    assert cache.get("a") is None
+
+
+def test_compile_routes_matches_path_parameters():
+    routes = compile_routes("/projects/{project_id}, /categories/")
+    assert routes.fullmatch("/projects/12")
+    assert routes.fullmatch("/categories/")
+    assert not routes.fullmatch("/projects/12/troubles")
+    assert compile_routes(" , ") is None
+
+
+def test_stale_cache_serves_last_good_response_while_open(monkeypatch):
+    monkeypatch.setattr(settings, "DB_CIRCUIT_ENABLED", True)
+    monkeypatch.setattr(settings, "STALE_CACHE_ROUTES", "/projects/{project_id}")
+    monkeypatch.setattr(db_circuit, "state", STATE_CLOSED)
+    calls = []
+    app = FastAPI()
+    app.add_middleware(StaleCacheMiddleware)
+    app.add_exception_handler(DatabaseUnavailable, database_unavailable_handler)
+
+    @app.get("/projects/{project_id}")
+    def project(project_id: int):
+        check_circuit()
+        calls.append(project_id)
+        if project_id == 404:
+            raise HTTPException(status_code=404)
+        return {"project_id": project_id, "version": len(calls)}
+
+    client = TestClient(app)
+    assert client.get("/projects/1").json() == {"project_id": 1, "version": 1}
+    assert client.get("/projects/1").json() == {"project_id": 1, "version": 2}
+    assert client.get("/projects/404").status_code == 404
+
+    monkeypatch.setattr(db_circuit, "state", STATE_OPEN)
+    response = client.get("/projects/1")
+    assert response.status_code == 200
+    assert response.json() == {"project_id": 1, "version": 2}
+    assert response.headers["x-cache-status"] == "stale"
+    assert "Response is Stale" in response.headers["warning"]
+    # 保持していない・エラーだったレスポンスは 503
+    for path in ("/projects/2", "/projects/404"):
+        response = client.get(path)
+        assert response.status_code == 503
+        assert "retry-after" in response.headers
+    # 他のトークンのリクエストには返さない
+    assert client.get("/projects/1", headers={"Authorization": "Bearer invalid"}).status_code == 503
+    assert len(calls) == 3
@@ -0,0 +1,97 @@
+# tests/test_deadlines.py
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.core import deadlines
+from app.core.config import settings
+from app.core.deadlines import (
+    DeadlineExceeded, RequestDeadline, RequestDeadlineMiddleware, check_deadline,
+    deadline_exceeded_handler, install_statement_timeouts
+)
+
+# 中断しない限り数秒以上かかる文
+SLOW_QUERY = text(
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) SELECT count(*) FROM n"
+)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    install_statement_timeouts(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def deadline():
+    """現在のコンテキストに期限を設定する関数"""
+    tokens = []
+
+    def set_deadline(seconds: float) -> RequestDeadline:
+        value = RequestDeadline("test", time.monotonic() + seconds)
+        tokens.append(deadlines._current_deadline.set(value))
+        return value
+
+    yield set_deadline
+    for token in reversed(tokens):
+        deadlines._current_deadline.reset(token)
+
+
+def test_statements_run_normally_without_or_within_deadline(engine, deadline):
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        deadline(5)
+        assert conn.execute(text("SELECT 2")).scalar() == 2
+    check_deadline()
+
+
+def test_expired_deadline_rejects_statement_before_execution(engine, deadline):
+    deadline(-1)
+    with engine.connect() as conn:
+        with pytest.raises(DeadlineExceeded):
+            conn.execute(text("SELECT 1"))
+    with pytest.raises(DeadlineExceeded):
+        check_deadline()
+
+
+def test_running_statement_is_interrupted_at_deadline(engine, deadline):
+    deadline(0.2)
+    started = time.monotonic()
+    with engine.connect() as conn:
+        with pytest.raises(DeadlineExceeded):
+            conn.execute(SLOW_QUERY)
+    assert time.monotonic() - started < 2
+    # 中断後もコネクションは使える
+    deadlines._current_deadline.set(None)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_middleware_applies_route_timeouts(monkeypatch):
+    monkeypatch.setattr(settings, "REQUEST_TIMEOUT_MS", 5000)
+    monkeypatch.setattr(settings, "REQUEST_TIMEOUT_ROUTES", "/slow=50")
+    app = FastAPI()
+    app.add_middleware(RequestDeadlineMiddleware)
+    app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+
+    @app.get("/slow/work")
+    def slow_work():
+        time.sleep(0.1)
+        check_deadline()
+        return {"ok": True}
+
+    @app.get("/fast/work")
+    def fast_work():
+        time.sleep(0.1)
+        check_deadline()
+        return {"route": deadlines.current_deadline().route}
+
+    client = TestClient(app)
+    assert client.get("/slow/work").status_code == 504
+    assert client.get("/fast/work").json() == {"route": "default"}
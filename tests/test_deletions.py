@@ -0,0 +1,175 @@
+# tests/test_deletions.py
+from datetime import datetime
+
+import pytest
+
+from app.api.deletions import cascade
+from app.api.deletions.models import DeletionJob
+from app.api.messages.models import Message, MessageArchive
+from app.api.projects import stats
+from app.api.projects.models import (
+    CoCreationProject, ProjectCategory, UserProjectFavorite, UserProjectParticipation
+)
+from app.api.sync import changelog
+from app.api.sync.models import ChangeLogEntry
+from app.api.troubles.models import Trouble, TroubleArchive, TroubleCategory
+from app.core.config import settings
+from app.core.soft_delete import INCLUDE_DELETED
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch, session_factory):
+    monkeypatch.setattr(settings, "DELETION_BATCH_ROWS", 2)
+    monkeypatch.setattr(settings, "DELETION_BATCH_PAUSE_SECONDS", 0)
+    monkeypatch.setattr(cascade, "SessionLocal", session_factory)
+
+
+def _count(db, model, *criteria):
+    return db.query(model).filter(*criteria).execution_options(**{INCLUDE_DELETED: True}).count()
+
+
+def _project_with_troubles(db):
+    now = datetime.utcnow()
+    db.add(CoCreationProject(project_id=1, title="a", description="a", creator_user_id=1, category_id=5))
+    db.add(CoCreationProject(project_id=2, title="b", description="b", creator_user_id=1))
+    for trouble_id in range(1, 5):
+        db.add(Trouble(trouble_id=trouble_id, description="t", category_id=3, project_id=1, creator_user_id=1, status="未解決"))
+        stats.record_trouble_change(db, 1, None, (3, "未解決"))
+    db.add(Trouble(trouble_id=9, description="other", category_id=3, project_id=2, creator_user_id=1))
+    db.add(TroubleArchive(trouble_id=5, description="t", category_id=3, project_id=1, creator_user_id=1, archived_at=now))
+    message_id = 0
+    for trouble_id in (1, 2, 9):
+        for _ in range(3):
+            message_id += 1
+            db.add(Message(message_id=message_id, trouble_id=trouble_id, sender_user_id=2, content="m",
+                           parent_message_id=message_id - 1 if message_id % 3 != 1 else None))
+    for archived_id in (100, 101, 102):
+        db.add(MessageArchive(message_id=archived_id, trouble_id=5, sender_user_id=2, content="m", archived_at=now))
+    for user_id in (1, 2, 3):
+        db.add(UserProjectFavorite(user_id=user_id, project_id=1))
+        db.add(UserProjectParticipation(user_id=user_id, project_id=1, selected_at=now))
+    db.add(UserProjectFavorite(user_id=1, project_id=2))
+    db.commit()
+
+
+def test_project_deletion_cascades_in_batches(db):
+    _project_with_troubles(db)
+    job = cascade.request_project_deletion(db, db.get(CoCreationProject, 1), 1)
+    job_id = job.job_id
+    # 論理削除した時点で検索結果から除外される
+    assert db.query(CoCreationProject).filter(CoCreationProject.project_id == 1).first() is None
+
+    cascade.run_job(job_id)
+    db.expire_all()
+    job = db.get(DeletionJob, job_id)
+    assert job.status == cascade.COMPLETED
+    assert job.error is None
+    assert _count(db, CoCreationProject) == 1
+    assert _count(db, Trouble) == 1
+    assert _count(db, TroubleArchive) == 0
+    assert [row.trouble_id for row in db.query(Message.trouble_id).distinct()] == [9]
+    assert _count(db, Message) == 3
+    assert _count(db, MessageArchive) == 0
+    assert _count(db, UserProjectFavorite) == 1
+    assert _count(db, UserProjectParticipation) == 0
+    assert stats.get_project_trouble_stats(db, 1) == []
+    # 論理削除したお困りごとは変更履歴に削除として記録される
+    deleted = {row.entity_id for row in db.query(ChangeLogEntry).filter(
+        ChangeLogEntry.entity_type == changelog.TROUBLE, ChangeLogEntry.operation == changelog.DELETE
+    )}
+    assert deleted == {1, 2, 3, 4}
+    # 削除・更新した行数を進捗として記録する
+    assert job.deleted_rows >= 4 + 4 + 1 + 6 + 3 + 3 + 3 + 1
+
+
+def test_failed_job_is_retried_and_resumes(db, monkeypatch):
+    _project_with_troubles(db)
+    job_id = cascade.request_trouble_deletion(db, db.get(Trouble, 1), 1).job_id
+    delete_troubles = cascade._delete_troubles
+
+    def fail_after_messages(session, job, trouble_ids):
+        cascade._delete_messages(session, job, Message, trouble_ids)
+        raise RuntimeError("接続が切れました")
+
+    monkeypatch.setattr(cascade, "_delete_troubles", fail_after_messages)
+    cascade.run_job(job_id)
+    db.expire_all()
+    job = db.get(DeletionJob, job_id)
+    assert (job.status, job.error) == (cascade.PENDING, "接続が切れました")
+    # コミット済みのバッチは残る
+    assert _count(db, Message, Message.trouble_id == 1) == 0
+    assert _count(db, Trouble, Trouble.trouble_id == 1) == 1
+
+    monkeypatch.setattr(cascade, "_delete_troubles", delete_troubles)
+    cascade.resume_jobs()
+    db.expire_all()
+    assert db.get(DeletionJob, job_id).status == cascade.COMPLETED
+    assert _count(db, Trouble, Trouble.trouble_id == 1) == 0
+    assert _count(db, Message, Message.trouble_id == 2) == 3
+
+
+def test_running_job_is_not_claimed_twice(db):
+    db.add(DeletionJob(job_id=1, entity_type=cascade.TROUBLE, entity_id=1, status=cascade.RUNNING))
+    db.commit()
+    cascade.run_job(1)
+    db.expire_all()
+    assert db.get(DeletionJob, 1).status == cascade.RUNNING
+
+
+def test_trouble_category_deletion_aborts_when_in_use(db):
+    now = datetime.utcnow()
+    db.add_all([
+        TroubleCategory(category_id=1, name="used"),
+        TroubleCategory(category_id=2, name="archived"),
+        TroubleCategory(category_id=3, name="unused"),
+        TroubleArchive(trouble_id=1, description="t", category_id=2, project_id=1, creator_user_id=1, archived_at=now),
+    ])
+    db.commit()
+    assert not cascade.trouble_category_in_use(db, 1)
+    assert cascade.trouble_category_in_use(db, 2)
+
+    job_ids = [cascade.request_category_deletion(db, db.get(TroubleCategory, category_id), 1).job_id for category_id in (1, 3)]
+    # 受け付け後にお困りごとが登録された
+    db.add(Trouble(trouble_id=2, description="t", category_id=1, project_id=1, creator_user_id=1))
+    db.commit()
+    for job_id in job_ids:
+        cascade.run_job(job_id)
+    db.expire_all()
+
+    aborted, completed = (db.get(DeletionJob, job_id) for job_id in job_ids)
+    assert aborted.status == cascade.FAILED
+    assert "カテゴリー 1" in aborted.error
+    assert db.get(TroubleCategory, 1).deleted_at is None
+    assert completed.status == cascade.COMPLETED
+    assert _count(db, TroubleCategory, TroubleCategory.category_id == 3) == 0
+
+
+def test_trouble_category_waits_for_pending_trouble_deletion(db):
+    db.add_all([
+        TroubleCategory(category_id=1, name="c"),
+        Trouble(trouble_id=1, description="t", category_id=1, project_id=1, creator_user_id=1, deleted_at=datetime.utcnow()),
+    ])
+    db.commit()
+    assert not cascade.trouble_category_in_use(db, 1)
+    assert cascade.trouble_category_in_use(db, 1, include_deleted=True)
+    job_id = cascade.request_category_deletion(db, db.get(TroubleCategory, 1), 1).job_id
+    cascade.run_job(job_id)
+    db.expire_all()
+    # 削除待ちのお困りごとがなくなるまで pending のまま再試行する
+    assert db.get(DeletionJob, job_id).status == cascade.PENDING
+    assert _count(db, TroubleCategory) == 1
+
+
+def test_project_category_deletion_uncategorizes_projects(db):
+    db.add(ProjectCategory(category_id=5, name="c"))
+    for project_id in (1, 2, 3):
+        db.add(CoCreationProject(project_id=project_id, title="p", description="p", creator_user_id=1, category_id=5))
+        stats.record_project_change(db, None, 5, created=True)
+    db.commit()
+    job_id = cascade.request_category_deletion(db, db.get(ProjectCategory, 5), 1).job_id
+    cascade.run_job(job_id)
+    db.expire_all()
+    assert db.get(DeletionJob, job_id).status == cascade.COMPLETED
+    assert _count(db, ProjectCategory) == 0
+    assert [project.category_id for project in db.query(CoCreationProject)] == [None, None, None]
+    assert stats.get_category_project_counts(db) == [(stats.UNCATEGORIZED, 3)]
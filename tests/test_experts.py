@@ -0,0 +1,79 @@
+# tests/test_experts.py
+from datetime import datetime, timedelta
+import time
+
+import pytest
+
+from app.api.messages.models import Message
+from app.api.troubles.experts import ExpertIndex
+from app.api.troubles.models import Trouble
+from app.api.users.models import User
+
+
+def _seed(db):
+    now = datetime.now()
+    db.add_all([
+        User(user_id=1, name="creator", password="x", category_id="1", num_answer=0),
+        User(user_id=2, name="helper", password="x", category_id="3", num_answer=10),
+        User(user_id=3, name="old-helper", password="x", category_id="4", num_answer=0),
+        Trouble(trouble_id=1, description="a", category_id=7, project_id=1, creator_user_id=1),
+        Trouble(trouble_id=2, description="b", category_id=8, project_id=1, creator_user_id=1),
+    ])
+    db.add_all([
+        # 作成者自身のメッセージは回答として数えない
+        Message(message_id=1, trouble_id=1, sender_user_id=1, content="q", sent_at=now),
+        Message(message_id=2, trouble_id=1, sender_user_id=2, content="a", sent_at=now),
+        Message(message_id=3, trouble_id=1, sender_user_id=2, content="a", sent_at=now),
+        Message(message_id=4, trouble_id=1, sender_user_id=3, content="a", sent_at=now - timedelta(days=365)),
+        Message(message_id=5, trouble_id=2, sender_user_id=3, content="a", sent_at=now),
+    ])
+    db.commit()
+
+
+def test_suggest_aggregates_answers_per_category(db):
+    _seed(db)
+    index = ExpertIndex(30)
+    candidates = index.suggest(db, 7)
+    assert [candidate.user_id for candidate in candidates] == [2, 3]
+    assert [candidate.answers for candidate in candidates] == [2, 1]
+    assert candidates[0].department_id == 3
+    assert [candidate.user_id for candidate in index.suggest(db, 8)] == [3]
+    assert index.suggest(db, 7, exclude_user_ids=(2,))[0].user_id == 3
+
+
+def test_department_bonus_and_recorded_answers(db):
+    _seed(db)
+    index = ExpertIndex(30)
+    index.ensure_loaded(db)
+    for _ in range(3):
+        index.record_answer(7, 3, 4, 3)
+    # 直近の回答が増えて上位になる
+    assert index.suggest(db, 7)[0].user_id == 3
+    assert index.suggest(db, 7)[0].answers == 4
+
+    fresh = ExpertIndex(30)
+    fresh.ensure_loaded(db)
+    scores = {candidate.user_id: candidate.score for candidate in fresh.suggest(db, 7)}
+    boosted = {candidate.user_id: candidate.score for candidate in fresh.suggest(db, 7, project_category_id=4)}
+    assert boosted[3] > scores[3]
+    assert boosted[2] == pytest.approx(scores[2])
+
+    fresh.update_user(3, 3)
+    assert fresh.suggest(db, 7, project_category_id=4)[1].score == pytest.approx(scores[3])
+
+
+def test_answers_before_and_during_load():
+    index = ExpertIndex(30)
+    # 集計前の回答は初回集計に含まれるため記録しない
+    index.record_answer(7, 5, None, 0)
+
+    def load(db):
+        # 集計中に投稿された回答は集計完了後に再適用される
+        index.record_answer(9, 6, 2, 1, at=time.time())
+        index._answers, index._users, index._loaded = {}, {}, True
+
+    index._load = load
+    index.ensure_loaded(None)
+    assert 7 not in index._answers
+    assert index._answers[9][6][0] == 1
+    assert index._users[6] == (2, 1)
@@ -0,0 +1,80 @@
+# tests/test_exports.py
+from datetime import datetime
+import csv
+import io
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.exports import router as exports
+from app.api.messages.models import Message, MessageArchive
+from app.api.projects.models import CoCreationProject
+from app.api.troubles.models import Trouble, TroubleArchive
+from app.api.users.models import User
+from app.core.config import settings
+
+
+def test_only_creator_and_admins_can_export(db, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_USER_IDS", "1")
+    project = CoCreationProject(title="p", description="プロジェクトの説明です", creator_user_id=2)
+    db.add(project)
+    db.commit()
+
+    exports._check_project_owner(db, project.project_id, User(user_id=2))
+    exports._check_project_owner(db, project.project_id, User(user_id=1))
+    with pytest.raises(HTTPException) as error:
+        exports._check_project_owner(db, project.project_id, User(user_id=3))
+    assert error.value.status_code == 403
+    with pytest.raises(HTTPException) as error:
+        exports._check_project_owner(db, 99999, User(user_id=1))
+    assert error.value.status_code == 404
+
+
+def _body(run, response) -> bytes:
+    async def read():
+        return [chunk async for chunk in response.body_iterator]
+
+    return run(read())
+
+
+def test_exports_stream_live_and_archived_rows_in_batches(db, monkeypatch, session_factory, run):
+    monkeypatch.setattr(exports, "SessionLocal", session_factory)
+    monkeypatch.setattr(exports, "EXPORT_BATCH_SIZE", 2)
+    now = datetime(2026, 1, 1, 9, 0)
+    db.add_all([
+        User(user_id=1, name="owner", password="x"),
+        User(user_id=2, name="回答者", password="x"),
+        CoCreationProject(project_id=1, title="p", description="p", creator_user_id=1),
+        Trouble(trouble_id=1, description="改行\nと,カンマ", category_id=1, project_id=1, creator_user_id=1, created_at=now, status="未解決"),
+        Trouble(trouble_id=2, description="b", category_id=1, project_id=1, creator_user_id=1, created_at=now, status="解決"),
+        Trouble(trouble_id=3, description="other", category_id=1, project_id=2, creator_user_id=1, created_at=now),
+        TroubleArchive(trouble_id=4, description="archived", category_id=1, project_id=1, creator_user_id=1,
+                       created_at=now, status="解決", archived_at=now),
+        Message(message_id=1, trouble_id=1, sender_user_id=2, content="回答", sent_at=now),
+        MessageArchive(message_id=2, trouble_id=4, sender_user_id=2, content="過去の回答", sent_at=now, archived_at=now),
+    ])
+    db.commit()
+    owner = User(user_id=1)
+
+    response = exports.export_troubles(1, None, None, None, "ndjson", db, owner)
+    assert response.media_type == "application/x-ndjson"
+    chunks = _body(run, response)
+    # 1バッチごとにまとめて送信する
+    assert len(chunks) == 2
+    rows = [json.loads(line) for line in b"".join(chunks).decode("utf-8").splitlines()]
+    assert [row["trouble_id"] for row in rows] == [1, 2, 4]
+    assert rows[0]["created_at"] == now.isoformat()
+    assert rows[0]["description"] == "改行\nと,カンマ"
+
+    response = exports.export_troubles(1, "解決", None, None, "csv", db, owner)
+    body = b"".join(_body(run, response)).decode("utf-8")
+    assert body.startswith("\ufeff")
+    rows = list(csv.DictReader(io.StringIO(body[1:])))
+    assert [row["trouble_id"] for row in rows] == ["2", "4"]
+
+    response = exports.export_messages(1, None, None, None, "ndjson", db, owner)
+    rows = [json.loads(line) for line in b"".join(_body(run, response)).decode("utf-8").splitlines()]
+    assert [(row["message_id"], row["sender_name"], row["content"]) for row in rows] == [
+        (1, "回答者", "回答"), (2, "回答者", "過去の回答")
+    ]
@@ -0,0 +1,69 @@
+# tests/test_favorites.py
+import time
+
+from app.api.projects.favorites import FavoriteSetCache
+from app.api.projects.models import UserProjectFavorite
+
+
+def _favorite(db, user_id, project_id):
+    db.add(UserProjectFavorite(user_id=user_id, project_id=project_id))
+    db.commit()
+
+
+def test_flags_are_answered_from_the_loaded_set(db):
+    for project_id in (5, 1, 3):
+        _favorite(db, 1, project_id)
+    cache = FavoriteSetCache()
+    assert list(cache.get(db, 1)) == [1, 3, 5]
+    assert cache.contains(db, 1, 3)
+    assert not cache.contains(db, 1, 4)
+    assert cache.flags(db, 1, [1, 2, 5, 6]) == {1: True, 2: False, 5: True, 6: False}
+    assert list(cache.get(db, 2)) == []
+
+
+def test_add_and_remove_update_cached_set_without_mutating_readers(db):
+    _favorite(db, 1, 2)
+    cache = FavoriteSetCache()
+    before = cache.get(db, 1)
+    cache.add(1, 1)
+    cache.add(1, 1)
+    cache.remove(1, 2)
+    assert list(cache.get(db, 1)) == [1]
+    # 読み取り中の配列は書き換えない
+    assert list(before) == [2]
+
+
+def test_changes_from_other_workers_are_seen_after_ttl(db):
+    worker_a = FavoriteSetCache(ttl_seconds=0.05)
+    worker_b = FavoriteSetCache(ttl_seconds=0.05)
+    assert not worker_b.contains(db, 1, 7)
+
+    _favorite(db, 1, 7)
+    worker_a.add(1, 7)
+    assert worker_a.contains(db, 1, 7)
+    # 別のワーカーのキャッシュは期限切れまで古いまま
+    assert not worker_b.contains(db, 1, 7)
+    time.sleep(0.06)
+    assert worker_b.contains(db, 1, 7)
+
+
+def test_local_update_does_not_extend_ttl(db):
+    cache = FavoriteSetCache(ttl_seconds=0.05)
+    cache.get(db, 1)
+    time.sleep(0.03)
+    cache.add(1, 9)
+    _favorite(db, 1, 8)
+    time.sleep(0.03)
+    # 読み込みから ttl が過ぎたためDBから読み直す（add で期限は延びない）
+    assert list(cache.get(db, 1)) == [8]
+
+
+def test_lru_limit_and_invalidate(db):
+    cache = FavoriteSetCache(max_users=2)
+    for user_id in (1, 2, 3):
+        cache.get(db, user_id)
+    assert list(cache._sets) == [2, 3]
+    cache.invalidate(2)
+    assert list(cache._sets) == [3]
+    cache.invalidate()
+    assert not cache._sets
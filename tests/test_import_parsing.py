@@ -0,0 +1,53 @@
+# tests/test_import_parsing.py
+from app.api.imports.parsing import iter_records
+
+
+async def _stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def _records(run, chunks, import_format="csv"):
+    async def collect():
+        return [record async for record in iter_records(_stream(chunks), import_format)]
+    return run(collect())
+
+
+def test_csv_quoted_field_with_newlines_and_escaped_quotes(run):
+    data = 'title,description\r\n"A","1行目\r\n2行目 ""引用"""\r\nB,\r\n'.encode("utf-8")
+    assert _records(run, [data]) == [
+        (1, {"title": "A", "description": '1行目\n2行目 "引用"'}),
+        (2, {"title": "B", "description": None}),
+    ]
+
+
+def test_csv_records_split_across_chunks(run):
+    data = '\ufefftitle,description\n"x","a\nb"\ny,z\n'.encode("utf-8")
+    # 1バイトずつ受信しても同じ結果になる（BOM・マルチバイト文字の途中で区切られる場合を含む）
+    chunks = [data[index:index + 1] for index in range(len(data))]
+    assert _records(run, chunks) == _records(run, [data]) == [
+        (1, {"title": "x", "description": "a\nb"}),
+        (2, {"title": "y", "description": "z"}),
+    ]
+
+
+def test_csv_skips_blank_lines_and_reports_column_mismatch(run):
+    data = b"title,description\n\nA,B,C\nD,E"
+    assert _records(run, [data]) == [
+        (1, "列数がヘッダーと一致しません（3列 / 2列）"),
+        (2, {"title": "D", "description": "E"}),
+    ]
+
+
+def test_csv_unclosed_quote_is_reported(run):
+    data = b'title,description\nA,"never closed\nmore'
+    assert _records(run, [data]) == [(1, "引用符が閉じられていません")]
+
+
+def test_ndjson_reports_invalid_lines(run):
+    data = b'{"title": "A"}\n\nnot json\n[1, 2]\n{"title": "B"}'
+    records = _records(run, [data], "ndjson")
+    assert records[0] == (1, {"title": "A"})
+    assert records[1][0] == 2 and records[1][1].startswith("JSONとして解析できません")
+    assert records[2] == (3, "各行はJSONオブジェクトである必要があります")
+    assert records[3] == (4, {"title": "B"})
@@ -0,0 +1,35 @@
+# tests/test_importer.py
+from app.api.imports import importer
+from app.api.projects.models import CoCreationProject
+from app.api.projects.trending import TrendingTracker
+from app.api.troubles.models import Trouble, TroubleCategory
+
+
+def _trouble_record(external_id, project_id, category_id):
+    return {"external_id": external_id, "project_id": project_id, "description": "十文字以上のお困りごとの説明", "category_id": category_id}
+
+
+def test_import_troubles_has_same_side_effects_as_create(db, monkeypatch):
+    tracker = TrendingTracker(24)
+    monkeypatch.setattr(importer, "trending_tracker", tracker)
+    project = CoCreationProject(title="p", description="プロジェクトの説明です", creator_user_id=1)
+    category = TroubleCategory(name="c")
+    db.add_all([project, category])
+    db.commit()
+
+    records = [
+        (1, _trouble_record("a", project.project_id, category.category_id)),
+        (2, _trouble_record("b", project.project_id, category.category_id)),
+        (3, _trouble_record("c", 99999, category.category_id)),
+    ]
+    results = importer.import_troubles(db, 1, records, set())
+    assert sorted((result.row, result.status) for result in results) == [(1, "created"), (2, "created"), (3, "error")]
+    assert db.query(Trouble).count() == 2
+    # 作成エンドポイントと同じくトレンドに反映される
+    assert tracker.current_scores()[project.project_id] > 0
+    assert list(tracker._pending) == [project.project_id]
+
+    # 同じ外部IDの再実行は登録済みとして扱う
+    again = importer.import_troubles(db, 1, records[:1], set())
+    assert again[0].status == "skipped"
+    assert db.query(Trouble).count() == 2
@@ -0,0 +1,72 @@
+# tests/test_integrity.py
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.api.auth.router import _insert_user
+from app.api.projects.models import CoCreationProject
+from app.api.troubles.models import Trouble, TroubleCategory
+from app.api.troubles.router import _insert_trouble
+from app.api.users.models import User
+from app.core.integrity import is_foreign_key_violation, is_unique_violation, violated_column
+
+
+@pytest.fixture
+def fk_db(db):
+    """外部キー制約を有効にしたセッション（本番の MySQL・起動時の SQLite と同じ）"""
+    db.execute(text("PRAGMA foreign_keys=ON"))
+    db.add(User(user_id=1, name="owner", password="x"))
+    db.add(CoCreationProject(project_id=1, title="p", description="p", creator_user_id=1))
+    db.add(TroubleCategory(category_id=1, name="c"))
+    db.commit()
+    return db
+
+
+def _mysql_error(code, message):
+    return IntegrityError("INSERT", {}, Exception(code, message))
+
+
+def test_mysql_errors_are_classified_by_code():
+    duplicate = _mysql_error(1062, "Duplicate entry 'alice' for key 'users.name'")
+    missing = _mysql_error(1452, "Cannot add or update a child row: a foreign key constraint fails "
+                                 "(`db`.`troubles`, CONSTRAINT `troubles_ibfk_1` FOREIGN KEY (`project_id`) "
+                                 "REFERENCES `co_creation_projects` (`project_id`))")
+    assert is_unique_violation(duplicate) and not is_foreign_key_violation(duplicate)
+    assert is_foreign_key_violation(missing) and not is_unique_violation(missing)
+    assert violated_column(missing, ["category_id", "project_id"]) == "project_id"
+
+
+def test_sqlite_errors_are_classified_by_message(fk_db):
+    fk_db.add(User(name="owner", password="x"))
+    with pytest.raises(IntegrityError) as duplicate:
+        fk_db.flush()
+    fk_db.rollback()
+    assert is_unique_violation(duplicate.value)
+    assert violated_column(duplicate.value, ["name"]) == "name"
+
+    fk_db.add(Trouble(description="t", project_id=99, category_id=1, creator_user_id=1))
+    with pytest.raises(IntegrityError) as missing:
+        fk_db.flush()
+    fk_db.rollback()
+    assert is_foreign_key_violation(missing.value)
+    # SQLite のメッセージには違反したカラムが含まれない
+    assert violated_column(missing.value, ["project_id", "category_id"]) is None
+
+
+def test_duplicate_user_name_is_rejected_by_unique_constraint(fk_db):
+    with pytest.raises(HTTPException) as error:
+        _insert_user(fk_db, User(name="owner", password="x"))
+    assert error.value.status_code == 400
+    # ロールバック後もセッションは使える
+    assert fk_db.query(User).count() == 1
+
+
+def test_missing_category_is_rejected_by_foreign_key(fk_db):
+    user = SimpleNamespace(user_id=1)
+    with pytest.raises(HTTPException) as error:
+        _insert_trouble(fk_db, user, 1, 99, "説明", "未解決")
+    assert error.value.status_code == 404
+    assert fk_db.query(Trouble).count() == 0
@@ -0,0 +1,74 @@
+# tests/test_login_tracker.py
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.api.auth import login_tracker as module
+from app.api.auth.login_tracker import LoginTracker
+from app.api.users.models import User
+
+BASE = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def users(db, monkeypatch, session_factory):
+    monkeypatch.setattr(module, "SessionLocal", session_factory)
+    db.add_all([User(user_id=user_id, name=f"u{user_id}", password="x") for user_id in range(1, 6)])
+    db.commit()
+    return db
+
+
+def _last_logins(db):
+    db.expire_all()
+    return {user.user_id: user.last_login_at for user in db.query(User).order_by(User.user_id)}
+
+
+def test_logins_are_coalesced_and_flushed_in_batches(users):
+    tracker = LoginTracker(batch_size=2)
+    for user_id in range(1, 5):
+        tracker.record(user_id, BASE)
+    tracker.record(1, BASE + timedelta(hours=1))
+    assert tracker.pending_for(1) == BASE + timedelta(hours=1)
+    # 反映するまで users は更新しない
+    assert _last_logins(users)[1] is None
+
+    assert tracker.flush() == 4
+    assert tracker.pending_for(1) is None
+    assert tracker.flush() == 0
+    assert _last_logins(users) == {1: BASE + timedelta(hours=1), 2: BASE, 3: BASE, 4: BASE, 5: None}
+
+
+def test_failed_batches_are_carried_over(users, monkeypatch, session_factory):
+    tracker = LoginTracker(batch_size=2)
+    for user_id in range(1, 5):
+        tracker.record(user_id, BASE)
+
+    class FailingSession:
+        """2バッチ目で接続が切れるセッション"""
+
+        def __init__(self):
+            self.session = session_factory()
+            self.executed = 0
+
+        def execute(self, *args, **kwargs):
+            self.executed += 1
+            if self.executed == 2:
+                # 失敗中に同じユーザーがより新しい日時でログインした
+                tracker.record(4, BASE + timedelta(hours=2))
+                raise OperationalError("UPDATE", {}, Exception("connection lost"))
+            return self.session.execute(*args, **kwargs)
+
+        def __getattr__(self, name):
+            return getattr(self.session, name)
+
+    monkeypatch.setattr(module, "SessionLocal", FailingSession)
+    with pytest.raises(OperationalError):
+        tracker.flush()
+    assert tracker.pending_for(1) is None
+    assert tracker.pending_for(3) == BASE
+    assert tracker.pending_for(4) == BASE + timedelta(hours=2)
+
+    monkeypatch.setattr(module, "SessionLocal", session_factory)
+    assert tracker.flush() == 2
+    assert _last_logins(users) == {1: BASE, 2: BASE, 3: BASE, 4: BASE + timedelta(hours=2), 5: None}
@@ -0,0 +1,35 @@
+# tests/test_partitioning.py
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.api.messages.partitioning import ForeignKeyState, _month_start, _partition_clause
+
+
+def test_foreign_keys_detected_on_unpartitioned_table(db):
+    assert ForeignKeyState().enforced(db)
+
+
+def test_missing_foreign_keys_are_detected():
+    # パーティショニング後と同じく外部キーのない trouble_messages
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE trouble_messages (message_id INTEGER, trouble_id INTEGER, sent_at DATETIME)")
+    with Session(engine) as db:
+        assert not ForeignKeyState().enforced(db)
+
+
+def test_foreign_key_state_is_cached_until_recheck(db):
+    state = ForeignKeyState(recheck_seconds=3600)
+    assert state.enforced(db)
+    state._enforced = False
+    assert not state.enforced(db)
+    state.recheck_seconds = 0
+    assert state.enforced(db)
+
+
+def test_month_boundaries():
+    assert _month_start(date(2024, 12, 15), 1) == date(2025, 1, 1)
+    assert _month_start(date(2024, 1, 31), -1) == date(2023, 12, 1)
+    assert _partition_clause(date(2024, 2, 1)) == "PARTITION p202402 VALUES LESS THAN (TO_DAYS('2024-03-01'))"
@@ -0,0 +1,73 @@
+# tests/test_points.py
+from app.api.users import points
+from app.api.users.models import PointLedgerEntry, User
+
+
+def _users(db):
+    db.add_all([
+        User(user_id=1, name="a", password="x", point_total=5, num_answer=1),
+        User(user_id=2, name="b", password="x"),
+    ])
+    db.commit()
+
+
+def test_aggregate_pending_applies_ledger_in_batches(db):
+    _users(db)
+    points.award(db, 1, points.REPLY, 10)
+    points.award(db, 1, points.REPLY, 11)
+    points.award(db, 2, points.FAVORITE_RECEIVED, 3)
+    points.award(db, 2, points.FAVORITE_REMOVED, 3)
+    db.commit()
+    # award は台帳に追加するだけで users は更新しない
+    assert db.get(User, 1).point_total == 5
+
+    assert points.aggregate_pending(db, 3) == 3
+    assert points.aggregate_pending(db, 3) == 1
+    assert points.aggregate_pending(db, 3) == 0
+    db.expire_all()
+    assert (db.get(User, 1).point_total, db.get(User, 1).num_answer) == (25, 3)
+    assert (db.get(User, 2).point_total, db.get(User, 2).num_answer) == (0, 0)
+
+
+def test_award_once_skips_existing_and_concurrent_duplicates(db):
+    _users(db)
+    assert points.award_once(db, 1, points.TROUBLE_RESOLVED, 7) is True
+    db.commit()
+    assert points.award_once(db, 1, points.TROUBLE_RESOLVED, 7) is False
+    # 別の対象・ユーザーには付与する
+    assert points.award_once(db, 2, points.TROUBLE_RESOLVED, 7) is True
+    db.commit()
+
+    # 事前の確認をすり抜けた同時付与は一意インデックスで弾かれ、他の変更は残る
+    points.award(db, 2, points.REPLY, 8)
+    query = db.query
+
+    class NotFound:
+        def filter(self, *args):
+            return self
+
+        def first(self):
+            return None
+
+    db.query = lambda *args: NotFound()
+    try:
+        assert points.award_once(db, 1, points.TROUBLE_RESOLVED, 7) is False
+    finally:
+        db.query = query
+    db.commit()
+    assert db.query(PointLedgerEntry).filter(PointLedgerEntry.reason == points.TROUBLE_RESOLVED.reason).count() == 2
+    assert db.query(PointLedgerEntry).filter(PointLedgerEntry.reason == points.REPLY.reason).count() == 1
+
+
+def test_reconcile_points(db):
+    _users(db)
+    # 台帳導入前の合計値は期首残高として取り込む
+    assert points.reconcile_points(db, opening_balance=True) == [(1, -5, -1)]
+    assert points.reconcile_points(db) == []
+
+    db.get(User, 2).point_total = 40
+    db.commit()
+    assert points.reconcile_points(db) == [(2, -40, 0)]
+    db.expire_all()
+    assert db.get(User, 2).point_total == 0
+    assert db.get(User, 1).point_total == 5
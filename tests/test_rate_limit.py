@@ -0,0 +1,55 @@
+# tests/test_rate_limit.py
+import pytest
+
+from app.core.rate_limit import InMemoryBucketStore, RateLimit, _form_value
+
+# バースト2件・毎秒1件の補充
+LIMIT = RateLimit("test", burst=2, per_minute=60)
+
+
+def test_burst_is_allowed_then_rejected_with_retry_after():
+    store = InMemoryBucketStore()
+    assert store.take("k", LIMIT, now=0.0) == 0.0
+    assert store.take("k", LIMIT, now=0.0) == 0.0
+    assert store.take("k", LIMIT, now=0.0) == pytest.approx(1.0)
+
+
+def test_tokens_refill_over_time():
+    store = InMemoryBucketStore()
+    store.take("k", LIMIT, now=0.0)
+    store.take("k", LIMIT, now=0.0)
+    # 0.5秒で0.5トークン補充され、残り0.5秒待つ必要がある
+    assert store.take("k", LIMIT, now=0.5) == pytest.approx(0.5)
+    # 拒否されたリクエストはトークンを消費しない
+    assert store.take("k", LIMIT, now=1.0) == 0.0
+    assert store.take("k", LIMIT, now=1.0) == pytest.approx(1.0)
+
+
+def test_refill_is_capped_at_burst():
+    store = InMemoryBucketStore()
+    store.take("k", LIMIT, now=0.0)
+    results = [store.take("k", LIMIT, now=1000.0) for _ in range(3)]
+    assert results[:2] == [0.0, 0.0]
+    assert results[2] > 0
+
+
+def test_keys_are_independent():
+    store = InMemoryBucketStore()
+    for _ in range(2):
+        store.take("a", LIMIT, now=0.0)
+    assert store.take("a", LIMIT, now=0.0) > 0
+    assert store.take("b", LIMIT, now=0.0) == 0.0
+
+
+def test_prune_drops_idle_buckets_when_full():
+    store = InMemoryBucketStore(max_keys=2)
+    store.take("old", LIMIT, now=0.0)
+    store.take("recent", LIMIT, now=4000.0)
+    store.take("new", LIMIT, now=4000.0)
+    assert set(store._buckets) == {"recent", "new"}
+
+
+def test_form_value_decodes_username():
+    assert _form_value(b"grant_type=password&username=%E5%A4%AA%E9%83%8E+x&password=p", b"username") == "太郎 x"
+    assert _form_value(b"username=&password=p", b"username") is None
+    assert _form_value(b"password=p", b"username") is None
@@ -0,0 +1,86 @@
+# tests/test_recommendations.py
+import pytest
+
+from app.api.projects.recommendations import ProjectRecommender
+
+# (プロジェクトID, カテゴリーID, 作成者ID)
+PROJECTS = [(1, 10, 100), (2, 10, 100), (3, 20, 101), (4, 20, 102), (5, 30, 7)]
+
+
+def _build(favorites, projects=PROJECTS):
+    recommender = ProjectRecommender()
+    recommender.build_from_arrays([user for user, _ in favorites], [project for _, project in favorites], projects)
+    return recommender
+
+
+def _scores(recommender, user_id, user_favorites, category_id=None):
+    with recommender._lock:
+        return dict(recommender._compute(user_id, user_favorites, category_id))
+
+
+def test_recommends_co_favorited_projects():
+    favorites = [(1, 1), (1, 2), (2, 1), (2, 2), (2, 3), (3, 3), (3, 4)]
+    recommender = _build(favorites)
+    ranked = recommender.recommend_for(7, [1], None)
+    ids = [project_id for project_id, _ in ranked]
+    # 1 と一緒にお気に入りされた 2 が最上位。お気に入り済み（1）と自分のプロジェクト（5）は除く
+    assert ids[0] == 2
+    assert 1 not in ids and 5 not in ids
+    assert ranked[0][1] == pytest.approx(1.0 + 0.05 * 2 / 2)
+
+
+def test_category_boost_for_users_without_favorites():
+    recommender = _build([(1, 3)])
+    ranked = dict(recommender.recommend_for(7, [], 20))
+    assert ranked[3] > ranked[4] > 0
+    assert 1 not in ranked
+
+
+def test_incremental_updates_match_full_rebuild():
+    initial = [(1, 1), (1, 2), (2, 2), (2, 3)]
+    recommender = _build(initial)
+    recommender.add_favorite(3, [1], 1)
+    recommender.add_favorite(3, [1, 3], 3)
+    recommender.remove_favorite(2, [3], 2)
+    recommender.add_favorite(4, [6], 6)  # 構築後に作成されたプロジェクト
+
+    final = [(1, 1), (1, 2), (2, 3), (3, 1), (3, 3), (4, 6)]
+    rebuilt = _build(final, PROJECTS + [(6, None, 103)])
+    for user_favorites in ([1], [3], [2, 6]):
+        expected = _scores(rebuilt, 7, user_favorites)
+        actual = _scores(recommender, 7, user_favorites)
+        assert actual.keys() == expected.keys()
+        for project_id, score in expected.items():
+            assert actual[project_id] == pytest.approx(score)
+
+    # 畳み込み後も同じ結果になる
+    with recommender._lock:
+        recommender._fold_delta()
+    assert _scores(recommender, 7, [1]) == pytest.approx(_scores(rebuilt, 7, [1]))
+
+
+def test_changes_during_rebuild_are_replayed():
+    recommender = _build([(1, 1), (1, 2)])
+    snapshot = [(1, 1), (1, 2), (2, 2)]
+    # 再構築のための読み込みの後に、ユーザー2がお気に入りを追加し、ユーザー1が削除した
+    recommender._rebuild_favorites = {}
+    recommender._rebuild_projects = {}
+    recommender.add_favorite(2, [2, 3], 3)
+    recommender.remove_favorite(1, [1], 2)
+    recommender.on_project_saved(4, 30, 100)
+    recommender.build_from_arrays([user for user, _ in snapshot], [project for _, project in snapshot], PROJECTS[:3])
+
+    latest = _build([(1, 1), (2, 2), (2, 3)], PROJECTS[:3] + [(4, 30, 100)])
+    assert recommender._rebuild_favorites is None
+    for user_favorites in ([2], [1], [3]):
+        assert _scores(recommender, 7, user_favorites) == pytest.approx(_scores(latest, 7, user_favorites))
+    assert _scores(recommender, 7, [], 30) == pytest.approx(_scores(latest, 7, [], 30))
+
+
+def test_cached_recommendations_are_recomputed_on_favorite_change():
+    recommender = _build([(1, 1), (1, 2), (2, 1), (2, 3)])
+    first = recommender.recommend_for(7, [1], None)
+    assert recommender.recommend_for(7, [1], None) is first
+    recommender.add_favorite(7, [1, 2], 2)
+    ids = [project_id for project_id, _ in recommender.recommend_for(7, [1, 2], None)]
+    assert 2 not in ids
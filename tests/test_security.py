@@ -0,0 +1,38 @@
+# tests/test_security.py
+from passlib.hash import bcrypt
+
+from app.api.auth.jwt import authenticate_user
+from app.api.users.models import User
+from app.core import security
+
+
+def test_hash_and_verify_on_worker_pool(run):
+    hashed = run(security.get_password_hash_async("secret"))
+    assert hashed.startswith("$2b$")
+    assert run(security.verify_and_update_password_async("secret", hashed)) == (True, None)
+    assert run(security.verify_and_update_password_async("wrong", hashed)) == (False, None)
+
+
+def test_dummy_hash_never_matches(run):
+    verified, _ = security.verify_and_update_password("", security._DUMMY_PASSWORD_HASH)
+    assert verified is False
+    assert run(security.verify_dummy_password_async("admin")) is None
+
+
+def test_plaintext_and_low_cost_hashes_are_upgraded_on_login(db, run):
+    db.add_all([
+        User(user_id=1, name="legacy", password="secret"),
+        User(user_id=2, name="cheap", password=bcrypt.using(rounds=4).hash("secret")),
+    ])
+    db.commit()
+
+    assert run(authenticate_user(db, "legacy", "wrong")) is None
+    assert db.get(User, 1).password == "secret"
+    for user_id, name in ((1, "legacy"), (2, "cheap")):
+        user = run(authenticate_user(db, name, "secret"))
+        assert user.user_id == user_id
+        db.expire_all()
+        stored = db.get(User, user_id).password
+        assert bcrypt.from_string(stored).rounds == security.settings.PASSWORD_HASH_ROUNDS
+        assert security.verify_password("secret", stored)
+    assert run(authenticate_user(db, "nobody", "secret")) is None
@@ -0,0 +1,97 @@
+# tests/test_sessions.py
+from datetime import datetime, timedelta
+
+from app.api.auth import sessions
+from app.api.auth.models import AuthSession
+
+
+def _revocation_list():
+    return sessions.RevocationList(
+        capacity=100, error_rate=0.001,
+        token_lifetime=timedelta(minutes=30), visibility_lag=timedelta(seconds=5)
+    )
+
+
+def test_rotation_issues_new_refresh_token(db):
+    issued = sessions.create_session(db, user_id=1)
+    user_id, rotated = sessions.rotate_session(db, issued.refresh_token)
+    assert user_id == 1
+    assert rotated.session_id == issued.session_id
+    assert rotated.refresh_token != issued.refresh_token
+    # 新しいリフレッシュトークンで続けて再発行できる
+    assert sessions.rotate_session(db, rotated.refresh_token)[0] == 1
+
+
+def test_replayed_refresh_token_revokes_session(db):
+    issued = sessions.create_session(db, user_id=1)
+    _, rotated = sessions.rotate_session(db, issued.refresh_token)
+
+    # 置き換え済みのトークンの再利用は拒否され、セッションごと失効する
+    assert sessions.rotate_session(db, issued.refresh_token) is None
+    db.expire_all()
+    assert db.get(AuthSession, issued.session_id).revoked_at is not None
+    assert sessions.rotate_session(db, rotated.refresh_token) is None
+    assert sessions.revocation_list.might_be_revoked(issued.session_id)
+
+
+def test_invalid_and_expired_tokens_are_rejected(db):
+    issued = sessions.create_session(db, user_id=1)
+    assert sessions.rotate_session(db, "") is None
+    assert sessions.rotate_session(db, issued.session_id) is None
+    assert sessions.rotate_session(db, "unknown.secret") is None
+
+    db.get(AuthSession, issued.session_id).expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    assert sessions.rotate_session(db, issued.refresh_token) is None
+
+
+def test_revoke_user_sessions_only_touches_active_sessions(db):
+    first = sessions.create_session(db, user_id=1)
+    second = sessions.create_session(db, user_id=1)
+    other = sessions.create_session(db, user_id=2)
+    sessions.revoke_sessions(db, [first.session_id])
+
+    assert sessions.revoke_user_sessions(db, 1) == 1
+    assert sessions.rotate_session(db, second.refresh_token) is None
+    assert sessions.rotate_session(db, other.refresh_token) is not None
+
+
+def test_revocation_list_confirms_filter_hits_in_database(db):
+    revocation_list = _revocation_list()
+    active = sessions.create_session(db, user_id=1)
+    revoked = sessions.create_session(db, user_id=1)
+    sessions.revoke_sessions(db, [revoked.session_id])
+
+    revocation_list.rebuild(db)
+    assert revocation_list.is_revoked(db, revoked.session_id)
+    assert not revocation_list.is_revoked(db, active.session_id)
+    assert not revocation_list.might_be_revoked(active.session_id)
+
+
+def test_revocation_list_rebuild_keeps_local_revocations_and_drops_old_ones(db):
+    revocation_list = _revocation_list()
+    old = sessions.create_session(db, user_id=1)
+    db.get(AuthSession, old.session_id).revoked_at = datetime.utcnow() - timedelta(hours=1)
+    db.commit()
+    revocation_list.rebuild(db)
+    # アクセストークンの有効期間を過ぎた失効はフィルタに含めない
+    assert not revocation_list.might_be_revoked(old.session_id)
+
+    # 他のワーカーからはまだ見えない失効（このプロセスで失効させたもの）も作り直し後に残る
+    revocation_list.add(["revoked-here"])
+    revocation_list.rebuild(db)
+    assert revocation_list.might_be_revoked("revoked-here")
+
+
+def test_forged_refresh_token_does_not_revoke_session(db):
+    issued = sessions.create_session(db, user_id=1)
+    # セッションIDはアクセストークンの sid クレームから誰でも読める
+    assert sessions.rotate_session(db, f"{issued.session_id}.garbage") is None
+    db.expire_all()
+    assert db.get(AuthSession, issued.session_id).revoked_at is None
+    assert sessions.rotate_session(db, issued.refresh_token) is not None
+
+    # 再発行後も、直前のトークン以外の不一致では失効させない
+    _, rotated = sessions.rotate_session(db, sessions.create_session(db, user_id=1).refresh_token)
+    assert sessions.rotate_session(db, f"{rotated.session_id}.garbage") is None
+    assert sessions.rotate_session(db, rotated.refresh_token) is not None
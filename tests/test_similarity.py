@@ -0,0 +1,76 @@
+# tests/test_similarity.py
+import numpy as np
+
+from app.api.troubles.similarity import TroubleSimilarityIndex, _shingles, normalize_text
+
+ROWS = [
+    (1, 10, "ログイン画面でパスワードを入力してもエラーが表示されてログインできません"),
+    (2, 10, "データベースの接続がタイムアウトして保存に失敗します"),
+    (3, 20, "ゲームのキャラクターデザインについて意見がほしいです"),
+]
+
+
+def _index(rows=ROWS):
+    index = TroubleSimilarityIndex()
+    index.build_from_rows(rows)
+    return index
+
+
+def test_normalize_text():
+    assert normalize_text("ＡＢＣ　 ｄｅｆ\n") == "abc def"
+    assert normalize_text(None) == ""
+
+
+def test_similar_ranks_closest_description_first():
+    index = _index()
+    results = index.similar(None, "パスワードを入力してもログインできない")
+    assert results[0].trouble_id == 1
+    assert results[0].project_id == 10
+    assert all(result.trouble_id != 3 for result in results)
+    assert index.similar(None, "パスワードを入力してもログインできない", exclude_id=1)[:1] != results[:1]
+    assert index.similar(None, "") == []
+
+
+def test_find_duplicates_detects_near_copies_only():
+    index = _index()
+    duplicates = index.find_duplicates(None, "ログイン画面でパスワードを入力してもエラーが表示されてログインできません。")
+    assert [result.trouble_id for result in duplicates] == [1]
+    assert duplicates[0].similarity >= 0.7
+    assert index.find_duplicates(None, "まったく関係のない新しい質問の本文です") == []
+
+
+def test_batch_signatures_match_single_signatures():
+    index = TroubleSimilarityIndex()
+    shingle_sets = [_shingles(normalize_text(text)) for _, _, text in ROWS] + [_shingles("")]
+    for batch, single in zip(index._signatures_batch(shingle_sets, chunk_size=2), shingle_sets):
+        assert np.array_equal(batch, index._signature(single))
+
+
+def test_incremental_add_update_and_remove():
+    index = _index()
+    index.add(4, 30, "サーバーのメモリ使用量が増え続けて落ちてしまいます")
+    assert index.similar(None, "メモリ使用量が増え続ける")[0].trouble_id == 4
+    assert [result.trouble_id for result in index.find_duplicates(None, "サーバーのメモリ使用量が増え続けて落ちてしまいます")] == [4]
+
+    # 説明文の更新は古い内容を置き換える
+    index.add(1, 10, "デザインの配色について相談したいです")
+    assert all(result.trouble_id != 1 for result in index.find_duplicates(None, ROWS[0][2]))
+
+    index.remove(2)
+    index.remove(4)
+    assert all(result.trouble_id not in (2, 4) for result in index.similar(None, "データベースの接続がタイムアウト"))
+    assert index.find_duplicates(None, "サーバーのメモリ使用量が増え続けて落ちてしまいます") == []
+
+
+def test_changes_during_build_are_replayed(db):
+    index = TroubleSimilarityIndex()
+    build_from_rows = index.build_from_rows
+
+    def build_with_concurrent_changes(rows):
+        build_from_rows(rows)
+        # 読み込み後・構築完了前に行われた変更
+        index.add(5, 40, "構築中に作成されたお困りごとの説明です")
+
+    index.build_from_rows = build_with_concurrent_changes
+    index.build(db)
+    assert index.similar(None, "構築中に作成されたお困りごと")[0].trouble_id == 5
@@ -0,0 +1,53 @@
+# tests/test_startup.py
+import argparse
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import manage
+from app.api.users.models import User
+from app.application import create_app
+from app.core import database
+from app.core.security import verify_password
+
+
+def test_create_app_does_not_touch_database():
+    connections = []
+
+    def on_connect(dbapi_connection, connection_record):
+        connections.append(dbapi_connection)
+
+    event.listen(database.engine, "connect", on_connect)
+    try:
+        app = create_app()
+        # 起動処理（startup イベント）を実行せずにリクエストを処理できる
+        response = TestClient(app).get("/")
+    finally:
+        event.remove(database.engine, "connect", on_connect)
+    assert response.status_code == 200
+    assert connections == []
+    paths = {route.path for route in app.routes}
+    assert {"/token", "/healthz", "/readyz", "/api/v1/troubles/"} <= paths
+
+
+def test_seed_creates_admin_once_with_generated_password(db, monkeypatch, session_factory, capsys):
+    monkeypatch.setattr(database, "SessionLocal", session_factory)
+    manage.seed(argparse.Namespace(admin_password=None))
+    output = capsys.readouterr().out
+    password = output.rsplit(": ", 1)[1].strip()
+    admin = db.get(User, 1)
+    assert admin.name == "admin"
+    assert password != "admin123" and len(password) >= 16
+    assert verify_password(password, admin.password)
+
+    manage.seed(argparse.Namespace(admin_password="other"))
+    assert "作成済み" in capsys.readouterr().out
+    db.expire_all()
+    assert verify_password(password, db.get(User, 1).password)
+
+
+def test_seed_uses_given_password_without_printing_it(db, monkeypatch, session_factory, capsys):
+    monkeypatch.setattr(database, "SessionLocal", session_factory)
+    manage.seed(argparse.Namespace(admin_password="given-password"))
+    assert "given-password" not in capsys.readouterr().out
+    assert verify_password("given-password", db.get(User, 1).password)
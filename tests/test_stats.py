@@ -0,0 +1,49 @@
+# tests/test_stats.py
+from app.api.projects import stats
+from app.api.projects.models import CoCreationProject
+from app.api.troubles.models import Trouble
+
+
+def test_trouble_changes_keep_rollup_in_sync(db):
+    stats.record_trouble_change(db, 1, None, (3, None))
+    stats.record_trouble_change(db, 1, None, (3, "未解決"))
+    stats.record_trouble_change(db, 1, None, (4, "解決"))
+    # 状態の変更は旧キーを減らして新キーを増やす
+    stats.record_trouble_change(db, 1, (3, None), (3, "解決"))
+    # 変更がなければ何もしない
+    stats.record_trouble_change(db, 1, (4, "解決"), (4, "解決"))
+    stats.record_trouble_change(db, 1, (4, "解決"), None)
+    db.commit()
+    assert sorted(stats.get_project_trouble_stats(db, 1)) == [(3, "未解決", 1), (3, "解決", 1)]
+    assert stats.get_project_trouble_stats(db, 2) == []
+
+
+def test_project_changes_and_bulk_counts(db):
+    stats.record_project_change(db, None, 5, created=True)
+    stats.record_project_change(db, None, None, created=True)
+    stats.record_project_change(db, 5, 6)
+    stats.add_project_counts(db, {6: 2, None: 1})
+    stats.add_trouble_counts(db, {(1, 3, None): 2, (1, 3, "未解決"): 1})
+    db.commit()
+    assert sorted(stats.get_category_project_counts(db)) == [(stats.UNCATEGORIZED, 2), (6, 3)]
+    assert stats.get_project_trouble_stats(db, 1) == [(3, "未解決", 3)]
+
+
+def test_rebuild_matches_source_tables(db):
+    db.add_all([
+        CoCreationProject(project_id=1, title="a", description="a", creator_user_id=1, category_id=5),
+        CoCreationProject(project_id=2, title="b", description="b", creator_user_id=1),
+        Trouble(trouble_id=1, description="a", category_id=3, project_id=1, creator_user_id=1, status=None),
+        Trouble(trouble_id=2, description="b", category_id=3, project_id=1, creator_user_id=1, status="未解決"),
+        Trouble(trouble_id=3, description="c", category_id=4, project_id=1, creator_user_id=1, status="解決"),
+    ])
+    db.commit()
+    # ずれた集計値は作り直しで上書きされる
+    stats.add_trouble_counts(db, {(1, 3, None): 10})
+    db.commit()
+    db.query(Trouble).filter(Trouble.trouble_id == 1).update({Trouble.status: None})
+    db.commit()
+
+    assert stats.rebuild_stats(db) == (2, 2)
+    assert sorted(stats.get_project_trouble_stats(db, 1)) == [(3, "未解決", 2), (4, "解決", 1)]
+    assert sorted(stats.get_category_project_counts(db)) == [(stats.UNCATEGORIZED, 1), (5, 1)]
@@ -0,0 +1,99 @@
+# tests/test_sync.py
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.api.projects.models import CoCreationProject, UserProjectFavorite
+from app.api.sync import changelog
+from app.api.sync.models import ChangeLogEntry
+from app.api.sync.router import sync_changes
+
+
+def _log(db, entity_type, entity_id, operation=changelog.UPSERT, user_id=None, age=timedelta(minutes=1)):
+    db.add(ChangeLogEntry(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        operation=operation,
+        user_id=user_id,
+        changed_at=datetime.utcnow() - age
+    ))
+    db.commit()
+
+
+def test_paging_returns_every_change_once(db):
+    for entity_id in range(1, 8):
+        _log(db, changelog.TROUBLE, entity_id)
+    _log(db, changelog.TROUBLE, 2, changelog.DELETE)
+    # 他のユーザーのお気に入りは返さない
+    _log(db, changelog.FAVORITE, 5, user_id=2)
+
+    seen = []
+    token, has_more = 0, True
+    while has_more:
+        changes, next_token, has_more = changelog.read_changes(db, token, 1, 3)
+        assert next_token > token or not changes
+        seen.extend(changes.items())
+        token = next_token
+    # トークンは自分に配信される最後の変更まで進む
+    assert token == 8
+    assert [key[1] for key, _ in seen] == [1, 2, 3, 4, 5, 6, 7, 2]
+    assert seen[-1] == ((changelog.TROUBLE, 2), changelog.DELETE)
+    assert changelog.read_changes(db, token, 1, 3) == ({}, token, False)
+
+
+def test_same_entity_collapses_to_last_operation(db):
+    _log(db, changelog.MESSAGE, 1)
+    _log(db, changelog.MESSAGE, 2)
+    _log(db, changelog.MESSAGE, 1, changelog.DELETE)
+    changes, next_token, has_more = changelog.read_changes(db, 0, 1, 10)
+    assert list(changes.items()) == [((changelog.MESSAGE, 2), changelog.UPSERT), ((changelog.MESSAGE, 1), changelog.DELETE)]
+    assert (next_token, has_more) == (3, False)
+
+
+def test_recent_changes_do_not_advance_token(db):
+    _log(db, changelog.PROJECT, 1)
+    _log(db, changelog.PROJECT, 2, age=timedelta(0))
+    changes, next_token, _ = changelog.read_changes(db, 0, 1, 10)
+    # 直近の変更も返すが、トークンは進めずに次回も返す
+    assert list(changes) == [(changelog.PROJECT, 1), (changelog.PROJECT, 2)]
+    assert next_token == 1
+    assert list(changelog.read_changes(db, next_token, 1, 10)[0]) == [(changelog.PROJECT, 2)]
+
+    # 1ページすべてが直近の変更の場合は先に進める
+    _log(db, changelog.PROJECT, 3, age=timedelta(0))
+    changes, next_token, has_more = changelog.read_changes(db, 1, 1, 1)
+    assert (next_token, has_more) == (2, True)
+
+
+def test_prune_advances_watermark_and_requires_resync(db):
+    for entity_id in range(1, 5):
+        _log(db, changelog.TROUBLE, entity_id, age=timedelta(days=10))
+    _log(db, changelog.TROUBLE, 5)
+    assert changelog.prune(db, retention_days=7, batch_size=3) == 4
+    assert changelog.get_watermark(db) == 4
+    assert changelog.prune(db, retention_days=7) == 0
+
+    user = SimpleNamespace(user_id=1)
+    response = sync_changes(since=2, limit=10, db=db, current_user=user)
+    assert response.resync_required is True
+    assert response.next_token == 5
+    response = sync_changes(since=4, limit=10, db=db, current_user=user)
+    assert response.resync_required is False
+    # 変更後に削除されたエンティティは削除として返す
+    assert response.deleted.troubles == [5]
+
+
+def test_sync_returns_current_rows_and_favorite_state(db):
+    db.add(CoCreationProject(project_id=1, title="a", description="a", creator_user_id=1))
+    db.add(UserProjectFavorite(user_id=1, project_id=1))
+    db.commit()
+    _log(db, changelog.PROJECT, 1)
+    _log(db, changelog.PROJECT, 2, changelog.DELETE)
+    _log(db, changelog.FAVORITE, 1, user_id=1)
+    _log(db, changelog.FAVORITE, 3, user_id=1)
+
+    response = sync_changes(since=0, limit=10, db=db, current_user=SimpleNamespace(user_id=1))
+    assert [project.project_id for project in response.projects] == [1]
+    assert response.deleted.projects == [2]
+    assert response.favorites_added == [1]
+    assert response.favorites_removed == [3]
+    assert response.next_token == 4
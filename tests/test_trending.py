@@ -0,0 +1,112 @@
+# tests/test_trending.py
+import time
+
+import pytest
+
+from app.api.projects import trending
+from app.api.projects.models import CoCreationProject, ProjectTrendingScore
+from app.api.projects.trending import FAVORITE_WEIGHT, MESSAGE_WEIGHT, TROUBLE_WEIGHT, TrendingTracker
+from app.api.troubles.models import Trouble
+
+HALF_LIFE_SECONDS = 3600
+
+
+@pytest.fixture
+def shared_db(session_factory, monkeypatch):
+    """スナップショットが使うセッションをテスト用のDBに向ける"""
+    monkeypatch.setattr(trending, "SessionLocal", session_factory)
+    return session_factory
+
+
+def test_scores_decay_with_half_life():
+    tracker = TrendingTracker(half_life_hours=1)
+    now = time.time()
+    tracker.record(1, 4.0, at=now - HALF_LIFE_SECONDS)
+    tracker.record(2, 1.0, at=now)
+    scores = tracker.current_scores()
+    assert scores[1] == pytest.approx(2.0, rel=1e-3)
+    assert scores[2] == pytest.approx(1.0, rel=1e-3)
+
+
+def test_rebase_keeps_relative_scores():
+    tracker = TrendingTracker(half_life_hours=1)
+    now = time.time()
+    tracker.record(1, 1.0, at=now)
+    # 基準時刻から大きく離れたイベントで基準時刻を移す
+    later = now + HALF_LIFE_SECONDS * 100
+    tracker.record(2, 1.0, at=later)
+    assert tracker._reference_time == later
+    assert 1 not in tracker._scores  # 減衰しきったスコアは破棄する
+    assert tracker._pending[2] == pytest.approx(1.0)
+
+
+def test_top_orders_by_score_with_offset(db):
+    db.add(ProjectTrendingScore(project_id=99, score=0.0, updated_at=trending.datetime.utcnow()))
+    db.commit()
+    tracker = TrendingTracker(half_life_hours=24)
+    tracker.record_message(1)
+    tracker.record_trouble(2)
+    tracker.record_favorite(3)
+    tracker.forget(1)
+    ranked = tracker.top(db, limit=5)
+    assert [project_id for project_id, _ in ranked] == [3, 2]
+    assert ranked[0][1] == pytest.approx(FAVORITE_WEIGHT, rel=1e-3)
+    assert [project_id for project_id, _ in tracker.top(db, limit=5, offset=1)] == [2]
+
+
+def test_workers_merge_scores_through_shared_table(shared_db):
+    worker_a = TrendingTracker(half_life_hours=24)
+    worker_b = TrendingTracker(half_life_hours=24)
+    db = shared_db()
+    worker_a.ensure_loaded(db)
+    worker_b.ensure_loaded(db)
+
+    worker_a.record_favorite(1)
+    worker_b.record_favorite(1)
+    worker_b.record_message(2)
+    worker_a.snapshot()
+    worker_b.snapshot()
+    worker_a.snapshot()
+
+    expected = {1: 2 * FAVORITE_WEIGHT, 2: MESSAGE_WEIGHT}
+    for worker in (worker_a, worker_b):
+        scores = worker.current_scores()
+        assert set(scores) == set(expected)
+        for project_id, value in expected.items():
+            assert scores[project_id] == pytest.approx(value, rel=1e-3)
+    # 増分は一度だけ加算される
+    stored = dict(db.query(ProjectTrendingScore.project_id, ProjectTrendingScore.score).all())
+    assert stored[1] == pytest.approx(2 * FAVORITE_WEIGHT, rel=1e-3)
+
+
+def test_failed_snapshot_keeps_pending_increments(shared_db):
+    tracker = TrendingTracker(half_life_hours=24)
+    tracker.ensure_loaded(shared_db())
+    tracker.record_trouble(1)
+
+    def fail(db, deltas):
+        raise RuntimeError("write failed")
+
+    tracker._save_pending = fail
+    with pytest.raises(RuntimeError):
+        tracker.snapshot()
+    assert tracker._pending[1] == pytest.approx(TROUBLE_WEIGHT, rel=1e-3)
+
+    del tracker._save_pending
+    tracker.snapshot()
+    assert not tracker._pending
+    db = shared_db()
+    assert db.query(ProjectTrendingScore.score).filter_by(project_id=1).scalar() == pytest.approx(TROUBLE_WEIGHT, rel=1e-3)
+
+
+def test_bootstrap_from_recent_activity_when_table_is_empty(db):
+    project = CoCreationProject(title="p", description="プロジェクトの説明です", creator_user_id=1)
+    db.add(project)
+    db.flush()
+    db.add(Trouble(description="最近のお困りごと", category_id=1, project_id=project.project_id, creator_user_id=1, created_at=trending.datetime.now()))
+    db.commit()
+
+    tracker = TrendingTracker(half_life_hours=24)
+    tracker.ensure_loaded(db)
+    assert tracker.current_scores()[project.project_id] == pytest.approx(TROUBLE_WEIGHT, rel=1e-2)
+    assert db.query(ProjectTrendingScore).count() == 1
@@ -0,0 +1,65 @@
+# tests/test_user_directory.py
+import time
+
+from app.api.users.directory import UserDirectory, build_user_card
+from app.api.users.models import User
+
+
+def _user(db, name, points=0):
+    user = User(name=name, password="x", point_total=points)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_build_user_card():
+    assert build_user_card(1, "太郎", None) == (1, "太郎", "太", 0)
+    assert build_user_card(2, "", 5).avatar == "不"
+
+
+def test_get_many_loads_missing_users_in_one_query(db):
+    alice = _user(db, "alice", 3)
+    bob = _user(db, "bob")
+    directory = UserDirectory()
+    cards = directory.get_many(db, [alice.user_id, bob.user_id, None, 999])
+    assert set(cards) == {alice.user_id, bob.user_id}
+    assert cards[alice.user_id].points == 3
+
+    # キャッシュ済みのユーザーはDBにアクセスしない
+    db.query(User).filter(User.user_id == alice.user_id).update({User.name: "renamed"})
+    db.commit()
+    assert directory.get(db, alice.user_id).name == "alice"
+    directory.invalidate(alice.user_id)
+    assert directory.get(db, alice.user_id).name == "renamed"
+
+
+def test_changes_from_other_workers_are_seen_after_ttl(db):
+    user = _user(db, "carol", 1)
+    directory = UserDirectory(ttl_seconds=0.05)
+    assert directory.get(db, user.user_id).points == 1
+
+    # 他のワーカーでの invalidate はこのプロセスに届かない
+    db.query(User).filter(User.user_id == user.user_id).update({User.point_total: 10})
+    db.commit()
+    assert directory.get(db, user.user_id).points == 1
+    time.sleep(0.06)
+    assert directory.get(db, user.user_id).points == 10
+
+
+def test_deleted_user_drops_expired_entry(db):
+    user = _user(db, "dave")
+    directory = UserDirectory(ttl_seconds=0.01)
+    directory.get(db, user.user_id)
+    db.delete(user)
+    db.commit()
+    time.sleep(0.02)
+    assert directory.get(db, user.user_id) is None
+    assert user.user_id not in directory._cards
+
+
+def test_max_size_evicts_least_recently_used(db):
+    users = [_user(db, f"user-{index}") for index in range(3)]
+    directory = UserDirectory(max_size=2)
+    for user in users:
+        directory.get(db, user.user_id)
+    assert list(directory._cards) == [users[1].user_id, users[2].user_id]
@@ -0,0 +1,85 @@
+# tests/test_warmup.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.monitoring.router import router as monitoring_router
+from app.core import warmup
+from app.core.config import settings
+
+
+@pytest.fixture
+def steps(monkeypatch, session_factory):
+    """登録済みの準備処理を置き換え、テスト用の処理だけを実行する"""
+    monkeypatch.setattr(warmup, "_steps", [])
+    monkeypatch.setattr(warmup, "_started_at", None)
+    monkeypatch.setattr(warmup, "_finished_at", None)
+    monkeypatch.setattr(warmup, "SessionLocal", session_factory)
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", True)
+    return warmup._steps
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(monitoring_router)
+    return TestClient(app)
+
+
+def test_readyz_reports_not_ready_until_warmup_completes(steps, client):
+    calls = []
+
+    def flaky(db):
+        calls.append(db)
+        if len(calls) == 1:
+            raise ConnectionError("まだ接続できません")
+
+    warmup.register_warmup("cache", lambda db: None)
+    warmup.register_warmup("index", flaky)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming_up"
+
+    # 再実行の指定がなければ失敗したまま戻る
+    warmup.run_warmup()
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    report = response.json()
+    assert report["status"] == "failed"
+    assert [(step["name"], step["status"]) for step in report["steps"]] == [("cache", "done"), ("index", "failed")]
+    assert report["steps"][1]["error"] == "まだ接続できません"
+
+    # 失敗した処理だけを再実行する
+    warmup.run_warmup(retry_interval=0)
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    report = response.json()
+    assert report["status"] == "ready"
+    assert [step["attempts"] for step in report["steps"]] == [1, 2]
+    assert report["steps"][1]["error"] is None
+    assert report["total_ms"] is not None
+    assert "database_circuit" in report
+    # 各処理には新しいセッションを渡す
+    assert calls[0] is not calls[1]
+
+
+def test_retry_until_all_steps_succeed(steps):
+    attempts = []
+
+    def fails_twice(db):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("failed")
+
+    step = warmup.register_warmup("index", fails_twice)
+    warmup.run_warmup(retry_interval=0)
+    assert (step.status, step.attempts) == (warmup.STATUS_DONE, 3)
+    assert warmup.is_ready()
+
+
+def test_healthz_and_disabled_warmup(steps, client, monkeypatch):
+    warmup.register_warmup("never-run", lambda db: None)
+    assert client.get("/healthz").json() == {"status": "ok"}
+    assert client.get("/readyz").status_code == 503
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", False)
+    assert client.get("/readyz").status_code == 200
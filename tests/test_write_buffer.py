@@ -0,0 +1,127 @@
+# tests/test_write_buffer.py
+from datetime import datetime
+import threading
+import time
+
+import pytest
+
+from app.api.messages.models import Message
+from app.api.messages.write_buffer import MessageWriteBuffer
+
+
+def _buffer(session_factory, result_timeout_seconds=2.0):
+    buffer = MessageWriteBuffer(
+        enabled=True, max_delay_seconds=0.01, max_batch=10, queue_size=100,
+        result_timeout_seconds=result_timeout_seconds, session_factory=session_factory
+    )
+    buffer.start()
+    return buffer
+
+
+def _row(content="hello"):
+    return {"content": content, "sender_user_id": 1, "trouble_id": 1, "parent_message_id": None, "sent_at": datetime.now()}
+
+
+def _noop(session, message_id):
+    pass
+
+
+def test_concurrent_submits_get_their_own_ids(session_factory):
+    buffer = _buffer(session_factory)
+    results = {}
+
+    def submit(index):
+        results[index] = buffer.submit(_row(f"message-{index}"), _noop)
+
+    try:
+        threads = [threading.Thread(target=submit, args=(index,)) for index in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        buffer.stop()
+
+    db = session_factory()
+    contents = dict(db.query(Message.message_id, Message.content).all())
+    assert len(contents) == 20
+    assert all(contents[results[index]] == f"message-{index}" for index in range(20))
+
+
+def test_failing_session_factory_fails_writes_instead_of_hanging(session_factory):
+    calls = []
+
+    def failing_factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("database is gone")
+        return session_factory()
+
+    buffer = _buffer(failing_factory)
+    try:
+        with pytest.raises(ConnectionError):
+            buffer.submit(_row(), _noop)
+        # ワーカーは止まらず、次の書き込みは登録される
+        assert buffer.active
+        assert buffer.submit(_row(), _noop) is not None
+    finally:
+        buffer.stop()
+
+
+def test_failing_rollback_fails_writes_instead_of_hanging(session_factory):
+    class BrokenSession:
+        def __init__(self):
+            self.session = session_factory()
+
+        def __getattr__(self, name):
+            return getattr(self.session, name)
+
+        def rollback(self):
+            raise ConnectionError("lost connection during rollback")
+
+    def failing_insert(session, message_id):
+        raise RuntimeError("after_insert failed")
+
+    buffer = _buffer(BrokenSession)
+    try:
+        with pytest.raises(ConnectionError):
+            buffer.submit(_row(), failing_insert)
+        assert buffer.active
+    finally:
+        buffer.stop()
+
+
+def test_running_write_that_never_finishes_times_out(session_factory):
+    release = threading.Event()
+
+    def slow_insert(session, message_id):
+        release.wait(5)
+
+    buffer = _buffer(session_factory, result_timeout_seconds=0.05)
+    try:
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            buffer.submit(_row(), slow_insert)
+        # 取り消せない書き込みも上限（2回分の待ち時間）を超えて待たない
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+        buffer.stop()
+
+
+def test_crashed_worker_stops_accepting_writes(session_factory):
+    buffer = _buffer(session_factory)
+
+    def crash(batch):
+        raise SystemExit("worker crashed")
+
+    buffer._flush = crash
+    try:
+        with pytest.raises(SystemExit):
+            buffer.submit(_row(), _noop)
+        buffer._thread.join(1)
+        # 受け付けを止め、呼び出し元に直接 INSERT させる
+        assert not buffer.active
+        assert buffer.submit(_row(), _noop) is None
+    finally:
+        buffer.stop()